@@ -9,6 +9,7 @@ from datetime import datetime
 from typing import Optional, Dict, Any
 
 from db_path_manager import get_db_path_manager
+from db_storage_profile import connect_database
 
 _lock = threading.Lock()
 
@@ -25,12 +26,11 @@ class AccountInfoDB:
     数据库存放路径：DatabasePathManager.get_config_db_path()
     表：accounts_self
     """
-    def __init__(self, db_path: Optional[str] = None):
+    def __init__(self, db_path: Optional[str] = None, storage_profile: Optional[str] = None):
         pm = get_db_path_manager()
         self.db_path = db_path or pm.get_config_db_path()
         _ensure_dir(self.db_path)
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn = connect_database(self.db_path, storage_profile)
         self.conn.execute("PRAGMA foreign_keys=ON;")
         self.cursor = self.conn.cursor()
         self._ensure_schema()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按内容寻址的文件存储（可选）
+开启后，下载完成的文件按文件列表中的 hash 保存一份到共享存储（output/blobs/{hash前两位}/{hash}），
+各群组 downloads 目录中的文件是指向它的硬链接（或符号链接）。
+同一文件在其他话题或群组中再次出现时，直接在下载目录创建链接，不再获取下载链接和传输内容。
+hash 相同但大小不同的文件不视为重复。
+
+用法:
+    python blob_store.py stats
+    python blob_store.py ingest <group_id>   # 把已下载的文件加入共享存储
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from typing import Dict, Any, Optional
+
+from db_path_manager import get_db_path_manager
+
+LINK_MODES = ('hardlink', 'symlink')
+
+
+class BlobStore:
+    """共享文件存储（线程安全：写入先落到临时文件再原子替换）"""
+
+    def __init__(self, root: str, link_mode: str = 'hardlink'):
+        """
+        Args:
+            root: 存储目录
+            link_mode: 下载目录中创建的链接类型，hardlink 或 symlink；
+                       无法创建时依次退回符号链接、复制
+        """
+        self.root = root
+        self.link_mode = link_mode
+
+    def blob_path(self, file_hash: str) -> Optional[str]:
+        """hash 对应的存储路径；hash 含路径字符等无法作为文件名时返回 None"""
+        file_hash = str(file_hash or '')
+        if len(file_hash) < 4 or not all(c.isalnum() or c in '-_' for c in file_hash):
+            return None
+        return os.path.join(self.root, file_hash[:2], file_hash)
+
+    def lookup(self, file_hash: str, size: int) -> Optional[str]:
+        """已存储且大小一致时返回存储路径"""
+        path = self.blob_path(file_hash)
+        if path and os.path.isfile(path) and (not size or os.path.getsize(path) == size):
+            return path
+        return None
+
+    def link_view(self, file_hash: str, size: int, target_path: str) -> Optional[str]:
+        """
+        在下载目录中创建指向已存储文件的链接（覆盖同名的旧文件）
+
+        Returns:
+            使用的方式（hardlink/symlink/copy），未存储该文件时返回 None
+        """
+        blob = self.lookup(file_hash, size)
+        if blob is None:
+            return None
+        if os.path.exists(target_path) and os.path.samefile(blob, target_path):
+            return self.link_mode
+
+        tmp_path = f"{target_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        modes = ('hardlink', 'symlink') if self.link_mode == 'hardlink' else ('symlink',)
+        method = 'copy'
+        for mode in modes:
+            try:
+                if mode == 'hardlink':
+                    os.link(blob, tmp_path)
+                else:
+                    os.symlink(os.path.abspath(blob), tmp_path)
+                method = mode
+                break
+            except OSError:
+                continue
+        if method == 'copy':
+            shutil.copy2(blob, tmp_path)
+        os.replace(tmp_path, target_path)
+        return method
+
+    def ingest(self, file_hash: str, size: int, file_path: str) -> bool:
+        """
+        把下载完成的文件加入存储，并把下载目录中的文件换成链接
+
+        Returns:
+            是否加入（或已在）存储中
+        """
+        path = self.blob_path(file_hash)
+        if path is None or not os.path.isfile(file_path) or os.path.islink(file_path):
+            return False
+        if size and os.path.getsize(file_path) != size:
+            return False
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                os.link(file_path, tmp_path)
+            except OSError:
+                shutil.copy2(file_path, tmp_path)
+            os.replace(tmp_path, path)
+
+        # 以硬链接加入存储时下载目录中的文件与存储已是同一份；只能复制或已有其他下载先存入时换成链接
+        if not os.path.samefile(path, file_path):
+            self.link_view(file_hash, size, file_path)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """已存储的文件数和大小；硬链接的引用数反映了节省的空间"""
+        blobs = total_bytes = saved_bytes = linked_views = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith('.tmp'):
+                    continue
+                st = os.stat(os.path.join(dirpath, name))
+                blobs += 1
+                total_bytes += st.st_size
+                # 除存储本身外的每个链接是一个下载目录中的文件，其中第一份本来就要占用空间
+                views = st.st_nlink - 1
+                linked_views += views
+                saved_bytes += st.st_size * max(0, views - 1)
+        return {
+            'root': self.root,
+            'link_mode': self.link_mode,
+            'blobs': blobs,
+            'bytes': total_bytes,
+            'hardlinked_views': linked_views,
+            'hardlink_bytes_saved': saved_bytes,
+        }
+
+
+# ==================== 全局开关与存储实例 ====================
+
+_settings = {
+    'enabled': os.environ.get('ZSXQ_BLOB_STORE', '').lower() in ('1', 'true', 'yes'),
+    'link_mode': os.environ.get('ZSXQ_BLOB_LINK_MODE', 'hardlink'),
+}
+_blob_store: Optional[BlobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_blob_store_dir() -> str:
+    return os.path.join(os.path.dirname(get_db_path_manager().base_dir), 'blobs')
+
+
+def get_blob_store() -> Optional[BlobStore]:
+    """共享存储开启时返回存储实例，未开启时返回 None"""
+    global _blob_store
+    if not _settings['enabled']:
+        return None
+    with _store_lock:
+        if _blob_store is None:
+            _blob_store = BlobStore(get_blob_store_dir(), _settings['link_mode'])
+        return _blob_store
+
+
+def set_blob_store_settings(enabled: Optional[bool] = None, link_mode: Optional[str] = None):
+    """修改共享存储设置（只影响之后的下载，已创建的链接不变）"""
+    global _blob_store
+    if link_mode is not None and link_mode not in LINK_MODES:
+        raise ValueError(f"不支持的链接方式: {link_mode}")
+    with _store_lock:
+        if enabled is not None:
+            _settings['enabled'] = bool(enabled)
+        if link_mode is not None:
+            _settings['link_mode'] = link_mode
+        _blob_store = None
+
+
+def get_blob_store_settings() -> Dict[str, Any]:
+    return dict(_settings)
+
+
+def ingest_group_downloads(group_id: str, download_dir: Optional[str] = None, log_callback=None) -> Dict[str, int]:
+    """把群组已下载且文件库中有 hash 的文件加入共享存储（按文件名和大小匹配下载目录中的文件）"""
+    log = log_callback or print
+    path_manager = get_db_path_manager()
+    download_dir = download_dir or os.path.join(path_manager.get_group_dir(group_id), 'downloads')
+    store = BlobStore(get_blob_store_dir(), _settings['link_mode'])
+
+    conn = sqlite3.connect(path_manager.get_files_db_path(group_id))
+    try:
+        rows = conn.execute("SELECT file_id, name, hash, size FROM files WHERE hash IS NOT NULL AND hash <> ''").fetchall()
+    finally:
+        conn.close()
+
+    stats = {'files': len(rows), 'ingested': 0, 'deduplicated': 0, 'bytes_saved': 0, 'missing': 0}
+    for file_id, name, file_hash, size in rows:
+        safe_filename = "".join(c for c in (name or '') if c.isalnum() or c in '._-（）()[]{}') or f"file_{file_id}"
+        file_path = os.path.join(download_dir, safe_filename)
+        if not os.path.isfile(file_path) or os.path.islink(file_path) or (size and os.path.getsize(file_path) != size):
+            stats['missing'] += 1
+            continue
+        # 已有其他下载存入同一内容时，本地这份换成链接，空间即被节省
+        duplicate = store.lookup(file_hash, size) is not None and not os.path.samefile(store.blob_path(file_hash), file_path)
+        if store.ingest(file_hash, size, file_path):
+            stats['ingested'] += 1
+            if duplicate:
+                stats['deduplicated'] += 1
+                stats['bytes_saved'] += size or 0
+
+    log(f"♻️ 群组 {group_id} 已加入共享存储 {stats['ingested']} 个文件，"
+        f"其中重复 {stats['deduplicated']} 个，节省 {stats['bytes_saved']/1024/1024:.1f}MB")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='知识星球文件共享存储工具')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('stats', help='查看共享存储统计')
+    ingest_parser = subparsers.add_parser('ingest', help='把群组已下载的文件加入共享存储')
+    ingest_parser.add_argument('group_id')
+    ingest_parser.add_argument('--download-dir', help='下载目录（默认为群组目录下的 downloads）')
+
+    args = parser.parse_args()
+    if args.command == 'stats':
+        print(json.dumps(BlobStore(get_blob_store_dir(), _settings['link_mode']).stats(), ensure_ascii=False, indent=2))
+    elif args.command == 'ingest':
+        ingest_group_downloads(args.group_id, args.download_dir)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+评论补全任务
+话题爬取只把评论不完整的话题登记到 comment_backfill_queue，
+本模块按缺口大小依次获取完整评论，请求间隔独立于话题爬取。
+队列保存在数据库中，任务中断后再次运行即从剩余话题继续。
+"""
+
+import random
+from typing import Dict, Any, Optional, Tuple
+
+
+class CommentBackfillWorker:
+    """评论补全队列的消费者（每个群组同一时间只应运行一个）"""
+
+    def __init__(self, crawler, topic_interval: Tuple[float, float] = (2.0, 5.0),
+                 page_interval: float = 1.0, batch_size: int = 20):
+        """
+        Args:
+            crawler: ZSXQInteractiveCrawler 实例（使用其会话、数据库、日志和停止标志）
+            topic_interval: 两个话题之间的随机等待区间（秒）
+            page_interval: 同一话题评论翻页间隔（秒）
+            batch_size: 每次从队列取出的话题数
+        """
+        self.crawler = crawler
+        self.db = crawler.db
+        self.topic_interval = topic_interval
+        self.page_interval = page_interval
+        self.batch_size = batch_size
+
+    def run(self, max_topics: Optional[int] = None) -> Dict[str, Any]:
+        """
+        持续消费队列直到队列为空、达到 max_topics 或任务停止
+
+        Returns:
+            {'processed_topics', 'completed_topics', 'skipped_topics', 'failed_topics', 'imported_comments'}
+        """
+        stats = {'processed_topics': 0, 'completed_topics': 0, 'skipped_topics': 0,
+                 'failed_topics': 0, 'imported_comments': 0}
+
+        status = self.db.get_comment_backfill_status()
+        self.crawler.log(f"💬 评论补全队列: {status['pending_topics']} 个话题待补全，"
+                         f"约缺 {status['missing_comments']} 条评论")
+
+        while not self.crawler.is_stopped():
+            if max_topics is not None and stats['processed_topics'] >= max_topics:
+                break
+
+            items = self.db.claim_comment_backfill(self.batch_size)
+            if not items:
+                self.crawler.log("✅ 评论补全队列已清空")
+                break
+
+            for item in items:
+                if self.crawler.is_stopped():
+                    break
+                if max_topics is not None and stats['processed_topics'] >= max_topics:
+                    break
+
+                stats['processed_topics'] += 1
+                self._process(item, stats)
+
+        self.crawler.log(f"📊 评论补全: 完成 {stats['completed_topics']} 个话题，导入 {stats['imported_comments']} 条评论，"
+                         f"跳过 {stats['skipped_topics']}，失败 {stats['failed_topics']}")
+        return stats
+
+    def _process(self, item: Dict[str, Any], stats: Dict[str, Any]):
+        topic_id = item['topic_id']
+        expected_count = item['expected_count']
+
+        # 登记后评论可能已被其他途径补全（如手动获取），已完整的直接出队
+        stored_count = self.db.get_stored_comment_count(topic_id)
+        if stored_count >= expected_count:
+            self.db.complete_comment_backfill(topic_id)
+            self.db.conn.commit()
+            stats['skipped_topics'] += 1
+            return
+
+        self.crawler.log(f"📝 话题 {topic_id}: 已有 {stored_count}/{expected_count} 条评论，开始补全")
+        try:
+            comments = self.crawler.fetch_all_comments(topic_id, expected_count, page_delay=self.page_interval)
+        except Exception as e:
+            comments = None
+            error = str(e)
+        else:
+            error = "未获取到评论，可能是权限限制"
+
+        if self.crawler.is_stopped():
+            return  # 中途停止的话题保留在队列中，下次继续
+
+        if comments:
+            self.db.import_additional_comments(topic_id, comments)
+            self.db.complete_comment_backfill(topic_id)
+            self.db.conn.commit()
+            stats['completed_topics'] += 1
+            stats['imported_comments'] += len(comments)
+        else:
+            self.db.fail_comment_backfill(topic_id, error)
+            self.db.conn.commit()
+            stats['failed_topics'] += 1
+            self.crawler.log(f"⚠️ 话题 {topic_id} 评论补全失败: {error}")
+
+        self.crawler._interruptible_sleep(random.uniform(*self.topic_interval))
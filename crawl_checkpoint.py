@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+爬取断点
+每写入一页就把下一页的游标和累计统计保存到 crawl_state 表，
+进程重启或任务停止后，同一模式的下一次爬取从断点继续，而不是根据数据库最老时间重新推算
+（中间留有空洞时推算结果会跳过空洞）。
+"""
+
+from typing import Dict, Any, Optional, Callable
+
+from crawl_coverage import CrawlCoverage
+
+# 可续传的状态：running 表示上次运行异常中断，stopped 表示被用户停止或会员过期
+RESUMABLE_STATUSES = ('running', 'stopped')
+
+
+class CrawlCheckpoint:
+    """单次爬取的断点记录（同步、异步采集器共用）"""
+
+    def __init__(self, db, group_id, mode: str, log=print,
+                 stop_check: Optional[Callable[[], bool]] = None):
+        """
+        Args:
+            db: ZSXQDatabase 实例
+            mode: 爬取模式名（historical / incremental / all_historical / latest_until_complete）
+            stop_check: 任务已停止时返回 True（停止后的页面可能未写入，不保存断点和覆盖区间）
+        """
+        self.db = db
+        self.group_id = group_id
+        self.mode = mode
+        self.log = log
+        self.stop_check = stop_check
+        self.coverage = CrawlCoverage(db, group_id)
+        self.resumed_state: Optional[Dict[str, Any]] = None
+        self.started = False
+        self.interrupted = False  # 爬取因失败提前结束时置为True，结束后保留断点
+
+    def start(self) -> Optional[str]:
+        """开始爬取，存在可续传的断点时返回其游标，否则重置断点并返回None"""
+        self.started = True
+        state = self.db.get_crawl_state(self.group_id, self.mode)
+        resumable = (
+            state is not None
+            and state['status'] in RESUMABLE_STATUSES
+            and state['cursor']
+        )
+
+        if resumable:
+            self.resumed_state = state
+            self.db.begin_crawl_state(self.group_id, self.mode, resume=True)
+            self.log(f"🔁 从断点继续: 已完成 {state['pages']} 页（新增{state['new_topics']}，更新{state['updated_topics']}），"
+                     f"游标 {state['cursor']}")
+            return state['cursor']
+
+        self.db.begin_crawl_state(self.group_id, self.mode)
+        return None
+
+    def page_done(self, cursor: Optional[str], page_stats: Dict[str, int], request_end_time: Optional[str]):
+        """
+        一页数据写入后保存断点和覆盖区间并提交（断点不会领先于已写入的数据）
+
+        Args:
+            cursor: 下一页的 end_time
+            request_end_time: 本页请求使用的 end_time（None 表示从最新开始）
+        """
+        if self.stop_check and self.stop_check():
+            return
+        self.db.checkpoint_crawl_state(self.group_id, self.mode, cursor, page_stats)
+        self._record_coverage(request_end_time, cursor)
+        self.db.conn.commit()
+
+    def page_covered(self, cursor: Optional[str], request_end_time: Optional[str]):
+        """本页话题已全部在库、无需写入时只记录覆盖区间"""
+        self._record_coverage(request_end_time, cursor)
+        self.db.conn.commit()
+
+    def _record_coverage(self, request_end_time: Optional[str], cursor: Optional[str]):
+        if not cursor:
+            return
+        try:
+            self.coverage.record_request(request_end_time, cursor)
+        except ValueError as e:
+            self.log(f"   ⚠️ 覆盖区间记录失败: {e}")
+
+    def finish(self, stopped: bool):
+        """结束爬取：被停止或提前中断时保留断点供下次续传"""
+        if not self.started:
+            return
+        status = 'stopped' if stopped or self.interrupted else 'completed'
+        self.db.finish_crawl_state(self.group_id, self.mode, status)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+已爬取时间区间
+每成功写入一页，就把该页请求覆盖的时间段 [最老话题时间 - 偏移, 请求的 end_time] 合并进 crawl_coverage 表
+（各爬取模式通过 CrawlCheckpoint.page_done 记录）。
+按时间区间爬取时先扣除已覆盖的部分，只对剩余的空缺区间从其结束时间直接开始翻页，
+不再从最新话题一路翻到目标区间；区间之间的空洞可由补洞模式单独爬取。
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+BEIJING_TZ = timezone(timedelta(hours=8))
+
+
+def parse_api_time(time_str: str) -> datetime:
+    """解析API时间戳（如 2024-01-01T08:00:00.000+0800）"""
+    return datetime.fromisoformat(time_str.replace('+0800', '+08:00'))
+
+
+def format_api_time(dt: datetime) -> str:
+    """格式化为API使用的东八区时间戳"""
+    return dt.astimezone(BEIJING_TZ).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0800'
+
+
+def shift_api_time(time_str: str, milliseconds: int) -> str:
+    """API时间戳向前推移若干毫秒（翻页游标）"""
+    return format_api_time(parse_api_time(time_str) - timedelta(milliseconds=milliseconds))
+
+
+def to_ms(dt: datetime) -> int:
+    return int(dt.timestamp() * 1000)
+
+
+def from_ms(ms: int) -> datetime:
+    return datetime.fromtimestamp(ms / 1000, BEIJING_TZ)
+
+
+class CrawlCoverage:
+    """群组已爬取时间区间（毫秒时间戳的闭区间集合，相邻或重叠的区间在写入时合并）"""
+
+    def __init__(self, db, group_id):
+        """
+        Args:
+            db: ZSXQDatabase 实例
+        """
+        self.db = db
+        self.group_id = group_id
+
+    def intervals(self) -> List[Tuple[int, int]]:
+        """已覆盖区间 [(start_ms, end_ms)]，按开始时间升序"""
+        return self.db.get_coverage_intervals(self.group_id)
+
+    def add(self, start_ms: int, end_ms: int):
+        """记录一段已完整爬取的时间（调用方负责提交事务）"""
+        if start_ms <= end_ms:
+            self.db.add_coverage_interval(self.group_id, start_ms, end_ms)
+
+    def record_page(self, end_time: Optional[str], oldest_time: str, offset_ms: int,
+                    start_dt: Optional[datetime] = None, end_dt: Optional[datetime] = None):
+        """
+        记录一页话题请求覆盖的时间段
+
+        Args:
+            end_time: 本页请求的 end_time，为 None 表示从最新开始（覆盖到当前时间）
+            oldest_time: 本页最老话题的 create_time
+            offset_ms: 下一页游标相对最老话题向前推移的毫秒数，与下一页的覆盖区间首尾相接
+            start_dt, end_dt: 只导入了该区间内的话题时，覆盖区间截取到该区间
+        """
+        start_ms = to_ms(parse_api_time(oldest_time)) - offset_ms
+        end_ms = to_ms(parse_api_time(end_time)) if end_time else int(time.time() * 1000)
+        if start_dt is not None:
+            start_ms = max(start_ms, to_ms(start_dt))
+        if end_dt is not None:
+            end_ms = min(end_ms, to_ms(end_dt))
+        self.add(start_ms, end_ms)
+
+    def record_request(self, end_time: Optional[str], next_cursor: str):
+        """记录一次翻页请求覆盖的时间段 [下一页游标, 本页请求的 end_time]"""
+        end_ms = to_ms(parse_api_time(end_time)) if end_time else int(time.time() * 1000)
+        self.add(to_ms(parse_api_time(next_cursor)), end_ms)
+
+    def gaps(self) -> List[Tuple[datetime, datetime]]:
+        """已覆盖区间之间的空洞（如翻页失败后跳过的时间段、中断后未续传的部分），按时间从新到旧排列"""
+        intervals = self.intervals()
+        return [(from_ms(prev_end + 1), from_ms(next_start - 1))
+                for (_, prev_end), (next_start, _) in reversed(list(zip(intervals, intervals[1:])))]
+
+    def missing(self, start_dt: datetime, end_dt: datetime) -> List[Tuple[datetime, datetime]]:
+        """返回 [start_dt, end_dt] 中尚未覆盖的子区间，按时间从新到旧排列"""
+        start_ms, end_ms = to_ms(start_dt), to_ms(end_dt)
+        gaps = []
+        cursor = end_ms
+        for covered_start, covered_end in reversed(self.intervals()):
+            if covered_end < start_ms:
+                break
+            if covered_start > cursor:
+                continue
+            if covered_end < cursor:
+                gaps.append((covered_end + 1, cursor))
+            cursor = min(cursor, covered_start - 1)
+            if cursor < start_ms:
+                break
+        if cursor >= start_ms:
+            gaps.append((start_ms, cursor))
+        return [(from_ms(gap_start), from_ms(gap_end)) for gap_start, gap_end in gaps]
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+采集流水线
+抓取 → 解析 → 写入 三个阶段通过有界队列连接：
+抓取线程只负责按间隔请求页面，解析线程把话题归一化为行缓冲区，
+唯一的写入线程独占SQLite连接，评论不完整的话题登记到评论补全队列，每页写入后保存爬取断点。
+队列写满时上游阻塞（背压），内存占用有上限。
+"""
+
+import queue
+import threading
+from typing import Dict, Any, List, Callable, Optional
+
+_STOP = object()  # 阶段结束标记
+
+
+class CrawlPipeline:
+    """
+    话题采集流水线
+
+    用法:
+        pipeline = CrawlPipeline(crawler)
+        pipeline.start()
+        try:
+            pipeline.submit_page(topics, cursor, request_end_time)    # 抓取线程调用
+            pipeline.call(db.get_timestamp_range_info)  # 需要读库时交给写入线程执行
+        finally:
+            stats = pipeline.close()
+
+    启动后直到 close() 之前，抓取线程不应再直接访问 crawler.db
+    """
+
+    def __init__(self, crawler, checkpoint=None, page_queue_size: int = 4, write_queue_size: int = 8):
+        """
+        Args:
+            crawler: ZSXQInteractiveCrawler 实例
+            checkpoint: CrawlCheckpoint 实例，提供时每页写入后由写入线程保存断点
+        """
+        self.crawler = crawler
+        self.db = crawler.db
+        self.checkpoint = checkpoint
+        self.parse_queue = queue.Queue(maxsize=page_queue_size)
+        self.write_queue = queue.Queue(maxsize=write_queue_size)
+        self.stats = {'new_topics': 0, 'updated_topics': 0, 'errors': 0, 'comment_backfill_queued': 0}
+        self._threads: Dict[str, threading.Thread] = {}
+
+    # ==================== 抓取线程接口 ====================
+
+    def start(self):
+        """启动解析和写入线程"""
+        for name, target in [('parser', self._parser_loop), ('writer', self._writer_loop)]:
+            thread = threading.Thread(target=target, name=f"crawl-{name}", daemon=True)
+            thread.start()
+            self._threads[name] = thread
+
+    def _put(self, target: queue.Queue, item) -> bool:
+        """阻塞放入队列（背压），等待期间检查停止标志，任务停止时放弃并返回False"""
+        while True:
+            try:
+                target.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                if self.crawler.is_stopped() and item is not _STOP:
+                    return False
+
+    def submit_page(self, topics: List[Dict[str, Any]], cursor: Optional[str] = None,
+                    request_end_time: Optional[str] = None) -> bool:
+        """提交一页话题、下一页游标和本页请求的 end_time，解析队列已满时阻塞"""
+        return self._put(self.parse_queue, ('page', (topics, cursor, request_end_time)))
+
+    def call(self, func: Callable, *args):
+        """
+        在写入线程中执行数据库操作并等待结果
+        调用按提交顺序排在已提交的页面之后，因此能读到之前页面写入的数据
+        """
+        done = threading.Event()
+        box = {}
+        if not self._put(self.parse_queue, ('call', (func, args, done, box))):
+            raise RuntimeError("任务已停止")
+        done.wait()
+        if 'error' in box:
+            raise box['error']
+        return box['result']
+
+    def queue_depths(self) -> str:
+        """各阶段队列深度（用于任务日志）"""
+        return (f"解析 {self.parse_queue.qsize()}/{self.parse_queue.maxsize}, "
+                f"写入 {self.write_queue.qsize()}/{self.write_queue.maxsize}")
+
+    def close(self) -> Dict[str, int]:
+        """依次结束各阶段并等待队列中的数据写完"""
+        if not self._threads:
+            return self.stats
+
+        self._put(self.parse_queue, _STOP)
+        self._threads['parser'].join()
+        self._put(self.write_queue, _STOP)
+        self._threads['writer'].join()
+        self._threads = {}
+        return self.stats
+
+    # ==================== 各阶段线程 ====================
+
+    def _parser_loop(self):
+        """解析阶段：话题归一化为行缓冲区"""
+        while True:
+            item = self.parse_queue.get()
+            if item is _STOP:
+                return
+
+            kind, payload = item
+            if kind == 'call':
+                if not self._put(self.write_queue, item):
+                    _, _, done, box = payload
+                    box['error'] = RuntimeError("任务已停止")
+                    done.set()
+                continue
+
+            topics, cursor, request_end_time = payload
+            try:
+                batch = self.db.prepare_topics_batch(topics)
+            except Exception as e:
+                self.crawler.log(f"   ⚠️ 解析话题失败: {e}")
+                self.stats['errors'] += len(topics)
+                continue
+
+            self._put(self.write_queue, ('topics', (batch, cursor, request_end_time)))
+
+    def _writer_loop(self):
+        """写入阶段：唯一使用SQLite连接的线程"""
+        while True:
+            item = self.write_queue.get()
+            if item is _STOP:
+                return
+
+            kind, payload = item
+            try:
+                if kind == 'topics':
+                    batch, cursor, request_end_time = payload
+                    page_stats = self.db.write_topics_batch(batch)
+                    queued = len(self.db.enqueue_comment_backfill(batch['topics']))
+                    self.db.conn.commit()
+                    if self.checkpoint:
+                        self.checkpoint.page_done(cursor, page_stats, request_end_time)
+                    for key in ('new_topics', 'updated_topics', 'errors'):
+                        self.stats[key] += page_stats[key]
+                    self.stats['comment_backfill_queued'] += queued
+                    self.crawler.log(f"   💾 页面存储: 新增{page_stats['new_topics']}, 更新{page_stats['updated_topics']}"
+                                     + (f", 评论待补全{queued}" if queued else ''))
+                    self.crawler._log_write_breakdown(page_stats)
+                elif kind == 'call':
+                    func, args, done, box = payload
+                    try:
+                        box['result'] = func(*args)
+                    except Exception as e:
+                        box['error'] = e
+                    finally:
+                        done.set()
+            except Exception as e:
+                # 单条写入失败不能让写入线程退出，否则上游会一直阻塞
+                self.db.conn.rollback()
+                self.stats['errors'] += 1
+                self.crawler.log(f"   ❌ 写入失败: {e}")
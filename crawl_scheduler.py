@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多群组爬取调度
+接收多个群组的爬取任务，按群组所属账号（Cookie）排队：
+每个账号同时运行的群组数有上限，同一群组同一时间只运行一个任务；
+同一账号的各群组共用一个速率控制器（见 rate_controller），
+每个请求按预约顺序取得发出时间，正在运行的群组因此轮流翻页，总请求量受账号预算限制。
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Callable
+
+from rate_controller import account_key
+
+# 调度器支持的爬取模式及其参数
+CRAWL_MODES = {
+    'latest_until_complete': ('per_page',),
+    'incremental': ('pages', 'per_page'),
+    'historical': ('pages', 'per_page'),
+    'all_historical': ('per_page',),
+    'hot_window': ('days', 'per_page'),
+    'gaps': ('per_page',),
+}
+
+
+def run_crawl_mode(crawler, mode: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """按模式名调用 ZSXQInteractiveCrawler 的爬取方法"""
+    kwargs = {key: params[key] for key in CRAWL_MODES[mode] if params.get(key) is not None}
+    if mode == 'latest_until_complete':
+        return crawler.crawl_latest_until_complete(**kwargs)
+    if mode == 'incremental':
+        return crawler.crawl_incremental(**kwargs)
+    if mode == 'historical':
+        return crawler.crawl_historical(**kwargs)
+    if mode == 'all_historical':
+        return crawler.crawl_all_historical(auto_confirm=True, **kwargs)
+    if mode == 'gaps':
+        return crawler.crawl_gaps(**kwargs)
+    return crawler.crawl_hot_window(**kwargs)
+
+
+class CrawlScheduler:
+    """
+    爬取任务调度器
+
+    runner(job) 在独立线程中执行一个任务并返回结果字典，
+    应通过 job['stop_requested'] 判断任务是否被取消
+    """
+
+    JOB_STATUSES = ('queued', 'running', 'completed', 'failed', 'cancelled')
+
+    def __init__(self, cookie_resolver: Callable[[str], str], runner: Callable[[Dict[str, Any]], Any],
+                 max_groups_per_account: int = 2, history_size: int = 200):
+        """
+        Args:
+            cookie_resolver: group_id -> Cookie，用于确定群组所属账号
+            runner: 执行单个任务的函数
+            max_groups_per_account: 每个账号同时运行的群组数上限
+            history_size: 保留的已结束任务数
+        """
+        self.cookie_resolver = cookie_resolver
+        self.runner = runner
+        self.max_groups_per_account = max_groups_per_account
+        self.history_size = history_size
+
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._queue = deque()  # 排队中的任务ID（先进先出）
+        self._running_groups: Dict[str, set] = {}  # 账号 -> 正在运行的群组
+        self._job_counter = 0
+        self._cond = threading.Condition()
+        self._dispatcher: Optional[threading.Thread] = None
+
+    # ==================== 任务提交与取消 ====================
+
+    def submit(self, group_id: str, mode: str, params: Optional[Dict[str, Any]] = None,
+               task_id: Optional[str] = None) -> Dict[str, Any]:
+        """提交一个爬取任务，返回任务记录"""
+        if mode not in CRAWL_MODES:
+            raise ValueError(f"不支持的爬取模式: {mode}")
+
+        cookie = self.cookie_resolver(group_id)
+        with self._cond:
+            self._job_counter += 1
+            job = {
+                'job_id': f"job_{self._job_counter}_{int(time.time())}",
+                'group_id': str(group_id),
+                'account': account_key(cookie),
+                'mode': mode,
+                'params': dict(params or {}),
+                'task_id': task_id,
+                'status': 'queued',
+                'stop_requested': False,
+                'result': None,
+                'error': None,
+                'submitted_at': datetime.now().isoformat(timespec='seconds'),
+                'started_at': None,
+                'finished_at': None,
+            }
+            self.jobs[job['job_id']] = job
+            self._queue.append(job['job_id'])
+            self._ensure_dispatcher()
+            self._cond.notify_all()
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """取消任务：排队中的直接移出队列，运行中的设置停止标志"""
+        with self._cond:
+            job = self.jobs.get(job_id)
+            if not job or job['status'] not in ('queued', 'running'):
+                return False
+            job['stop_requested'] = True
+            if job['status'] == 'queued':
+                self._queue.remove(job_id)
+                self._finish(job, 'cancelled')
+            self._cond.notify_all()
+            return True
+
+    def set_max_groups_per_account(self, limit: int):
+        with self._cond:
+            self.max_groups_per_account = max(1, limit)
+            self._cond.notify_all()
+
+    # ==================== 调度 ====================
+
+    def _ensure_dispatcher(self):
+        if self._dispatcher is None or not self._dispatcher.is_alive():
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name="crawl-scheduler", daemon=True)
+            self._dispatcher.start()
+
+    def _next_runnable(self) -> Optional[Dict[str, Any]]:
+        """按提交顺序找出第一个账号有空闲名额、且群组未在运行的任务"""
+        for job_id in self._queue:
+            job = self.jobs[job_id]
+            running = self._running_groups.get(job['account'], set())
+            if len(running) < self.max_groups_per_account and job['group_id'] not in running:
+                return job
+        return None
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                job = self._next_runnable()
+                while job is None:
+                    self._cond.wait()
+                    job = self._next_runnable()
+
+                self._queue.remove(job['job_id'])
+                self._running_groups.setdefault(job['account'], set()).add(job['group_id'])
+                job['status'] = 'running'
+                job['started_at'] = datetime.now().isoformat(timespec='seconds')
+
+            threading.Thread(target=self._run_job, args=(job,), name=f"crawl-{job['group_id']}", daemon=True).start()
+
+    def _run_job(self, job: Dict[str, Any]):
+        status, result, error = 'completed', None, None
+        try:
+            result = self.runner(job)
+        except Exception as e:
+            status, error = 'failed', str(e)
+
+        with self._cond:
+            job['result'] = result
+            job['error'] = error
+            if job['stop_requested']:
+                status = 'cancelled'
+            elif isinstance(result, dict) and result.get('expired'):
+                status = 'failed'
+            self._running_groups[job['account']].discard(job['group_id'])
+            self._finish(job, status)
+            self._cond.notify_all()
+
+    def _finish(self, job: Dict[str, Any], status: str):
+        """记录任务结束，超过保留数量时删除最早结束的任务（调用方持有锁）"""
+        job['status'] = status
+        job['finished_at'] = datetime.now().isoformat(timespec='seconds')
+        finished = [j for j in self.jobs.values() if j['finished_at']]
+        for old in sorted(finished, key=lambda j: j['finished_at'])[:max(0, len(finished) - self.history_size)]:
+            del self.jobs[old['job_id']]
+
+    # ==================== 状态 ====================
+
+    def snapshot(self) -> Dict[str, Any]:
+        """队列状态：各账号运行中和排队的群组，以及全部任务记录"""
+        with self._cond:
+            accounts: Dict[str, Dict[str, Any]] = {}
+            for job in self.jobs.values():
+                account = accounts.setdefault(job['account'], {'running_groups': [], 'queued_jobs': 0})
+                if job['status'] == 'running':
+                    account['running_groups'].append(job['group_id'])
+                elif job['status'] == 'queued':
+                    account['queued_jobs'] += 1
+
+            jobs: List[Dict[str, Any]] = sorted(
+                (dict(job) for job in self.jobs.values()), key=lambda j: j['submitted_at'], reverse=True)
+            return {
+                'max_groups_per_account': self.max_groups_per_account,
+                'queue_length': len(self._queue),
+                'accounts': accounts,
+                'jobs': jobs,
+            }
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+游标分页工具
+将排序键编码为不透明的游标字符串，配合 (create_time, id) 键集分页使用，
+翻页深度不影响查询速度，且新数据写入时不会出现重复或遗漏
+"""
+
+import base64
+import json
+from typing import Dict, Any
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """将排序键编码为游标字符串"""
+    raw = json.dumps(values, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, required_keys=('t', 'id')) -> Dict[str, Any]:
+    """解析游标字符串，格式错误时抛出 ValueError"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except Exception:
+        raise ValueError("无效的分页游标")
+
+    if not isinstance(values, dict) or any(key not in values for key in required_keys):
+        raise ValueError("无效的分页游标")
+    return values
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库性能基准测试
+使用合成数据在临时目录中运行，不会影响 output/databases 下的真实数据
+
+用法:
+    python db_benchmark.py read-latency [--profiles legacy concurrent] [--duration 10]
+    python db_benchmark.py tag-import [--topics 20000] [--tags 20] [--tags-per-topic 3]
+    python db_benchmark.py topic-dedup [--topics 200000] [--pages 2000]
+    python db_benchmark.py replay [--archive DIR] [--topics 20000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List
+
+from db_storage_profile import STORAGE_PROFILES
+from response_archive import ResponseArchive, replay_archive, archive_stats
+from zsxq_database import ZSXQDatabase
+
+
+BENCH_GROUP_ID = 100000001
+BEIJING_TZ = timezone(timedelta(hours=8))
+
+
+def make_synthetic_topic(topic_id: int, create_dt: datetime, group_id: int = BENCH_GROUP_ID,
+                         comments: int = 5, likes: int = 5, tags: List[str] = None) -> Dict[str, Any]:
+    """生成一个结构与 /v2/groups/{id}/topics 返回值一致的合成话题"""
+    create_time = create_dt.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0800'
+    owner = {'user_id': 200000 + topic_id % 500, 'name': f'用户{topic_id % 500}', 'avatar_url': ''}
+    text = f'合成话题 {topic_id} ' + '知识星球内容测试 ' * 20
+    for tag in tags or []:
+        text += f' <e type="hashtag" hid="{abs(hash(tag)) % 10 ** 8}" title="%23{tag}%23" /> '
+
+    return {
+        'topic_id': topic_id,
+        'group': {'group_id': group_id, 'name': '基准测试星球', 'type': 'pay'},
+        'type': 'talk',
+        'title': f'合成话题 {topic_id}',
+        'create_time': create_time,
+        'likes_count': likes,
+        'comments_count': comments,
+        'reading_count': random.randint(10, 1000),
+        'readers_count': random.randint(10, 500),
+        'talk': {'owner': owner, 'text': text},
+        'latest_likes': [
+            {'create_time': create_time, 'owner': {'user_id': 300000 + (topic_id + i) % 2000, 'name': f'点赞{i}'}}
+            for i in range(likes)
+        ],
+        'likes_detail': {'emojis': [{'emoji_key': '[赞]', 'likes_count': likes}]},
+        'show_comments': [
+            {
+                'comment_id': topic_id * 100 + i,
+                'create_time': create_time,
+                'owner': {'user_id': 400000 + (topic_id + i) % 3000, 'name': f'评论{i}'},
+                'text': f'评论内容 {i}',
+                'likes_count': 0,
+            }
+            for i in range(comments)
+        ],
+    }
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def bench_read_latency(profile: str, duration: float, seed_topics: int, page_size: int) -> Dict[str, Any]:
+    """模拟爬取写入的同时，测量Web界面话题列表查询的延迟"""
+    tmp_dir = tempfile.mkdtemp(prefix='zsxq_bench_')
+    db_path = os.path.join(tmp_dir, f'zsxq_topics_{BENCH_GROUP_ID}.db')
+
+    # 预置数据
+    seed_db = ZSXQDatabase(db_path, storage_profile=profile)
+    base_dt = datetime.now(BEIJING_TZ)
+    for i in range(seed_topics):
+        seed_db.import_topic_data(make_synthetic_topic(i + 1, base_dt - timedelta(minutes=i)))
+    seed_db.conn.commit()
+    seed_db.close()
+
+    stop_event = threading.Event()
+    write_stats = {'pages': 0, 'topics': 0}
+
+    def writer():
+        # 与 store_batch_data 相同：每页一个写事务
+        db = ZSXQDatabase(db_path, storage_profile=profile)
+        next_id = seed_topics + 1
+        while not stop_event.is_set():
+            for _ in range(page_size):
+                db.import_topic_data(make_synthetic_topic(next_id, base_dt - timedelta(minutes=next_id)))
+                next_id += 1
+            db.conn.commit()
+            write_stats['pages'] += 1
+            write_stats['topics'] += page_size
+        db.close()
+
+    reader_db = ZSXQDatabase(db_path, storage_profile=profile)
+    latencies = []
+    errors = 0
+
+    writer_thread = threading.Thread(target=writer, daemon=True)
+    writer_thread.start()
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        start = time.perf_counter()
+        try:
+            reader_db.cursor.execute('''
+                SELECT t.topic_id, t.title, t.create_time, t.likes_count, t.comments_count, tk.text
+                FROM topics t
+                LEFT JOIN talks tk ON t.topic_id = tk.topic_id
+                WHERE t.group_id = ?
+                ORDER BY t.create_time DESC
+                LIMIT 20
+            ''', (BENCH_GROUP_ID,))
+            reader_db.cursor.fetchall()
+            latencies.append((time.perf_counter() - start) * 1000)
+        except Exception:
+            errors += 1
+        time.sleep(0.01)
+
+    stop_event.set()
+    writer_thread.join()
+    reader_db.close()
+
+    return {
+        'profile': profile,
+        'reads': len(latencies),
+        'errors': errors,
+        'p50_ms': statistics.median(latencies) if latencies else 0.0,
+        'p95_ms': _percentile(latencies, 95),
+        'max_ms': max(latencies) if latencies else 0.0,
+        'pages_written': write_stats['pages'],
+        'topics_written': write_stats['topics'],
+    }
+
+
+def run_read_latency(args):
+    print("📊 爬取写入期间的读取延迟基准测试")
+    print(f"   时长: {args.duration}s  预置话题: {args.seed_topics}  每页话题: {args.page_size}")
+    print("=" * 80)
+    print(f"{'配置':<12}{'读取次数':>10}{'失败':>8}{'p50(ms)':>12}{'p95(ms)':>12}{'max(ms)':>12}{'写入页数':>10}")
+    for profile in args.profiles:
+        result = bench_read_latency(profile, args.duration, args.seed_topics, args.page_size)
+        print(f"{result['profile']:<12}{result['reads']:>10}{result['errors']:>8}"
+              f"{result['p50_ms']:>12.2f}{result['p95_ms']:>12.2f}{result['max_ms']:>12.2f}"
+              f"{result['pages_written']:>10}")
+
+
+def bench_tag_import(total_topics: int, tag_pool: int, tags_per_topic: int, page_size: int) -> Dict[str, Any]:
+    """导入标签密集的合成群组，记录每页导入耗时随群组规模的变化"""
+    tmp_dir = tempfile.mkdtemp(prefix='zsxq_bench_')
+    db_path = os.path.join(tmp_dir, f'zsxq_topics_{BENCH_GROUP_ID}.db')
+    db = ZSXQDatabase(db_path)
+
+    # 少量热门标签被大量话题反复引用
+    tag_names = [f'热门标签{i}' for i in range(tag_pool)]
+    base_dt = datetime.now(BEIJING_TZ)
+    page_ms = []
+    for start in range(0, total_topics, page_size):
+        topics = [
+            make_synthetic_topic(topic_id, base_dt - timedelta(minutes=topic_id), comments=2, likes=2,
+                                 tags=random.sample(tag_names, min(tags_per_topic, tag_pool)))
+            for topic_id in range(start + 1, min(start + page_size, total_topics) + 1)
+        ]
+        begin = time.perf_counter()
+        db.import_topics_batch(topics)
+        page_ms.append((time.perf_counter() - begin) * 1000)
+
+    db.cursor.execute('SELECT SUM(topic_count) FROM tags')
+    counted = db.cursor.fetchone()[0] or 0
+    db.cursor.execute('SELECT COUNT(*) FROM topic_tags')
+    linked = db.cursor.fetchone()[0]
+    db.close()
+
+    window = max(1, len(page_ms) // 10)
+    return {
+        'pages': len(page_ms),
+        'total_s': sum(page_ms) / 1000,
+        'first_ms': statistics.mean(page_ms[:window]),
+        'last_ms': statistics.mean(page_ms[-window:]),
+        'p95_ms': _percentile(page_ms, 95),
+        'counts_match': counted == linked,
+        'links': linked,
+    }
+
+
+def run_tag_import(args):
+    print("🏷️ 标签密集群组导入基准测试")
+    print(f"   话题: {args.topics}  标签池: {args.tags}  每话题标签: {args.tags_per_topic}  每页话题: {args.page_size}")
+    print("=" * 80)
+    result = bench_tag_import(args.topics, args.tags, args.tags_per_topic, args.page_size)
+    print(f"   导入 {result['pages']} 页，共 {result['total_s']:.2f}s，标签关联 {result['links']}")
+    print(f"   前10%页平均 {result['first_ms']:.2f}ms  后10%页平均 {result['last_ms']:.2f}ms  p95 {result['p95_ms']:.2f}ms")
+    print(f"   标签计数与关联数{'一致' if result['counts_match'] else '不一致'}")
+
+
+def bench_topic_dedup(total_topics: int, pages: int, page_size: int) -> Dict[str, Any]:
+    """比较逐条 SELECT 与内存话题ID索引判断一页话题新旧的耗时"""
+    tmp_dir = tempfile.mkdtemp(prefix='zsxq_bench_')
+    db_path = os.path.join(tmp_dir, f'zsxq_topics_{BENCH_GROUP_ID}.db')
+    db = ZSXQDatabase(db_path)
+
+    # 只写入话题主表即可，ID间隔为2，便于构造一半已存在的页面
+    db.cursor.executemany(
+        'INSERT INTO topics (topic_id, group_id, type, create_time) VALUES (?, ?, ?, ?)',
+        ((topic_id, BENCH_GROUP_ID, 'talk', '') for topic_id in range(2, total_topics * 2 + 1, 2))
+    )
+    db.conn.commit()
+
+    page_ids = []
+    for _ in range(pages):
+        start = random.randint(1, total_topics * 2 - page_size)
+        page_ids.append(list(range(start, start + page_size)))
+
+    begin = time.perf_counter()
+    select_existing = 0
+    for ids in page_ids:
+        for topic_id in ids:
+            db.cursor.execute('SELECT topic_id FROM topics WHERE topic_id = ?', (topic_id,))
+            if db.cursor.fetchone():
+                select_existing += 1
+    select_s = time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    index = db.known_topic_ids()
+    load_s = time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    index_existing = sum(len(db.get_existing_topic_ids(ids)) for ids in page_ids)
+    index_s = time.perf_counter() - begin
+    db.close()
+
+    return {
+        'select_ms_per_page': select_s * 1000 / pages,
+        'index_ms_per_page': index_s * 1000 / pages,
+        'load_ms': load_s * 1000,
+        'index_bytes': len(index) * 8,
+        'results_match': select_existing == index_existing,
+    }
+
+
+def run_topic_dedup(args):
+    print("🆔 话题新旧判断基准测试")
+    print(f"   已入库话题: {args.topics}  页数: {args.pages}  每页话题: {args.page_size}")
+    print("=" * 80)
+    result = bench_topic_dedup(args.topics, args.pages, args.page_size)
+    print(f"   逐条SELECT: {result['select_ms_per_page']:.3f}ms/页")
+    print(f"   ID索引:     {result['index_ms_per_page']:.3f}ms/页 "
+          f"(加载 {result['load_ms']:.1f}ms，约 {result['index_bytes'] / 1024 / 1024:.1f}MB)")
+    print(f"   两种方式结果{'一致' if result['results_match'] else '不一致'}")
+
+
+def build_synthetic_archive(archive_dir: str, total_topics: int, page_size: int):
+    """生成与真实话题列表响应格式一致的合成归档"""
+    archive = ResponseArchive(archive_dir, segment_bytes=16 * 1024 * 1024)
+    start = datetime(2024, 1, 1, tzinfo=BEIJING_TZ)
+    for page_start in range(0, total_topics, page_size):
+        topics = [make_synthetic_topic(10 ** 9 + i, start + timedelta(minutes=i))
+                  for i in range(page_start, min(page_start + page_size, total_topics))]
+        archive.record('topics', {'scope': 'all', 'count': str(page_size)},
+                       {'succeeded': True, 'resp_data': {'topics': topics}})
+    archive.close()
+
+
+def run_replay(args):
+    print("📼 归档重放基准测试")
+    print("=" * 80)
+    tmp_dir = tempfile.mkdtemp(prefix='zsxq_bench_')
+    archive_dir = args.archive
+    if not archive_dir:
+        archive_dir = os.path.join(tmp_dir, 'archive')
+        print(f"   生成合成归档: {args.topics} 个话题，每页 {args.page_size} 条")
+        build_synthetic_archive(archive_dir, args.topics, args.page_size)
+
+    info = archive_stats(archive_dir)
+    print(f"   归档: {info['segments']} 个分段，{info['compressed_bytes'] / 1024 / 1024:.1f}MB，记录 {info['records']}")
+    result = replay_archive(archive_dir,
+                            os.path.join(tmp_dir, f'zsxq_topics_{BENCH_GROUP_ID}.db'),
+                            os.path.join(tmp_dir, f'zsxq_files_{BENCH_GROUP_ID}.db'),
+                            log_callback=lambda message: None)
+    topics_per_s = result['topics'] / result['elapsed_s'] if result['elapsed_s'] else 0.0
+    print(f"   重放 {result['records']} 条记录，耗时 {result['elapsed_s']:.2f}s")
+    print(f"   {result['records_per_s']:.1f} 条记录/s，{topics_per_s:.0f} 个话题/s，"
+          f"评论 {result['comments']}，文件 {result['files']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='知识星球数据库性能基准测试')
+    subparsers = parser.add_subparsers(dest='command')
+
+    read_parser = subparsers.add_parser('read-latency', help='爬取写入期间的读取延迟')
+    read_parser.add_argument('--profiles', nargs='+', default=['legacy', 'concurrent'],
+                             choices=sorted(STORAGE_PROFILES.keys()))
+    read_parser.add_argument('--duration', type=float, default=10.0)
+    read_parser.add_argument('--seed-topics', type=int, default=2000)
+    read_parser.add_argument('--page-size', type=int, default=20)
+    read_parser.set_defaults(func=run_read_latency)
+
+    tag_parser = subparsers.add_parser('tag-import', help='标签密集群组的导入耗时')
+    tag_parser.add_argument('--topics', type=int, default=20000)
+    tag_parser.add_argument('--tags', type=int, default=20)
+    tag_parser.add_argument('--tags-per-topic', type=int, default=3)
+    tag_parser.add_argument('--page-size', type=int, default=20)
+    tag_parser.set_defaults(func=run_tag_import)
+
+    dedup_parser = subparsers.add_parser('topic-dedup', help='话题新旧判断：逐条查询与内存ID索引对比')
+    dedup_parser.add_argument('--topics', type=int, default=200000)
+    dedup_parser.add_argument('--pages', type=int, default=2000)
+    dedup_parser.add_argument('--page-size', type=int, default=20)
+    dedup_parser.set_defaults(func=run_topic_dedup)
+
+    replay_parser = subparsers.add_parser('replay', help='从响应归档重建数据库的耗时')
+    replay_parser.add_argument('--archive', help='真实归档目录（不指定时生成合成归档）')
+    replay_parser.add_argument('--topics', type=int, default=20000)
+    replay_parser.add_argument('--page-size', type=int, default=20)
+    replay_parser.set_defaults(func=run_replay)
+
+    args = parser.parse_args()
+    if not hasattr(args, 'func'):
+        parser.print_help()
+        return
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库维护工具
+对 output/databases 下的各群组数据库执行维护操作
+
+用法:
+    python db_maintenance.py migrate [--group GROUP_ID ...]
+    python db_maintenance.py compact [--group GROUP_ID ...] [--no-vacuum]
+    python db_maintenance.py rebuild-search [--group GROUP_ID ...]
+    python db_maintenance.py verify-stats [--group GROUP_ID ...] [--rebuild]
+    python db_maintenance.py rebuild-stats [--group GROUP_ID ...]
+"""
+
+import argparse
+import os
+from typing import List, Dict, Any
+
+from db_path_manager import get_db_path_manager
+
+
+def _format_bytes(size: int) -> str:
+    """格式化字节数"""
+    if size < 1024:
+        return f"{size}B"
+    for unit in ['KB', 'MB', 'GB']:
+        size /= 1024.0
+        if size < 1024 or unit == 'GB':
+            break
+    return f"{size:.1f}{unit}"
+
+
+def _resolve_groups(group_ids: List[str]) -> List[Dict[str, Any]]:
+    """解析要处理的群组列表（未指定时处理全部群组）"""
+    path_manager = get_db_path_manager()
+    all_groups = path_manager.list_all_groups()
+    if not group_ids:
+        return all_groups
+
+    selected = [group for group in all_groups if group['group_id'] in set(group_ids)]
+    missing = set(group_ids) - {group['group_id'] for group in selected}
+    for group_id in sorted(missing):
+        print(f"⚠️ 群组 {group_id} 没有话题数据库，已跳过")
+    return selected
+
+
+def run_migrate(args):
+    """将群组的话题数据库和文件数据库升级到最新结构版本"""
+    from schema_migrations import read_schema_version
+    from zsxq_database import ZSXQDatabase
+    from zsxq_file_database import ZSXQFileDatabase
+
+    groups = _resolve_groups(args.group)
+    if not groups:
+        print("ℹ️ 没有找到任何群组数据库")
+        return
+
+    path_manager = get_db_path_manager()
+    upgraded = 0
+    failed = 0
+    for group in groups:
+        targets = [('话题库', group['topics_db'], ZSXQDatabase),
+                   ('文件库', path_manager.get_files_db_path(group['group_id']), ZSXQFileDatabase)]
+        for label, db_path, db_class in targets:
+            before = read_schema_version(db_path)
+            if before is None:
+                continue
+            try:
+                db = db_class(db_path)
+                after = db.conn.execute('PRAGMA user_version').fetchone()[0]
+                db.close()
+            except Exception as e:
+                failed += 1
+                print(f"❌ 群组 {group['group_id']} {label}迁移失败: {e}")
+                continue
+
+            if after != before:
+                upgraded += 1
+                print(f"✅ 群组 {group['group_id']} {label}: v{before} -> v{after}")
+            else:
+                print(f"ℹ️ 群组 {group['group_id']} {label}: 已是最新 v{after}")
+
+    print(f"\n✅ 完成 {len(groups)} 个群组，升级 {upgraded} 个数据库，失败 {failed} 个")
+
+
+def run_compact(args):
+    """清理自然键重复行并回收空间"""
+    from zsxq_database import ZSXQDatabase
+
+    groups = _resolve_groups(args.group)
+    if not groups:
+        print("ℹ️ 没有找到任何群组数据库")
+        return
+
+    total_rows = 0
+    total_bytes = 0
+    for group in groups:
+        print(f"\n🧹 压缩群组 {group['group_id']}: {group['topics_db']}")
+        db = ZSXQDatabase(group['topics_db'])
+        try:
+            report = db.compact_database(vacuum=not args.no_vacuum)
+        finally:
+            db.close()
+
+        for table, count in report['removed_rows'].items():
+            if count:
+                print(f"   {table}: 删除重复行 {count}")
+        print(f"   📦 {_format_bytes(report['bytes_before'])} -> {_format_bytes(report['bytes_after'])}"
+              f"，回收 {_format_bytes(report['reclaimed_bytes'])}")
+        if not report['vacuumed'] and report['free_bytes']:
+            print(f"   ℹ️ 空闲页 {_format_bytes(report['free_bytes'])}，去掉 --no-vacuum 可释放到磁盘")
+
+        total_rows += report['total_removed_rows']
+        total_bytes += report['reclaimed_bytes']
+
+    print(f"\n✅ 完成 {len(groups)} 个群组，共删除重复行 {total_rows}，回收 {_format_bytes(total_bytes)}")
+
+
+def run_rebuild_search(args):
+    """重建全文搜索索引"""
+    from zsxq_database import ZSXQDatabase
+
+    groups = _resolve_groups(args.group)
+    if not groups:
+        print("ℹ️ 没有找到任何群组数据库")
+        return
+
+    for group in groups:
+        print(f"\n📇 重建群组 {group['group_id']} 的全文索引...")
+        db = ZSXQDatabase(group['topics_db'])
+        try:
+            result = db.rebuild_search_index()
+        finally:
+            db.close()
+
+        if result['success']:
+            print(f"   ✅ 已索引 {result['indexed_topics']} 个话题")
+        else:
+            print(f"   ❌ {result['message']}")
+
+
+def run_verify_stats(args):
+    """校验触发器维护的群组统计，可选择对有偏差的数据库重建"""
+    from zsxq_database import ZSXQDatabase
+
+    groups = _resolve_groups(args.group)
+    if not groups:
+        print("ℹ️ 没有找到任何群组数据库")
+        return
+
+    mismatched = 0
+    for group in groups:
+        db = ZSXQDatabase(group['topics_db'])
+        try:
+            report = db.verify_group_stats()
+            if not report['mismatches']:
+                print(f"✅ 群组 {group['group_id']}: 统计一致（{report['groups_checked']} 个群组）")
+                continue
+
+            mismatched += 1
+            print(f"⚠️ 群组 {group['group_id']}: 发现 {len(report['mismatches'])} 处统计偏差")
+            for item in report['mismatches']:
+                print(f"   {item['group_id']}.{item['field']}: 实际 {item['expected']}，记录 {item['actual']}")
+
+            if args.rebuild:
+                result = db.rebuild_group_stats()
+                if result['success']:
+                    print(f"   🔧 已重建统计（{result['groups']} 个群组）")
+                else:
+                    print(f"   ❌ 重建失败: {result['message']}")
+        finally:
+            db.close()
+
+    print(f"\n✅ 完成 {len(groups)} 个群组，{mismatched} 个数据库存在统计偏差")
+
+
+def run_rebuild_stats(args):
+    """按现有数据重建群组统计"""
+    from zsxq_database import ZSXQDatabase
+
+    groups = _resolve_groups(args.group)
+    if not groups:
+        print("ℹ️ 没有找到任何群组数据库")
+        return
+
+    for group in groups:
+        db = ZSXQDatabase(group['topics_db'])
+        try:
+            result = db.rebuild_group_stats()
+        finally:
+            db.close()
+
+        if result['success']:
+            print(f"✅ 群组 {group['group_id']}: 已重建统计（{result['groups']} 个群组）")
+        else:
+            print(f"❌ 群组 {group['group_id']}: 重建失败 - {result['message']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='知识星球数据库维护工具')
+    parser.add_argument('--base-dir', default=None, help='数据库根目录（默认 output/databases）')
+    subparsers = parser.add_subparsers(dest='command')
+
+    migrate_parser = subparsers.add_parser('migrate', help='升级数据库结构到最新版本')
+    migrate_parser.add_argument('--group', nargs='*', default=[], help='指定群组ID（默认全部）')
+    migrate_parser.set_defaults(func=run_migrate)
+
+    compact_parser = subparsers.add_parser('compact', help='清理重复数据并回收磁盘空间')
+    compact_parser.add_argument('--group', nargs='*', default=[], help='指定群组ID（默认全部）')
+    compact_parser.add_argument('--no-vacuum', action='store_true', help='只清理重复行，不执行VACUUM')
+    compact_parser.set_defaults(func=run_compact)
+
+    search_parser = subparsers.add_parser('rebuild-search', help='重建全文搜索索引')
+    search_parser.add_argument('--group', nargs='*', default=[], help='指定群组ID（默认全部）')
+    search_parser.set_defaults(func=run_rebuild_search)
+
+    verify_parser = subparsers.add_parser('verify-stats', help='校验群组统计是否与实际数据一致')
+    verify_parser.add_argument('--group', nargs='*', default=[], help='指定群组ID（默认全部）')
+    verify_parser.add_argument('--rebuild', action='store_true', help='发现偏差时自动重建')
+    verify_parser.set_defaults(func=run_verify_stats)
+
+    stats_parser = subparsers.add_parser('rebuild-stats', help='重建群组统计')
+    stats_parser.add_argument('--group', nargs='*', default=[], help='指定群组ID（默认全部）')
+    stats_parser.set_defaults(func=run_rebuild_stats)
+
+    args = parser.parse_args()
+    if not hasattr(args, 'func'):
+        parser.print_help()
+        return
+
+    if args.base_dir:
+        path_manager = get_db_path_manager()
+        path_manager.base_dir = os.path.abspath(args.base_dir)
+
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite 存储配置管理器
+统一管理话题数据库、文件数据库和账号信息数据库的连接参数
+"""
+
+import os
+import sqlite3
+from typing import Dict, Any, Optional
+
+
+# 存储配置方案
+# - legacy: 回滚日志模式，与旧版本行为一致；长时间写事务会阻塞所有读取
+# - concurrent: WAL模式，爬取写入期间Web界面的读取请求不会被阻塞
+STORAGE_PROFILES: Dict[str, Dict[str, Any]] = {
+    'legacy': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'busy_timeout': 5000,
+    },
+    'concurrent': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -65536,       # 负数单位为KB，约64MB页缓存
+        'mmap_size': 268435456,     # 256MB内存映射
+        'temp_store': 'MEMORY',
+        'busy_timeout': 15000,      # 毫秒
+    },
+}
+
+DEFAULT_STORAGE_PROFILE = 'concurrent'
+
+# PRAGMA 的应用顺序：busy_timeout 必须最先设置，journal_mode 切换时可能需要等待锁
+_PRAGMA_ORDER = ['busy_timeout', 'journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store']
+
+
+def get_default_storage_profile() -> str:
+    """获取默认存储配置名称（可通过环境变量 ZSXQ_STORAGE_PROFILE 覆盖）"""
+    return os.environ.get('ZSXQ_STORAGE_PROFILE', DEFAULT_STORAGE_PROFILE)
+
+
+def apply_storage_profile(conn: sqlite3.Connection, profile: Optional[str] = None) -> str:
+    """在已打开的连接上应用存储配置，返回实际生效的配置名称"""
+    profile_name = profile or get_default_storage_profile()
+    settings = STORAGE_PROFILES.get(profile_name)
+    if settings is None:
+        print(f"⚠️ 未知的存储配置: {profile_name}，使用默认配置 {DEFAULT_STORAGE_PROFILE}")
+        profile_name = DEFAULT_STORAGE_PROFILE
+        settings = STORAGE_PROFILES[profile_name]
+
+    for key in _PRAGMA_ORDER:
+        if key not in settings:
+            continue
+        try:
+            conn.execute(f"PRAGMA {key}={settings[key]}")
+        except sqlite3.Error as e:
+            # 只读文件系统或其他连接持有锁时，切换journal模式可能失败，不影响正常使用
+            print(f"⚠️ 应用存储参数失败: {key}={settings[key]} - {e}")
+
+    return profile_name
+
+
+def connect_database(db_path: str, profile: Optional[str] = None) -> sqlite3.Connection:
+    """按存储配置打开SQLite连接"""
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    apply_storage_profile(conn, profile)
+    return conn
+
+
+def get_storage_info(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """读取连接当前生效的存储参数（用于调试和基准测试输出）"""
+    info = {}
+    for key in _PRAGMA_ORDER:
+        try:
+            row = conn.execute(f"PRAGMA {key}").fetchone()
+            info[key] = row[0] if row else None
+        except sqlite3.Error:
+            info[key] = None
+    return info
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并发文件下载
+获取下载链接是受限的API请求，仍由主线程逐个发出并经账号共用的速率控制器排队；
+拿到签名链接后把CDN传输交给工作线程并发执行，传输之间不再插入下载间隔。
+同一账号（Cookie）同时进行的传输数有上限，多个下载任务共用该名额；
+下载时间等数据库写入只在主线程进行。
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, Optional, Iterable
+
+import requests
+
+from rate_controller import account_key
+
+
+class TransferSlots:
+    """账号的CDN传输名额（上限可调整的信号量）"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout: float) -> bool:
+        with self._cond:
+            if self.in_use >= self.limit:
+                self._cond.wait(timeout)
+            if self.in_use >= self.limit:
+                return False
+            self.in_use += 1
+            return True
+
+    def release(self):
+        with self._cond:
+            self.in_use -= 1
+            self._cond.notify_all()
+
+    def set_limit(self, limit: int):
+        with self._cond:
+            self.limit = limit
+            self._cond.notify_all()
+
+
+_transfer_slots: Dict[str, TransferSlots] = {}
+_slots_lock = threading.Lock()
+_max_transfers_per_account = 4
+
+
+def get_transfer_slots(cookie: str) -> TransferSlots:
+    """获取账号共用的传输名额"""
+    key = account_key(cookie)
+    with _slots_lock:
+        if key not in _transfer_slots:
+            _transfer_slots[key] = TransferSlots(_max_transfers_per_account)
+        return _transfer_slots[key]
+
+
+def set_max_transfers_per_account(limit: int):
+    """设置每个账号同时进行的CDN传输数上限（包括之后创建的账号）"""
+    global _max_transfers_per_account
+    with _slots_lock:
+        _max_transfers_per_account = max(1, int(limit))
+        for slots in _transfer_slots.values():
+            slots.set_limit(_max_transfers_per_account)
+
+
+def get_download_pool_settings() -> Dict[str, Any]:
+    with _slots_lock:
+        return {
+            'max_transfers_per_account': _max_transfers_per_account,
+            'accounts': {key: {'in_use': slots.in_use, 'limit': slots.limit}
+                         for key, slots in _transfer_slots.items()},
+        }
+
+
+class DownloadProgress:
+    """下载任务的汇总进度（工作线程累加字节数，主线程累加文件数）"""
+
+    def __init__(self, total_files: Optional[int] = None):
+        self.total_files = total_files
+        self.processed = 0
+        self.downloaded = 0
+        self.skipped = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.bytes_downloaded = 0
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    def add_bytes(self, size: int):
+        with self._lock:
+            self.bytes_downloaded += size
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            elapsed = time.time() - self.started_at
+            return {
+                'total_files': self.total_files,
+                'processed': self.processed,
+                'downloaded': self.downloaded,
+                'skipped': self.skipped,
+                'failed': self.failed,
+                'in_flight': self.in_flight,
+                'bytes_downloaded': self.bytes_downloaded,
+                'elapsed_s': round(elapsed, 1),
+                'bytes_per_s': round(self.bytes_downloaded / elapsed, 1) if elapsed > 0 else 0.0,
+            }
+
+    def summary(self) -> str:
+        s = self.snapshot()
+        total = f"/{s['total_files']}" if s['total_files'] else ""
+        return (f"📊 总进度: {s['processed']}{total} (成功 {s['downloaded']}, 跳过 {s['skipped']}, "
+                f"失败 {s['failed']})，传输中 {s['in_flight']}，已下载 {s['bytes_downloaded']/1024/1024:.1f}MB，"
+                f"速度 {s['bytes_per_s']/1024/1024:.2f}MB/s")
+
+
+class DownloadPool:
+    """
+    ZSXQFileDownloader 的并发下载
+
+    使用下载器的 _prepare_download / get_download_url（主线程）、
+    _transfer_file（工作线程）和 _finish_download（主线程）三个步骤
+    """
+
+    SLOT_WAIT = 1.0  # 等待传输名额时检查停止标志的间隔（秒）
+
+    def __init__(self, downloader, concurrency: int):
+        self.downloader = downloader
+        self.concurrency = max(1, concurrency)
+        self.slots = get_transfer_slots(downloader.cookie)
+        self.progress = DownloadProgress()
+        self._local = threading.local()
+        self._in_flight: Dict[Any, Dict[str, Any]] = {}
+
+    def run(self, file_infos: Iterable[Dict[str, Any]], total_files: Optional[int] = None,
+            limit: Optional[int] = None) -> Dict[str, int]:
+        """
+        下载一组文件
+
+        Args:
+            file_infos: 文件信息（与 download_file 的参数相同），可以是边翻页边产出的生成器
+            total_files: 文件总数（用于进度显示），未知时为 None
+            limit: 成功下载的文件数达到该值后不再开始新的下载
+
+        Returns:
+            与顺序下载相同的统计字典，另含已下载字节数
+        """
+        downloader = self.downloader
+        self.progress.total_files = total_files
+        downloader.log(f"🚀 并发下载: 最多 {self.concurrency} 个传输，"
+                       f"账号传输上限 {self.slots.limit}，下载链接仍按账号限速获取")
+
+        executor = ThreadPoolExecutor(max_workers=self.concurrency,
+                                      thread_name_prefix=f"download-{downloader.group_id}")
+        try:
+            for file_info in file_infos:
+                self._collect(block=False)
+                if limit is not None:
+                    while self._in_flight and self.progress.downloaded + len(self._in_flight) >= limit:
+                        self._collect(block=True)
+                    if self.progress.downloaded >= limit:
+                        break
+                if downloader.check_stop():
+                    downloader.log("🛑 下载任务被停止")
+                    break
+
+                file_name = file_info.get('file', {}).get('name', 'Unknown')
+                total = f"/{total_files}" if total_files else ""
+                downloader.log(f"【{self.progress.processed + len(self._in_flight) + 1}{total}】{file_name}")
+
+                job = self._prepare(file_info)
+                if job is None:
+                    continue
+
+                # 等待空闲的工作线程和账号传输名额，再获取下载链接（签名链接有时效）
+                while len(self._in_flight) >= self.concurrency:
+                    self._collect(block=True)
+                if not self._acquire_slot():
+                    break
+
+                download_url = downloader.get_download_url(job['file_id'])
+                if not download_url:
+                    self.slots.release()
+                    downloader.log(f"   ❌ 无法获取下载链接")
+                    self._count('failed')
+                    continue
+
+                with self.progress._lock:
+                    self.progress.in_flight += 1
+                future = executor.submit(self._transfer, job, download_url)
+                self._in_flight[future] = job
+
+            while self._in_flight:
+                self._collect(block=True)
+        finally:
+            executor.shutdown(wait=True)
+            # 被停止时仍会等待传输中的文件结束，这里把结果计入统计
+            while self._in_flight:
+                self._collect(block=True)
+
+        snapshot = self.progress.snapshot()
+        downloader.log(self.progress.summary())
+        return {
+            'total_files': snapshot['processed'],
+            'downloaded': snapshot['downloaded'],
+            'skipped': snapshot['skipped'],
+            'failed': snapshot['failed'],
+            'bytes_downloaded': snapshot['bytes_downloaded'],
+        }
+
+    def _prepare(self, file_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """下载前检查；同名文件正在传输时等它完成后再检查（已下载的会被跳过）"""
+        while True:
+            job = self.downloader._prepare_download(file_info)
+            if job == "skipped":
+                self._count('skipped')
+                return None
+            if not job:
+                self._count('failed')
+                return None
+            if not any(other['file_path'] == job['file_path'] for other in self._in_flight.values()):
+                return job
+            self._collect(block=True)
+
+    def _acquire_slot(self) -> bool:
+        while not self.slots.acquire(self.SLOT_WAIT):
+            self._collect(block=False)
+            if self.downloader.check_stop():
+                self.downloader.log("🛑 下载任务被停止")
+                return False
+        return True
+
+    def _session(self) -> requests.Session:
+        """每个工作线程使用独立的 Session"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+        return session
+
+    def _transfer(self, job: Dict[str, Any], download_url: str) -> bool:
+        """工作线程：只做CDN传输，不访问数据库"""
+        try:
+            return self.downloader._transfer_file(job, download_url, self._session(),
+                                                  on_bytes=self.progress.add_bytes)
+        finally:
+            self.slots.release()
+
+    def _collect(self, block: bool):
+        """处理已结束的传输（主线程写入下载时间）"""
+        if not self._in_flight:
+            return
+        done, _ = wait(list(self._in_flight), timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for future in done:
+            job = self._in_flight.pop(future)
+            with self.progress._lock:
+                self.progress.in_flight -= 1
+            try:
+                ok = future.result()
+            except Exception as e:
+                self.downloader.log(f"   ❌ 下载异常: {job['file_name']}: {e}")
+                ok = False
+            if ok:
+                self.downloader._finish_download(job)
+                self._count('downloaded')
+            else:
+                self.downloader.log(f"   ❌ 下载失败: {job['file_name']}")
+                self._count('failed')
+
+    def _count(self, outcome: str):
+        with self.progress._lock:
+            setattr(self.progress, outcome, getattr(self.progress, outcome) + 1)
+            self.progress.processed += 1
+        self.downloader.log(self.progress.summary())
+        if self.downloader.progress_callback:
+            self.downloader.progress_callback(self.progress.snapshot())
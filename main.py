@@ -6,6 +6,7 @@
 import os
 import sys
 import asyncio
+import functools
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 import json
@@ -27,6 +28,16 @@ if project_root not in sys.path:
 
 # 导入现有的业务逻辑模块
 from zsxq_interactive_crawler import ZSXQInteractiveCrawler, load_config
+from zsxq_async_crawler import ZSXQAsyncCrawler
+from crawl_coverage import CrawlCoverage, format_api_time, from_ms
+from rate_controller import list_rate_controllers, set_hourly_budget, get_hourly_budget
+from crawl_scheduler import CrawlScheduler, CRAWL_MODES, run_crawl_mode
+from download_pool import set_max_transfers_per_account, get_download_pool_settings
+from blob_store import get_blob_store_settings, set_blob_store_settings, get_blob_store_dir, BlobStore
+from response_archive import (
+    get_archive_dir, get_archive_settings, set_archive_settings, archive_stats, replay_archive,
+    close_response_archive, close_all_response_archives
+)
 from db_path_manager import get_db_path_manager
 from image_cache_manager import get_image_cache_manager
 from accounts_manager import (
@@ -174,15 +185,26 @@ def get_cached_local_group_ids(force_refresh: bool = False) -> set:
     return _local_groups_cache.get("ids", set())
 
 
+async def run_blocking(func, *args, **kwargs):
+    """在默认线程池中执行阻塞函数（asyncio.to_thread 需要 Python 3.9）"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
 @app.on_event("startup")
 async def _init_local_groups_scan():
     """
     应用启动时后台异步执行一次扫描，不阻塞主线程。
     """
     try:
-        await asyncio.to_thread(scan_local_groups)
+        await run_blocking(scan_local_groups)
     except Exception as e:
         print(f"⚠️ 启动扫描本地群失败: {e}")
+
+@app.on_event("shutdown")
+def _close_response_archives():
+    """应用退出时结束所有归档分段，避免留下没有 gzip 结尾的分段"""
+    close_all_response_archives()
+
 # Pydantic模型定义
 class ConfigModel(BaseModel):
     cookie: str = Field(..., description="知识星球Cookie")
@@ -196,14 +218,51 @@ class CrawlHistoricalRequest(BaseModel):
     crawlIntervalMax: Optional[float] = Field(default=None, ge=1.0, le=60.0, description="爬取间隔最大值(秒)")
     longSleepIntervalMin: Optional[float] = Field(default=None, ge=60.0, le=3600.0, description="长休眠间隔最小值(秒)")
     longSleepIntervalMax: Optional[float] = Field(default=None, ge=60.0, le=3600.0, description="长休眠间隔最大值(秒)")
-    pagesPerBatch: Optional[int] = Field(default=None, ge=5, le=50, description="每批次页面数")
+    pagesPerBatch: Optional[int] = Field(default=None, ge=5, le=50, description="每批次页面数（仅在关闭自适应速率时生效）")
+    adaptiveRate: bool = Field(default=True, description="自适应请求速率：成功时逐步加快，被限流时自动降速")
+    engine: Optional[str] = Field(default=None, description="采集引擎: thread（默认，线程中执行）或 async（事件循环中并发执行）")
 
 class CrawlSettingsRequest(BaseModel):
     crawlIntervalMin: Optional[float] = Field(default=None, ge=1.0, le=60.0, description="爬取间隔最小值(秒)")
     crawlIntervalMax: Optional[float] = Field(default=None, ge=1.0, le=60.0, description="爬取间隔最大值(秒)")
     longSleepIntervalMin: Optional[float] = Field(default=None, ge=60.0, le=3600.0, description="长休眠间隔最小值(秒)")
     longSleepIntervalMax: Optional[float] = Field(default=None, ge=60.0, le=3600.0, description="长休眠间隔最大值(秒)")
-    pagesPerBatch: Optional[int] = Field(default=None, ge=5, le=50, description="每批次页面数")
+    pagesPerBatch: Optional[int] = Field(default=None, ge=5, le=50, description="每批次页面数（仅在关闭自适应速率时生效）")
+    adaptiveRate: bool = Field(default=True, description="自适应请求速率：成功时逐步加快，被限流时自动降速")
+    engine: Optional[str] = Field(default=None, description="采集引擎: thread（默认，线程中执行）或 async（事件循环中并发执行）")
+
+class CommentBackfillRequest(BaseModel):
+    maxTopics: Optional[int] = Field(default=None, ge=1, description="本次最多补全的话题数（默认直到队列清空）")
+    topicIntervalMin: float = Field(default=2.0, ge=0.5, le=60.0, description="话题间隔最小值(秒)")
+    topicIntervalMax: float = Field(default=5.0, ge=0.5, le=60.0, description="话题间隔最大值(秒)")
+    pageInterval: float = Field(default=1.0, ge=0.5, le=30.0, description="评论翻页间隔(秒)")
+    retryFailed: bool = Field(default=False, description="是否重新尝试已放弃的话题")
+
+class HotWindowRequest(BaseModel):
+    days: int = Field(default=7, ge=1, le=90, description="刷新最近多少天的话题")
+    perPage: int = Field(default=20, ge=1, le=100, description="每页数量")
+    repeatMinutes: Optional[int] = Field(default=None, ge=5, le=1440, description="定时重复间隔(分钟)，不设置则只执行一次")
+    crawlIntervalMin: Optional[float] = Field(default=None, ge=1.0, le=60.0, description="爬取间隔最小值(秒)")
+    crawlIntervalMax: Optional[float] = Field(default=None, ge=1.0, le=60.0, description="爬取间隔最大值(秒)")
+
+class ScheduleCrawlRequest(BaseModel):
+    groupIds: List[str] = Field(..., min_length=1, description="要爬取的群组ID列表")
+    mode: str = Field(default="latest_until_complete", description="爬取模式: latest_until_complete / incremental / historical / all_historical / hot_window / gaps")
+    pages: Optional[int] = Field(default=None, ge=1, le=1000, description="页数（incremental / historical）")
+    perPage: Optional[int] = Field(default=None, ge=1, le=100, description="每页数量")
+    days: Optional[int] = Field(default=None, ge=1, le=90, description="刷新天数（hot_window）")
+
+class SchedulerSettingsRequest(BaseModel):
+    maxGroupsPerAccount: Optional[int] = Field(default=None, ge=1, le=10, description="每个账号同时爬取的群组数上限")
+    hourlyRequestBudget: Optional[int] = Field(default=None, ge=0, le=100000, description="每个账号每小时请求预算，0表示不限制")
+
+class ArchiveSettingsRequest(BaseModel):
+    enabled: Optional[bool] = Field(default=None, description="是否归档API原始响应")
+    segmentMb: Optional[int] = Field(default=None, ge=1, le=1024, description="单个归档分段的大小上限(MB)")
+
+class ArchiveReplayRequest(BaseModel):
+    topics: bool = Field(default=True, description="重放话题和评论响应到话题库")
+    files: bool = Field(default=True, description="重放文件列表响应到文件库")
 
 class FileDownloadRequest(BaseModel):
     max_files: Optional[int] = Field(default=None, description="最大下载文件数")
@@ -216,6 +275,14 @@ class FileDownloadRequest(BaseModel):
     download_interval_max: Optional[float] = Field(default=None, ge=1.0, le=300.0, description="随机下载间隔最大值（秒）")
     long_sleep_interval_min: Optional[float] = Field(default=None, ge=10.0, le=3600.0, description="随机长休眠间隔最小值（秒）")
     long_sleep_interval_max: Optional[float] = Field(default=None, ge=10.0, le=3600.0, description="随机长休眠间隔最大值（秒）")
+    concurrency: int = Field(default=1, ge=1, le=16, description="并发下载数，大于1时CDN传输并发进行，下载链接仍按账号限速获取")
+
+class BlobStoreSettingsRequest(BaseModel):
+    enabled: Optional[bool] = Field(default=None, description="是否按文件hash共享存储并去重")
+    linkMode: Optional[str] = Field(default=None, description="下载目录中的链接方式: hardlink 或 symlink")
+
+class DownloadPoolSettingsRequest(BaseModel):
+    maxTransfersPerAccount: int = Field(..., ge=1, le=32, description="每个账号同时进行的文件传输数上限")
 
 class AccountCreateRequest(BaseModel):
     cookie: str = Field(..., description="账号Cookie")
@@ -396,6 +463,12 @@ def update_task(task_id: str, status: str, message: str, result: Optional[Dict[s
         # 添加状态变更日志
         add_task_log(task_id, f"状态更新: {message}")
 
+def set_task_progress(task_id: str, progress: Dict[str, Any]):
+    """更新任务的进度信息（不写日志）"""
+    if task_id in current_tasks:
+        current_tasks[task_id]["progress"] = progress
+        current_tasks[task_id]["updated_at"] = datetime.now()
+
 def stop_task(task_id: str) -> bool:
     """停止任务"""
     if task_id not in current_tasks:
@@ -897,7 +970,8 @@ def run_crawl_historical_task(task_id: str, group_id: str, pages: int, per_page:
                 crawl_interval_max=crawl_settings.crawlIntervalMax,
                 long_sleep_interval_min=crawl_settings.longSleepIntervalMin,
                 long_sleep_interval_max=crawl_settings.longSleepIntervalMax,
-                pages_per_batch=crawl_settings.pagesPerBatch
+                pages_per_batch=crawl_settings.pagesPerBatch,
+                adaptive=crawl_settings.adaptiveRate
             )
 
         # 检查任务是否在设置过程中被停止
@@ -925,18 +999,276 @@ def run_crawl_historical_task(task_id: str, group_id: str, pages: int, per_page:
             return
 
         add_task_log(task_id, f"✅ 获取完成！新增话题: {result.get('new_topics', 0)}, 更新话题: {result.get('updated_topics', 0)}")
+        chain_comment_backfill(task_id, group_id, crawler, result)
         update_task(task_id, "completed", "历史数据爬取完成", result)
     except Exception as e:
         if not is_task_stopped(task_id):
             add_task_log(task_id, f"❌ 获取失败: {str(e)}")
             update_task(task_id, "failed", f"爬取失败: {str(e)}")
+    finally:
+        close_response_archive(group_id)
+
+async def run_async_crawl_task(task_id: str, group_id: str, mode: str, crawl_settings=None, **kwargs):
+    """在事件循环中执行爬取任务（异步采集引擎），多个群组的任务可在同一进程内并发进行"""
+    crawler = None
+    try:
+        update_task(task_id, "running", f"开始异步爬取 ({mode})...")
+
+        def log_callback(message: str):
+            add_task_log(task_id, message)
+
+        def stop_check():
+            return is_task_stopped(task_id)
+
+        # Cookie匹配和数据库初始化可能较慢，放到线程中执行
+        cookie = await run_blocking(get_cookie_for_group, group_id)
+        db_path = get_db_path_manager().get_topics_db_path(group_id)
+        crawler = await run_blocking(ZSXQAsyncCrawler, cookie, group_id, db_path, log_callback)
+        crawler.stop_check_func = stop_check
+
+        if crawl_settings:
+            crawler.set_custom_intervals(
+                crawl_interval_min=crawl_settings.crawlIntervalMin,
+                crawl_interval_max=crawl_settings.crawlIntervalMax,
+                long_sleep_interval_min=crawl_settings.longSleepIntervalMin,
+                long_sleep_interval_max=crawl_settings.longSleepIntervalMax,
+                pages_per_batch=crawl_settings.pagesPerBatch,
+                adaptive=crawl_settings.adaptiveRate
+            )
+
+        if is_task_stopped(task_id):
+            add_task_log(task_id, "🛑 任务在初始化过程中被停止")
+            return
+
+        add_task_log(task_id, "⚡ 使用异步采集引擎")
+        result = await crawler.run(mode, **kwargs)
+
+        if is_task_stopped(task_id):
+            return
+
+        if result and result.get('expired'):
+            add_task_log(task_id, f"❌ 会员已过期: {result.get('message', '成员体验已到期')}")
+            update_task(task_id, "failed", "会员已过期", {"expired": True, "code": result.get('code'), "message": result.get('message')})
+            return
+
+        add_task_log(task_id, f"✅ 异步爬取完成！新增话题: {result.get('new_topics', 0)}, 更新话题: {result.get('updated_topics', 0)}")
+        chain_comment_backfill(task_id, group_id, crawler, result)
+        update_task(task_id, "completed", "异步爬取完成", result)
+    except Exception as e:
+        if not is_task_stopped(task_id):
+            add_task_log(task_id, f"❌ 异步爬取失败: {str(e)}")
+            update_task(task_id, "failed", f"异步爬取失败: {str(e)}")
+    finally:
+        if crawler:
+            await crawler.close()
+
+def run_comment_backfill_task(task_id: str, group_id: str, settings: Optional[CommentBackfillRequest] = None):
+    """后台执行评论补全任务：消费评论补全队列，使用独立的数据库连接和请求间隔"""
+    crawler = None
+    try:
+        from comment_backfill import CommentBackfillWorker
+
+        settings = settings or CommentBackfillRequest()
+        update_task(task_id, "running", "开始补全评论...")
+
+        def log_callback(message: str):
+            add_task_log(task_id, message)
+
+        def stop_check():
+            return is_task_stopped(task_id)
+
+        cookie = get_cookie_for_group(group_id)
+        db_path = get_db_path_manager().get_topics_db_path(group_id)
+        crawler = ZSXQInteractiveCrawler(cookie, group_id, db_path, log_callback)
+        crawler.stop_check_func = stop_check
+
+        if settings.retryFailed:
+            reset = crawler.db.reset_comment_backfill_failures()
+            if reset:
+                add_task_log(task_id, f"🔄 重新尝试 {reset} 个已放弃的话题")
+
+        interval_min = min(settings.topicIntervalMin, settings.topicIntervalMax)
+        interval_max = max(settings.topicIntervalMin, settings.topicIntervalMax)
+        worker = CommentBackfillWorker(crawler, topic_interval=(interval_min, interval_max),
+                                       page_interval=settings.pageInterval)
+        result = worker.run(max_topics=settings.maxTopics)
+
+        if is_task_stopped(task_id):
+            return
+
+        result['queue'] = crawler.db.get_comment_backfill_status()
+        update_task(task_id, "completed", "评论补全完成", result)
+    except Exception as e:
+        if not is_task_stopped(task_id):
+            add_task_log(task_id, f"❌ 评论补全失败: {str(e)}")
+            update_task(task_id, "failed", f"评论补全失败: {str(e)}")
+    finally:
+        if crawler:
+            crawler.close()
+
+# 每个群组最近一次创建的评论补全任务（同一群组同时只运行一个）
+comment_backfill_tasks: Dict[str, str] = {}
+
+def start_comment_backfill_task(group_id: str, settings: Optional[CommentBackfillRequest] = None) -> str:
+    """创建评论补全任务并在后台线程中执行"""
+    import threading
+
+    task_id = create_task("comment_backfill", f"补全评论 (群组: {group_id})")
+    comment_backfill_tasks[group_id] = task_id
+    threading.Thread(target=run_comment_backfill_task, args=(task_id, group_id, settings), daemon=True).start()
+    return task_id
+
+def chain_comment_backfill(task_id: str, group_id: str, crawler, result: Optional[Dict[str, Any]]):
+    """爬取任务完成后，若评论补全队列中有待处理话题，自动创建评论补全任务"""
+    try:
+        pending = crawler.db.get_comment_backfill_status()['pending_topics']
+    except Exception as e:
+        add_task_log(task_id, f"⚠️ 读取评论补全队列失败: {e}")
+        return
+    if not pending or is_task_stopped(task_id):
+        return
+
+    running_task_id = comment_backfill_tasks.get(group_id)
+    if running_task_id and current_tasks.get(running_task_id, {}).get('status') in ('pending', 'running'):
+        add_task_log(task_id, f"💬 {pending} 个话题的评论待补全，评论补全任务 {running_task_id} 正在运行")
+        return
+
+    backfill_task_id = start_comment_backfill_task(group_id)
+    add_task_log(task_id, f"💬 {pending} 个话题的评论待补全，已创建评论补全任务 {backfill_task_id}")
+    if isinstance(result, dict):
+        result['comment_backfill_task_id'] = backfill_task_id
+
+def run_hot_window_task(task_id: str, group_id: str, settings: HotWindowRequest):
+    """后台执行热点窗口刷新，设置了 repeatMinutes 时按间隔重复执行直到任务被停止"""
+    crawler = None
+    try:
+        update_task(task_id, "running", f"开始刷新最近 {settings.days} 天的话题统计...")
+
+        def log_callback(message: str):
+            add_task_log(task_id, message)
+
+        def stop_check():
+            return is_task_stopped(task_id)
+
+        cookie = get_cookie_for_group(group_id)
+        db_path = get_db_path_manager().get_topics_db_path(group_id)
+        crawler = ZSXQInteractiveCrawler(cookie, group_id, db_path, log_callback)
+        crawler.stop_check_func = stop_check
+        if settings.crawlIntervalMin or settings.crawlIntervalMax:
+            crawler.set_custom_intervals(crawl_interval_min=settings.crawlIntervalMin,
+                                         crawl_interval_max=settings.crawlIntervalMax)
+
+        runs = 0
+        while True:
+            result = crawler.crawl_hot_window(days=settings.days, per_page=settings.perPage)
+            runs += 1
+            if is_task_stopped(task_id):
+                return
+
+            if result and result.get('expired'):
+                add_task_log(task_id, f"❌ 会员已过期: {result.get('message', '成员体验已到期')}")
+                update_task(task_id, "failed", "会员已过期", {"expired": True, "code": result.get('code'), "message": result.get('message')})
+                return
+
+            chain_comment_backfill(task_id, group_id, crawler, result)
+            if not settings.repeatMinutes:
+                break
+
+            next_run = datetime.now().timestamp() + settings.repeatMinutes * 60
+            add_task_log(task_id, f"⏰ 第 {runs} 次刷新完成，下次刷新: {datetime.fromtimestamp(next_run).strftime('%H:%M:%S')}")
+            update_task(task_id, "running", f"已刷新 {runs} 次，等待下次刷新", result)
+            crawler._interruptible_sleep(settings.repeatMinutes * 60)
+            if is_task_stopped(task_id):
+                return
+
+        update_task(task_id, "completed", "热点窗口刷新完成", result)
+    except Exception as e:
+        if not is_task_stopped(task_id):
+            add_task_log(task_id, f"❌ 热点窗口刷新失败: {str(e)}")
+            update_task(task_id, "failed", f"热点窗口刷新失败: {str(e)}")
+    finally:
+        if crawler:
+            crawler.close()
+
+def run_archive_replay_task(task_id: str, group_id: str, request: ArchiveReplayRequest):
+    """后台执行归档重放任务"""
+    try:
+        update_task(task_id, "running", "开始重放归档响应...")
+        path_manager = get_db_path_manager()
+        result = replay_archive(
+            get_archive_dir(group_id),
+            path_manager.get_topics_db_path(group_id) if request.topics else None,
+            path_manager.get_files_db_path(group_id) if request.files else None,
+            log_callback=lambda message: add_task_log(task_id, message),
+            stop_check=lambda: is_task_stopped(task_id),
+        )
+        if result['stopped']:
+            update_task(task_id, "cancelled", "任务已取消", result)
+        else:
+            update_task(task_id, "completed", f"重放完成: {result['records']} 条记录", result)
+    except Exception as e:
+        add_task_log(task_id, f"❌ 归档重放失败: {str(e)}")
+        update_task(task_id, "failed", f"归档重放失败: {str(e)}")
+
+def run_scheduled_crawl_job(job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """执行调度器分配的一个爬取任务（在调度器的任务线程中运行）"""
+    task_id = job['task_id']
+    group_id = job['group_id']
+    crawler = None
+    try:
+        if is_task_stopped(task_id):
+            job['stop_requested'] = True
+            return None
+        update_task(task_id, "running", f"开始执行 {job['mode']} (群组: {group_id})")
+
+        def log_callback(message: str):
+            add_task_log(task_id, message)
+
+        def stop_check():
+            return job['stop_requested'] or is_task_stopped(task_id)
+
+        cookie = get_cookie_for_group(group_id)
+        db_path = get_db_path_manager().get_topics_db_path(group_id)
+        crawler = ZSXQInteractiveCrawler(cookie, group_id, db_path, log_callback)
+        crawler.stop_check_func = stop_check
+
+        result = run_crawl_mode(crawler, job['mode'], job['params'])
+        if stop_check():
+            update_task(task_id, "cancelled", "任务已取消", result)
+            return result
+
+        if result and result.get('expired'):
+            add_task_log(task_id, f"❌ 会员已过期: {result.get('message', '成员体验已到期')}")
+            update_task(task_id, "failed", "会员已过期", {"expired": True, "code": result.get('code'), "message": result.get('message')})
+            return result
+
+        chain_comment_backfill(task_id, group_id, crawler, result)
+        update_task(task_id, "completed", f"{job['mode']} 完成", result)
+        return result
+    except Exception as e:
+        if not is_task_stopped(task_id):
+            add_task_log(task_id, f"❌ 调度爬取失败: {str(e)}")
+            update_task(task_id, "failed", f"调度爬取失败: {str(e)}")
+        raise
+    finally:
+        if crawler:
+            crawler.close()
+
+crawl_scheduler: Optional[CrawlScheduler] = None
+
+def get_crawl_scheduler() -> CrawlScheduler:
+    """获取全局爬取调度器（首次调用时创建）"""
+    global crawl_scheduler
+    if crawl_scheduler is None:
+        crawl_scheduler = CrawlScheduler(get_cookie_for_group, run_scheduled_crawl_job)
+    return crawl_scheduler
 
 def run_file_download_task(task_id: str, group_id: str, max_files: Optional[int], sort_by: str,
                           download_interval: float = 1.0, long_sleep_interval: float = 60.0,
                           files_per_batch: int = 10, download_interval_min: Optional[float] = None,
                           download_interval_max: Optional[float] = None,
                           long_sleep_interval_min: Optional[float] = None,
-                          long_sleep_interval_max: Optional[float] = None):
+                          long_sleep_interval_max: Optional[float] = None, concurrency: int = 1):
     """后台执行文件下载任务"""
     try:
         update_task(task_id, "running", "开始文件下载...")
@@ -969,16 +1301,21 @@ def run_file_download_task(task_id: str, group_id: str, max_files: Optional[int]
             download_interval_min=download_interval_min,
             download_interval_max=download_interval_max,
             long_sleep_interval_min=long_sleep_interval_min,
-            long_sleep_interval_max=long_sleep_interval_max
+            long_sleep_interval_max=long_sleep_interval_max,
+            concurrency=concurrency
         )
         # 设置日志回调和停止检查函数
         downloader.log_callback = log_callback
         downloader.stop_check_func = stop_check
+        downloader.progress_callback = lambda progress: set_task_progress(task_id, progress)
 
         add_task_log(task_id, f"⚙️ 下载配置:")
-        add_task_log(task_id, f"   ⏱️ 单次下载间隔: {download_interval}秒")
-        add_task_log(task_id, f"   😴 长休眠间隔: {long_sleep_interval}秒")
-        add_task_log(task_id, f"   📦 批次大小: {files_per_batch}个文件")
+        if concurrency > 1:
+            add_task_log(task_id, f"   🚀 并发下载数: {concurrency}（传输之间不插入下载间隔）")
+        else:
+            add_task_log(task_id, f"   ⏱️ 单次下载间隔: {download_interval}秒")
+            add_task_log(task_id, f"   😴 长休眠间隔: {long_sleep_interval}秒")
+            add_task_log(task_id, f"   📦 批次大小: {files_per_batch}个文件")
 
         # 将下载器实例存储到全局字典中
         global file_downloader_instances
@@ -1022,6 +1359,7 @@ def run_file_download_task(task_id: str, group_id: str, max_files: Optional[int]
         # 清理下载器实例
         if task_id in file_downloader_instances:
             del file_downloader_instances[task_id]
+        close_response_archive(group_id)
 
 def run_single_file_download_task(task_id: str, group_id: str, file_id: int):
     """运行单个文件下载任务"""
@@ -1126,9 +1464,16 @@ def run_single_file_download_task(task_id: str, group_id: str, file_id: int):
 
             # 更新或插入文件状态
             downloader.file_db.cursor.execute('''
-                INSERT OR REPLACE INTO files
+                INSERT INTO files
                 (file_id, name, size, download_status, local_path, download_time, download_count)
                 VALUES (?, ?, ?, 'downloaded', ?, CURRENT_TIMESTAMP, ?)
+                ON CONFLICT(file_id) DO UPDATE SET
+                    name = excluded.name,
+                    size = excluded.size,
+                    download_status = excluded.download_status,
+                    local_path = excluded.local_path,
+                    download_time = excluded.download_time,
+                    download_count = excluded.download_count
             ''', (file_id, actual_file_name, actual_file_size, local_path,
                   actual_file_info.get('download_count', 0)))
             downloader.file_db.conn.commit()
@@ -1146,6 +1491,7 @@ def run_single_file_download_task(task_id: str, group_id: str, file_id: int):
         # 清理下载器实例
         if task_id in file_downloader_instances:
             del file_downloader_instances[task_id]
+        close_response_archive(group_id)
 
 def run_single_file_download_task_with_info(task_id: str, group_id: str, file_id: int,
                                            file_name: Optional[str] = None, file_size: Optional[int] = None):
@@ -1257,9 +1603,16 @@ def run_single_file_download_task_with_info(task_id: str, group_id: str, file_id
 
             # 更新或插入文件状态
             downloader.file_db.cursor.execute('''
-                INSERT OR REPLACE INTO files
+                INSERT INTO files
                 (file_id, name, size, download_status, local_path, download_time, download_count)
                 VALUES (?, ?, ?, 'downloaded', ?, CURRENT_TIMESTAMP, ?)
+                ON CONFLICT(file_id) DO UPDATE SET
+                    name = excluded.name,
+                    size = excluded.size,
+                    download_status = excluded.download_status,
+                    local_path = excluded.local_path,
+                    download_time = excluded.download_time,
+                    download_count = excluded.download_count
             ''', (file_id, actual_file_name, actual_file_size, local_path,
                   actual_file_info.get('download_count', 0)))
             downloader.file_db.conn.commit()
@@ -1277,6 +1630,7 @@ def run_single_file_download_task_with_info(task_id: str, group_id: str, file_id
         # 清理下载器实例
         if task_id in file_downloader_instances:
             del file_downloader_instances[task_id]
+        close_response_archive(group_id)
 
 # 群组相关辅助函数
 def fetch_groups_from_api(cookie: str) -> List[dict]:
@@ -1417,7 +1771,11 @@ async def crawl_historical(group_id: str, request: CrawlHistoricalRequest, backg
         task_id = create_task("crawl_historical", f"爬取历史数据 {request.pages} 页 (群组: {group_id})")
 
         # 添加后台任务
-        background_tasks.add_task(run_crawl_historical_task, task_id, group_id, request.pages, request.per_page, request)
+        if request.engine == 'async':
+            background_tasks.add_task(run_async_crawl_task, task_id, group_id, 'incremental', request,
+                                      pages=request.pages, per_page=request.per_page)
+        else:
+            background_tasks.add_task(run_crawl_historical_task, task_id, group_id, request.pages, request.per_page, request)
 
         return {"task_id": task_id, "message": "任务已创建，正在后台执行"}
     except Exception as e:
@@ -1464,7 +1822,8 @@ async def crawl_all(group_id: str, request: CrawlSettingsRequest, background_tas
                         crawl_interval_max=crawl_settings.crawlIntervalMax,
                         long_sleep_interval_min=crawl_settings.longSleepIntervalMin,
                         long_sleep_interval_max=crawl_settings.longSleepIntervalMax,
-                        pages_per_batch=crawl_settings.pagesPerBatch
+                        pages_per_batch=crawl_settings.pagesPerBatch,
+                        adaptive=crawl_settings.adaptiveRate
                     )
 
                 # 检查任务是否在设置过程中被停止
@@ -1502,13 +1861,19 @@ async def crawl_all(group_id: str, request: CrawlSettingsRequest, background_tas
 
                 add_task_log(task_id, f"🎉 全量爬取完成！")
                 add_task_log(task_id, f"📊 最终统计: 新增话题: {result.get('new_topics', 0)}, 更新话题: {result.get('updated_topics', 0)}, 总页数: {result.get('pages', 0)}")
+                chain_comment_backfill(task_id, group_id, crawler, result)
                 update_task(task_id, "completed", "全量爬取完成", result)
             except Exception as e:
                 add_task_log(task_id, f"❌ 全量爬取失败: {str(e)}")
                 update_task(task_id, "failed", f"全量爬取失败: {str(e)}")
+            finally:
+                close_response_archive(group_id)
 
         # 添加后台任务
-        background_tasks.add_task(run_crawl_all_task, task_id, group_id, request)
+        if request.engine == 'async':
+            background_tasks.add_task(run_async_crawl_task, task_id, group_id, 'all_historical', request)
+        else:
+            background_tasks.add_task(run_crawl_all_task, task_id, group_id, request)
 
         return {"task_id": task_id, "message": "任务已创建，正在后台执行"}
     except Exception as e:
@@ -1552,7 +1917,8 @@ async def crawl_incremental(group_id: str, request: CrawlHistoricalRequest, back
                         crawl_interval_max=crawl_settings.crawlIntervalMax,
                         long_sleep_interval_min=crawl_settings.longSleepIntervalMin,
                         long_sleep_interval_max=crawl_settings.longSleepIntervalMax,
-                        pages_per_batch=crawl_settings.pagesPerBatch
+                        pages_per_batch=crawl_settings.pagesPerBatch,
+                        adaptive=crawl_settings.adaptiveRate
                     )
 
                 # 检查任务是否在设置过程中被停止
@@ -1570,14 +1936,21 @@ async def crawl_incremental(group_id: str, request: CrawlHistoricalRequest, back
                     return
 
                 add_task_log(task_id, f"✅ 增量爬取完成！新增话题: {result.get('new_topics', 0)}, 更新话题: {result.get('updated_topics', 0)}")
+                chain_comment_backfill(task_id, group_id, crawler, result)
                 update_task(task_id, "completed", "增量爬取完成", result)
             except Exception as e:
                 if not is_task_stopped(task_id):
                     add_task_log(task_id, f"❌ 增量爬取失败: {str(e)}")
                     update_task(task_id, "failed", f"增量爬取失败: {str(e)}")
+            finally:
+                close_response_archive(group_id)
 
         # 添加后台任务
-        background_tasks.add_task(run_crawl_incremental_task, task_id, group_id, request.pages, request.per_page, request)
+        if request.engine == 'async':
+            background_tasks.add_task(run_async_crawl_task, task_id, group_id, 'incremental', request,
+                                      pages=request.pages, per_page=request.per_page)
+        else:
+            background_tasks.add_task(run_crawl_incremental_task, task_id, group_id, request.pages, request.per_page, request)
 
         return {"task_id": task_id, "message": "任务已创建，正在后台执行"}
     except Exception as e:
@@ -1621,7 +1994,8 @@ async def crawl_latest_until_complete(group_id: str, request: CrawlSettingsReque
                         crawl_interval_max=crawl_settings.crawlIntervalMax,
                         long_sleep_interval_min=crawl_settings.longSleepIntervalMin,
                         long_sleep_interval_max=crawl_settings.longSleepIntervalMax,
-                        pages_per_batch=crawl_settings.pagesPerBatch
+                        pages_per_batch=crawl_settings.pagesPerBatch,
+                        adaptive=crawl_settings.adaptiveRate
                     )
 
                 # 检查任务是否在设置过程中被停止
@@ -1645,19 +2019,127 @@ async def crawl_latest_until_complete(group_id: str, request: CrawlSettingsReque
                     return
 
                 add_task_log(task_id, f"✅ 获取最新记录完成！新增话题: {result.get('new_topics', 0)}, 更新话题: {result.get('updated_topics', 0)}")
+                chain_comment_backfill(task_id, group_id, crawler, result)
                 update_task(task_id, "completed", "获取最新记录完成", result)
             except Exception as e:
                 if not is_task_stopped(task_id):
                     add_task_log(task_id, f"❌ 获取最新记录失败: {str(e)}")
                     update_task(task_id, "failed", f"获取最新记录失败: {str(e)}")
+            finally:
+                close_response_archive(group_id)
 
         # 添加后台任务
-        background_tasks.add_task(run_crawl_latest_task, task_id, group_id, request)
+        if request.engine == 'async':
+            background_tasks.add_task(run_async_crawl_task, task_id, group_id, 'latest_until_complete', request)
+        else:
+            background_tasks.add_task(run_crawl_latest_task, task_id, group_id, request)
 
         return {"task_id": task_id, "message": "任务已创建，正在后台执行"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"创建获取最新记录任务失败: {str(e)}")
 
+@app.post("/api/crawl/comments/{group_id}")
+async def crawl_comment_backfill(group_id: str, request: CommentBackfillRequest):
+    """补全评论：按缺口大小依次获取评论补全队列中的话题"""
+    try:
+        task_id = start_comment_backfill_task(group_id, request)
+        return {"task_id": task_id, "message": "任务已创建，正在后台执行"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"创建评论补全任务失败: {str(e)}")
+
+@app.post("/api/crawl/hot-window/{group_id}")
+async def crawl_hot_window(group_id: str, request: HotWindowRequest):
+    """热点窗口刷新：通过话题列表页批量刷新最近N天话题的统计数据，可按间隔定时重复"""
+    try:
+        import threading
+
+        task_id = create_task("crawl_hot_window", f"热点窗口刷新 (群组: {group_id}, 最近{request.days}天)")
+        # 定时重复的任务可能长期运行，使用独立线程而不占用后台任务线程池
+        threading.Thread(target=run_hot_window_task, args=(task_id, group_id, request), daemon=True).start()
+        return {"task_id": task_id, "message": "任务已创建，正在后台执行"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"创建热点窗口刷新任务失败: {str(e)}")
+
+@app.post("/api/scheduler/jobs")
+async def schedule_crawl_jobs(request: ScheduleCrawlRequest):
+    """提交多个群组的爬取任务，由调度器按账号限制并发并排队执行"""
+    if request.mode not in CRAWL_MODES:
+        raise HTTPException(status_code=400, detail=f"不支持的爬取模式: {request.mode}")
+    try:
+        scheduler = get_crawl_scheduler()
+        params = {'pages': request.pages, 'per_page': request.perPage, 'days': request.days}
+        jobs = []
+        for group_id in request.groupIds:
+            task_id = create_task(f"scheduled_{request.mode}", f"调度爬取 {request.mode} (群组: {group_id})，排队中")
+            job = scheduler.submit(group_id, request.mode, params, task_id=task_id)
+            jobs.append({"job_id": job['job_id'], "task_id": task_id, "group_id": group_id})
+        return {"jobs": jobs, "message": f"已提交 {len(jobs)} 个爬取任务"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"提交调度任务失败: {str(e)}")
+
+@app.get("/api/scheduler")
+async def get_scheduler_status():
+    """调度器队列状态：各账号运行中和排队的群组、任务记录及账号请求速率"""
+    try:
+        status = get_crawl_scheduler().snapshot()
+        status['rate_control'] = list_rate_controllers()
+        return status
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取调度器状态失败: {str(e)}")
+
+@app.delete("/api/scheduler/jobs/{job_id}")
+async def cancel_scheduled_job(job_id: str):
+    """取消调度任务：排队中的移出队列，运行中的在下一个检查点停止"""
+    scheduler = get_crawl_scheduler()
+    job = scheduler.jobs.get(job_id)
+    if not job or not scheduler.cancel(job_id):
+        raise HTTPException(status_code=404, detail="任务不存在或已结束")
+    if job['task_id']:
+        if job['status'] == 'cancelled':
+            update_task(job['task_id'], "cancelled", "任务已取消")
+        else:
+            stop_task(job['task_id'])
+    return {"job_id": job_id, "status": job['status']}
+
+@app.post("/api/scheduler/settings")
+async def update_scheduler_settings(request: SchedulerSettingsRequest):
+    """调整每个账号的并发群组数和每小时请求预算"""
+    scheduler = get_crawl_scheduler()
+    if request.maxGroupsPerAccount is not None:
+        scheduler.set_max_groups_per_account(request.maxGroupsPerAccount)
+    if request.hourlyRequestBudget is not None:
+        set_hourly_budget(request.hourlyRequestBudget)
+    return {"max_groups_per_account": scheduler.max_groups_per_account,
+            "hourly_request_budget": get_hourly_budget()}
+
+@app.get("/api/groups/{group_id}/comment-backfill")
+async def get_comment_backfill_status(group_id: str):
+    """获取评论补全队列概况"""
+    try:
+        crawler = get_crawler_for_group(group_id)
+        return crawler.db.get_comment_backfill_status()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取评论补全队列失败: {str(e)}")
+
+@app.get("/api/groups/{group_id}/crawl-state")
+async def get_crawl_state(group_id: str):
+    """获取群组各爬取模式的断点"""
+    try:
+        crawler = get_crawler_for_group(group_id)
+        return {"group_id": group_id, "states": crawler.db.list_crawl_states(group_id)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取爬取断点失败: {str(e)}")
+
+@app.delete("/api/groups/{group_id}/crawl-state")
+async def reset_crawl_state(group_id: str, mode: Optional[str] = None):
+    """清除爬取断点，下次爬取从头开始（不指定mode时清除全部模式）"""
+    try:
+        crawler = get_crawler_for_group(group_id)
+        removed = crawler.db.reset_crawl_state(group_id, mode)
+        return {"message": f"已清除 {removed} 个爬取断点", "removed": removed}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"清除爬取断点失败: {str(e)}")
+
 # 文件相关API路由
 @app.post("/api/files/collect/{group_id}")
 async def collect_files(group_id: str, background_tasks: BackgroundTasks):
@@ -1719,6 +2201,7 @@ async def collect_files(group_id: str, background_tasks: BackgroundTasks):
                 # 清理下载器实例
                 if task_id in file_downloader_instances:
                     del file_downloader_instances[task_id]
+                close_response_archive(group_id)
 
         # 添加后台任务
         background_tasks.add_task(run_collect_files_task, task_id, group_id)
@@ -1746,7 +2229,8 @@ async def download_files(group_id: str, request: FileDownloadRequest, background
             request.download_interval_min,
             request.download_interval_max,
             request.long_sleep_interval_min,
-            request.long_sleep_interval_max
+            request.long_sleep_interval_max,
+            request.concurrency
         )
 
         return {"task_id": task_id, "message": "任务已创建，正在后台执行"}
@@ -2060,121 +2544,61 @@ async def clear_topic_database(group_id: str):
 
 # 数据查询API路由
 @app.get("/api/topics")
-async def get_topics(page: int = 1, per_page: int = 20, search: Optional[str] = None):
-    """获取话题列表"""
+async def get_topics(page: int = 1, per_page: int = 20, search: Optional[str] = None, cursor: Optional[str] = None):
+    """获取话题列表（传入上一页返回的 next_cursor 可按游标翻页）"""
     try:
         crawler = get_crawler()
 
-        offset = (page - 1) * per_page
-
-        # 构建查询SQL
+        # 搜索走全文索引，按相关度排序
         if search:
-            query = """
-                SELECT topic_id, title, create_time, likes_count, comments_count, reading_count
-                FROM topics
-                WHERE title LIKE ?
-                ORDER BY create_time DESC
-                LIMIT ? OFFSET ?
-            """
-            params = (f"%{search}%", per_page, offset)
-        else:
-            query = """
-                SELECT topic_id, title, create_time, likes_count, comments_count, reading_count
-                FROM topics
-                ORDER BY create_time DESC
-                LIMIT ? OFFSET ?
-            """
-            params = (per_page, offset)
-
-        crawler.db.cursor.execute(query, params)
-        topics = crawler.db.cursor.fetchall()
-
-        # 获取总数
-        if search:
-            crawler.db.cursor.execute("SELECT COUNT(*) FROM topics WHERE title LIKE ?", (f"%{search}%",))
-        else:
-            crawler.db.cursor.execute("SELECT COUNT(*) FROM topics")
-        total = crawler.db.cursor.fetchone()[0]
+            result = crawler.db.search_topics(None, search, page, per_page)
+            return {
+                "topics": [
+                    {
+                        "topic_id": topic["topic_id"],
+                        "title": topic["title"],
+                        "create_time": topic["create_time"],
+                        "likes_count": topic["likes_count"],
+                        "comments_count": topic["comments_count"],
+                        "reading_count": topic["reading_count"],
+                        "highlight": topic["highlight"]
+                    }
+                    for topic in result["topics"]
+                ],
+                "pagination": result["pagination"]
+            }
 
+        result = crawler.db.get_all_topics(page, per_page, cursor)
         return {
             "topics": [
                 {
-                    "topic_id": topic[0],
-                    "title": topic[1],
-                    "create_time": topic[2],
-                    "likes_count": topic[3],
-                    "comments_count": topic[4],
-                    "reading_count": topic[5]
+                    "topic_id": topic["topic_id"],
+                    "title": topic["title"],
+                    "create_time": topic["create_time"],
+                    "likes_count": topic["likes_count"],
+                    "comments_count": topic["comments_count"],
+                    "reading_count": topic["reading_count"]
                 }
-                for topic in topics
+                for topic in result["topics"]
             ],
-            "pagination": {
-                "page": page,
-                "per_page": per_page,
-                "total": total,
-                "pages": (total + per_page - 1) // per_page
-            }
+            "pagination": result["pagination"]
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取话题列表失败: {str(e)}")
 
 @app.get("/api/files/{group_id}")
-async def get_files(group_id: str, page: int = 1, per_page: int = 20, status: Optional[str] = None):
-    """获取指定群组的文件列表"""
+async def get_files(group_id: str, page: int = 1, per_page: int = 20, status: Optional[str] = None,
+                    cursor: Optional[str] = None):
+    """获取指定群组的文件列表（传入上一页返回的 next_cursor 可按游标翻页）"""
     try:
         crawler = get_crawler_for_group(group_id)
         downloader = crawler.get_file_downloader()
 
-        offset = (page - 1) * per_page
-
-        # 构建查询SQL
-        if status:
-            query = """
-                SELECT file_id, name, size, download_count, create_time, download_status
-                FROM files
-                WHERE download_status = ?
-                ORDER BY create_time DESC
-                LIMIT ? OFFSET ?
-            """
-            params = (status, per_page, offset)
-        else:
-            query = """
-                SELECT file_id, name, size, download_count, create_time, download_status
-                FROM files
-                ORDER BY create_time DESC
-                LIMIT ? OFFSET ?
-            """
-            params = (per_page, offset)
-
-        downloader.file_db.cursor.execute(query, params)
-        files = downloader.file_db.cursor.fetchall()
-
-        # 获取总数
-        if status:
-            downloader.file_db.cursor.execute("SELECT COUNT(*) FROM files WHERE download_status = ?", (status,))
-        else:
-            downloader.file_db.cursor.execute("SELECT COUNT(*) FROM files")
-        total = downloader.file_db.cursor.fetchone()[0]
-
-        return {
-            "files": [
-                {
-                    "file_id": file[0],
-                    "name": file[1],
-                    "size": file[2],
-                    "download_count": file[3],
-                    "create_time": file[4],
-                    "download_status": file[5] if len(file) > 5 else "unknown"
-                }
-                for file in files
-            ],
-            "pagination": {
-                "page": page,
-                "per_page": per_page,
-                "total": total,
-                "pages": (total + per_page - 1) // per_page
-            }
-        }
+        return downloader.file_db.list_files(status, page, per_page, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取文件列表失败: {str(e)}")
 
@@ -2185,7 +2609,7 @@ async def refresh_local_groups():
     手动刷新本地群（output）扫描缓存；不抛错，异常时返回旧缓存。
     """
     try:
-        ids = await asyncio.to_thread(scan_local_groups)
+        ids = await run_blocking(scan_local_groups)
         return {"success": True, "count": len(ids), "groups": sorted(list(ids))}
     except Exception as e:
         cached = get_cached_local_group_ids(force_refresh=False) or set()
@@ -2396,6 +2820,7 @@ async def fetch_more_comments(topic_id: int, group_id: str):
             additional_comments = crawler.fetch_all_comments(topic_id, comments_count)
             if additional_comments:
                 crawler.db.import_additional_comments(topic_id, additional_comments)
+                crawler.db.complete_comment_backfill(topic_id)
                 crawler.db.conn.commit()
 
                 return {
@@ -2445,7 +2870,9 @@ async def delete_single_topic(topic_id: int, group_id: int):
             'articles',
             'talks',
             'topic_files',
-            'topic_tags'
+            'topic_tags',
+            'topic_fingerprints',
+            'comment_backfill_queue'
         ]
 
         for table in tables_to_clean:
@@ -2456,6 +2883,7 @@ async def delete_single_topic(topic_id: int, group_id: int):
 
         deleted = crawler.db.cursor.rowcount
         crawler.db.conn.commit()
+        crawler.db.reset_known_topic_ids()
 
         return {"success": True, "deleted_topic_id": topic_id, "deleted": deleted > 0}
     except Exception as e:
@@ -2497,8 +2925,7 @@ async def fetch_single_topic(group_id: str, topic_id: int, fetch_comments: bool
             raise HTTPException(status_code=400, detail="该话题不属于当前群组")
 
         # 判断话题是否已存在
-        crawler.db.cursor.execute('SELECT topic_id FROM topics WHERE topic_id = ?', (topic_id,))
-        existed = crawler.db.cursor.fetchone() is not None
+        existed = crawler.db.topic_exists(topic_id)
 
         # 导入话题完整数据
         crawler.db.import_topic_data(topic)
@@ -2513,6 +2940,7 @@ async def fetch_single_topic(group_id: str, topic_id: int, fetch_comments: bool
                     additional_comments = crawler.fetch_all_comments(topic_id, comments_count)
                     if additional_comments:
                         crawler.db.import_additional_comments(topic_id, additional_comments)
+                        crawler.db.complete_comment_backfill(topic_id)
                         crawler.db.conn.commit()
                         comments_fetched = len(additional_comments)
                 except Exception as e:
@@ -2547,7 +2975,8 @@ async def get_group_tags(group_id: str):
         raise HTTPException(status_code=500, detail=f"获取标签列表失败: {str(e)}")
 
 @app.get("/api/groups/{group_id}/tags/{tag_id}/topics")
-async def get_topics_by_tag(group_id: int, tag_id: int, page: int = 1, per_page: int = 20):
+async def get_topics_by_tag(group_id: int, tag_id: int, page: int = 1, per_page: int = 20,
+                            cursor: Optional[str] = None):
     """根据标签获取指定群组的话题列表"""
     try:
         # 使用指定群组的爬虫实例
@@ -2560,9 +2989,11 @@ async def get_topics_by_tag(group_id: int, tag_id: int, page: int = 1, per_page:
         if tag_count == 0:
             raise HTTPException(status_code=404, detail="标签在该群组中不存在")
             
-        result = crawler.db.get_topics_by_tag(tag_id, page, per_page)
+        result = crawler.db.get_topics_by_tag(tag_id, page, per_page, cursor)
         
         return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"根据标签获取话题失败: {str(e)}")
 
@@ -2749,106 +3180,20 @@ async def get_group_info(group_id: str):
         return build_fallback(note="exception_fallback")
 
 @app.get("/api/groups/{group_id}/topics")
-async def get_group_topics(group_id: int, page: int = 1, per_page: int = 20, search: Optional[str] = None):
-    """获取指定群组的话题列表"""
+async def get_group_topics(group_id: int, page: int = 1, per_page: int = 20, search: Optional[str] = None,
+                           cursor: Optional[str] = None):
+    """获取指定群组的话题列表（传入上一页返回的 next_cursor 可按游标翻页）"""
     try:
         # 使用指定群组的爬虫实例
         crawler = get_crawler_for_group(str(group_id))
 
-        offset = (page - 1) * per_page
-
-        # 构建查询SQL - 包含所有内容类型
-        if search:
-            query = """
-                SELECT
-                    t.topic_id, t.title, t.create_time, t.likes_count, t.comments_count,
-                    t.reading_count, t.type, t.digested, t.sticky,
-                    q.text as question_text,
-                    a.text as answer_text,
-                    tk.text as talk_text,
-                    u.user_id, u.name, u.avatar_url, t.imported_at
-                FROM topics t
-                LEFT JOIN questions q ON t.topic_id = q.topic_id
-                LEFT JOIN answers a ON t.topic_id = a.topic_id
-                LEFT JOIN talks tk ON t.topic_id = tk.topic_id
-                LEFT JOIN users u ON tk.owner_user_id = u.user_id
-                WHERE t.group_id = ? AND (t.title LIKE ? OR q.text LIKE ? OR tk.text LIKE ?)
-                ORDER BY t.create_time DESC
-                LIMIT ? OFFSET ?
-            """
-            params = (group_id, f"%{search}%", f"%{search}%", f"%{search}%", per_page, offset)
-        else:
-            query = """
-                SELECT
-                    t.topic_id, t.title, t.create_time, t.likes_count, t.comments_count,
-                    t.reading_count, t.type, t.digested, t.sticky,
-                    q.text as question_text,
-                    a.text as answer_text,
-                    tk.text as talk_text,
-                    u.user_id, u.name, u.avatar_url, t.imported_at
-                FROM topics t
-                LEFT JOIN questions q ON t.topic_id = q.topic_id
-                LEFT JOIN answers a ON t.topic_id = a.topic_id
-                LEFT JOIN talks tk ON t.topic_id = tk.topic_id
-                LEFT JOIN users u ON tk.owner_user_id = u.user_id
-                WHERE t.group_id = ?
-                ORDER BY t.create_time DESC
-                LIMIT ? OFFSET ?
-            """
-            params = (group_id, per_page, offset)
-
-        crawler.db.cursor.execute(query, params)
-        topics = crawler.db.cursor.fetchall()
-
-        # 获取总数
+        # 搜索走全文索引（按相关度排序，包含评论和回答）
         if search:
-            crawler.db.cursor.execute("SELECT COUNT(*) FROM topics WHERE group_id = ? AND title LIKE ?", (group_id, f"%{search}%"))
-        else:
-            crawler.db.cursor.execute("SELECT COUNT(*) FROM topics WHERE group_id = ?", (group_id,))
-        total = crawler.db.cursor.fetchone()[0]
-
-        # 处理话题数据
-        topics_list = []
-        for topic in topics:
-            topic_data = {
-                "topic_id": topic[0],
-                "title": topic[1],
-                "create_time": topic[2],
-                "likes_count": topic[3],
-                "comments_count": topic[4],
-                "reading_count": topic[5],
-                "type": topic[6],
-                "digested": bool(topic[7]) if topic[7] is not None else False,
-                "sticky": bool(topic[8]) if topic[8] is not None else False,
-                "imported_at": topic[15] if len(topic) > 15 else None  # 获取时间
-            }
-
-            # 添加内容文本
-            if topic[6] == 'q&a':
-                # 问答类型话题
-                topic_data['question_text'] = topic[9] if topic[9] else ''
-                topic_data['answer_text'] = topic[10] if topic[10] else ''
-            else:
-                # 其他类型话题（talk、article等）
-                topic_data['talk_text'] = topic[11] if topic[11] else ''
-                if topic[12]:  # 有作者信息
-                    topic_data['author'] = {
-                        'user_id': topic[12],
-                        'name': topic[13],
-                        'avatar_url': topic[14]
-                    }
+            return crawler.db.search_topics(group_id, search, page, per_page)
 
-            topics_list.append(topic_data)
-
-        return {
-            "topics": topics_list,
-            "pagination": {
-                "page": page,
-                "per_page": per_page,
-                "total": total,
-                "pages": (total + per_page - 1) // per_page
-            }
-        }
+        return crawler.db.get_group_topics(group_id, page, per_page, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取群组话题失败: {str(e)}")
 
@@ -2858,51 +3203,9 @@ async def get_group_stats(group_id: int):
     try:
         # 使用指定群组的爬虫实例
         crawler = get_crawler_for_group(str(group_id))
-        cursor = crawler.db.cursor
-
-        # 获取话题统计
-        cursor.execute("SELECT COUNT(*) FROM topics WHERE group_id = ?", (group_id,))
-        topics_count = cursor.fetchone()[0]
 
-        # 获取用户统计 - 从talks表获取，因为topics表没有user_id字段
-        cursor.execute("""
-            SELECT COUNT(DISTINCT t.owner_user_id)
-            FROM talks t
-            JOIN topics tp ON t.topic_id = tp.topic_id
-            WHERE tp.group_id = ?
-        """, (group_id,))
-        users_count = cursor.fetchone()[0]
-
-        # 获取最新话题时间
-        cursor.execute("SELECT MAX(create_time) FROM topics WHERE group_id = ?", (group_id,))
-        latest_topic_time = cursor.fetchone()[0]
-
-        # 获取最早话题时间
-        cursor.execute("SELECT MIN(create_time) FROM topics WHERE group_id = ?", (group_id,))
-        earliest_topic_time = cursor.fetchone()[0]
-
-        # 获取总点赞数
-        cursor.execute("SELECT SUM(likes_count) FROM topics WHERE group_id = ?", (group_id,))
-        total_likes = cursor.fetchone()[0] or 0
-
-        # 获取总评论数
-        cursor.execute("SELECT SUM(comments_count) FROM topics WHERE group_id = ?", (group_id,))
-        total_comments = cursor.fetchone()[0] or 0
-
-        # 获取总阅读数
-        cursor.execute("SELECT SUM(reading_count) FROM topics WHERE group_id = ?", (group_id,))
-        total_readings = cursor.fetchone()[0] or 0
-
-        return {
-            "group_id": group_id,
-            "topics_count": topics_count,
-            "users_count": users_count,
-            "latest_topic_time": latest_topic_time,
-            "earliest_topic_time": earliest_topic_time,
-            "total_likes": total_likes,
-            "total_comments": total_comments,
-            "total_readings": total_readings
-        }
+        # 统计值由导入和删除时的触发器维护，这里只读取一行
+        return crawler.db.get_group_stats(group_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取群组统计失败: {str(e)}")
 
@@ -2927,9 +3230,8 @@ async def delete_group_topics(group_id: int):
         # 使用指定群组的爬虫实例
         crawler = get_crawler_for_group(str(group_id))
 
-        # 获取删除前的统计信息
-        crawler.db.cursor.execute('SELECT COUNT(*) FROM topics WHERE group_id = ?', (group_id,))
-        topics_count = crawler.db.cursor.fetchone()[0]
+        # 获取删除前的统计信息（删除时群组统计由触发器同步扣减）
+        topics_count = crawler.db.get_group_topic_count(group_id)
 
         if topics_count == 0:
             return {
@@ -2950,6 +3252,10 @@ async def delete_group_topics(group_id: int):
             ('talks', 'topic_id'),
             ('topic_files', 'topic_id'),  # 添加话题文件表
             ('topic_tags', 'topic_id'),   # 添加话题标签关联表
+            ('comment_backfill_queue', 'topic_id'),
+            ('topic_fingerprints', 'topic_id'),
+            ('crawl_state', 'group_id'),
+            ('crawl_coverage', 'group_id'),
             ('topics', 'group_id')
         ]
 
@@ -2972,6 +3278,7 @@ async def delete_group_topics(group_id: int):
 
         # 提交事务
         crawler.db.conn.commit()
+        crawler.db.reset_known_topic_ids()
 
         return {
             "message": f"成功删除群组 {group_id} 的所有话题数据",
@@ -3108,6 +3415,73 @@ async def get_crawler_settings():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取爬虫设置失败: {str(e)}")
 
+@app.get("/api/settings/rate-control")
+async def get_rate_control_status():
+    """获取各账号自适应请求速率的当前状态和降速记录"""
+    try:
+        return {"controllers": list_rate_controllers()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取速率状态失败: {str(e)}")
+
+@app.get("/api/settings/download-pool")
+async def get_download_pool_config():
+    """获取并发下载的账号传输上限和各账号正在进行的传输数"""
+    return get_download_pool_settings()
+
+@app.post("/api/settings/download-pool")
+async def update_download_pool_config(request: DownloadPoolSettingsRequest):
+    """调整每个账号同时进行的文件传输数上限"""
+    set_max_transfers_per_account(request.maxTransfersPerAccount)
+    return get_download_pool_settings()
+
+@app.get("/api/settings/blob-store")
+async def get_blob_store_config():
+    """获取共享文件存储设置和已存储的文件数、大小"""
+    try:
+        settings = get_blob_store_settings()
+        settings["stats"] = BlobStore(get_blob_store_dir(), settings["link_mode"]).stats()
+        return settings
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取共享存储状态失败: {str(e)}")
+
+@app.post("/api/settings/blob-store")
+async def update_blob_store_config(request: BlobStoreSettingsRequest):
+    """开启/关闭按hash去重的共享文件存储，调整链接方式"""
+    try:
+        set_blob_store_settings(request.enabled, request.linkMode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return get_blob_store_settings()
+
+@app.get("/api/settings/archive")
+async def get_archive_config():
+    """获取API响应归档设置"""
+    return get_archive_settings()
+
+@app.post("/api/settings/archive")
+async def update_archive_config(request: ArchiveSettingsRequest):
+    """开启/关闭API响应归档，调整分段大小"""
+    set_archive_settings(request.enabled, request.segmentMb)
+    return get_archive_settings()
+
+@app.get("/api/groups/{group_id}/archive")
+async def get_group_archive(group_id: str):
+    """查看群组的响应归档：分段数、压缩后大小和各类记录数"""
+    try:
+        return archive_stats(get_archive_dir(group_id))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"读取归档失败: {str(e)}")
+
+@app.post("/api/groups/{group_id}/archive/replay")
+async def replay_group_archive(group_id: str, request: ArchiveReplayRequest, background_tasks: BackgroundTasks):
+    """从响应归档离线重建群组的话题库和文件库"""
+    try:
+        task_id = create_task("archive_replay", f"归档重放 (群组: {group_id})")
+        background_tasks.add_task(run_archive_replay_task, task_id, group_id, request)
+        return {"task_id": task_id, "message": "任务已创建，正在后台执行"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"创建归档重放任务失败: {str(e)}")
+
 class CrawlerSettingsRequest(BaseModel):
     min_delay: float = Field(default=2.0, ge=0.5, le=10.0)
     max_delay: float = Field(default=5.0, ge=1.0, le=20.0)
@@ -3130,6 +3504,7 @@ async def update_crawler_settings(request: CrawlerSettingsRequest):
         # 更新设置
         crawler.min_delay = request.min_delay
         crawler.max_delay = request.max_delay
+        crawler.rate_controller.configure(request.min_delay, request.max_delay)
         crawler.long_delay_interval = request.long_delay_interval
         crawler.timestamp_offset_ms = request.timestamp_offset_ms
         crawler.debug_mode = request.debug_mode
@@ -3346,62 +3721,71 @@ class CrawlTimeRangeRequest(BaseModel):
     crawlIntervalMax: Optional[float] = Field(default=None, ge=1.0, le=60.0, description="爬取间隔最大值(秒)")
     longSleepIntervalMin: Optional[float] = Field(default=None, ge=60.0, le=3600.0, description="长休眠间隔最小值(秒)")
     longSleepIntervalMax: Optional[float] = Field(default=None, ge=60.0, le=3600.0, description="长休眠间隔最大值(秒)")
-    pagesPerBatch: Optional[int] = Field(default=None, ge=5, le=50, description="每批次页面数")
+    pagesPerBatch: Optional[int] = Field(default=None, ge=5, le=50, description="每批次页面数（仅在关闭自适应速率时生效）")
+    adaptiveRate: bool = Field(default=True, description="自适应请求速率：成功时逐步加快，被限流时自动降速")
+    engine: Optional[str] = Field(default=None, description="采集引擎: thread（默认，线程中执行）或 async（事件循环中并发执行）")
 
 
-def run_crawl_time_range_task(task_id: str, group_id: str, request: "CrawlTimeRangeRequest"):
-    """后台执行“按时间区间爬取”任务：仅导入位于区间 [startTime, endTime] 内的话题"""
-    try:
-        from datetime import datetime, timedelta, timezone
-
-        # 解析用户输入时间
-        def parse_user_time(s: Optional[str]) -> Optional[datetime]:
-            if not s:
-                return None
-            t = s.strip()
-            try:
-                # 仅日期：YYYY-MM-DD -> 当天00:00:00（东八区）
-                if len(t) == 10 and t[4] == '-' and t[7] == '-':
-                    dt = datetime.strptime(t, '%Y-%m-%d')
-                    return dt.replace(tzinfo=timezone(timedelta(hours=8)))
-                # datetime-local (无秒)：YYYY-MM-DDTHH:MM
-                if 'T' in t and len(t) == 16:
-                    t = t + ':00'
-                # 尾部Z -> +00:00
-                if t.endswith('Z'):
-                    t = t.replace('Z', '+00:00')
-                # 兼容 +0800 -> +08:00
-                if len(t) >= 24 and (t[-5] in ['+', '-']) and t[-3] != ':':
-                    t = t[:-2] + ':' + t[-2:]
-                dt = datetime.fromisoformat(t)
-                if dt.tzinfo is None:
-                    dt = dt.replace(tzinfo=timezone(timedelta(hours=8)))
-                return dt
-            except Exception:
-                return None
+def resolve_crawl_time_range(request: "CrawlTimeRangeRequest"):
+    """解析时间区间请求，返回 (start_dt, end_dt)（均为带时区的datetime）"""
+    from datetime import timedelta, timezone
 
-        bj_tz = timezone(timedelta(hours=8))
-        now_bj = datetime.now(bj_tz)
+    # 解析用户输入时间
+    def parse_user_time(s: Optional[str]) -> Optional[datetime]:
+        if not s:
+            return None
+        t = s.strip()
+        try:
+            # 仅日期：YYYY-MM-DD -> 当天00:00:00（东八区）
+            if len(t) == 10 and t[4] == '-' and t[7] == '-':
+                dt = datetime.strptime(t, '%Y-%m-%d')
+                return dt.replace(tzinfo=timezone(timedelta(hours=8)))
+            # datetime-local (无秒)：YYYY-MM-DDTHH:MM
+            if 'T' in t and len(t) == 16:
+                t = t + ':00'
+            # 尾部Z -> +00:00
+            if t.endswith('Z'):
+                t = t.replace('Z', '+00:00')
+            # 兼容 +0800 -> +08:00
+            if len(t) >= 24 and (t[-5] in ['+', '-']) and t[-3] != ':':
+                t = t[:-2] + ':' + t[-2:]
+            dt = datetime.fromisoformat(t)
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone(timedelta(hours=8)))
+            return dt
+        except Exception:
+            return None
 
-        start_dt = parse_user_time(request.startTime)
-        end_dt = parse_user_time(request.endTime) if request.endTime else None
+    bj_tz = timezone(timedelta(hours=8))
+    now_bj = datetime.now(bj_tz)
 
-        # 若指定了最近N天，以 end_dt（默认现在）为终点推导 start_dt
-        if request.lastDays and request.lastDays > 0:
-            if end_dt is None:
-                end_dt = now_bj
-            start_dt = end_dt - timedelta(days=request.lastDays)
+    start_dt = parse_user_time(request.startTime)
+    end_dt = parse_user_time(request.endTime) if request.endTime else None
 
-        # 默认 end_dt = 现在
+    # 若指定了最近N天，以 end_dt（默认现在）为终点推导 start_dt
+    if request.lastDays and request.lastDays > 0:
         if end_dt is None:
             end_dt = now_bj
-        # 默认 start_dt = end_dt - 30天
-        if start_dt is None:
-            start_dt = end_dt - timedelta(days=30)
+        start_dt = end_dt - timedelta(days=request.lastDays)
+
+    # 默认 end_dt = 现在
+    if end_dt is None:
+        end_dt = now_bj
+    # 默认 start_dt = end_dt - 30天
+    if start_dt is None:
+        start_dt = end_dt - timedelta(days=30)
+
+    # 保证时间顺序
+    if start_dt > end_dt:
+        start_dt, end_dt = end_dt, start_dt
 
-        # 保证时间顺序
-        if start_dt > end_dt:
-            start_dt, end_dt = end_dt, start_dt
+    return start_dt, end_dt
+
+
+def run_crawl_time_range_task(task_id: str, group_id: str, request: "CrawlTimeRangeRequest"):
+    """后台执行“按时间区间爬取”任务：仅导入位于区间 [startTime, endTime] 内的话题"""
+    try:
+        start_dt, end_dt = resolve_crawl_time_range(request)
 
         update_task(task_id, "running", "开始按时间区间爬取...")
         add_task_log(task_id, f"🗓️ 时间范围: {start_dt.isoformat()} ~ {end_dt.isoformat()}")
@@ -3425,119 +3809,118 @@ def run_crawl_time_range_task(task_id: str, group_id: str, request: "CrawlTimeRa
         if any([
             request.crawlIntervalMin, request.crawlIntervalMax,
             request.longSleepIntervalMin, request.longSleepIntervalMax,
-            request.pagesPerBatch
+            request.pagesPerBatch, not request.adaptiveRate
         ]):
             crawler.set_custom_intervals(
                 crawl_interval_min=request.crawlIntervalMin,
                 crawl_interval_max=request.crawlIntervalMax,
                 long_sleep_interval_min=request.longSleepIntervalMin,
                 long_sleep_interval_max=request.longSleepIntervalMax,
-                pages_per_batch=request.pagesPerBatch
+                pages_per_batch=request.pagesPerBatch,
+                adaptive=request.adaptiveRate
             )
 
-        per_page = request.perPage or 20
-        total_stats = {'new_topics': 0, 'updated_topics': 0, 'errors': 0, 'pages': 0}
-        end_time_param = None  # 从最新开始
-        max_retries_per_page = 10
+        # 扣除已爬取过的时间段，每个空缺区间从其结束时间直接开始翻页，越过起始时间即结束
+        result = crawler.crawl_time_range(start_dt, end_dt, per_page=request.perPage or 20)
+        if result.get('expired'):
+            add_task_log(task_id, f"❌ 会员已过期: {result.get('message')}")
+            update_task(task_id, "failed", "会员已过期", result)
+            return
+        if is_task_stopped(task_id):
+            add_task_log(task_id, "🛑 任务已停止")
+            return
 
-        while True:
-            if is_task_stopped(task_id):
-                add_task_log(task_id, "🛑 任务已停止")
-                break
+        chain_comment_backfill(task_id, group_id, crawler, result)
+        update_task(task_id, "completed", "时间区间爬取完成", result)
+    except Exception as e:
+        if not is_task_stopped(task_id):
+            add_task_log(task_id, f"❌ 时间区间爬取失败: {str(e)}")
+            update_task(task_id, "failed", f"时间区间爬取失败: {str(e)}")
+    finally:
+        close_response_archive(group_id)
 
-            retry = 0
-            page_processed = False
-            last_time_dt_in_page = None
 
-            while retry < max_retries_per_page:
-                if is_task_stopped(task_id):
-                    break
+def run_crawl_gaps_task(task_id: str, group_id: str, crawl_settings: CrawlSettingsRequest = None):
+    """后台执行补洞任务：只爬取已覆盖时间段之间的空洞"""
+    crawler = None
+    try:
+        update_task(task_id, "running", "开始补洞爬取...")
 
-                data = crawler.fetch_topics_safe(
-                    scope="all",
-                    count=per_page,
-                    end_time=end_time_param,
-                    is_historical=True if end_time_param else False
-                )
+        def log_callback(message: str):
+            add_task_log(task_id, message)
 
-                # 会员过期
-                if data and isinstance(data, dict) and data.get('expired'):
-                    add_task_log(task_id, f"❌ 会员已过期: {data.get('message')}")
-                    update_task(task_id, "failed", "会员已过期", data)
-                    return
+        def stop_check():
+            return is_task_stopped(task_id)
 
-                if not data:
-                    retry += 1
-                    total_stats['errors'] += 1
-                    add_task_log(task_id, f"❌ 页面获取失败 (重试{retry}/{max_retries_per_page})")
-                    continue
+        cookie = get_cookie_for_group(group_id)
+        db_path = get_db_path_manager().get_topics_db_path(group_id)
+        crawler = ZSXQInteractiveCrawler(cookie, group_id, db_path, log_callback)
+        crawler.stop_check_func = stop_check
 
-                topics = (data.get('resp_data', {}) or {}).get('topics', []) or []
-                if not topics:
-                    add_task_log(task_id, "📭 无更多数据，任务结束")
-                    page_processed = True
-                    break
+        if crawl_settings:
+            crawler.set_custom_intervals(
+                crawl_interval_min=crawl_settings.crawlIntervalMin,
+                crawl_interval_max=crawl_settings.crawlIntervalMax,
+                long_sleep_interval_min=crawl_settings.longSleepIntervalMin,
+                long_sleep_interval_max=crawl_settings.longSleepIntervalMax,
+                pages_per_batch=crawl_settings.pagesPerBatch,
+                adaptive=crawl_settings.adaptiveRate
+            )
 
-                # 过滤时间范围
-                from datetime import datetime
-                filtered = []
-                for t in topics:
-                    ts = t.get('create_time')
-                    dt = None
-                    try:
-                        if ts:
-                            ts_fixed = ts.replace('+0800', '+08:00') if ts.endswith('+0800') else ts
-                            dt = datetime.fromisoformat(ts_fixed)
-                    except Exception:
-                        dt = None
-
-                    if dt:
-                        last_time_dt_in_page = dt  # 该页数据按时间降序；循环结束后持有最后（最老）时间
-                        if start_dt <= dt <= end_dt:
-                            filtered.append(t)
-
-                # 仅导入时间范围内的数据
-                if filtered:
-                    filtered_data = {'succeeded': True, 'resp_data': {'topics': filtered}}
-                    page_stats = crawler.store_batch_data(filtered_data)
-                    total_stats['new_topics'] += page_stats.get('new_topics', 0)
-                    total_stats['updated_topics'] += page_stats.get('updated_topics', 0)
-                    total_stats['errors'] += page_stats.get('errors', 0)
-
-                total_stats['pages'] += 1
-                page_processed = True
-
-                # 计算下一页的 end_time（使用该页最老话题时间 - 偏移毫秒）
-                oldest_in_page = topics[-1].get('create_time')
-                try:
-                    dt_oldest = datetime.fromisoformat(oldest_in_page.replace('+0800', '+08:00'))
-                    dt_oldest = dt_oldest - timedelta(milliseconds=crawler.timestamp_offset_ms)
-                    end_time_param = dt_oldest.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0800'
-                except Exception:
-                    end_time_param = oldest_in_page
+        result = crawler.crawl_gaps()
+        if result.get('expired'):
+            add_task_log(task_id, f"❌ 会员已过期: {result.get('message')}")
+            update_task(task_id, "failed", "会员已过期", result)
+            return
+        if is_task_stopped(task_id):
+            return
 
-                # 若该页最老时间已早于 start_dt，则后续更老数据均不在范围内，结束
-                if last_time_dt_in_page and last_time_dt_in_page < start_dt:
-                    add_task_log(task_id, "✅ 已到达起始时间之前，任务结束")
-                    break
+        chain_comment_backfill(task_id, group_id, crawler, result)
+        update_task(task_id, "completed", "补洞爬取完成", result)
+    except Exception as e:
+        if not is_task_stopped(task_id):
+            add_task_log(task_id, f"❌ 补洞爬取失败: {str(e)}")
+            update_task(task_id, "failed", f"补洞爬取失败: {str(e)}")
+    finally:
+        if crawler:
+            crawler.close()
 
-                # 成功处理后进行长休眠检查
-                crawler.check_page_long_delay()
-                break  # 成功后跳出重试循环
 
-            if not page_processed:
-                add_task_log(task_id, "🚫 当前页面达到最大重试次数，终止任务")
-                break
+@app.get("/api/groups/{group_id}/coverage")
+async def get_crawl_coverage(group_id: str):
+    """已爬取的时间区间和区间之间的空洞"""
+    try:
+        crawler = get_crawler_for_group(group_id)
+        coverage = CrawlCoverage(crawler.db, group_id)
+        intervals = [{"start": format_api_time(from_ms(start_ms)), "end": format_api_time(from_ms(end_ms))}
+                     for start_ms, end_ms in reversed(coverage.intervals())]
+        gaps = [{"start": format_api_time(gap_start), "end": format_api_time(gap_end),
+                 "seconds": round((gap_end - gap_start).total_seconds(), 3)}
+                for gap_start, gap_end in coverage.gaps()]
+        topic_range = crawler.db.get_timestamp_range_info()
+        return {
+            "group_id": group_id,
+            "intervals": intervals,
+            "gaps": gaps,
+            "topics_oldest": topic_range.get('oldest_timestamp'),
+            "topics_newest": topic_range.get('newest_timestamp'),
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取爬取覆盖区间失败: {str(e)}")
 
-            # 结束条件：没有下一页时间或已越过起始边界
-            if not end_time_param or (last_time_dt_in_page and last_time_dt_in_page < start_dt):
-                break
 
-        update_task(task_id, "completed", "时间区间爬取完成", total_stats)
+@app.post("/api/crawl/gaps/{group_id}")
+async def crawl_gaps(group_id: str, request: CrawlSettingsRequest, background_tasks: BackgroundTasks):
+    """补洞爬取：只请求已覆盖时间段之间的空洞，不重新全量爬取"""
+    try:
+        task_id = create_task("crawl_gaps", f"补洞爬取 (群组: {group_id})")
+        if request.engine == 'async':
+            background_tasks.add_task(run_async_crawl_task, task_id, group_id, 'gaps', request)
+        else:
+            background_tasks.add_task(run_crawl_gaps_task, task_id, group_id, request)
+        return {"task_id": task_id, "message": "任务已创建，正在后台执行"}
     except Exception as e:
-        if not is_task_stopped(task_id):
-            add_task_log(task_id, f"❌ 时间区间爬取失败: {str(e)}")
-            update_task(task_id, "failed", f"时间区间爬取失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"创建补洞爬取任务失败: {str(e)}")
 
 
 @app.post("/api/crawl/range/{group_id}")
@@ -3545,7 +3928,12 @@ async def crawl_by_time_range(group_id: str, request: CrawlTimeRangeRequest, bac
     """按时间区间爬取话题（支持最近N天或自定义开始/结束时间）"""
     try:
         task_id = create_task("crawl_time_range", f"按时间区间爬取 (群组: {group_id})")
-        background_tasks.add_task(run_crawl_time_range_task, task_id, group_id, request)
+        if request.engine == 'async':
+            start_dt, end_dt = resolve_crawl_time_range(request)
+            background_tasks.add_task(run_async_crawl_task, task_id, group_id, 'time_range', request,
+                                      start_dt=start_dt, end_dt=end_dt, per_page=request.perPage or 20)
+        else:
+            background_tasks.add_task(run_crawl_time_range_task, task_id, group_id, request)
         return {"task_id": task_id, "message": "任务已创建，正在后台执行"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"创建时间区间爬取任务失败: {str(e)}")
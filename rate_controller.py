@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自适应请求速率控制
+按预约顺序排定每个请求的发出时间，相邻请求至少间隔一个（带抖动的）当前间隔，速率按 AIMD（加性增、乘性减）调整：
+请求连续成功时逐步加快，遇到反爬错误码1059、HTTP 429或超时立即减半；
+速率已降到下限仍被限制时，所有请求暂停一段时间（长休眠）。
+同一账号的话题、评论、文件列表和下载链接请求共用一个控制器，并可设置每小时请求预算。
+"""
+
+import hashlib
+import random
+import threading
+import time
+from bisect import bisect_right, insort
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+
+# 请求结果分类
+OUTCOME_OK = 'ok'
+OUTCOME_ANTI_CRAWL = 'anti_crawl'      # 业务错误码1059
+OUTCOME_RATE_LIMITED = 'rate_limited'  # HTTP 429
+OUTCOME_TIMEOUT = 'timeout'
+OUTCOME_ERROR = 'error'                # 其他失败，不影响速率
+
+# 触发降速的结果
+THROTTLE_OUTCOMES = (OUTCOME_ANTI_CRAWL, OUTCOME_RATE_LIMITED, OUTCOME_TIMEOUT)
+
+
+def classify_response(status_code: int, data: Optional[Dict[str, Any]] = None) -> str:
+    """根据HTTP状态码和响应JSON判断请求结果"""
+    if status_code == 429:
+        return OUTCOME_RATE_LIMITED
+    if status_code != 200 or data is None:
+        return OUTCOME_ERROR
+    if data.get('succeeded'):
+        return OUTCOME_OK
+    if data.get('code') == 1059:
+        return OUTCOME_ANTI_CRAWL
+    return OUTCOME_ERROR
+
+
+class RateController:
+    """按时间槽排队 + AIMD 的速率控制器（线程安全，同步和异步采集器共用）"""
+
+    def __init__(self, name: str, min_interval: float = 2.0, max_interval: float = 5.0,
+                 floor_interval: float = 60.0, burst: float = 1.0, decrease_factor: float = 0.5,
+                 cooldown: float = 10.0, jitter: float = 0.3,
+                 pause_range: Tuple[float, float] = (180.0, 300.0), window: int = 50,
+                 hourly_budget: Optional[int] = None):
+        """
+        Args:
+            name: 控制器名称（用于日志和状态接口）
+            min_interval: 最短请求间隔（秒），即速率上限
+            max_interval: 初始请求间隔（秒），与 min_interval 取平均作为起始速率
+            floor_interval: 最长请求间隔（秒），即速率下限
+            burst: 空闲后允许连续发出的请求数，1表示不允许突发请求
+            decrease_factor: 触发限制时速率乘以的系数
+            cooldown: 两次降速之间的最短间隔（秒），同一波限制只降速一次
+            jitter: 间隔随机抖动比例
+            pause_range: 速率已到下限仍被限制时的长休眠区间（秒）
+            window: 统计最近多少次请求的结果
+            hourly_budget: 每小时最多请求数，None表示不限制
+        """
+        self.name = name
+        self.burst = burst
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.jitter = jitter
+        self.pause_range = pause_range
+        self.floor_interval = floor_interval
+        self.hourly_budget = hourly_budget
+
+        self._lock = threading.Lock()
+        self._next_slot = 0.0  # 下一个请求最早的发出时间（只增不减）
+        self._last_decrease = 0.0
+        self._paused_until = 0.0
+        self._outcomes = deque(maxlen=window)
+        self.backoff_events = deque(maxlen=50)
+        self._request_times = []  # 最近一小时内已预约请求的发出时间（升序）
+        self.total_requests = 0
+
+        self.rate = 2.0 / (min_interval + max_interval)
+        self.configure(min_interval, max_interval)
+
+    def configure(self, min_interval: float, max_interval: float):
+        """
+        设置间隔范围（同一账号的所有任务共用，只应由全局设置修改）
+
+        当前速率保持不变，只收进新的范围内，已有的降速不会因此被撤销
+        """
+        with self._lock:
+            self.max_rate = 1.0 / max(min_interval, 0.1)
+            self.min_rate = min(1.0 / max(self.floor_interval, max_interval), self.max_rate)
+            self.increase_step = self.max_rate / 20
+            self.rate = min(self.max_rate, max(self.min_rate, self.rate))
+
+    # ==================== 请求排队 ====================
+
+    def reserve(self, extra: float = 0.0, min_wait: float = 0.0) -> float:
+        """
+        预约下一个发出时间，返回发起请求前需要等待的秒数（长休眠期间包含剩余休眠时间）
+
+        抖动只作用于每个请求自己的间隔，先预约的请求总是先发出，
+        相邻两次预约至少相隔 (1 - jitter) 个当前间隔
+
+        Args:
+            extra: 调用方在排队时间之外额外等待的秒数
+            min_wait: 调用方自己要求的最短等待秒数
+        两者只影响计入每小时预算的发出时间，不占用其他任务的时间槽
+        """
+        with self._lock:
+            now = time.monotonic()
+            # 空闲期间不积攒时间槽，burst > 1 时最多允许提前 burst - 1 个间隔
+            slot = max(self._next_slot, now - (self.burst - 1) / self.rate, self._paused_until)
+            self._next_slot = slot + random.uniform(1 - self.jitter, 1 + self.jitter) / self.rate
+            self.total_requests += 1
+            return self._reserve_budget(now, max(max(0.0, slot - now) + extra, min_wait))
+
+    def reserve_budget(self, delay: float = 0.0) -> float:
+        """
+        只计入每小时预算，返回实际需要等待的秒数（不小于 delay）
+
+        用于不使用自适应速率的任务：请求间隔由任务自己的固定间隔决定，
+        但请求数仍与同账号的其他任务合计，受每小时预算约束
+
+        Args:
+            delay: 按任务自己的间隔，请求将在多少秒后发出
+        """
+        with self._lock:
+            self.total_requests += 1
+            return self._reserve_budget(time.monotonic(), max(0.0, delay))
+
+    def _reserve_budget(self, now: float, wait: float) -> float:
+        """记录一次将在 now + wait 发出的请求，返回满足每小时预算的等待秒数（调用方持有锁）"""
+        if not self.hourly_budget:
+            return wait
+        times = self._request_times
+        del times[:bisect_right(times, now - 3600)]
+        send_at = now + wait
+        budget = self.hourly_budget
+        while True:
+            pos = bisect_right(times, send_at)
+            merged = times[max(0, pos - budget):pos] + [send_at] + times[pos:pos + budget]
+            mid = min(pos, budget)
+            # 加入后任意连续 budget + 1 个请求的首尾至少相隔一小时（已预约在之后发出的请求也计入）
+            violated = next((i for i in range(mid, len(merged))
+                             if i >= budget and merged[i] < merged[i - budget] + 3600), None)
+            if violated is None:
+                break
+            # 超出发生在本请求上时推迟到窗口中最早的请求满一小时，否则排到该已预约请求之后再检查
+            send_at = merged[mid - budget] + 3600 if violated == mid else merged[violated]
+        insort(times, send_at)
+        return send_at - now
+
+    def wait(self, sleep_func=time.sleep) -> float:
+        """预约发出时间并等待（sleep_func 可传入可中断的等待函数），返回等待的秒数"""
+        delay = self.reserve()
+        if delay > 0:
+            sleep_func(delay)
+        return delay
+
+    # ==================== AIMD ====================
+
+    def record(self, outcome: str):
+        """记录一次请求结果并调整速率"""
+        now = time.monotonic()
+        with self._lock:
+            self._outcomes.append(outcome)
+            if outcome == OUTCOME_OK:
+                # 降速后的冷却期内不加速，避免刚被限制又立即提速
+                if now - self._last_decrease >= self.cooldown:
+                    self.rate = min(self.max_rate, self.rate + self.increase_step)
+                return
+            if outcome not in THROTTLE_OUTCOMES or now - self._last_decrease < self.cooldown:
+                return
+
+            old_rate = self.rate
+            at_floor = old_rate <= self.min_rate
+            self.rate = max(self.min_rate, old_rate * self.decrease_factor)
+            self._last_decrease = now
+            pause = random.uniform(*self.pause_range) if at_floor else None
+            if pause:
+                self._paused_until = now + pause
+
+            self.backoff_events.append({
+                'time': datetime.now().isoformat(timespec='seconds'),
+                'reason': outcome,
+                'old_interval': round(1.0 / old_rate, 2),
+                'new_interval': round(1.0 / self.rate, 2),
+                'pause': round(pause, 1) if pause else None,
+            })
+
+    @property
+    def interval(self) -> float:
+        return 1.0 / self.rate
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前速率、最近请求结果统计和降速记录"""
+        with self._lock:
+            outcome_counts = {}
+            for outcome in self._outcomes:
+                outcome_counts[outcome] = outcome_counts.get(outcome, 0) + 1
+            throttled = sum(outcome_counts.get(o, 0) for o in THROTTLE_OUTCOMES)
+            return {
+                'name': self.name,
+                'rate_per_minute': round(self.rate * 60, 2),
+                'interval': round(1.0 / self.rate, 2),
+                'min_interval': round(1.0 / self.max_rate, 2),
+                'max_interval': round(1.0 / self.min_rate, 2),
+                'total_requests': self.total_requests,
+                'recent_outcomes': outcome_counts,
+                'recent_throttle_ratio': round(throttled / len(self._outcomes), 3) if self._outcomes else 0.0,
+                'paused_seconds': round(max(0.0, self._paused_until - time.monotonic()), 1),
+                'hourly_budget': self.hourly_budget,
+                'requests_last_hour': (bisect_right(self._request_times, time.monotonic())
+                                       - bisect_right(self._request_times, time.monotonic() - 3600)),
+                'backoff_events': list(self.backoff_events),
+            }
+
+
+# 全局控制器实例字典，按账号（Cookie）存储
+_rate_controllers: Dict[str, RateController] = {}
+_controllers_lock = threading.Lock()
+_default_hourly_budget: Optional[int] = None
+
+
+def account_key(cookie: str) -> str:
+    """账号标识：规范化后Cookie的哈希（不保存Cookie本身）"""
+    normalized = '; '.join(part.strip() for part in (cookie or '').strip().split(';'))
+    return 'account-' + hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:12]
+
+
+def get_rate_controller(cookie: str) -> RateController:
+    """获取账号共用的速率控制器（同一Cookie的所有采集器和下载器共享）"""
+    key = account_key(cookie)
+    with _controllers_lock:
+        if key not in _rate_controllers:
+            _rate_controllers[key] = RateController(key, hourly_budget=_default_hourly_budget)
+        return _rate_controllers[key]
+
+
+def set_hourly_budget(budget: Optional[int]):
+    """设置所有账号（包括之后创建的）的每小时请求预算，None或0表示不限制"""
+    global _default_hourly_budget
+    with _controllers_lock:
+        _default_hourly_budget = budget or None
+        for controller in _rate_controllers.values():
+            controller.hourly_budget = _default_hourly_budget
+
+
+def get_hourly_budget() -> Optional[int]:
+    """当前的每小时请求预算，None表示不限制"""
+    with _controllers_lock:
+        return _default_hourly_budget
+
+
+def list_rate_controllers() -> Dict[str, Dict[str, Any]]:
+    """所有速率控制器的状态"""
+    with _controllers_lock:
+        controllers = list(_rate_controllers.values())
+    return {controller.name: controller.snapshot() for controller in controllers}
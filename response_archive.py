@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+API原始响应归档与重放
+开启归档后，话题列表、评论、文件列表的成功响应按群组追加写入 gzip 压缩的 JSONL 分段文件
+（output/databases/{group_id}/archive/），单个分段超过大小上限后切换到新分段。
+重放时按时间顺序读取全部分段，直接导入话题库和文件库，不访问网络，
+可用于解析逻辑或表结构调整后重建数据库，也可作为真实数据的性能测试语料。
+
+用法:
+    python response_archive.py replay <group_id> [--archive DIR] [--topics-db PATH] [--files-db PATH]
+    python response_archive.py stats <group_id>
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import os
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Dict, Any, Optional, Iterator, Iterable, List
+
+from db_path_manager import get_db_path_manager
+
+ARCHIVE_KINDS = ('topics', 'comments', 'files')
+SEGMENT_SUFFIX = '.jsonl.gz'
+
+
+class ResponseArchive:
+    """单个群组的响应归档（线程安全，采集器与文件下载器共用）"""
+
+    FLUSH_EVERY = 50  # 每写入N条记录刷新一次压缩缓冲
+    FLUSH_INTERVAL = 10.0  # 距上次刷新超过N秒时也刷新
+
+    def __init__(self, archive_dir: str, segment_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            archive_dir: 归档目录
+            segment_bytes: 单个分段的未压缩大小上限
+        """
+        self.archive_dir = archive_dir
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._file = None
+        self._segment_path: Optional[str] = None
+        self._segment_size = 0
+        self._segment_seq = 0
+        self._pending = 0
+        self._last_flush = time.time()
+        self.records_written = 0
+
+    def record(self, kind: str, params: Dict[str, Any], data: Dict[str, Any]):
+        """追加一条响应记录，写入失败只打印错误，不影响爬取"""
+        line = json.dumps({
+            'ts': datetime.now().isoformat(timespec='seconds'),
+            'kind': kind,
+            'params': params,
+            'data': data,
+        }, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+        with self._lock:
+            try:
+                if self._file is None or self._segment_size + len(line) > self.segment_bytes:
+                    self._open_segment()
+                self._file.write(line)
+                self._segment_size += len(line)
+                self._pending += 1
+                self.records_written += 1
+                if self._pending >= self.FLUSH_EVERY or time.time() - self._last_flush >= self.FLUSH_INTERVAL:
+                    self._flush()
+            except Exception as e:
+                print(f"⚠️ 写入响应归档失败: {e}")
+
+    def _open_segment(self):
+        """关闭当前分段并新建一个分段，文件名按创建时间排序"""
+        self._close_segment()
+        os.makedirs(self.archive_dir, exist_ok=True)
+        self._segment_seq += 1
+        name = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._segment_seq:04d}{SEGMENT_SUFFIX}"
+        self._segment_path = os.path.join(self.archive_dir, name)
+        self._file = gzip.open(self._segment_path, 'wb', compresslevel=6)
+        self._segment_size = 0
+
+    def _flush(self):
+        # Z_SYNC_FLUSH 让已写入的记录在进程中断后仍可读出
+        self._file.flush(zlib.Z_SYNC_FLUSH)
+        self._pending = 0
+        self._last_flush = time.time()
+
+    def _close_segment(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None and self._pending:
+                self._flush()
+
+    def close(self):
+        with self._lock:
+            self._close_segment()
+
+
+# ==================== 全局开关与归档实例 ====================
+
+_archives: Dict[str, ResponseArchive] = {}
+_archives_lock = threading.Lock()
+_settings = {
+    'enabled': os.environ.get('ZSXQ_RESPONSE_ARCHIVE', '').lower() in ('1', 'true', 'yes'),
+    'segment_mb': 64,
+}
+
+
+def get_archive_dir(group_id: str) -> str:
+    return os.path.join(get_db_path_manager().get_group_dir(str(group_id)), 'archive')
+
+
+def get_response_archive(group_id: str) -> Optional[ResponseArchive]:
+    """归档开启时返回群组的归档实例，未开启时返回 None"""
+    if not _settings['enabled']:
+        return None
+    group_id = str(group_id)
+    with _archives_lock:
+        archive = _archives.get(group_id)
+        if archive is None:
+            archive = ResponseArchive(get_archive_dir(group_id), _settings['segment_mb'] * 1024 * 1024)
+            _archives[group_id] = archive
+        return archive
+
+
+def archive_response(group_id: str, kind: str, params: Dict[str, Any], data: Optional[Dict[str, Any]]):
+    """归档开启时记录一条成功的响应"""
+    if not data or not data.get('succeeded'):
+        return
+    archive = get_response_archive(group_id)
+    if archive is not None:
+        archive.record(kind, params, data)
+
+
+def close_response_archive(group_id: str):
+    """
+    结束群组当前的分段（写入 gzip 结尾），在任务结束时调用
+    同一群组仍在运行的其他任务再写入时会新建分段
+    """
+    archive = _archives.get(str(group_id))
+    if archive is not None:
+        archive.close()
+
+
+def close_all_response_archives():
+    """结束所有群组的分段（应用退出时调用）"""
+    with _archives_lock:
+        for archive in _archives.values():
+            archive.close()
+
+
+def set_archive_settings(enabled: Optional[bool] = None, segment_mb: Optional[int] = None):
+    """修改归档设置；关闭归档或修改分段大小时关闭已打开的分段"""
+    with _archives_lock:
+        if enabled is not None:
+            _settings['enabled'] = bool(enabled)
+        if segment_mb is not None:
+            _settings['segment_mb'] = max(1, int(segment_mb))
+        for archive in _archives.values():
+            archive.close()
+        _archives.clear()
+
+
+def get_archive_settings() -> Dict[str, Any]:
+    return dict(_settings)
+
+
+# ==================== 读取与重放 ====================
+
+def _segment_sort_key(path: str) -> tuple:
+    """分段文件名为 {日期}-{时间}-{pid}-{序号}，按时间和序号的数值排序（pid 只用于区分同一秒内的不同进程）"""
+    name = os.path.basename(path)[:-len(SEGMENT_SUFFIX)]
+    try:
+        date, clock, pid, seq = (int(part) for part in name.split('-'))
+    except ValueError:
+        return (0, 0, 0, 0, name)
+    return (date, clock, seq, pid, name)
+
+
+def list_segments(archive_dir: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(archive_dir, f'*{SEGMENT_SUFFIX}')), key=_segment_sort_key)
+
+
+def iter_archive(archive_dir: str, kinds: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+    """按时间顺序逐条读取归档记录；分段末尾因进程中断而不完整时跳过残缺部分"""
+    kinds = set(kinds) if kinds else None
+    for path in list_segments(archive_dir):
+        try:
+            with gzip.open(path, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if kinds is None or record.get('kind') in kinds:
+                        yield record
+        except (EOFError, OSError, zlib.error) as e:
+            print(f"⚠️ 归档分段未正常结束（仍在写入或进程中断），已读取到末尾: {os.path.basename(path)} ({e})")
+
+
+def archive_stats(archive_dir: str) -> Dict[str, Any]:
+    """统计归档分段数、压缩后大小和各类记录数"""
+    segments = list_segments(archive_dir)
+    counts = {kind: 0 for kind in ARCHIVE_KINDS}
+    for record in iter_archive(archive_dir):
+        counts[record.get('kind')] = counts.get(record.get('kind'), 0) + 1
+    return {
+        'archive_dir': archive_dir,
+        'segments': len(segments),
+        'compressed_bytes': sum(os.path.getsize(path) for path in segments),
+        'records': counts,
+    }
+
+
+def replay_archive(archive_dir: str, topics_db_path: Optional[str] = None, files_db_path: Optional[str] = None,
+                   log_callback=None, stop_check=None) -> Dict[str, Any]:
+    """
+    把归档中的响应按原顺序导入数据库（话题与评论写入话题库，文件列表写入文件库）
+
+    Args:
+        archive_dir: 归档目录
+        topics_db_path: 话题库路径，为 None 时跳过话题和评论记录
+        files_db_path: 文件库路径，为 None 时跳过文件列表记录
+        log_callback: 日志回调
+        stop_check: 返回 True 时停止重放
+
+    Returns:
+        各类记录数、导入的话题/评论/文件数和耗时
+    """
+    log = log_callback or print
+    kinds = ([] if topics_db_path is None else ['topics', 'comments']) + ([] if files_db_path is None else ['files'])
+    stats = {'records': 0, 'topic_pages': 0, 'topics': 0, 'new_topics': 0,
+             'comment_pages': 0, 'comments': 0, 'file_pages': 0, 'files': 0, 'stopped': False}
+    if not kinds:
+        return stats
+
+    topics_db = files_db = None
+    if topics_db_path:
+        from zsxq_database import ZSXQDatabase
+        topics_db = ZSXQDatabase(topics_db_path)
+    if files_db_path:
+        from zsxq_file_database import ZSXQFileDatabase
+        files_db = ZSXQFileDatabase(files_db_path)
+
+    log(f"📼 开始重放归档: {archive_dir} ({len(list_segments(archive_dir))} 个分段)")
+    begin = time.perf_counter()
+    try:
+        for record in iter_archive(archive_dir, kinds):
+            if stop_check and stop_check():
+                stats['stopped'] = True
+                break
+
+            kind = record['kind']
+            resp_data = record['data'].get('resp_data', {})
+            if kind == 'topics':
+                topics = resp_data.get('topics', [])
+                page_stats = topics_db.import_topics_batch(topics)
+                topics_db.conn.commit()
+                stats['topic_pages'] += 1
+                stats['topics'] += len(topics)
+                stats['new_topics'] += page_stats.get('new_topics', 0)
+            elif kind == 'comments':
+                # 与 fetch_all_comments 一致：楼中楼回复与一级评论一起导入
+                comments = []
+                for comment in resp_data.get('comments', []):
+                    comments.append(comment)
+                    comments.extend(comment.get('replied_comments') or [])
+                topics_db.import_additional_comments(record['params']['topic_id'], comments)
+                topics_db.conn.commit()
+                stats['comment_pages'] += 1
+                stats['comments'] += len(comments)
+            elif kind == 'files':
+                files_db.import_file_response(record['data'])
+                stats['file_pages'] += 1
+                stats['files'] += len(resp_data.get('files', []))
+
+            stats['records'] += 1
+            if stats['records'] % 500 == 0:
+                log(f"   📼 已重放 {stats['records']} 条记录")
+    finally:
+        if topics_db:
+            topics_db.close()
+        if files_db:
+            files_db.close()
+
+    elapsed = time.perf_counter() - begin
+    stats['elapsed_s'] = round(elapsed, 3)
+    stats['records_per_s'] = round(stats['records'] / elapsed, 1) if elapsed > 0 else 0.0
+    log(f"✅ 重放完成: {stats['records']} 条记录，话题 {stats['topics']}，评论 {stats['comments']}，"
+        f"文件 {stats['files']}，耗时 {elapsed:.2f}s")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='知识星球API响应归档工具')
+    subparsers = parser.add_subparsers(dest='command')
+
+    replay_parser = subparsers.add_parser('replay', help='从归档重建话题库和文件库')
+    replay_parser.add_argument('group_id')
+    replay_parser.add_argument('--archive', help='归档目录（默认为群组目录下的 archive）')
+    replay_parser.add_argument('--topics-db', help='话题库路径（默认为群组话题库）')
+    replay_parser.add_argument('--files-db', help='文件库路径（默认为群组文件库）')
+
+    stats_parser = subparsers.add_parser('stats', help='查看归档统计')
+    stats_parser.add_argument('group_id')
+    stats_parser.add_argument('--archive', help='归档目录（默认为群组目录下的 archive）')
+
+    args = parser.parse_args()
+    if not args.command:
+        parser.print_help()
+        return
+
+    archive_dir = args.archive or get_archive_dir(args.group_id)
+    if args.command == 'stats':
+        print(json.dumps(archive_stats(archive_dir), ensure_ascii=False, indent=2))
+        return
+
+    path_manager = get_db_path_manager()
+    replay_archive(archive_dir,
+                   args.topics_db or path_manager.get_topics_db_path(args.group_id),
+                   args.files_db or path_manager.get_files_db_path(args.group_id))
+
+
+if __name__ == "__main__":
+    main()
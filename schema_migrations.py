@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库结构版本迁移
+使用 SQLite 的 PRAGMA user_version 记录已应用的迁移版本，
+已是最新版本的数据库打开时只需读取一次 user_version
+"""
+
+import os
+import sqlite3
+from typing import Callable, List, Tuple, Optional
+
+# 迁移定义: (版本号, 描述, 迁移函数)，版本号从1开始连续递增
+Migration = Tuple[int, str, Callable[[], None]]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """读取数据库当前结构版本"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def read_schema_version(db_path: str) -> Optional[int]:
+    """读取数据库文件的结构版本（不触发迁移；文件不存在时返回None）"""
+    if not os.path.exists(db_path):
+        return None
+    conn = sqlite3.connect(db_path)
+    try:
+        return get_schema_version(conn)
+    finally:
+        conn.close()
+
+
+def run_migrations(conn: sqlite3.Connection, migrations: List[Migration], db_label: str = '') -> List[int]:
+    """
+    按版本顺序执行未应用的迁移，每个迁移在独立事务中执行并同步更新 user_version
+
+    Returns:
+        本次执行的迁移版本号列表
+    """
+    current_version = get_schema_version(conn)
+    latest_version = migrations[-1][0] if migrations else 0
+    if current_version >= latest_version:
+        if current_version > latest_version:
+            print(f"⚠️ 数据库结构版本 v{current_version} 高于程序支持的 v{latest_version}{db_label}，跳过迁移")
+        return []
+
+    applied = []
+    for version, description, migrate in migrations:
+        if version <= current_version:
+            continue
+
+        # 结束可能存在的隐式事务，保证迁移与版本号更新原子提交
+        conn.commit()
+        try:
+            conn.execute('BEGIN')
+            migrate()
+            conn.execute(f'PRAGMA user_version = {int(version)}')
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ 数据库迁移 v{version} 失败{db_label}: {description} - {e}")
+            raise
+
+        applied.append(version)
+        print(f"🔧 数据库迁移 v{version}{db_label}: {description}")
+
+    return applied
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+已入库话题ID索引
+一次性把群组的全部话题ID读入有序的 array('q')（每个ID 8字节），
+之后的新旧判断只做二分查找，不再逐条查询数据库。
+新写入的ID先放在小集合中，积累到一定数量再归并进有序数组，避免每次插入都移动整个数组。
+"""
+
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Set
+
+
+class TopicIdIndex:
+    """有序数组 + 增量集合的话题ID集合（线程安全）"""
+
+    MERGE_THRESHOLD = 4096  # 增量集合超过该大小时归并进有序数组
+
+    def __init__(self, sorted_ids: Iterable[int] = ()):
+        """sorted_ids 必须已按升序排列（如 SELECT topic_id FROM topics ORDER BY topic_id）"""
+        self._ids = array('q', sorted_ids)
+        self._recent: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids) + len(self._recent)
+
+    def _contains(self, topic_id: int) -> bool:
+        topic_id = int(topic_id)
+        if topic_id in self._recent:
+            return True
+        ids = self._ids
+        i = bisect_left(ids, topic_id)
+        return i < len(ids) and ids[i] == topic_id
+
+    def __contains__(self, topic_id: int) -> bool:
+        with self._lock:
+            return self._contains(topic_id)
+
+    def existing(self, topic_ids: Iterable[int]) -> Set[int]:
+        """返回给定ID中已存在的部分"""
+        with self._lock:
+            return {topic_id for topic_id in topic_ids if self._contains(topic_id)}
+
+    def add_many(self, topic_ids: Iterable[int]):
+        """记录新写入的话题ID"""
+        with self._lock:
+            self._recent.update(int(topic_id) for topic_id in topic_ids if not self._contains(topic_id))
+            if len(self._recent) > self.MERGE_THRESHOLD:
+                self._merge()
+
+    def discard(self, topic_id: int):
+        """移除已删除的话题ID"""
+        topic_id = int(topic_id)
+        with self._lock:
+            self._recent.discard(topic_id)
+            i = bisect_left(self._ids, topic_id)
+            if i < len(self._ids) and self._ids[i] == topic_id:
+                del self._ids[i]
+
+    def _merge(self):
+        # 两段有序数据拼接后排序，timsort 按归并处理
+        merged = array('q', self._ids)
+        merged.extend(sorted(self._recent))
+        self._ids = array('q', sorted(merged))
+        self._recent = set()
@@ -0,0 +1,672 @@
+#!/usr/bin/env python3
+"""
+知识星球异步采集引擎
+基于 asyncio 实现与 ZSXQInteractiveCrawler 相同的爬取模式，
+一个事件循环即可同时驱动多个群组的采集任务，评论补全与翻页请求并行进行
+"""
+
+import asyncio
+import functools
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List, Callable, Awaitable
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None  # 未安装时回退到线程池中的 requests
+
+from zsxq_interactive_crawler import ZSXQInteractiveCrawler
+from crawl_checkpoint import CrawlCheckpoint
+from crawl_coverage import CrawlCoverage, format_api_time, parse_api_time, shift_api_time, to_ms
+from rate_controller import classify_response, OUTCOME_ERROR, OUTCOME_TIMEOUT
+from response_archive import archive_response
+
+
+async def to_thread(func: Callable, *args, **kwargs):
+    """在默认线程池中执行阻塞函数（asyncio.to_thread 需要 Python 3.9）"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+def _empty_stats() -> Dict[str, int]:
+    return {'new_topics': 0, 'updated_topics': 0, 'errors': 0, 'pages': 0}
+
+
+class ZSXQAsyncCrawler:
+    """
+    异步采集器
+
+    复用同步采集器的Cookie、请求头、间隔配置、响应解析和数据库，
+    只把网络请求和等待改为协程；数据库写入在线程池中串行执行，不阻塞事件循环
+    """
+
+    # 可通过 run(mode, ...) 调用的爬取模式
+    MODES = ['latest', 'historical', 'incremental', 'all_historical', 'latest_until_complete', 'time_range', 'gaps']
+
+    def __init__(self, cookie: str, group_id: str, db_path: str = None, log_callback=None,
+                 comment_concurrency: int = 2):
+        self.crawler = ZSXQInteractiveCrawler(cookie, group_id, db_path, log_callback)
+        self.group_id = group_id
+        self.comment_concurrency = max(1, comment_concurrency)
+
+        # 以下对象需要在事件循环内创建
+        self._session = None
+        self._db_lock: Optional[asyncio.Lock] = None
+        self._comment_semaphore: Optional[asyncio.Semaphore] = None
+        self._comment_tasks = set()
+
+        if aiohttp is None:
+            self.log("ℹ️ 未安装 aiohttp，异步采集将在线程池中执行 requests 请求")
+
+    # ==================== 与同步采集器共用的状态 ====================
+
+    @property
+    def db(self):
+        return self.crawler.db
+
+    @property
+    def stop_check_func(self):
+        return self.crawler.stop_check_func
+
+    @stop_check_func.setter
+    def stop_check_func(self, func):
+        self.crawler.stop_check_func = func
+
+    def log(self, message: str):
+        self.crawler.log(message)
+
+    def is_stopped(self) -> bool:
+        return self.crawler.is_stopped()
+
+    def set_stop_flag(self):
+        self.crawler.set_stop_flag()
+
+    def set_custom_intervals(self, **kwargs):
+        self.crawler.set_custom_intervals(**kwargs)
+
+    # ==================== 网络与等待 ====================
+
+    def _ensure_loop_objects(self):
+        if self._db_lock is None:
+            self._db_lock = asyncio.Lock()
+            self._comment_semaphore = asyncio.Semaphore(self.comment_concurrency)
+
+    async def _http_get(self, url: str, params: Dict[str, Any], timeout: float) -> tuple:
+        """发送GET请求，返回 (状态码, 响应体, 响应头)"""
+        headers = self.crawler.get_stealth_headers()
+        if aiohttp is not None:
+            if self._session is None:
+                self._session = aiohttp.ClientSession()
+            async with self._session.get(url, params=params, headers=headers,
+                                         timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                body = await response.read()
+                return response.status, body, dict(response.headers)
+
+        response = await to_thread(self.crawler.session.get, url, params=params,
+                                   headers=headers, timeout=timeout)
+        return response.status_code, response.content, dict(response.headers)
+
+    async def _sleep(self, duration: float):
+        """可中断的异步等待，每0.1秒检查一次停止标志"""
+        deadline = time.monotonic() + duration
+        while not self.is_stopped():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(0.1, remaining))
+
+    async def _check_page_long_delay(self):
+        """页面级长休眠（间隔规则与同步采集器一致）"""
+        long_delay = self.crawler._next_long_delay()
+        if long_delay is None:
+            return
+        start_time = datetime.now()
+        await self._sleep(long_delay)
+        self.crawler._log_long_delay_end(start_time, long_delay)
+
+    @staticmethod
+    def _exception_outcome(error: Exception) -> str:
+        """请求异常对应的速率控制结果（超时会触发降速）"""
+        if isinstance(error, asyncio.TimeoutError) or 'Timeout' in type(error).__name__:
+            return OUTCOME_TIMEOUT
+        return OUTCOME_ERROR
+
+    async def _run_db(self, func: Callable, *args):
+        """在线程池中串行执行数据库操作"""
+        self._ensure_loop_objects()
+        async with self._db_lock:
+            return await to_thread(func, *args)
+
+    # ==================== 话题与评论 ====================
+
+    async def fetch_topics(self, count: int = 20, end_time: Optional[str] = None,
+                           is_historical: bool = False) -> Optional[Dict[str, Any]]:
+        """获取一页话题（返回值与 fetch_topics_safe 相同）"""
+        await self._sleep(self.crawler._next_page_delay(is_historical))
+        if self.is_stopped():
+            return None
+
+        url = f"{self.crawler.base_url}{self.crawler.api_endpoint}"
+        params = {"scope": "all", "count": str(count)}
+        if end_time:
+            params["end_time"] = end_time
+
+        self.log(f"🌐 异步请求 #{self.crawler.request_count}")
+        self.log(f"   🎯 参数: scope=all, count={count}")
+        if end_time:
+            self.log(f"   📅 时间: {end_time}")
+
+        try:
+            status, body, headers = await self._http_get(url, params, timeout=10)
+        except Exception as e:
+            self.crawler._record_request(self._exception_outcome(e))
+            print(f"   ❌ 请求异常: {e}")
+            print(f"   🔧 异常类型: {type(e).__name__}")
+            return None
+
+        self.log(f"   📊 状态: {status}, 大小: {len(body)}B")
+        if self.is_stopped():
+            return None
+        data = self.crawler._parse_topics_response(status, body, headers)
+        archive_response(self.crawler.group_id, 'topics', params, data)
+        return data
+
+    async def fetch_comments(self, topic_id: int, begin_time: str = None, count: int = 30,
+                             max_retries: int = 10) -> Optional[Dict[str, Any]]:
+        """获取一页评论，遇到反爬错误码1059或异常时重试（等待策略与同步采集器一致）"""
+        url = f"{self.crawler.base_url}/v2/topics/{topic_id}/comments"
+        params = {'sort': 'asc', 'count': count, 'with_sticky': 'true'}
+        if begin_time:
+            params['begin_time'] = begin_time
+
+        for retry in range(max_retries):
+            if self.crawler.adaptive_rate:
+                await self._sleep(self.crawler._next_rate_limited_delay())
+            else:
+                await self._sleep(self.crawler._next_budget_delay())
+            if self.is_stopped():
+                return None
+            try:
+                status, body, _ = await self._http_get(url, params, timeout=30)
+                if status != 200:
+                    self.crawler._record_request(classify_response(status))
+                    self.log(f"❌ 评论API请求失败: {status}")
+                    return None
+
+                data = json.loads(body)
+                self.crawler._record_request(classify_response(status, data))
+                if data.get('succeeded'):
+                    archive_response(self.crawler.group_id, 'comments', dict(params, topic_id=topic_id), data)
+                    if retry > 0:
+                        self.log(f"✅ 评论API重试成功 (第{retry+1}次尝试)")
+                    return data
+
+                error_code = data.get('code')
+                if error_code != 1059:
+                    self.log(f"❌ 评论API返回失败: 错误码{error_code} - {data.get('error', '未知错误')}")
+                    return None
+                reason = "遇到反爬机制 (错误码1059)"
+            except Exception as e:
+                self.crawler._record_request(self._exception_outcome(e))
+                reason = f"获取评论异常: {e}"
+
+            if retry >= max_retries - 1:
+                self.log(f"❌ {reason}，重试{max_retries}次后仍失败")
+                return None
+
+            if self.crawler.adaptive_rate:
+                # 结果已报告给速率控制器，由下一次预约按降速后的间隔等待
+                self.log(f"⚠️ {reason}，降速后重试 (第{retry+1}/{max_retries}次)")
+                continue
+
+            wait_time = 2 if retry < 3 else (5 if retry < 6 else 10)
+            self.log(f"⚠️ {reason}，等待{wait_time}秒后重试 (第{retry+1}/{max_retries}次)")
+            await self._sleep(wait_time)
+            if self.is_stopped():
+                return None
+
+        return None
+
+    async def fetch_all_comments(self, topic_id: int, comments_count: int) -> List[Dict[str, Any]]:
+        """获取话题的所有评论（如果评论数量大于8）"""
+        if comments_count <= 8:
+            return []
+
+        all_comments = []
+        begin_time = None
+        page = 1
+        while not self.is_stopped():
+            data = await self.fetch_comments(topic_id, begin_time, count=30)
+            if not data:
+                self.log(f"   ❌ 话题 {topic_id} 第 {page} 页评论获取失败，跳过此话题")
+                break
+
+            comments = data.get('resp_data', {}).get('comments', [])
+            for comment in comments:
+                all_comments.append(comment)
+                all_comments.extend(comment.get('replied_comments') or [])
+
+            # 返回不足30条说明已经是最后一页
+            if len(comments) < 30:
+                break
+
+            last_time = comments[-1].get('create_time')
+            if not last_time:
+                break
+            begin_time = self.crawler._increment_time(last_time)
+            page += 1
+            await self._sleep(1)
+
+        return all_comments
+
+    def _import_comments(self, topic_id: int, comments: List[Dict[str, Any]]):
+        self.db.import_additional_comments(topic_id, comments)
+        self.db.complete_comment_backfill(topic_id)
+        self.db.conn.commit()
+
+    def _fail_comments(self, topic_id: int, error: str):
+        self.db.fail_comment_backfill(topic_id, error)
+        self.db.conn.commit()
+
+    def _store_topics(self, topics: List[Dict[str, Any]]) -> tuple:
+        stats = self.db.import_topics_batch(topics)
+        queued = self.db.enqueue_comment_backfill(topics)
+        self.db.conn.commit()
+        return stats, queued
+
+    async def _backfill_comments(self, topic_id: int, comments_count: int):
+        """
+        后台补全单个话题的评论（并发数受 comment_concurrency 限制）
+        结果记录到评论补全队列，任务停止时未完成的话题留给评论补全任务继续
+        """
+        async with self._comment_semaphore:
+            if self.is_stopped():
+                return
+            try:
+                self.log(f"📝 话题 {topic_id} 有 {comments_count} 条评论，后台获取完整评论列表...")
+                comments = await self.fetch_all_comments(topic_id, comments_count)
+                if self.is_stopped():
+                    return
+                if comments:
+                    await self._run_db(self._import_comments, topic_id, comments)
+                    self.log(f"✅ 话题 {topic_id} 导入 {len(comments)} 条额外评论")
+                else:
+                    await self._run_db(self._fail_comments, topic_id, "未获取到评论，可能是权限限制")
+                    self.log(f"ℹ️ 话题 {topic_id} 无法获取更多评论，可能是权限限制")
+            except Exception as e:
+                self.log(f"⚠️ 话题 {topic_id} 获取评论时出错: {e}")
+
+    async def _drain_comment_tasks(self):
+        """等待所有后台评论任务完成"""
+        while self._comment_tasks:
+            await asyncio.gather(*list(self._comment_tasks), return_exceptions=True)
+
+    async def store_topics(self, topics: List[Dict[str, Any]]) -> Dict[str, int]:
+        """写入一页话题，登记到评论补全队列的话题在后台补全评论，不阻塞下一页的请求"""
+        if self.is_stopped() or not topics:
+            return {'new_topics': 0, 'updated_topics': 0, 'errors': 0}
+
+        stats, queued = await self._run_db(self._store_topics, topics)
+        self.crawler._log_write_breakdown(stats)
+
+        self._ensure_loop_objects()
+        comments_counts = {topic.get('topic_id'): topic.get('comments_count', 0) for topic in topics}
+        for topic_id in queued:
+            task = asyncio.ensure_future(self._backfill_comments(topic_id, comments_counts[topic_id]))
+            self._comment_tasks.add(task)
+            task.add_done_callback(self._comment_tasks.discard)
+        return stats
+
+    async def _existing_topic_ids(self, topics: List[Dict[str, Any]]) -> set:
+        topic_ids = [topic.get('topic_id') for topic in topics if topic.get('topic_id')]
+        return await self._run_db(self.db.get_existing_topic_ids, topic_ids)
+
+    @staticmethod
+    def _add_stats(total: Dict[str, int], page_stats: Dict[str, int]):
+        for key in ('new_topics', 'updated_topics', 'errors'):
+            total[key] += page_stats.get(key, 0)
+
+    # ==================== 翻页流程 ====================
+
+    def _checkpoint(self, mode: str) -> CrawlCheckpoint:
+        return CrawlCheckpoint(self.db, self.group_id, mode, self.log, stop_check=self.is_stopped)
+
+    async def _walk_pages(self, handle_page: Callable[[List[Dict[str, Any]], Dict[str, int]], Awaitable[bool]],
+                          end_time: Optional[str] = None, max_pages: Optional[int] = None,
+                          per_page: int = 20, skip_failed_pages: bool = True,
+                          checkpoint: Optional[CrawlCheckpoint] = None,
+                          recheck_head_after_resume: bool = False) -> Dict[str, Any]:
+        """
+        按 end_time 向历史方向翻页，所有爬取模式共用
+
+        Args:
+            handle_page: 处理一页话题的协程，返回 False 时结束翻页
+            end_time: 起始时间戳，为None时从最新话题开始
+            max_pages: 最多请求的页数，为None时不限
+            skip_failed_pages: 单页重试失败后是否向前跳过1小时继续（否则结束）
+            checkpoint: 爬取断点，存在未完成的断点时从断点游标开始，每页处理后保存
+            recheck_head_after_resume: 从断点续传结束后，再从最新话题翻一遍（补上中断后发布的话题）
+        """
+        resume_cursor = None
+        if checkpoint:
+            resume_cursor = await self._run_db(checkpoint.start)
+            end_time = resume_cursor or end_time
+
+        result = await self._walk(handle_page, end_time, max_pages, per_page, skip_failed_pages, checkpoint)
+
+        if recheck_head_after_resume and resume_cursor and not result.get('expired') \
+                and not self.is_stopped() and not checkpoint.interrupted:
+            self.log("🔁 断点之后的部分已与数据库衔接，再从最新开始检查中断后发布的话题")
+            head = await self._walk(handle_page, None, max_pages, per_page, skip_failed_pages, checkpoint)
+            if head.get('expired'):
+                result = head
+            else:
+                for key in ('new_topics', 'updated_topics', 'errors', 'pages'):
+                    result[key] += head.get(key, 0)
+
+        if checkpoint:
+            await self._run_db(checkpoint.finish, self.is_stopped() or bool(result.get('expired')))
+        return result
+
+    async def _walk(self, handle_page, end_time: Optional[str], max_pages: Optional[int], per_page: int,
+                    skip_failed_pages: bool, checkpoint: Optional[CrawlCheckpoint]) -> Dict[str, Any]:
+        stats = _empty_stats()
+        offset_ms = self.crawler.timestamp_offset_ms
+        max_retries_per_page = 10
+        attempted = 0
+
+        try:
+            while max_pages is None or attempted < max_pages:
+                if self.is_stopped():
+                    self.log("🛑 任务已停止")
+                    break
+
+                attempted += 1
+                self.log(f"\n📄 页面 {attempted}" + (f"/{max_pages}" if max_pages else ''))
+
+                data = None
+                for retry in range(max_retries_per_page):
+                    if self.is_stopped():
+                        return stats
+                    if retry > 0:
+                        self.log(f"   🔄 第{retry}次重试")
+
+                    request_end_time = end_time
+                    data = await self.fetch_topics(per_page, end_time, is_historical=end_time is not None)
+                    if data:
+                        break
+
+                    stats['errors'] += 1
+                    if self.is_stopped():
+                        return stats
+                    self.log(f"   ❌ 页面 {attempted} 获取失败 (重试{retry+1}/{max_retries_per_page})")
+                    if end_time:
+                        end_time = shift_api_time(end_time, offset_ms)
+
+                if data and data.get('expired'):
+                    self.log("   ❌ 会员已过期，停止爬取")
+                    return data
+
+                if not data:
+                    if not skip_failed_pages or not end_time:
+                        self.log(f"   🚫 页面 {attempted} 达到最大重试次数，停止获取")
+                        if checkpoint:
+                            checkpoint.interrupted = True
+                        break
+                    end_time = format_api_time(parse_api_time(end_time) - timedelta(hours=1))
+                    self.log(f"   ⏰ 大幅度跳过时间段: {end_time} (减去1小时)")
+                    continue
+
+                topics = data.get('resp_data', {}).get('topics', []) or []
+                before = dict(stats)
+                keep_going = await handle_page(topics, stats)
+
+                if topics:
+                    stats['pages'] += 1
+                    last_time = topics[-1].get('create_time')
+                    try:
+                        end_time = shift_api_time(last_time, offset_ms)
+                    except Exception as e:
+                        end_time = last_time
+                        self.log(f"   ⚠️ 时间戳调整失败: {e}")
+                    self.log(f"   📈 累计: 新增{stats['new_topics']}, 更新{stats['updated_topics']}, 页数{stats['pages']}")
+                    if checkpoint:
+                        page_stats = {key: stats[key] - before[key] for key in ('new_topics', 'updated_topics', 'errors')}
+                        await self._run_db(checkpoint.page_done, end_time, page_stats, request_end_time)
+
+                if not keep_going:
+                    break
+                await self._check_page_long_delay()
+        finally:
+            await self._drain_comment_tasks()
+
+        return stats
+
+    # ==================== 爬取模式 ====================
+
+    async def crawl_latest(self, count: int = 20) -> Dict[str, Any]:
+        """爬取最新话题"""
+        data = await self.fetch_topics(count)
+        if not data:
+            return {'new_topics': 0, 'updated_topics': 0, 'errors': 1}
+        if data.get('expired'):
+            return data
+
+        try:
+            stats = await self.store_topics(data.get('resp_data', {}).get('topics', []))
+        finally:
+            await self._drain_comment_tasks()
+        self.log(f"💾 存储结果: 新增{stats['new_topics']}, 更新{stats['updated_topics']}")
+        return stats
+
+    async def crawl_historical(self, pages: int = 10, per_page: int = 20) -> Dict[str, Any]:
+        """从最新话题开始爬取指定页数"""
+        async def handle_page(topics, stats):
+            if not topics:
+                self.log("   📭 无更多数据，停止爬取")
+                return False
+            self._add_stats(stats, await self.store_topics(topics))
+            if len(topics) < per_page:
+                self.log(f"   📭 已爬取完毕 (返回{len(topics)}条)")
+                return False
+            return True
+
+        return await self._walk_pages(handle_page, max_pages=pages, per_page=per_page,
+                                      checkpoint=self._checkpoint('historical'))
+
+    async def _oldest_end_time(self) -> Optional[str]:
+        """数据库最老话题时间减去偏移量，作为继续向历史爬取的起点"""
+        info = await self._run_db(self.db.get_timestamp_range_info)
+        if not info['has_data']:
+            return None
+        self.log(f"📊 数据库现状: {info['total_topics']}个话题，{info['oldest_timestamp']} ~ {info['newest_timestamp']}")
+        try:
+            return shift_api_time(info['oldest_timestamp'], self.crawler.timestamp_offset_ms)
+        except Exception:
+            return info['oldest_timestamp']
+
+    async def crawl_incremental(self, pages: int = 10, per_page: int = 20) -> Dict[str, Any]:
+        """增量爬取：基于数据库最老时间戳继续向历史爬取"""
+        start_end_time = await self._oldest_end_time()
+        if not start_end_time:
+            self.log("❌ 数据库中没有话题数据，请先进行历史爬取")
+            return {'new_topics': 0, 'updated_topics': 0, 'errors': 1}
+
+        async def handle_page(topics, stats):
+            if not topics:
+                self.log("   📭 无更多历史数据，增量爬取完成")
+                return False
+            new_count = len(topics) - len(await self._existing_topic_ids(topics))
+            self.log(f"   📊 获取到 {len(topics)} 个话题，其中 {new_count} 个为新话题")
+            if new_count == 0 and len(topics) < per_page:
+                self.log("   📭 无新话题且数据量不足，可能已达历史底部")
+                return False
+            self._add_stats(stats, await self.store_topics(topics))
+            return True
+
+        return await self._walk_pages(handle_page, end_time=start_end_time, max_pages=pages, per_page=per_page,
+                                      checkpoint=self._checkpoint('incremental'))
+
+    async def crawl_all_historical(self, per_page: int = 20) -> Dict[str, Any]:
+        """获取所有历史数据：从数据库最老话题（空库时从最新话题）开始，直到连续3个空页面"""
+        start_end_time = await self._oldest_end_time()
+        empty_pages = 0
+
+        async def handle_page(topics, stats):
+            nonlocal empty_pages
+            if not topics:
+                empty_pages += 1
+                self.log(f"   📭 第{empty_pages}个空页面")
+                if empty_pages >= 3:
+                    self.log("   🏁 连续3个空页面，所有历史数据爬取完成")
+                    return False
+                return True
+
+            empty_pages = 0
+            new_count = len(topics) - len(await self._existing_topic_ids(topics))
+            self._add_stats(stats, await self.store_topics(topics))
+            self.log(f"   📊 获取到 {len(topics)} 个话题，其中 {new_count} 个为新话题")
+            if new_count == 0 and len(topics) < per_page:
+                self.log("   📭 无新话题且数据量不足，可能已达历史底部")
+                return False
+            return True
+
+        return await self._walk_pages(handle_page, end_time=start_end_time, per_page=per_page,
+                                      checkpoint=self._checkpoint('all_historical'))
+
+    async def crawl_latest_until_complete(self, per_page: int = 20) -> Dict[str, Any]:
+        """获取最新记录：从最新话题向后爬取，直到整页话题都已存在于数据库"""
+        async def handle_page(topics, stats):
+            if not topics:
+                self.log("   📭 无更多数据，获取完成")
+                return False
+            existing = await self._existing_topic_ids(topics)
+            if len(existing) == len(topics):
+                # 索引不含其他连接的删除，停止前到数据库确认整页确实都已存在
+                existing = await self._run_db(self.db.confirm_existing_topic_ids, existing)
+            new_topics = [topic for topic in topics if topic.get('topic_id') not in existing]
+            self.log(f"   📊 页面分析: {len(topics)}个话题，{len(existing)}个已存在，{len(new_topics)}个新话题")
+            if not new_topics:
+                self.log("   ✅ 整页话题全部存在于数据库，增量更新完成")
+                return False
+            self._add_stats(stats, await self.store_topics(new_topics))
+            return True
+
+        return await self._walk_pages(handle_page, per_page=per_page, skip_failed_pages=False,
+                                      checkpoint=self._checkpoint('latest_until_complete'),
+                                      recheck_head_after_resume=True)
+
+    async def crawl_time_range(self, start_dt: datetime, end_dt: datetime, per_page: int = 20) -> Dict[str, Any]:
+        """按时间区间爬取：扣除已爬取过的时间段，每个空缺区间从其结束时间直接开始翻页，只导入区间内的话题"""
+        coverage = CrawlCoverage(self.db, self.group_id)
+        gaps = await self._run_db(coverage.missing, start_dt, end_dt)
+        if not gaps:
+            self.log("✅ 该时间区间已完整爬取过，无需请求")
+            return _empty_stats()
+        return await self._crawl_gaps(coverage, gaps, per_page, start_dt, end_dt)
+
+    async def crawl_gaps(self, per_page: int = 20) -> Dict[str, Any]:
+        """补洞模式：只爬取已覆盖区间之间的空洞"""
+        coverage = CrawlCoverage(self.db, self.group_id)
+        gaps = await self._run_db(coverage.gaps)
+        if not gaps:
+            self.log("✅ 已爬取的时间段之间没有空洞")
+            return _empty_stats()
+        return await self._crawl_gaps(coverage, gaps, per_page)
+
+    async def _crawl_gaps(self, coverage: CrawlCoverage, gaps: List[tuple], per_page: int,
+                          start_dt: Optional[datetime] = None, end_dt: Optional[datetime] = None) -> Dict[str, Any]:
+        """依次爬取各个空缺区间（从新到旧），start_dt/end_dt 给定时只导入该区间内的话题"""
+        self.log(f"🧩 待爬取 {len(gaps)} 个区间")
+        total = _empty_stats()
+        offset_ms = self.crawler.timestamp_offset_ms
+        for gap_start, gap_end in gaps:
+            walk = {'end_time': format_api_time(gap_end), 'done': False}
+            self.log(f"⏩ 从 {walk['end_time']} 开始翻页")
+
+            async def handle_page(topics, stats, gap_start=gap_start, walk=walk):
+                if not topics:
+                    self.log("📭 无更多数据")
+                    gap_end_ms = to_ms(parse_api_time(walk['end_time']))
+                    await self._run_db(self._add_coverage, coverage, to_ms(gap_start),
+                                       min(gap_end_ms, to_ms(end_dt)) if end_dt else gap_end_ms)
+                    walk['done'] = True
+                    return False
+
+                stored = []
+                for topic in topics:
+                    try:
+                        topic_dt = parse_api_time(topic.get('create_time', ''))
+                    except ValueError:
+                        continue
+                    if (not start_dt or topic_dt >= start_dt) and (not end_dt or topic_dt <= end_dt):
+                        stored.append(topic)
+                if stored:
+                    self._add_stats(stats, await self.store_topics(stored))
+                if self.is_stopped():
+                    return False  # 停止时本页可能未写入，不记录覆盖区间
+
+                oldest_time = topics[-1].get('create_time', '')
+                await self._run_db(self._record_page_coverage, coverage, walk['end_time'], oldest_time,
+                                   start_dt, end_dt)
+                walk['end_time'] = shift_api_time(oldest_time, offset_ms)
+                if parse_api_time(oldest_time) < gap_start:
+                    walk['done'] = True
+                    return False
+                return True
+
+            result = await self._walk(handle_page, walk['end_time'], None, per_page, False, None)
+            if result.get('expired'):
+                return result
+            self._add_stats(total, result)
+            total['pages'] += result.get('pages', 0)
+            if not walk['done'] or self.is_stopped():
+                return total
+
+        self.log("✅ 全部区间爬取完成")
+        return total
+
+    def _record_page_coverage(self, coverage: CrawlCoverage, end_time: str, oldest_time: str,
+                              start_dt: Optional[datetime], end_dt: Optional[datetime]):
+        coverage.record_page(end_time, oldest_time, self.crawler.timestamp_offset_ms, start_dt, end_dt)
+        self.db.conn.commit()
+
+    def _add_coverage(self, coverage: CrawlCoverage, start_ms: int, end_ms: int):
+        coverage.add(start_ms, end_ms)
+        self.db.conn.commit()
+
+    async def run(self, mode: str, **kwargs) -> Dict[str, Any]:
+        """按模式名执行爬取（模式见 MODES）"""
+        if mode not in self.MODES:
+            raise ValueError(f"不支持的爬取模式: {mode}")
+        return await getattr(self, f"crawl_{mode}")(**kwargs)
+
+    async def close(self):
+        """关闭HTTP会话和数据库连接"""
+        await self._drain_comment_tasks()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        self.crawler.close()
+
+
+async def crawl_groups(jobs: List[Dict[str, Any]]) -> List[Any]:
+    """
+    在同一事件循环中并发执行多个群组的采集
+
+    Args:
+        jobs: [{'crawler': ZSXQAsyncCrawler, 'mode': 'incremental', 'kwargs': {...}}]
+
+    Returns:
+        与 jobs 顺序对应的结果（失败时为异常对象）
+    """
+    async def run_job(job):
+        crawler = job['crawler']
+        try:
+            return await crawler.run(job['mode'], **job.get('kwargs', {}))
+        finally:
+            await crawler.close()
+
+    return await asyncio.gather(*(run_job(job) for job in jobs), return_exceptions=True)
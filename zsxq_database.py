@@ -1,21 +1,129 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import hashlib
+import json
+import re
 import sqlite3
+from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, Optional, List
+from urllib.parse import unquote
+
+from cursor_pagination import encode_cursor, decode_cursor
+from db_storage_profile import connect_database
+from schema_migrations import run_migrations
+from topic_id_index import TopicIdIndex
+
+
+# 富文本标记，如 <e type="hashtag" hid="..." title="%23标签%23" />
+_RICH_TEXT_ENTITY = re.compile(r'<e\s[^>]*?title="([^"]*)"[^>]*/>')
+_RICH_TEXT_TAG = re.compile(r'<[^>]+>')
+# 话题标签标记 <e type="hashtag" hid="..." title="..." />
+_HASHTAG = re.compile(r'<e\s+type="hashtag"\s+hid="([^"]+)"\s+title="([^"]+)"\s*/>')
+
+
+def _plain_text(text: Optional[str]) -> str:
+    """去除富文本标记，得到用于全文索引的纯文本"""
+    if not text:
+        return ''
+    text = _RICH_TEXT_ENTITY.sub(lambda m: ' ' + unquote(m.group(1)) + ' ', text)
+    return _RICH_TEXT_TAG.sub(' ', text)
+
+
+def _beijing_now() -> str:
+    """当前东八区时间（与API返回的时间格式一致）"""
+    beijing_tz = timezone(timedelta(hours=8))
+    return datetime.now(beijing_tz).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0800'
+
+
+# 话题中随浏览、点赞、评论变化的统计字段（只影响 topics 表的统计列）
+_TOPIC_STATS_KEYS = ('digested', 'sticky', 'likes_count', 'tourist_likes_count', 'rewards_count',
+                     'comments_count', 'reading_count', 'readers_count',
+                     'user_liked', 'user_subscribed', 'user_specific')
+
+
+def _fingerprint(value: Any) -> int:
+    """JSON规范化后的64位哈希（有符号整数，直接存入 INTEGER 列）"""
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    digest = hashlib.blake2b(payload.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def topic_fingerprints(topic_data: Dict[str, Any]) -> tuple:
+    """
+    返回话题的 (内容指纹, 统计指纹)
+    内容指纹覆盖统计字段以外的全部数据，只有统计指纹变化时只需更新 topics 表的统计列
+    """
+    content = {key: value for key, value in topic_data.items() if key not in _TOPIC_STATS_KEYS}
+    stats = [topic_data.get(key) for key in _TOPIC_STATS_KEYS]
+    return _fingerprint(content), _fingerprint(stats)
 
 
 class ZSXQDatabase:
     """知识星球数据库管理器"""
+
+    # 二级索引: (索引名, 表名, 列定义)
+    INDEXES = [
+        ('idx_topics_group_create_time', 'topics', 'group_id, create_time'),
+        ('idx_topics_create_time', 'topics', 'create_time'),
+        ('idx_images_topic_comment', 'images', 'topic_id, comment_id'),
+        ('idx_images_comment_id', 'images', 'comment_id'),
+        ('idx_likes_topic_create_time', 'likes', 'topic_id, create_time'),
+        ('idx_comments_topic_create_time', 'comments', 'topic_id, create_time'),
+        ('idx_topic_tags_tag_id', 'topic_tags', 'tag_id'),
+        ('idx_topic_files_topic_id', 'topic_files', 'topic_id'),
+        ('idx_topic_files_file_id', 'topic_files', 'file_id'),
+    ]
+
+    # 自然键唯一约束: (索引名, 表名, 键列)
+    # 这些表使用自增id，重复爬取同一话题时需要按自然键覆盖而不是追加
+    NATURAL_KEYS = [
+        ('uq_talks_topic_id', 'talks', 'topic_id'),
+        ('uq_articles_topic_id', 'articles', 'topic_id'),
+        ('uq_likes_topic_user', 'likes', 'topic_id, user_id'),
+        ('uq_like_emojis_topic_emoji', 'like_emojis', 'topic_id, emoji_key'),
+        ('uq_user_liked_emojis_topic_emoji', 'user_liked_emojis', 'topic_id, emoji_key'),
+        ('uq_questions_topic_id', 'questions', 'topic_id'),
+        ('uq_answers_topic_id', 'answers', 'topic_id'),
+    ]
+
+    # 被自然键唯一索引取代的旧索引
+    _SUPERSEDED_INDEXES = [
+        'idx_talks_topic_id', 'idx_articles_topic_id', 'idx_like_emojis_topic_id',
+        'idx_user_liked_emojis_topic_id', 'idx_questions_topic_id', 'idx_answers_topic_id',
+    ]
     
-    def __init__(self, db_path: str = "zsxq_interactive.db"):
+    def __init__(self, db_path: str = "zsxq_interactive.db", storage_profile: Optional[str] = None):
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn = connect_database(db_path, storage_profile)
         self.cursor = self.conn.cursor()
+        self.natural_key_cleanup: Dict[str, int] = {}
+        self._search_index_available: Optional[bool] = None
+        self._topic_id_index: Optional[TopicIdIndex] = None
         self._init_database()
     
     def _init_database(self):
-        """初始化数据库表结构"""
+        """初始化数据库表结构（按 user_version 执行尚未应用的迁移）"""
+        run_migrations(self.conn, self._schema_migrations(), f" ({self.db_path})")
+
+    def _schema_migrations(self) -> List[tuple]:
+        """结构迁移列表，只能在末尾追加新版本"""
+        return [
+            (1, '创建基础表结构', self._create_base_tables),
+            (2, '创建二级索引', self._ensure_indexes),
+            (3, '自然键唯一约束', self._ensure_natural_keys),
+            (4, '全文搜索索引', self._create_search_index),
+            (5, '群组话题计数', self._create_group_stats),
+            (6, '群组统计扩展', self._extend_group_stats),
+            (7, '标签计数触发器', self._create_tag_count_triggers),
+            (8, '评论补全队列', self._create_comment_backfill_queue),
+            (9, '爬取断点', self._create_crawl_state),
+            (10, '话题指纹', self._create_topic_fingerprints),
+            (11, '爬取覆盖区间', self._create_crawl_coverage),
+        ]
+
+    def _create_base_tables(self):
+        """创建基础表结构"""
         
         # 群组表 - 适配现有结构
         self.cursor.execute('''
@@ -254,115 +362,423 @@ class ZSXQDatabase:
             )
         ''')
 
+    def _ensure_indexes(self):
+        """创建二级索引（幂等，已有数据库首次打开时自动补建）"""
+        for index_name, table, columns in self.INDEXES:
+            self.cursor.execute(f'CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({columns})')
+
+    def _ensure_natural_keys(self):
+        """确保自然键唯一索引存在；旧数据库首次打开时先清理重复行再建索引"""
+        self.cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+        existing = {row[0] for row in self.cursor.fetchall()}
+        missing = [key for key in self.NATURAL_KEYS if key[0] not in existing]
+        if not missing:
+            return
+
+        removed = self._deduplicate_natural_keys(missing)
+        for index_name in self._SUPERSEDED_INDEXES:
+            self.cursor.execute(f'DROP INDEX IF EXISTS {index_name}')
+
+        for table, count in removed.items():
+            self.natural_key_cleanup[table] = self.natural_key_cleanup.get(table, 0) + count
+        total = sum(removed.values())
+        if total:
+            details = ', '.join(f"{table} {count}" for table, count in removed.items() if count)
+            print(f"🧹 已清理重复数据 {total} 行 ({details})，可运行 python db_maintenance.py compact 回收磁盘空间")
+
+    def _deduplicate_natural_keys(self, keys: List[tuple]) -> Dict[str, int]:
+        """按自然键删除重复行（保留最新写入的一行），并创建唯一索引"""
+        removed = {}
+        for index_name, table, columns in keys:
+            self.cursor.execute(f'''
+                DELETE FROM {table}
+                WHERE id NOT IN (SELECT MAX(id) FROM {table} GROUP BY {columns})
+            ''')
+            removed[table] = max(self.cursor.rowcount, 0)
+            self.cursor.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS {index_name} ON {table} ({columns})')
+        return removed
+
+    def compact_database(self, vacuum: bool = True) -> Dict[str, Any]:
+        """
+        在线压缩数据库：按自然键清理重复行，并回收空闲页
+
+        Returns:
+            包含各表删除行数、压缩前后大小和回收字节数的报告
+        """
+        def storage_bytes():
+            page_size = self.conn.execute('PRAGMA page_size').fetchone()[0]
+            page_count = self.conn.execute('PRAGMA page_count').fetchone()[0]
+            freelist_count = self.conn.execute('PRAGMA freelist_count').fetchone()[0]
+            return page_size * page_count, page_size * freelist_count
+
+        bytes_before, _ = storage_bytes()
+
+        removed = self._deduplicate_natural_keys(self.NATURAL_KEYS)
         self.conn.commit()
+
+        # 合并打开数据库时自动清理的行数
+        for table, count in self.natural_key_cleanup.items():
+            removed[table] = removed.get(table, 0) + count
+        self.natural_key_cleanup = {}
+
+        if vacuum:
+            self.conn.execute('VACUUM')
+            journal_mode = self.conn.execute('PRAGMA journal_mode').fetchone()[0]
+            if str(journal_mode).lower() == 'wal':
+                self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+        bytes_after, free_bytes = storage_bytes()
+
+        return {
+            'db_path': self.db_path,
+            'removed_rows': removed,
+            'total_removed_rows': sum(removed.values()),
+            'bytes_before': bytes_before,
+            'bytes_after': bytes_after,
+            'reclaimed_bytes': max(bytes_before - bytes_after, 0),
+            'free_bytes': free_bytes,
+            'vacuumed': vacuum
+        }
     
     def import_topic_data(self, topic_data: Dict[str, Any]) -> bool:
         """导入话题数据到数据库"""
         try:
-            topic_id = topic_data.get('topic_id')
-            group_info = topic_data.get('group', {})
-            
-            if not topic_id:
+            if not topic_data.get('topic_id'):
                 return False
-            
-
-            
-            # 导入群组信息
-            if group_info:
-                self._upsert_group(group_info)
-            
-            # 导入话题相关的所有用户信息
-            self._import_all_users(topic_data)
-            
-            # 导入话题信息
-            self._upsert_topic(topic_data)
-            
-            # 导入话题内容(talk)
-            if 'talk' in topic_data and topic_data['talk']:
-                self._upsert_talk(topic_id, topic_data['talk'])
-            
-            # 导入文章信息（如果话题类型是文章）
-            self._import_articles(topic_id, topic_data)
-            
-            # 导入图片信息
-            self._import_images(topic_id, topic_data)
-            
-            # 导入点赞信息
-            self._import_likes(topic_id, topic_data)
-            
-            # 导入表情点赞信息
-            self._import_like_emojis(topic_id, topic_data)
-            
-            # 导入用户表情点赞信息
-            self._import_user_liked_emojis(topic_id, topic_data)
-            
-            # 导入评论信息
-            if 'show_comments' in topic_data:
-                self._import_comments(topic_id, topic_data['show_comments'])
-            
-            # 导入问题信息
-            if 'question' in topic_data and topic_data['question']:
-                self._upsert_question(topic_id, topic_data['question'])
-            
-            # 导入回答信息
-            if 'answer' in topic_data and topic_data['answer']:
-                self._upsert_answer(topic_id, topic_data['answer'])
-            
-            # 导入标签信息
-            self._import_tags(topic_id, topic_data)
-
-            # 导入文件信息
-            if 'talk' in topic_data and topic_data['talk'] and 'files' in topic_data['talk']:
-                self._import_files(topic_id, topic_data['talk']['files'])
 
+            rows = self._new_row_buffers()
+            self._collect_topic_rows(topic_data, rows, _beijing_now())
+            self._flush_row_buffers(rows)
             return True
-            
+
         except Exception as e:
             print(f"❌ 导入话题数据失败: {e}")
             import traceback
             traceback.print_exc()
             return False
-    
-    def _upsert_group(self, group_data: Dict[str, Any]):
-        """插入或更新群组信息"""
-        group_id = group_data.get('group_id')
-        if not group_id:
-            return
-        
-        # 获取当前时间作为created_at（使用东八区时间格式）
-        from datetime import datetime, timezone, timedelta
-        beijing_tz = timezone(timedelta(hours=8))
-        current_time = datetime.now(beijing_tz).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0800'
-        
-        self.cursor.execute('''
-            INSERT OR REPLACE INTO groups 
+
+    def import_topics_batch(self, topics: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        批量导入一整页话题数据
+        整页数据先归一化为按表划分的行缓冲区（页内用户去重），再用 executemany 在一个事务内写入
+
+        Returns:
+            {'new_topics': 新增数, 'updated_topics': 更新数, 'errors': 失败数}
+        """
+        return self.write_topics_batch(self.prepare_topics_batch(topics))
+
+    def prepare_topics_batch(self, topics: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """将一页话题归一化为行缓冲区（不访问数据库，可在解析线程中执行）"""
+        valid_topics = [topic for topic in topics if topic and topic.get('topic_id')]
+        rows = self._new_row_buffers()
+        current_time = _beijing_now()
+        for topic_data in valid_topics:
+            self._collect_topic_rows(topic_data, rows, current_time)
+        return {'topics': valid_topics, 'rows': rows, 'invalid': len(topics) - len(valid_topics)}
+
+    def write_topics_batch(self, batch: Dict[str, Any]) -> Dict[str, int]:
+        """
+        在一个事务内写入 prepare_topics_batch 生成的行缓冲区
+        已入库的话题按指纹分为三类：内容和统计都未变化的直接跳过，只有统计变化的只更新 topics 统计列，
+        其余（新话题、内容变化或没有指纹的旧数据）完整写入
+
+        Returns:
+            {'new_topics', 'updated_topics', 'errors', 'skipped_topics', 'stats_updated_topics', 'rewritten_topics'}
+        """
+        stats = {'new_topics': 0, 'updated_topics': 0, 'errors': batch['invalid'],
+                 'skipped_topics': 0, 'stats_updated_topics': 0, 'rewritten_topics': 0}
+        valid_topics = batch['topics']
+        if not valid_topics:
+            return stats
+
+        rows = batch['rows']
+        existing_ids = self._get_existing_topic_ids([topic['topic_id'] for topic in valid_topics])
+        stored = self._get_topic_fingerprints(list(existing_ids)) if existing_ids else {}
+        fingerprints = {row[0]: row for row in rows['topic_fingerprints']}
+
+        skipped_ids, stats_rows, full_topics = set(), [], []
+        topic_rows = {row[0]: row for row in rows['topics']}
+        for topic_data in valid_topics:
+            topic_id = topic_data['topic_id']
+            old, new = stored.get(topic_id), fingerprints.get(topic_id)
+            if old is None or new is None or old[0] != new[1]:
+                full_topics.append(topic_data)
+            elif old[1] == new[2]:
+                skipped_ids.add(topic_id)
+            else:
+                stats_rows.append((topic_rows[topic_id], new))
+
+        # 部分话题不需要完整写入时，只为其余话题重新生成行缓冲区
+        if len(full_topics) != len(valid_topics):
+            rows = self._new_row_buffers()
+            current_time = _beijing_now()
+            for topic_data in full_topics:
+                self._collect_topic_rows(topic_data, rows, current_time)
+
+        try:
+            if full_topics:
+                self._flush_row_buffers(rows)
+            if stats_rows:
+                self.cursor.executemany(self._UPDATE_TOPIC_STATS_SQL,
+                                        [self._topic_stats_params(topic_row) for topic_row, _ in stats_rows])
+                self.cursor.executemany(self._UPSERT_SQL['topic_fingerprints'],
+                                        [fingerprint for _, fingerprint in stats_rows])
+            self.conn.commit()
+        except Exception as e:
+            # 整页写入失败时回滚，改为逐条导入，避免单个异常话题导致整页丢失
+            self.conn.rollback()
+            print(f"⚠️ 批量导入失败，改为逐条导入: {e}")
+            failed_ids = set()
+            for topic_data in valid_topics:
+                if topic_data['topic_id'] not in skipped_ids and not self.import_topic_data(topic_data):
+                    failed_ids.add(topic_data['topic_id'])
+            self.conn.commit()
+            stats['errors'] += len(failed_ids)
+            valid_topics = [topic for topic in valid_topics if topic['topic_id'] not in failed_ids]
+            stats_rows = []
+
+        for topic_data in valid_topics:
+            if topic_data['topic_id'] in existing_ids:
+                stats['updated_topics'] += 1
+            else:
+                stats['new_topics'] += 1
+        stats['skipped_topics'] = len(skipped_ids)
+        stats['stats_updated_topics'] = len(stats_rows)
+        stats['rewritten_topics'] = len(valid_topics) - stats['skipped_topics'] - stats['stats_updated_topics']
+
+        return stats
+
+    def _get_existing_topic_ids(self, topic_ids: List[int]) -> set:
+        """查询给定话题ID中已存在于数据库的部分（查内存索引，不访问数据库）"""
+        return self.known_topic_ids().existing(topic_ids)
+
+    def get_existing_topic_ids(self, topic_ids: List[int]) -> set:
+        """给定话题ID中已入库的部分（查内存索引）"""
+        return self._get_existing_topic_ids(topic_ids)
+
+    def confirm_existing_topic_ids(self, topic_ids: List[int]) -> set:
+        """
+        用一次 IN (...) 查询确认给定话题ID中仍在数据库的部分
+        索引只随本连接的写入更新，其他连接删除的话题会残留在索引中；查到已删除的ID时同时移出索引
+        """
+        topic_ids = [int(topic_id) for topic_id in topic_ids]
+        if not topic_ids:
+            return set()
+        placeholders = ','.join('?' * len(topic_ids))
+        rows = self.conn.execute(f'SELECT topic_id FROM topics WHERE topic_id IN ({placeholders})', topic_ids)
+        existing = {row[0] for row in rows}
+        index = self.known_topic_ids()
+        for topic_id in set(topic_ids) - existing:
+            index.discard(topic_id)
+        return existing
+
+    def topic_exists(self, topic_id: int) -> bool:
+        """话题是否已入库"""
+        return topic_id in self.known_topic_ids()
+
+    def known_topic_ids(self) -> TopicIdIndex:
+        """
+        已入库话题ID索引：首次调用时按主键顺序一次性读入，之后随本连接的写入同步更新
+        索引属于本连接：其他连接（如删除接口）删除的话题不会自动移出，
+        依据"全部已存在"做判断前应先用 confirm_existing_topic_ids() 确认
+        """
+        if self._topic_id_index is None:
+            rows = self.conn.execute('SELECT topic_id FROM topics ORDER BY topic_id')
+            self._topic_id_index = TopicIdIndex(row[0] for row in rows)
+        return self._topic_id_index
+
+    def reset_known_topic_ids(self):
+        """丢弃话题ID索引（删除话题后调用），下次使用时重新加载"""
+        self._topic_id_index = None
+
+    # ==================== 行缓冲区 ====================
+
+    # 各表的写入语句（单条导入和批量导入共用）
+    _UPSERT_SQL = {
+        'groups': '''
+            INSERT OR REPLACE INTO groups
             (group_id, name, type, background_url, created_at)
             VALUES (?, ?, ?, ?, ?)
-        ''', (
-            group_id,
-            group_data.get('name', ''),
-            group_data.get('type', ''),
-            group_data.get('background_url', ''),
-            current_time
-        ))
-    
-    def _upsert_user(self, user_data: Dict[str, Any]):
-        """插入或更新用户信息"""
-        user_id = user_data.get('user_id')
-        if not user_id:
-            return
-        
-        # 获取当前时间作为created_at（使用东八区时间格式）
-        from datetime import datetime, timezone, timedelta
-        beijing_tz = timezone(timedelta(hours=8))
-        current_time = datetime.now(beijing_tz).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0800'
-        
-        self.cursor.execute('''
-            INSERT OR REPLACE INTO users 
+        ''',
+        'users': '''
+            INSERT OR REPLACE INTO users
             (user_id, name, alias, avatar_url, location, description, ai_comment_url, created_at)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            user_id,
+        ''',
+        'topics': '''
+            INSERT INTO topics
+            (topic_id, group_id, type, title, create_time, digested, sticky,
+             likes_count, tourist_likes_count, rewards_count, comments_count,
+             reading_count, readers_count, answered, silenced, annotation,
+             user_liked, user_subscribed, imported_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(topic_id) DO UPDATE SET
+                group_id = excluded.group_id,
+                type = excluded.type,
+                title = excluded.title,
+                create_time = excluded.create_time,
+                digested = excluded.digested,
+                sticky = excluded.sticky,
+                likes_count = excluded.likes_count,
+                tourist_likes_count = excluded.tourist_likes_count,
+                rewards_count = excluded.rewards_count,
+                comments_count = excluded.comments_count,
+                reading_count = excluded.reading_count,
+                readers_count = excluded.readers_count,
+                answered = excluded.answered,
+                silenced = excluded.silenced,
+                annotation = excluded.annotation,
+                user_liked = excluded.user_liked,
+                user_subscribed = excluded.user_subscribed,
+                imported_at = excluded.imported_at
+        ''',
+        'talks': '''
+            INSERT INTO talks
+            (topic_id, owner_user_id, text, created_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(topic_id) DO UPDATE SET
+                owner_user_id = excluded.owner_user_id,
+                text = excluded.text,
+                created_at = excluded.created_at
+        ''',
+        'articles': '''
+            INSERT INTO articles
+            (topic_id, title, article_id, article_url, inline_article_url, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(topic_id) DO UPDATE SET
+                title = excluded.title,
+                article_id = excluded.article_id,
+                article_url = excluded.article_url,
+                inline_article_url = excluded.inline_article_url,
+                created_at = excluded.created_at
+        ''',
+        'images': '''
+            INSERT OR REPLACE INTO images
+            (image_id, topic_id, comment_id, type, thumbnail_url, thumbnail_width, thumbnail_height,
+             large_url, large_width, large_height, original_url, original_width, original_height,
+             original_size, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''',
+        'likes': '''
+            INSERT INTO likes
+            (topic_id, user_id, create_time, imported_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(topic_id, user_id) DO UPDATE SET
+                create_time = excluded.create_time
+        ''',
+        'like_emojis': '''
+            INSERT INTO like_emojis
+            (topic_id, emoji_key, likes_count, created_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(topic_id, emoji_key) DO UPDATE SET
+                likes_count = excluded.likes_count,
+                created_at = excluded.created_at
+        ''',
+        'user_liked_emojis': '''
+            INSERT OR IGNORE INTO user_liked_emojis
+            (topic_id, emoji_key)
+            VALUES (?, ?)
+        ''',
+        'comments': '''
+            INSERT OR REPLACE INTO comments
+            (comment_id, topic_id, owner_user_id, parent_comment_id, repliee_user_id,
+             text, create_time, likes_count, rewards_count, replies_count, sticky, imported_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''',
+        'questions': '''
+            INSERT INTO questions
+            (topic_id, owner_user_id, questionee_user_id, text, expired, anonymous,
+             owner_questions_count, owner_join_time, owner_status, owner_location, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(topic_id) DO UPDATE SET
+                owner_user_id = excluded.owner_user_id,
+                questionee_user_id = excluded.questionee_user_id,
+                text = excluded.text,
+                expired = excluded.expired,
+                anonymous = excluded.anonymous,
+                owner_questions_count = excluded.owner_questions_count,
+                owner_join_time = excluded.owner_join_time,
+                owner_status = excluded.owner_status,
+                owner_location = excluded.owner_location,
+                created_at = excluded.created_at
+        ''',
+        'answers': '''
+            INSERT INTO answers
+            (topic_id, owner_user_id, text, created_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(topic_id) DO UPDATE SET
+                owner_user_id = excluded.owner_user_id,
+                text = excluded.text,
+                created_at = excluded.created_at
+        ''',
+        'topic_fingerprints': '''
+            INSERT INTO topic_fingerprints
+            (topic_id, content_hash, stats_hash, updated_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(topic_id) DO UPDATE SET
+                content_hash = excluded.content_hash,
+                stats_hash = excluded.stats_hash,
+                updated_at = excluded.updated_at
+        ''',
+        'topic_files': '''
+            INSERT OR REPLACE INTO topic_files
+            (topic_id, file_id, name, hash, size, duration, download_count, create_time, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''',
+    }
+
+    # 写入顺序：先写群组、用户和话题主表，再写子表
+    _FLUSH_ORDER = ['groups', 'users', 'topics', 'talks', 'articles', 'images', 'likes',
+                    'like_emojis', 'user_liked_emojis', 'comments', 'questions', 'answers', 'topic_files',
+                    'topic_fingerprints']
+
+    # 只有统计字段变化时的更新语句（参数取自 topics 行缓冲区中的对应列）
+    _UPDATE_TOPIC_STATS_SQL = '''
+        UPDATE topics
+        SET digested = ?, sticky = ?, likes_count = ?, tourist_likes_count = ?, rewards_count = ?,
+            comments_count = ?, reading_count = ?, readers_count = ?,
+            user_liked = ?, user_subscribed = ?, imported_at = ?
+        WHERE topic_id = ?
+    '''
+
+    @staticmethod
+    def _topic_stats_params(topic_row: tuple) -> tuple:
+        """从 topics 行缓冲区的一行取出 _UPDATE_TOPIC_STATS_SQL 的参数"""
+        return topic_row[5:13] + topic_row[16:19] + (topic_row[0],)
+
+    def _new_row_buffers(self) -> Dict[str, Any]:
+        """创建空的行缓冲区（groups/users 按主键去重，其余按顺序追加）"""
+        rows = {table: [] for table in self._FLUSH_ORDER}
+        rows['groups'] = {}
+        rows['users'] = {}
+        rows['tags'] = []
+        return rows
+
+    def _flush_row_buffers(self, rows: Dict[str, Any]):
+        """将行缓冲区写入数据库（调用方负责提交事务）"""
+        for table in self._FLUSH_ORDER:
+            table_rows = rows[table]
+            if isinstance(table_rows, dict):
+                table_rows = list(table_rows.values())
+            if table_rows:
+                self.cursor.executemany(self._UPSERT_SQL[table], table_rows)
+
+        if rows['tags']:
+            self._flush_topic_tags(rows['tags'])
+
+        # 同步更新全文索引（话题正文和评论变化的话题）
+        touched_topic_ids = [row[0] for row in rows['topics']] + [row[1] for row in rows['comments']]
+        self._refresh_search_index(touched_topic_ids)
+
+        if self._topic_id_index is not None:
+            self._topic_id_index.add_many(row[0] for row in rows['topics'])
+
+    def _add_user_row(self, rows: Dict[str, Any], user_data: Optional[Dict[str, Any]], current_time: str):
+        """向缓冲区添加用户（同一页内重复出现的用户只保留最后一份）"""
+        if not user_data or not user_data.get('user_id'):
+            return
+        rows['users'][user_data['user_id']] = (
+            user_data['user_id'],
             user_data.get('name', ''),
             user_data.get('alias', ''),
             user_data.get('avatar_url', ''),
@@ -370,29 +786,14 @@ class ZSXQDatabase:
             user_data.get('description', ''),
             user_data.get('ai_comment_url', ''),
             current_time
-        ))
-    
-    def _upsert_topic(self, topic_data: Dict[str, Any]):
-        """插入或更新话题信息"""
-        topic_id = topic_data.get('topic_id')
-        if not topic_id:
-            return
-        
-        # 获取当前时间作为imported_at（使用东八区时间格式）
-        from datetime import datetime, timezone, timedelta
-        beijing_tz = timezone(timedelta(hours=8))
-        current_time = datetime.now(beijing_tz).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0800'
-        
-        self.cursor.execute('''
-            INSERT OR REPLACE INTO topics 
-            (topic_id, group_id, type, title, create_time, digested, sticky, 
-             likes_count, tourist_likes_count, rewards_count, comments_count, 
-             reading_count, readers_count, answered, silenced, annotation, 
-             user_liked, user_subscribed, imported_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            topic_id,
-            topic_data.get('group', {}).get('group_id', ''),
+        )
+
+    @staticmethod
+    def _topic_row(topic_data: Dict[str, Any], current_time: str) -> tuple:
+        """topics 表的一行（列顺序与 _UPSERT_SQL['topics'] 一致）"""
+        return (
+            topic_data.get('topic_id'),
+            (topic_data.get('group') or {}).get('group_id', ''),
             topic_data.get('type', ''),
             topic_data.get('title', ''),
             topic_data.get('create_time', ''),
@@ -410,7 +811,205 @@ class ZSXQDatabase:
             topic_data.get('user_liked', False),
             topic_data.get('user_subscribed', False),
             current_time
+        )
+
+    def _collect_topic_rows(self, topic_data: Dict[str, Any], rows: Dict[str, Any], current_time: str):
+        """将单个话题拆分为各表的行，追加到缓冲区"""
+        topic_id = topic_data.get('topic_id')
+        group_info = topic_data.get('group', {})
+        talk = topic_data.get('talk')
+        question = topic_data.get('question')
+        answer = topic_data.get('answer')
+
+        # 群组信息
+        if group_info and group_info.get('group_id'):
+            rows['groups'][group_info['group_id']] = (
+                group_info['group_id'],
+                group_info.get('name', ''),
+                group_info.get('type', ''),
+                group_info.get('background_url', ''),
+                current_time
+            )
+
+        # 话题相关的用户（评论相关用户在评论处理中添加）
+        if talk and 'owner' in talk:
+            self._add_user_row(rows, talk['owner'], current_time)
+        if question:
+            # 对于非匿名用户，导入提问者信息；被提问者无论是否匿名都有
+            if 'owner' in question and not question.get('anonymous', False):
+                self._add_user_row(rows, question['owner'], current_time)
+            if 'questionee' in question:
+                self._add_user_row(rows, question['questionee'], current_time)
+        if answer and 'owner' in answer:
+            self._add_user_row(rows, answer['owner'], current_time)
+        for like in topic_data.get('latest_likes') or []:
+            if 'owner' in like:
+                self._add_user_row(rows, like['owner'], current_time)
+
+        # 话题主表
+        rows['topics'].append(self._topic_row(topic_data, current_time))
+        rows['topic_fingerprints'].append((topic_id, *topic_fingerprints(topic_data), current_time))
+
+        # 话题内容(talk)
+        if talk and talk.get('owner', {}).get('user_id'):
+            rows['talks'].append((topic_id, talk['owner']['user_id'], talk.get('text', ''), current_time))
+
+        # 文章信息
+        article_data = self._resolve_article_data(topic_id, topic_data)
+        if article_data and (article_data.get('title') or article_data.get('article_id')):
+            rows['articles'].append((
+                topic_id,
+                article_data.get('title', ''),
+                article_data.get('article_id', ''),
+                article_data.get('article_url', ''),
+                article_data.get('inline_article_url', ''),
+                topic_data.get('create_time', '')  # 话题创建时间作为文章创建时间
+            ))
+
+        # talk中的图片
+        if talk:
+            for image in talk.get('images') or []:
+                self._add_image_row(rows, topic_id, image, None, current_time)
+
+        # 点赞信息
+        for like in topic_data.get('latest_likes') or []:
+            user_id = like.get('owner', {}).get('user_id')
+            if user_id:
+                rows['likes'].append((topic_id, user_id, like.get('create_time', ''), current_time))
+
+        # 表情点赞信息
+        for emoji in (topic_data.get('likes_detail') or {}).get('emojis') or []:
+            if emoji.get('emoji_key'):
+                rows['like_emojis'].append((topic_id, emoji['emoji_key'], emoji.get('likes_count', 0), current_time))
+
+        # 用户表情点赞信息
+        for emoji_key in (topic_data.get('user_specific') or {}).get('liked_emojis') or []:
+            if emoji_key:
+                rows['user_liked_emojis'].append((topic_id, emoji_key))
+
+        # 评论信息（含评论用户和评论图片）
+        for comment in topic_data.get('show_comments') or []:
+            self._collect_comment_rows(topic_id, comment, rows, current_time)
+
+        # 问题信息（匿名提问 owner_user_id 为 None，但仍需要存储问题内容）
+        if question and (question.get('owner', {}).get('user_id') or question.get('text')):
+            owner_detail = question.get('owner_detail', {})
+            rows['questions'].append((
+                topic_id,
+                question.get('owner', {}).get('user_id'),
+                question.get('questionee', {}).get('user_id'),
+                question.get('text', ''),
+                question.get('expired', False),
+                question.get('anonymous', False),
+                owner_detail.get('questions_count'),
+                owner_detail.get('join_time', owner_detail.get('estimated_join_time', '')),  # 支持 estimated_join_time
+                owner_detail.get('status', ''),
+                question.get('owner_location', ''),
+                current_time
+            ))
+
+        # 回答信息
+        if answer and answer.get('owner', {}).get('user_id'):
+            rows['answers'].append((topic_id, answer['owner']['user_id'], answer.get('text', ''), current_time))
+
+        # 标签信息
+        group_id = group_info.get('group_id')
+        if group_id:
+            for tag_name, hid in self._extract_topic_tags(topic_data):
+                rows['tags'].append((topic_id, group_id, tag_name, hid))
+
+        # 文件信息
+        if talk:
+            for file_data in talk.get('files') or []:
+                if not file_data.get('file_id'):
+                    continue
+                rows['topic_files'].append((
+                    topic_id,
+                    file_data.get('file_id'),
+                    file_data.get('name', ''),
+                    file_data.get('hash', ''),
+                    file_data.get('size', 0),
+                    file_data.get('duration', 0),
+                    file_data.get('download_count', 0),
+                    file_data.get('create_time', ''),
+                    current_time
+                ))
+
+    def _collect_comment_rows(self, topic_id: int, comment_data: Dict[str, Any], rows: Dict[str, Any], current_time: str):
+        """将单条评论（含作者、被回复人、图片）追加到缓冲区"""
+        self._add_user_row(rows, comment_data.get('owner'), current_time)
+        self._add_user_row(rows, comment_data.get('repliee'), current_time)
+
+        comment_id = comment_data.get('comment_id')
+        if not comment_id:
+            return
+
+        rows['comments'].append((
+            comment_id,
+            topic_id,
+            comment_data.get('owner', {}).get('user_id'),
+            comment_data.get('parent_comment_id'),
+            comment_data.get('repliee', {}).get('user_id'),
+            comment_data.get('text', ''),
+            comment_data.get('create_time', ''),
+            comment_data.get('likes_count', 0),
+            comment_data.get('rewards_count', 0),
+            comment_data.get('replies_count', 0),
+            comment_data.get('sticky', False),
+            current_time
+        ))
+
+        for image in comment_data.get('images') or []:
+            self._add_image_row(rows, topic_id, image, comment_id, current_time)
+
+    def _add_image_row(self, rows: Dict[str, Any], topic_id: int, image_data: Dict[str, Any],
+                       comment_id: Optional[int], current_time: str):
+        """向缓冲区添加图片"""
+        if not image_data.get('image_id'):
+            return
+
+        thumbnail = image_data.get('thumbnail', {})
+        large = image_data.get('large', {})
+        original = image_data.get('original', {})
+        rows['images'].append((
+            image_data['image_id'],
+            topic_id,
+            comment_id,
+            image_data.get('type', ''),
+            thumbnail.get('url', ''),
+            thumbnail.get('width', 0),
+            thumbnail.get('height', 0),
+            large.get('url', ''),
+            large.get('width', 0),
+            large.get('height', 0),
+            original.get('url', ''),
+            original.get('width', 0),
+            original.get('height', 0),
+            original.get('size', 0),
+            current_time
         ))
+
+    def _resolve_article_data(self, topic_id: int, topic_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """获取话题对应的文章信息"""
+        # 检查talk类型话题中的article字段
+        talk = topic_data.get('talk')
+        if talk and talk.get('article'):
+            return talk['article']
+
+        # 检查顶层的article字段（如果存在）
+        if topic_data.get('article'):
+            return topic_data['article']
+
+        # 如果话题类型是article但没有article字段，从title等信息构建
+        if topic_data.get('type', '') == 'article' and topic_data.get('title'):
+            return {
+                'title': topic_data.get('title', ''),
+                'article_id': str(topic_id),  # 使用topic_id作为article_id
+                'article_url': '',
+                'inline_article_url': ''
+            }
+
+        return None
     
     def update_topic_stats(self, topic_data: Dict[str, Any]) -> bool:
         """仅更新话题的统计信息，不导入其他相关数据"""
@@ -460,6 +1059,26 @@ class ZSXQDatabase:
             traceback.print_exc()
             return False
 
+    def update_topics_stats_batch(self, topics: List[Dict[str, Any]]) -> int:
+        """
+        批量更新已入库话题的统计列（点赞、评论、阅读数等），不改写内容和子表
+        同时更新话题指纹中的统计部分，返回更新的话题数（调用方负责提交事务）
+        """
+        current_time = _beijing_now()
+        params, fingerprints = [], []
+        for topic_data in topics:
+            if not topic_data or not topic_data.get('topic_id'):
+                continue
+            params.append(self._topic_stats_params(self._topic_row(topic_data, current_time)))
+            fingerprints.append((topic_fingerprints(topic_data)[1], current_time, topic_data['topic_id']))
+
+        if not params:
+            return 0
+        self.cursor.executemany(self._UPDATE_TOPIC_STATS_SQL, params)
+        self.cursor.executemany(
+            'UPDATE topic_fingerprints SET stats_hash = ?, updated_at = ? WHERE topic_id = ?', fingerprints)
+        return len(params)
+
     def get_database_stats(self) -> Dict[str, Any]:
         """获取数据库统计信息"""
         stats = {}
@@ -478,30 +1097,346 @@ class ZSXQDatabase:
 
         return stats
     
+    # 评论补全失败达到该次数后不再自动重试（仍保留在队列中，可手动重置）
+    COMMENT_BACKFILL_MAX_ATTEMPTS = 5
+
+    def _create_comment_backfill_queue(self):
+        """评论补全队列：爬取时只登记评论不完整的话题，由独立的补全任务按缺口大小依次获取"""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS comment_backfill_queue (
+                topic_id INTEGER PRIMARY KEY,
+                expected_count INTEGER NOT NULL,
+                stored_count INTEGER NOT NULL DEFAULT 0,
+                priority INTEGER NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                enqueued_at TEXT,
+                updated_at TEXT,
+                completed_at TEXT
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_comment_backfill_priority
+            ON comment_backfill_queue (attempts, priority DESC) WHERE completed_at IS NULL
+        ''')
+
+        # 已有数据库登记一次历史缺口（旧版本爬取中断或评论获取失败的话题）
+        current_time = _beijing_now()
+        self.cursor.execute('''
+            INSERT OR IGNORE INTO comment_backfill_queue
+            (topic_id, expected_count, stored_count, priority, enqueued_at, updated_at)
+            SELECT t.topic_id, t.comments_count, COALESCE(c.stored, 0),
+                   t.comments_count - COALESCE(c.stored, 0), ?, ?
+            FROM topics t
+            LEFT JOIN (SELECT topic_id, COUNT(*) AS stored FROM comments GROUP BY topic_id) c
+                ON c.topic_id = t.topic_id
+            WHERE t.comments_count > 8 AND t.comments_count > COALESCE(c.stored, 0)
+        ''', (current_time, current_time))
+
+    def get_stored_comment_count(self, topic_id: int) -> int:
+        """话题已入库的评论数"""
+        return self._get_stored_comment_counts([topic_id]).get(topic_id, 0)
+
+    def _get_stored_comment_counts(self, topic_ids: List[int]) -> Dict[int, int]:
+        """查询话题已入库的评论数"""
+        counts = {}
+        unique_ids = list(set(topic_ids))
+        for i in range(0, len(unique_ids), 500):
+            chunk = unique_ids[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            self.cursor.execute(f'''
+                SELECT topic_id, COUNT(*) FROM comments
+                WHERE topic_id IN ({placeholders})
+                GROUP BY topic_id
+            ''', chunk)
+            counts.update(self.cursor.fetchall())
+        return counts
+
+    def enqueue_comment_backfill(self, topics: List[Dict[str, Any]]) -> List[int]:
+        """
+        登记需要补全评论的话题（comments_count > 8 且已入库评论数不足）
+        已在队列中的话题按最新缺口更新优先级，评论已完整的话题移出队列；
+        已补全过或已放弃、且评论数未变化的话题不再重复登记（接口可见评论可能少于评论数）。
+        调用方负责提交事务
+
+        Returns:
+            本次需要补全的话题ID列表
+        """
+        expected = {
+            topic['topic_id']: topic.get('comments_count', 0)
+            for topic in topics
+            if topic and topic.get('topic_id') and topic.get('comments_count', 0) > 8
+        }
+        if not expected:
+            return []
+
+        stored = self._get_stored_comment_counts(list(expected))
+        settled = self._get_settled_comment_backfill(list(expected))
+        current_time = _beijing_now()
+        pending = []
+        complete = []
+        for topic_id, expected_count in expected.items():
+            stored_count = stored.get(topic_id, 0)
+            if stored_count >= expected_count:
+                complete.append((topic_id,))
+            elif settled.get(topic_id) != expected_count:
+                pending.append((topic_id, expected_count, stored_count,
+                                expected_count - stored_count, current_time, current_time))
+
+        if complete:
+            self.cursor.executemany('DELETE FROM comment_backfill_queue WHERE topic_id = ?', complete)
+        if pending:
+            # 评论数有变化时重置失败次数，让之前放弃或已补全的话题重新参与补全
+            self.cursor.executemany('''
+                INSERT INTO comment_backfill_queue
+                (topic_id, expected_count, stored_count, priority, enqueued_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(topic_id) DO UPDATE SET
+                    attempts = CASE WHEN expected_count = excluded.expected_count THEN attempts ELSE 0 END,
+                    expected_count = excluded.expected_count,
+                    stored_count = excluded.stored_count,
+                    priority = excluded.priority,
+                    updated_at = excluded.updated_at,
+                    completed_at = NULL
+            ''', pending)
+        return [row[0] for row in pending]
+
+    def _get_settled_comment_backfill(self, topic_ids: List[int]) -> Dict[int, int]:
+        """查询已补全或已放弃的话题及其登记时的评论数"""
+        settled = {}
+        for i in range(0, len(topic_ids), 500):
+            chunk = topic_ids[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            self.cursor.execute(f'''
+                SELECT topic_id, expected_count FROM comment_backfill_queue
+                WHERE topic_id IN ({placeholders})
+                  AND (completed_at IS NOT NULL OR attempts >= ?)
+            ''', chunk + [self.COMMENT_BACKFILL_MAX_ATTEMPTS])
+            settled.update(self.cursor.fetchall())
+        return settled
+
+    def claim_comment_backfill(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """按缺口大小取出待补全的话题（失败次数少的优先）"""
+        self.cursor.execute('''
+            SELECT topic_id, expected_count, stored_count, attempts
+            FROM comment_backfill_queue
+            WHERE completed_at IS NULL AND attempts < ?
+            ORDER BY attempts, priority DESC
+            LIMIT ?
+        ''', (self.COMMENT_BACKFILL_MAX_ATTEMPTS, limit))
+        return [
+            {'topic_id': row[0], 'expected_count': row[1], 'stored_count': row[2], 'attempts': row[3]}
+            for row in self.cursor.fetchall()
+        ]
+
+    def complete_comment_backfill(self, topic_id: int):
+        """话题评论补全完成（保留记录，评论数不变时不再重复登记；调用方负责提交事务）"""
+        stored_count = self.get_stored_comment_count(topic_id)
+        current_time = _beijing_now()
+        self.cursor.execute('''
+            UPDATE comment_backfill_queue
+            SET stored_count = ?, priority = expected_count - ?, completed_at = ?, updated_at = ?
+            WHERE topic_id = ?
+        ''', (stored_count, stored_count, current_time, current_time, topic_id))
+
+    def fail_comment_backfill(self, topic_id: int, error: str):
+        """记录补全失败（调用方负责提交事务）"""
+        self.cursor.execute('''
+            UPDATE comment_backfill_queue
+            SET attempts = attempts + 1, last_error = ?, updated_at = ?
+            WHERE topic_id = ?
+        ''', (error, _beijing_now(), topic_id))
+
+    def get_comment_backfill_status(self) -> Dict[str, Any]:
+        """评论补全队列概况"""
+        self.cursor.execute('''
+            SELECT
+                COUNT(*) FILTER (WHERE attempts < ?),
+                COUNT(*) FILTER (WHERE attempts >= ?),
+                COALESCE(SUM(priority), 0)
+            FROM comment_backfill_queue
+            WHERE completed_at IS NULL
+        ''', (self.COMMENT_BACKFILL_MAX_ATTEMPTS, self.COMMENT_BACKFILL_MAX_ATTEMPTS))
+        pending, failed, missing = self.cursor.fetchone()
+        return {'pending_topics': pending, 'failed_topics': failed, 'missing_comments': missing}
+
+    def reset_comment_backfill_failures(self) -> int:
+        """重置已放弃话题的失败次数，返回重置数量"""
+        self.cursor.execute('''
+            UPDATE comment_backfill_queue SET attempts = 0
+            WHERE completed_at IS NULL AND attempts >= ?
+        ''', (self.COMMENT_BACKFILL_MAX_ATTEMPTS,))
+        count = self.cursor.rowcount
+        self.conn.commit()
+        return count
+
+    def _create_topic_fingerprints(self):
+        """话题指纹：再次爬到已有话题时据此跳过未变化的话题，或只更新统计列"""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS topic_fingerprints (
+                topic_id INTEGER PRIMARY KEY,
+                content_hash INTEGER NOT NULL,
+                stats_hash INTEGER NOT NULL,
+                updated_at TEXT
+            )
+        ''')
+
+    def _get_topic_fingerprints(self, topic_ids: List[int]) -> Dict[int, tuple]:
+        """查询已保存的话题指纹 {topic_id: (content_hash, stats_hash)}"""
+        fingerprints = {}
+        unique_ids = list(set(topic_ids))
+        # SQLite 默认最多 999 个绑定参数，分块查询
+        for i in range(0, len(unique_ids), 500):
+            chunk = unique_ids[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            self.cursor.execute(f'''
+                SELECT topic_id, content_hash, stats_hash FROM topic_fingerprints
+                WHERE topic_id IN ({placeholders})
+            ''', chunk)
+            for topic_id, content_hash, stats_hash in self.cursor.fetchall():
+                fingerprints[topic_id] = (content_hash, stats_hash)
+        return fingerprints
+
+    def _create_crawl_state(self):
+        """爬取断点：每个群组每种爬取模式一行，每写入一页更新一次"""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_state (
+                group_id INTEGER NOT NULL,
+                mode TEXT NOT NULL,
+                direction TEXT NOT NULL DEFAULT 'backward',
+                cursor TEXT,
+                range_start TEXT,  -- 时间区间任务改用覆盖区间（crawl_coverage）前的旧断点才有值
+                range_end TEXT,
+                status TEXT NOT NULL,
+                pages INTEGER NOT NULL DEFAULT 0,
+                new_topics INTEGER NOT NULL DEFAULT 0,
+                updated_topics INTEGER NOT NULL DEFAULT 0,
+                errors INTEGER NOT NULL DEFAULT 0,
+                started_at TEXT,
+                last_page_at TEXT,
+                updated_at TEXT,
+                PRIMARY KEY (group_id, mode)
+            )
+        ''')
+
+    CRAWL_STATE_COLUMNS = ['group_id', 'mode', 'direction', 'cursor', 'range_start', 'range_end', 'status',
+                           'pages', 'new_topics', 'updated_topics', 'errors',
+                           'started_at', 'last_page_at', 'updated_at']
+
+    def get_crawl_state(self, group_id, mode: str) -> Optional[Dict[str, Any]]:
+        """获取指定模式的爬取断点"""
+        self.cursor.execute(f'''
+            SELECT {', '.join(self.CRAWL_STATE_COLUMNS)} FROM crawl_state
+            WHERE group_id = ? AND mode = ?
+        ''', (group_id, mode))
+        row = self.cursor.fetchone()
+        return dict(zip(self.CRAWL_STATE_COLUMNS, row)) if row else None
+
+    def list_crawl_states(self, group_id) -> List[Dict[str, Any]]:
+        """获取群组所有模式的爬取断点"""
+        self.cursor.execute(f'''
+            SELECT {', '.join(self.CRAWL_STATE_COLUMNS)} FROM crawl_state
+            WHERE group_id = ? ORDER BY updated_at DESC
+        ''', (group_id,))
+        return [dict(zip(self.CRAWL_STATE_COLUMNS, row)) for row in self.cursor.fetchall()]
+
+    def begin_crawl_state(self, group_id, mode: str, resume: bool = False, direction: str = 'backward'):
+        """开始一次爬取：续传时保留游标和累计统计，否则重置断点"""
+        current_time = _beijing_now()
+        if resume:
+            self.cursor.execute('''
+                UPDATE crawl_state SET status = 'running', updated_at = ?
+                WHERE group_id = ? AND mode = ?
+            ''', (current_time, group_id, mode))
+        else:
+            self.cursor.execute('''
+                INSERT OR REPLACE INTO crawl_state
+                (group_id, mode, direction, cursor, status, started_at, updated_at)
+                VALUES (?, ?, ?, NULL, 'running', ?, ?)
+            ''', (group_id, mode, direction, current_time, current_time))
+        self.conn.commit()
+
+    def checkpoint_crawl_state(self, group_id, mode: str, cursor: Optional[str], page_stats: Dict[str, int]):
+        """记录一页已写入：保存下一页游标并累加统计（调用方负责提交事务）"""
+        current_time = _beijing_now()
+        self.cursor.execute('''
+            UPDATE crawl_state SET
+                cursor = ?,
+                pages = pages + 1,
+                new_topics = new_topics + ?,
+                updated_topics = updated_topics + ?,
+                errors = errors + ?,
+                last_page_at = ?,
+                updated_at = ?
+            WHERE group_id = ? AND mode = ?
+        ''', (cursor, page_stats.get('new_topics', 0), page_stats.get('updated_topics', 0),
+              page_stats.get('errors', 0), current_time, current_time, group_id, mode))
+
+    def finish_crawl_state(self, group_id, mode: str, status: str):
+        """结束一次爬取（completed 表示已走完，stopped 表示可续传）"""
+        self.cursor.execute('''
+            UPDATE crawl_state SET status = ?, updated_at = ?
+            WHERE group_id = ? AND mode = ?
+        ''', (status, _beijing_now(), group_id, mode))
+        self.conn.commit()
+
+    def reset_crawl_state(self, group_id, mode: Optional[str] = None) -> int:
+        """清除爬取断点（mode为None时清除该群组全部模式），返回删除行数"""
+        if mode:
+            self.cursor.execute('DELETE FROM crawl_state WHERE group_id = ? AND mode = ?', (group_id, mode))
+        else:
+            self.cursor.execute('DELETE FROM crawl_state WHERE group_id = ?', (group_id,))
+        count = self.cursor.rowcount
+        self.conn.commit()
+        return count
+
+    def _create_crawl_coverage(self):
+        """已爬取时间区间：每个群组若干互不相邻的毫秒时间戳闭区间"""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_coverage (
+                group_id INTEGER NOT NULL,
+                start_ms INTEGER NOT NULL,
+                end_ms INTEGER NOT NULL,
+                updated_at TEXT,
+                PRIMARY KEY (group_id, start_ms)
+            )
+        ''')
+
+    def get_coverage_intervals(self, group_id) -> List[tuple]:
+        """获取群组的已爬取区间 [(start_ms, end_ms)]，按开始时间升序"""
+        self.cursor.execute('''
+            SELECT start_ms, end_ms FROM crawl_coverage
+            WHERE group_id = ? ORDER BY start_ms
+        ''', (group_id,))
+        return [tuple(row) for row in self.cursor.fetchall()]
+
+    def add_coverage_interval(self, group_id, start_ms: int, end_ms: int):
+        """合并一段已爬取区间：与之重叠或相邻的区间合并为一行（调用方负责提交事务）"""
+        self.cursor.execute('''
+            SELECT MIN(start_ms), MAX(end_ms) FROM crawl_coverage
+            WHERE group_id = ? AND start_ms <= ? AND end_ms >= ?
+        ''', (group_id, end_ms + 1, start_ms - 1))
+        merged_start, merged_end = self.cursor.fetchone()
+        if merged_start is not None:
+            start_ms, end_ms = min(start_ms, merged_start), max(end_ms, merged_end)
+            self.cursor.execute('''
+                DELETE FROM crawl_coverage
+                WHERE group_id = ? AND start_ms >= ? AND end_ms <= ?
+            ''', (group_id, start_ms, end_ms))
+        self.cursor.execute('''
+            INSERT INTO crawl_coverage (group_id, start_ms, end_ms, updated_at)
+            VALUES (?, ?, ?, ?)
+        ''', (group_id, start_ms, end_ms, _beijing_now()))
+
     def get_timestamp_range_info(self) -> Dict[str, Any]:
         """获取话题时间戳范围信息"""
         try:
-            # 获取最新话题时间
-            self.cursor.execute('''
-                SELECT create_time FROM topics 
-                WHERE create_time IS NOT NULL AND create_time != ''
-                ORDER BY create_time DESC LIMIT 1
-            ''')
-            newest_result = self.cursor.fetchone()
-            newest_time = newest_result[0] if newest_result else None
-            
-            # 获取最老话题时间
+            # 时间范围和话题总数取自触发器维护的群组统计
             self.cursor.execute('''
-                SELECT create_time FROM topics 
-                WHERE create_time IS NOT NULL AND create_time != ''
-                ORDER BY create_time ASC LIMIT 1
+                SELECT MAX(latest_topic_time), MIN(earliest_topic_time), COALESCE(SUM(topics_count), 0)
+                FROM group_stats
             ''')
-            oldest_result = self.cursor.fetchone()
-            oldest_time = oldest_result[0] if oldest_result else None
-            
-            # 获取话题总数
-            self.cursor.execute('SELECT COUNT(*) FROM topics')
-            total_topics = self.cursor.fetchone()[0]
+            newest_time, oldest_time, total_topics = self.cursor.fetchone()
             
             # 判断是否有数据
             has_data = newest_time is not None and oldest_time is not None
@@ -554,474 +1489,100 @@ class ZSXQDatabase:
             print(f"获取最新话题时间戳失败: {e}")
             return None
     
-    def _import_all_users(self, topic_data: Dict[str, Any]):
-        """导入话题相关的所有用户信息"""
-        # 导入talk中的用户
-        if 'talk' in topic_data and topic_data['talk'] and 'owner' in topic_data['talk']:
-            self._upsert_user(topic_data['talk']['owner'])
-
-        # 导入question中的用户
-        if 'question' in topic_data and topic_data['question']:
-            # 对于非匿名用户，导入提问者信息
-            if 'owner' in topic_data['question'] and not topic_data['question'].get('anonymous', False):
-                self._upsert_user(topic_data['question']['owner'])
-            # 导入被提问者信息（无论是否匿名都有）
-            if 'questionee' in topic_data['question']:
-                self._upsert_user(topic_data['question']['questionee'])
-
-        # 导入answer中的用户
-        if 'answer' in topic_data and topic_data['answer'] and 'owner' in topic_data['answer']:
-            self._upsert_user(topic_data['answer']['owner'])
-        
-        # 导入latest_likes中的用户
-        if 'latest_likes' in topic_data:
-            for like in topic_data['latest_likes']:
-                if 'owner' in like:
-                    self._upsert_user(like['owner'])
-        
-        # 导入comments中的用户
-        if 'show_comments' in topic_data:
-            for comment in topic_data['show_comments']:
-                if 'owner' in comment:
-                    self._upsert_user(comment['owner'])
-                if 'repliee' in comment:
-                    self._upsert_user(comment['repliee'])
-    
-    def _upsert_talk(self, topic_id: int, talk_data: Dict[str, Any]):
-        """插入或更新话题内容"""
-        if not talk_data:
-            return
-        
-        owner_user_id = talk_data.get('owner', {}).get('user_id')
-        if not owner_user_id:
-            return
-        
-        # 获取当前时间作为created_at（使用东八区时间格式）
-        from datetime import datetime, timezone, timedelta
-        beijing_tz = timezone(timedelta(hours=8))
-        current_time = datetime.now(beijing_tz).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0800'
-        
-        self.cursor.execute('''
-            INSERT OR REPLACE INTO talks 
-            (topic_id, owner_user_id, text, created_at)
-            VALUES (?, ?, ?, ?)
-        ''', (
-            topic_id,
-            owner_user_id,
-            talk_data.get('text', ''),
-            current_time
-        ))
-
-    
-    def _import_images(self, topic_id: int, topic_data: Dict[str, Any]):
-        """导入图片信息"""
-        images_to_import = []
-        
-        # 从talk中获取图片
-        if 'talk' in topic_data and topic_data['talk'] and 'images' in topic_data['talk']:
-            for img in topic_data['talk']['images']:
-                images_to_import.append((img, None))  # (image_data, comment_id)
-        
-        # 从comments中获取图片
-        if 'show_comments' in topic_data:
-            for comment in topic_data['show_comments']:
-                if 'images' in comment:
-                    comment_id = comment.get('comment_id')
-                    for img in comment['images']:
-                        images_to_import.append((img, comment_id))
-        
-        # 导入所有图片
-        for img_data, comment_id in images_to_import:
-            self._upsert_image(topic_id, img_data, comment_id)
-    
-    def _upsert_image(self, topic_id: int, image_data: Dict[str, Any], comment_id: Optional[int] = None):
-        """插入或更新图片信息"""
-        image_id = image_data.get('image_id')
-        if not image_id:
-            return
-        
-        thumbnail = image_data.get('thumbnail', {})
-        large = image_data.get('large', {})
-        original = image_data.get('original', {})
-        
-        # 获取当前时间作为created_at（使用东八区时间格式）
-        from datetime import datetime, timezone, timedelta
-        beijing_tz = timezone(timedelta(hours=8))
-        current_time = datetime.now(beijing_tz).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0800'
-        
-        self.cursor.execute('''
-            INSERT OR REPLACE INTO images 
-            (image_id, topic_id, comment_id, type, thumbnail_url, thumbnail_width, thumbnail_height,
-             large_url, large_width, large_height, original_url, original_width, original_height, original_size, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            image_id,
-            topic_id,
-            comment_id,
-            image_data.get('type', ''),
-            thumbnail.get('url', ''),
-            thumbnail.get('width'),
-            thumbnail.get('height'),
-            large.get('url', ''),
-            large.get('width'),
-            large.get('height'),
-            original.get('url', ''),
-            original.get('width'),
-            original.get('height'),
-            original.get('size'),
-            current_time
-        ))
-
-    
-    def _import_likes(self, topic_id: int, topic_data: Dict[str, Any]):
-        """导入点赞信息"""
-        if 'latest_likes' not in topic_data:
-            return
-        
-        for like in topic_data['latest_likes']:
-            owner = like.get('owner', {})
-            user_id = owner.get('user_id')
-            if user_id:
-                # 获取当前时间作为imported_at（使用东八区时间格式）
-                from datetime import datetime, timezone, timedelta
-                beijing_tz = timezone(timedelta(hours=8))
-                current_time = datetime.now(beijing_tz).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0800'
-                
-                self.cursor.execute('''
-                    INSERT OR IGNORE INTO likes 
-                    (topic_id, user_id, create_time, imported_at)
-                    VALUES (?, ?, ?, ?)
-                ''', (
-                    topic_id,
-                    user_id,
-                    like.get('create_time', ''),
-                    current_time
-                ))
-        
-        if topic_data['latest_likes']:
-            pass  # 数据已导入，无需额外日志
-
-    def _import_like_emojis(self, topic_id: int, topic_data: Dict[str, Any]):
-        """导入表情点赞信息"""
-        if 'likes_detail' not in topic_data or 'emojis' not in topic_data['likes_detail']:
-            return
-        
-        for emoji in topic_data['likes_detail']['emojis']:
-            emoji_key = emoji.get('emoji_key')
-            likes_count = emoji.get('likes_count', 0)
-            if emoji_key:
-                # 获取当前时间作为created_at（使用东八区时间格式）
-                from datetime import datetime, timezone, timedelta
-                beijing_tz = timezone(timedelta(hours=8))
-                current_time = datetime.now(beijing_tz).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0800'
-                
-                self.cursor.execute('''
-                    INSERT OR REPLACE INTO like_emojis 
-                    (topic_id, emoji_key, likes_count, created_at)
-                    VALUES (?, ?, ?, ?)
-                ''', (
-                    topic_id,
-                    emoji_key,
-                    likes_count,
-                    current_time
-                ))
-        
-        if topic_data['likes_detail']['emojis']:
-            pass  # 数据已导入，无需额外日志
-
-    def _import_user_liked_emojis(self, topic_id: int, topic_data: Dict[str, Any]):
-        """导入用户表情点赞信息"""
-        if 'user_specific' not in topic_data or 'liked_emojis' not in topic_data['user_specific']:
-            return
-        
-        for emoji_key in topic_data['user_specific']['liked_emojis']:
-            if emoji_key:
-                self.cursor.execute('''
-                    INSERT OR IGNORE INTO user_liked_emojis 
-                    (topic_id, emoji_key)
-                    VALUES (?, ?)
-                ''', (
-                    topic_id,
-                    emoji_key
-                ))
-        
-        if topic_data['user_specific']['liked_emojis']:
-            pass  # 数据已导入，无需额外日志
-
-    def _import_comments(self, topic_id: int, comments: List[Dict[str, Any]]):
-        """导入评论信息"""
-        for comment in comments:
-            self._upsert_comment(topic_id, comment)
-            # 导入评论的图片
-            if 'images' in comment and comment['images']:
-                self._import_comment_images(topic_id, comment['comment_id'], comment['images'])
-
-        if comments:
-            pass  # 数据已导入，无需额外日志
-
-    def import_additional_comments(self, topic_id: int, comments: List[Dict[str, Any]]):
-        """导入额外获取的评论信息（来自评论API）"""
-        if not comments:
+    def import_additional_comments(self, topic_id: int, comments: List[Dict[str, Any]]):
+        """导入额外获取的评论信息（来自评论API）"""
+        if not comments:
             return
 
         print(f"📝 导入话题 {topic_id} 的 {len(comments)} 条额外评论...")
 
+        rows = self._new_row_buffers()
+        current_time = _beijing_now()
         for comment in comments:
-            # 导入评论作者
-            if 'owner' in comment and comment['owner']:
-                self._upsert_user(comment['owner'])
-
-            # 导入回复人（如果存在）
-            if 'repliee' in comment and comment['repliee']:
-                self._upsert_user(comment['repliee'])
-
-            # 导入评论
-            self._upsert_comment(topic_id, comment)
-
-            # 导入评论的图片
-            if 'images' in comment and comment['images']:
-                self._import_comment_images(topic_id, comment['comment_id'], comment['images'])
+            self._collect_comment_rows(topic_id, comment, rows, current_time)
+        self._flush_row_buffers(rows)
 
         print(f"✅ 完成导入 {len(comments)} 条评论")
 
-    def _upsert_comment(self, topic_id: int, comment_data: Dict[str, Any]):
-        """插入或更新评论信息"""
-        comment_id = comment_data.get('comment_id')
-        if not comment_id:
-            return
-        
-        owner_user_id = comment_data.get('owner', {}).get('user_id')
-        repliee_user_id = comment_data.get('repliee', {}).get('user_id')
-        
-        # 获取当前时间作为imported_at（使用东八区时间格式）
-        from datetime import datetime, timezone, timedelta
-        beijing_tz = timezone(timedelta(hours=8))
-        current_time = datetime.now(beijing_tz).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0800'
-        
-        self.cursor.execute('''
-            INSERT OR REPLACE INTO comments
-            (comment_id, topic_id, owner_user_id, parent_comment_id, repliee_user_id,
-             text, create_time, likes_count, rewards_count, replies_count, sticky, imported_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            comment_id,
-            topic_id,
-            owner_user_id,
-            comment_data.get('parent_comment_id'),
-            repliee_user_id,
-            comment_data.get('text', ''),
-            comment_data.get('create_time', ''),
-            comment_data.get('likes_count', 0),
-            comment_data.get('rewards_count', 0),
-            comment_data.get('replies_count', 0),
-            comment_data.get('sticky', False),
-            current_time
-        ))
-
-    def _import_comment_images(self, topic_id: int, comment_id: int, images: List[Dict[str, Any]]):
-        """导入评论的图片信息"""
-        for image in images:
-            if not image.get('image_id'):
-                continue
-
-            # 获取当前时间作为created_at（使用东八区时间格式）
-            from datetime import datetime, timezone, timedelta
-            beijing_tz = timezone(timedelta(hours=8))
-            current_time = datetime.now(beijing_tz).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0800'
-
-            self.cursor.execute('''
-                INSERT OR REPLACE INTO images
-                (image_id, topic_id, comment_id, type, thumbnail_url, thumbnail_width, thumbnail_height,
-                 large_url, large_width, large_height, original_url, original_width, original_height,
-                 original_size, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                image.get('image_id'),
-                topic_id,
-                comment_id,
-                image.get('type', ''),
-                image.get('thumbnail', {}).get('url', ''),
-                image.get('thumbnail', {}).get('width', 0),
-                image.get('thumbnail', {}).get('height', 0),
-                image.get('large', {}).get('url', ''),
-                image.get('large', {}).get('width', 0),
-                image.get('large', {}).get('height', 0),
-                image.get('original', {}).get('url', ''),
-                image.get('original', {}).get('width', 0),
-                image.get('original', {}).get('height', 0),
-                image.get('original', {}).get('size', 0),
-                current_time
-            ))
-
-    def _upsert_question(self, topic_id: int, question_data: Dict[str, Any]):
-        """插入或更新问题信息"""
-        owner_user_id = question_data.get('owner', {}).get('user_id')
-        questionee_user_id = question_data.get('questionee', {}).get('user_id')
-        is_anonymous = question_data.get('anonymous', False)
-
-        # 对于匿名用户，owner_user_id 可能为 None，但仍需要存储问题信息
-        # 只有在既没有 owner_user_id 又没有问题文本时才跳过
-        if not owner_user_id and not question_data.get('text'):
-            return
-
-        owner_detail = question_data.get('owner_detail', {})
-
-        # 获取当前时间作为created_at（使用东八区时间格式）
-        from datetime import datetime, timezone, timedelta
-        beijing_tz = timezone(timedelta(hours=8))
-        current_time = datetime.now(beijing_tz).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0800'
-
-        self.cursor.execute('''
-            INSERT OR REPLACE INTO questions
-            (topic_id, owner_user_id, questionee_user_id, text, expired, anonymous,
-             owner_questions_count, owner_join_time, owner_status, owner_location, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            topic_id,
-            owner_user_id,  # 对于匿名用户可能为 None
-            questionee_user_id,
-            question_data.get('text', ''),
-            question_data.get('expired', False),
-            is_anonymous,
-            owner_detail.get('questions_count'),
-            owner_detail.get('join_time', owner_detail.get('estimated_join_time', '')),  # 支持 estimated_join_time
-            owner_detail.get('status', ''),
-            question_data.get('owner_location', ''),
-            current_time
-        ))
-
-    
-    def _upsert_answer(self, topic_id: int, answer_data: Dict[str, Any]):
-        """插入或更新回答信息"""
-        owner_user_id = answer_data.get('owner', {}).get('user_id')
-        
-        if not owner_user_id:
-            return
-        
-        # 获取当前时间作为created_at（使用东八区时间格式）
-        from datetime import datetime, timezone, timedelta
-        beijing_tz = timezone(timedelta(hours=8))
-        current_time = datetime.now(beijing_tz).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0800'
-        
-        self.cursor.execute('''
-            INSERT OR REPLACE INTO answers 
-            (topic_id, owner_user_id, text, created_at)
-            VALUES (?, ?, ?, ?)
-        ''', (
-            topic_id,
-            owner_user_id,
-            answer_data.get('text', ''),
-            current_time
-        ))
-
-    
-    def _import_articles(self, topic_id: int, topic_data: Dict[str, Any]):
-        """导入文章信息"""
-        # 检查talk类型话题中的article字段
-        if 'talk' in topic_data and topic_data['talk'] and 'article' in topic_data['talk']:
-            article_data = topic_data['talk']['article']
-            if article_data:
-                self._upsert_article(topic_id, article_data)
-                return
-        
-        # 检查顶层的article字段（如果存在）
-        if 'article' in topic_data and topic_data['article']:
-            article_data = topic_data['article']
-            self._upsert_article(topic_id, article_data)
-            return
-        
-        # 如果话题类型是article但没有article字段，从title等信息构建
-        topic_type = topic_data.get('type', '')
-        if topic_type == 'article' and topic_data.get('title'):
-            article_data = {
-                'title': topic_data.get('title', ''),
-                'article_id': str(topic_id),  # 使用topic_id作为article_id
-                'article_url': '',  # 暂时为空
-                'inline_article_url': ''  # 暂时为空
-            }
-            self._upsert_article(topic_id, article_data)
-    
-    def _upsert_article(self, topic_id: int, article_data: Dict[str, Any]):
-        """插入或更新文章信息"""
-        title = article_data.get('title', '')
-        article_id = article_data.get('article_id', '')
-        
-        if not title and not article_id:
-            return
-        
-        # 获取话题的创建时间作为文章创建时间
-        self.cursor.execute('''
-            SELECT create_time FROM topics WHERE topic_id = ?
-        ''', (topic_id,))
-        result = self.cursor.fetchone()
-        created_at = result[0] if result else ''
-        
-        self.cursor.execute('''
-            INSERT OR REPLACE INTO articles
-            (topic_id, title, article_id, article_url, inline_article_url, created_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            topic_id,
-            title,
-            article_id,
-            article_data.get('article_url', ''),
-            article_data.get('inline_article_url', ''),
-            created_at
-        ))
-
-    def _import_files(self, topic_id: int, files_data: List[Dict[str, Any]]):
-        """导入话题文件信息"""
-        if not files_data:
-            return
-
-        for file_data in files_data:
-            if not file_data.get('file_id'):
-                continue
-
-            # 获取当前时间作为created_at（使用东八区时间格式）
-            from datetime import datetime, timezone, timedelta
-            beijing_tz = timezone(timedelta(hours=8))
-            current_time = datetime.now(beijing_tz).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0800'
-
-            self.cursor.execute('''
-                INSERT OR REPLACE INTO topic_files
-                (topic_id, file_id, name, hash, size, duration, download_count, create_time, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                topic_id,
-                file_data.get('file_id'),
-                file_data.get('name', ''),
-                file_data.get('hash', ''),
-                file_data.get('size', 0),
-                file_data.get('duration', 0),
-                file_data.get('download_count', 0),
-                file_data.get('create_time', ''),
-                current_time
-            ))
-
-
     def get_topic_detail(self, topic_id: int):
         """获取完整的话题详情"""
+        details = self.get_topic_details([topic_id])
+        return details.get(topic_id)
+
+    def get_topic_details(self, topic_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        批量获取话题详情（用于列表和导出）
+        每批话题使用固定数量的集合查询组装，不随评论数增长
+
+        Returns:
+            {topic_id: 话题详情}，不存在的话题不包含在结果中
+        """
+        details = {}
         try:
-            # 1. 获取基本话题信息和群组信息
-            self.cursor.execute('''
-                SELECT
-                    t.topic_id, t.type, t.title, t.create_time, t.digested, t.sticky,
-                    t.likes_count, t.tourist_likes_count, t.rewards_count, t.comments_count,
-                    t.reading_count, t.readers_count, t.answered, t.silenced, t.annotation,
-                    t.user_liked, t.user_subscribed,
-                    g.group_id, g.name as group_name, g.type as group_type, g.background_url
-                FROM topics t
-                LEFT JOIN groups g ON t.group_id = g.group_id
-                WHERE t.topic_id = ?
-            ''', (topic_id,))
-
-            topic_row = self.cursor.fetchone()
-            if not topic_row:
-                return None
-
-            # 构建基本话题信息
-            topic_detail = {
+            unique_ids = list(dict.fromkeys(topic_ids))
+            for i in range(0, len(unique_ids), 500):
+                details.update(self._load_topic_details(unique_ids[i:i + 500]))
+        except Exception as e:
+            print(f"获取话题详情失败: {e}")
+            return {}
+        return details
+
+    @staticmethod
+    def _image_dict(img_row) -> Dict[str, Any]:
+        """将 images 表的一行转换为API结构（从 image_id 列开始）"""
+        return {
+            "image_id": img_row[0],
+            "type": img_row[1],
+            "thumbnail": {
+                "url": img_row[2],
+                "width": img_row[3],
+                "height": img_row[4]
+            },
+            "large": {
+                "url": img_row[5],
+                "width": img_row[6],
+                "height": img_row[7]
+            },
+            "original": {
+                "url": img_row[8],
+                "width": img_row[9],
+                "height": img_row[10],
+                "size": img_row[11]
+            }
+        }
+
+    @staticmethod
+    def _user_dict(user_row) -> Dict[str, Any]:
+        """将 (user_id, name, alias, avatar_url, location, description) 转换为用户结构"""
+        return {
+            "user_id": user_row[0],
+            "name": user_row[1],
+            "alias": user_row[2],
+            "avatar_url": user_row[3],
+            "location": user_row[4],
+            "description": user_row[5]
+        }
+
+    def _load_topic_details(self, topic_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """组装一批话题的详情（topic_ids 数量不超过 SQLite 参数上限）"""
+        placeholders = ','.join('?' * len(topic_ids))
+
+        # 1. 获取基本话题信息和群组信息
+        self.cursor.execute(f'''
+            SELECT
+                t.topic_id, t.type, t.title, t.create_time, t.digested, t.sticky,
+                t.likes_count, t.tourist_likes_count, t.rewards_count, t.comments_count,
+                t.reading_count, t.readers_count, t.answered, t.silenced, t.annotation,
+                t.user_liked, t.user_subscribed,
+                g.group_id, g.name as group_name, g.type as group_type, g.background_url
+            FROM topics t
+            LEFT JOIN groups g ON t.group_id = g.group_id
+            WHERE t.topic_id IN ({placeholders})
+        ''', topic_ids)
+
+        details = {}
+        for topic_row in self.cursor.fetchall():
+            details[topic_row[0]] = {
                 "topic_id": topic_row[0],
                 "type": topic_row[1],
                 "title": topic_row[2],
@@ -1047,337 +1608,226 @@ class ZSXQDatabase:
                     "liked": bool(topic_row[15]),
                     "liked_emojis": [],
                     "subscribed": bool(topic_row[16])
-                }
+                },
+                "latest_likes": [],
+                "show_comments": [],
+                "likes_detail": {"emojis": []}
             }
 
-            # 2. 获取话题内容（talk）
-            self.cursor.execute('''
-                SELECT
-                    t.text,
-                    u.user_id, u.name, u.alias, u.avatar_url, u.location, u.description
-                FROM talks t
-                LEFT JOIN users u ON t.owner_user_id = u.user_id
-                WHERE t.topic_id = ?
-                LIMIT 1
-            ''', (topic_id,))
-
-            talk_row = self.cursor.fetchone()
-            if talk_row:
-                talk_data = {
-                    "text": talk_row[0],
-                    "owner": {
-                        "user_id": talk_row[1],
-                        "name": talk_row[2],
-                        "alias": talk_row[3],
-                        "avatar_url": talk_row[4],
-                        "location": talk_row[5],
-                        "description": talk_row[6]
-                    }
+        if not details:
+            return details
+
+        found_ids = list(details.keys())
+        placeholders = ','.join('?' * len(found_ids))
+
+        # 2. 获取话题内容（talk）
+        self.cursor.execute(f'''
+            SELECT
+                t.topic_id, t.text,
+                u.user_id, u.name, u.alias, u.avatar_url, u.location, u.description
+            FROM talks t
+            LEFT JOIN users u ON t.owner_user_id = u.user_id
+            WHERE t.topic_id IN ({placeholders})
+        ''', found_ids)
+        for talk_row in self.cursor.fetchall():
+            details[talk_row[0]]["talk"] = {
+                "text": talk_row[1],
+                "owner": self._user_dict(talk_row[2:8])
+            }
+
+        # 3. 获取话题及评论的全部图片（一次查询，按 comment_id 分组）
+        self.cursor.execute(f'''
+            SELECT
+                topic_id, comment_id,
+                image_id, type, thumbnail_url, thumbnail_width, thumbnail_height,
+                large_url, large_width, large_height,
+                original_url, original_width, original_height, original_size
+            FROM images
+            WHERE topic_id IN ({placeholders})
+            ORDER BY image_id
+        ''', found_ids)
+        comment_images = {}
+        for img_row in self.cursor.fetchall():
+            image = self._image_dict(img_row[2:])
+            if img_row[1] is None:
+                talk = details[img_row[0]].get("talk")
+                if talk is not None:
+                    talk.setdefault("images", []).append(image)
+            else:
+                comment_images.setdefault(img_row[1], []).append(image)
+
+        # 4. 获取话题文件
+        self.cursor.execute(f'''
+            SELECT
+                topic_id, file_id, name, hash, size, duration, download_count, create_time
+            FROM topic_files
+            WHERE topic_id IN ({placeholders})
+            ORDER BY file_id
+        ''', found_ids)
+        for file_row in self.cursor.fetchall():
+            talk = details[file_row[0]].get("talk")
+            if talk is not None:
+                talk.setdefault("files", []).append({
+                    "file_id": file_row[1],
+                    "name": file_row[2],
+                    "hash": file_row[3],
+                    "size": file_row[4],
+                    "duration": file_row[5],
+                    "download_count": file_row[6],
+                    "create_time": file_row[7]
+                })
+
+        # 5. 读取文章信息（如有）
+        self.cursor.execute(f'''
+            SELECT topic_id, title, article_id, article_url, inline_article_url
+            FROM articles
+            WHERE topic_id IN ({placeholders})
+        ''', found_ids)
+        for article_row in self.cursor.fetchall():
+            talk = details[article_row[0]].get("talk")
+            if talk is not None:
+                talk["article"] = {
+                    "title": article_row[1],
+                    "article_id": article_row[2],
+                    "article_url": article_row[3],
+                    "inline_article_url": article_row[4]
                 }
 
-                # 获取话题图片
-                self.cursor.execute('''
-                    SELECT
-                        image_id, type, thumbnail_url, thumbnail_width, thumbnail_height,
-                        large_url, large_width, large_height,
-                        original_url, original_width, original_height, original_size
-                    FROM images
-                    WHERE topic_id = ? AND comment_id IS NULL
-                    ORDER BY image_id
-                ''', (topic_id,))
-
-                images = []
-                for img_row in self.cursor.fetchall():
-                    images.append({
-                        "image_id": img_row[0],
-                        "type": img_row[1],
-                        "thumbnail": {
-                            "url": img_row[2],
-                            "width": img_row[3],
-                            "height": img_row[4]
-                        },
-                        "large": {
-                            "url": img_row[5],
-                            "width": img_row[6],
-                            "height": img_row[7]
-                        },
-                        "original": {
-                            "url": img_row[8],
-                            "width": img_row[9],
-                            "height": img_row[10],
-                            "size": img_row[11]
-                        }
-                    })
-
-                if images:
-                    talk_data["images"] = images
-
-                # 获取话题文件
-                self.cursor.execute('''
-                    SELECT
-                        file_id, name, hash, size, duration, download_count, create_time
-                    FROM topic_files
-                    WHERE topic_id = ?
-                    ORDER BY file_id
-                ''', (topic_id,))
-
-                files = []
-                for file_row in self.cursor.fetchall():
-                    files.append({
-                        "file_id": file_row[0],
-                        "name": file_row[1],
-                        "hash": file_row[2],
-                        "size": file_row[3],
-                        "duration": file_row[4],
-                        "download_count": file_row[5],
-                        "create_time": file_row[6]
-                    })
-
-                if files:
-                    talk_data["files"] = files
-
-                # 读取文章信息（如有）
-                self.cursor.execute('''
-                    SELECT title, article_id, article_url, inline_article_url
-                    FROM articles
-                    WHERE topic_id = ?
-                    LIMIT 1
-                ''', (topic_id,))
-                article_row = self.cursor.fetchone()
-                if article_row:
-                    talk_data["article"] = {
-                        "title": article_row[0],
-                        "article_id": article_row[1],
-                        "article_url": article_row[2],
-                        "inline_article_url": article_row[3]
-                    }
-
-                topic_detail["talk"] = talk_data
-
-            # 3. 获取最新点赞
-            self.cursor.execute('''
+        # 6. 获取最新点赞（每个话题最多5条）
+        self.cursor.execute(f'''
+            SELECT topic_id, create_time, user_id, name, avatar_url
+            FROM (
                 SELECT
-                    l.create_time,
-                    u.user_id, u.name, u.avatar_url
+                    l.topic_id, l.create_time, u.user_id, u.name, u.avatar_url,
+                    ROW_NUMBER() OVER (PARTITION BY l.topic_id ORDER BY l.create_time DESC) AS rn
                 FROM likes l
                 LEFT JOIN users u ON l.user_id = u.user_id
-                WHERE l.topic_id = ?
-                ORDER BY l.create_time DESC
-                LIMIT 5
-            ''', (topic_id,))
-
-            latest_likes = []
-            for like_row in self.cursor.fetchall():
-                latest_likes.append({
-                    "create_time": like_row[0],
-                    "owner": {
-                        "user_id": like_row[1],
-                        "name": like_row[2],
-                        "avatar_url": like_row[3]
-                    }
-                })
-            topic_detail["latest_likes"] = latest_likes
+                WHERE l.topic_id IN ({placeholders})
+            )
+            WHERE rn <= 5
+            ORDER BY topic_id, rn
+        ''', found_ids)
+        for like_row in self.cursor.fetchall():
+            details[like_row[0]]["latest_likes"].append({
+                "create_time": like_row[1],
+                "owner": {
+                    "user_id": like_row[2],
+                    "name": like_row[3],
+                    "avatar_url": like_row[4]
+                }
+            })
+
+        # 7. 获取全部评论
+        self.cursor.execute(f'''
+            SELECT
+                c.topic_id, c.comment_id, c.text, c.create_time, c.likes_count, c.rewards_count, c.sticky,
+                c.parent_comment_id, c.replies_count,
+                u.user_id, u.name, u.alias, u.avatar_url, u.location, u.description,
+                r.user_id as repliee_user_id, r.name as repliee_name, r.avatar_url as repliee_avatar_url
+            FROM comments c
+            LEFT JOIN users u ON c.owner_user_id = u.user_id
+            LEFT JOIN users r ON c.repliee_user_id = r.user_id
+            WHERE c.topic_id IN ({placeholders})
+            ORDER BY c.topic_id, c.create_time ASC
+        ''', found_ids)
+        for comment_row in self.cursor.fetchall():
+            comment_id = comment_row[1]
+            comment_data = {
+                "comment_id": comment_id,
+                "text": comment_row[2],
+                "create_time": comment_row[3],
+                "likes_count": comment_row[4],
+                "rewards_count": comment_row[5],
+                "sticky": bool(comment_row[6]),
+                "parent_comment_id": comment_row[7],
+                "replies_count": comment_row[8],
+                "owner": self._user_dict(comment_row[9:15])
+            }
 
-            # 4. 获取评论 - 不再限制为10条，返回所有评论
-            self.cursor.execute('''
-                SELECT
-                    c.comment_id, c.text, c.create_time, c.likes_count, c.rewards_count, c.sticky,
-                    c.parent_comment_id, c.replies_count,
-                    u.user_id, u.name, u.alias, u.avatar_url, u.location, u.description,
-                    r.user_id as repliee_user_id, r.name as repliee_name, r.avatar_url as repliee_avatar_url
-                FROM comments c
-                LEFT JOIN users u ON c.owner_user_id = u.user_id
-                LEFT JOIN users r ON c.repliee_user_id = r.user_id
-                WHERE c.topic_id = ?
-                ORDER BY c.create_time ASC
-            ''', (topic_id,))
-
-            show_comments = []
-            for comment_row in self.cursor.fetchall():
-                comment_id = comment_row[0]
-                comment_data = {
-                    "comment_id": comment_id,
-                    "text": comment_row[1],
-                    "create_time": comment_row[2],
-                    "likes_count": comment_row[3],
-                    "rewards_count": comment_row[4],
-                    "sticky": bool(comment_row[5]),
-                    "parent_comment_id": comment_row[6],
-                    "replies_count": comment_row[7],
-                    "owner": {
-                        "user_id": comment_row[8],
-                        "name": comment_row[9],
-                        "alias": comment_row[10],
-                        "avatar_url": comment_row[11],
-                        "location": comment_row[12],
-                        "description": comment_row[13]
-                    }
+            # 添加回复人信息（如果存在）
+            if comment_row[15]:
+                comment_data["repliee"] = {
+                    "user_id": comment_row[15],
+                    "name": comment_row[16],
+                    "avatar_url": comment_row[17]
                 }
 
-                # 添加回复人信息（如果存在）
-                if comment_row[14]:  # repliee_user_id
-                    comment_data["repliee"] = {
-                        "user_id": comment_row[14],
-                        "name": comment_row[15],
-                        "avatar_url": comment_row[16]
-                    }
+            if comment_id in comment_images:
+                comment_data["images"] = comment_images[comment_id]
+
+            details[comment_row[0]]["show_comments"].append(comment_data)
+
+        # 8. 获取点赞详情（表情）
+        self.cursor.execute(f'''
+            SELECT topic_id, emoji_key, likes_count
+            FROM like_emojis
+            WHERE topic_id IN ({placeholders})
+        ''', found_ids)
+        for emoji_row in self.cursor.fetchall():
+            details[emoji_row[0]]["likes_detail"]["emojis"].append({
+                "emoji_key": emoji_row[1],
+                "likes_count": emoji_row[2]
+            })
+
+        # 9. 获取问答数据（仅问答类型话题）
+        qa_ids = [topic_id for topic_id, detail in details.items() if detail["type"] == "q&a"]
+        if qa_ids:
+            qa_placeholders = ','.join('?' * len(qa_ids))
+            self.cursor.execute(f'''
+                SELECT
+                    q.topic_id, q.text, q.expired, q.anonymous, q.owner_questions_count,
+                    q.owner_join_time, q.owner_status, q.owner_location,
+                    owner.user_id, owner.name, owner.alias, owner.avatar_url,
+                    owner.location, owner.description,
+                    questionee.user_id, questionee.name, questionee.alias, questionee.avatar_url,
+                    questionee.location, questionee.description
+                FROM questions q
+                LEFT JOIN users owner ON q.owner_user_id = owner.user_id
+                LEFT JOIN users questionee ON q.questionee_user_id = questionee.user_id
+                WHERE q.topic_id IN ({qa_placeholders})
+            ''', qa_ids)
+            for question_row in self.cursor.fetchall():
+                question_data = {
+                    "text": question_row[1],
+                    "expired": bool(question_row[2]),
+                    "anonymous": bool(question_row[3]),
+                    "owner_detail": {
+                        "questions_count": question_row[4],
+                        "estimated_join_time": question_row[5],
+                        "status": question_row[6]
+                    },
+                    "owner_location": question_row[7]
+                }
 
-                # 获取评论的图片
-                self.cursor.execute('''
-                    SELECT
-                        image_id, type, thumbnail_url, thumbnail_width, thumbnail_height,
-                        large_url, large_width, large_height,
-                        original_url, original_width, original_height, original_size
-                    FROM images
-                    WHERE comment_id = ?
-                    ORDER BY image_id
-                ''', (comment_id,))
-
-                images = []
-                for img_row in self.cursor.fetchall():
-                    images.append({
-                        "image_id": img_row[0],
-                        "type": img_row[1],
-                        "thumbnail": {
-                            "url": img_row[2],
-                            "width": img_row[3],
-                            "height": img_row[4]
-                        },
-                        "large": {
-                            "url": img_row[5],
-                            "width": img_row[6],
-                            "height": img_row[7]
-                        },
-                        "original": {
-                            "url": img_row[8],
-                            "width": img_row[9],
-                            "height": img_row[10],
-                            "size": img_row[11]
-                        }
-                    })
-
-                if images:
-                    comment_data["images"] = images
-
-                show_comments.append(comment_data)
-            topic_detail["show_comments"] = show_comments
-
-            # 5. 获取点赞详情（表情）
-            self.cursor.execute('''
-                SELECT emoji_key, likes_count
-                FROM like_emojis
-                WHERE topic_id = ?
-            ''', (topic_id,))
+                # 添加被提问者信息
+                if question_row[14]:
+                    question_data["questionee"] = self._user_dict(question_row[14:20])
 
-            emojis = []
-            for emoji_row in self.cursor.fetchall():
-                emojis.append({
-                    "emoji_key": emoji_row[0],
-                    "likes_count": emoji_row[1]
-                })
+                # 如果不是匿名且有提问者信息，添加提问者信息
+                if not question_data["anonymous"] and question_row[8]:
+                    question_data["owner"] = self._user_dict(question_row[8:14])
 
-            topic_detail["likes_detail"] = {
-                "emojis": emojis
-            }
+                details[question_row[0]]["question"] = question_data
 
-            # 6. 获取问答数据（如果是问答类型话题）
-            if topic_detail["type"] == "q&a":
-                # 获取问题信息
-                self.cursor.execute('''
-                    SELECT
-                        q.text, q.expired, q.anonymous, q.owner_questions_count,
-                        q.owner_join_time, q.owner_status, q.owner_location,
-                        owner.user_id as owner_user_id, owner.name as owner_name,
-                        owner.alias as owner_alias, owner.avatar_url as owner_avatar_url,
-                        owner.location as owner_location_detail, owner.description as owner_description,
-                        questionee.user_id as questionee_user_id, questionee.name as questionee_name,
-                        questionee.alias as questionee_alias, questionee.avatar_url as questionee_avatar_url,
-                        questionee.location as questionee_location, questionee.description as questionee_description
-                    FROM questions q
-                    LEFT JOIN users owner ON q.owner_user_id = owner.user_id
-                    LEFT JOIN users questionee ON q.questionee_user_id = questionee.user_id
-                    WHERE q.topic_id = ?
-                    LIMIT 1
-                ''', (topic_id,))
-
-                question_row = self.cursor.fetchone()
-                if question_row:
-                    question_data = {
-                        "text": question_row[0],
-                        "expired": bool(question_row[1]),
-                        "anonymous": bool(question_row[2]),
-                        "owner_detail": {
-                            "questions_count": question_row[3],
-                            "estimated_join_time": question_row[4],
-                            "status": question_row[5]
-                        },
-                        "owner_location": question_row[6]
-                    }
-
-                    # 添加被提问者信息
-                    if question_row[12]:  # questionee_user_id
-                        question_data["questionee"] = {
-                            "user_id": question_row[12],
-                            "name": question_row[13],
-                            "alias": question_row[14],
-                            "avatar_url": question_row[15],
-                            "location": question_row[16],
-                            "description": question_row[17]
-                        }
-
-                    # 如果不是匿名且有提问者信息，添加提问者信息
-                    if not question_data["anonymous"] and question_row[7]:  # owner_user_id
-                        question_data["owner"] = {
-                            "user_id": question_row[7],
-                            "name": question_row[8],
-                            "alias": question_row[9],
-                            "avatar_url": question_row[10],
-                            "location": question_row[11],
-                            "description": question_row[11]
-                        }
-
-                    topic_detail["question"] = question_data
-
-                # 获取回答信息
-                self.cursor.execute('''
-                    SELECT
-                        a.text,
-                        u.user_id, u.name, u.alias, u.avatar_url, u.location, u.description
-                    FROM answers a
-                    LEFT JOIN users u ON a.owner_user_id = u.user_id
-                    WHERE a.topic_id = ?
-                    LIMIT 1
-                ''', (topic_id,))
-
-                answer_row = self.cursor.fetchone()
-                if answer_row:
-                    answer_data = {
-                        "text": answer_row[0],
-                        "owner": {
-                            "user_id": answer_row[1],
-                            "name": answer_row[2],
-                            "alias": answer_row[3],
-                            "avatar_url": answer_row[4],
-                            "location": answer_row[5],
-                            "description": answer_row[6]
-                        }
-                    }
-                    topic_detail["answer"] = answer_data
-
-            return topic_detail
+            # 获取回答信息
+            self.cursor.execute(f'''
+                SELECT
+                    a.topic_id, a.text,
+                    u.user_id, u.name, u.alias, u.avatar_url, u.location, u.description
+                FROM answers a
+                LEFT JOIN users u ON a.owner_user_id = u.user_id
+                WHERE a.topic_id IN ({qa_placeholders})
+            ''', qa_ids)
+            for answer_row in self.cursor.fetchall():
+                details[answer_row[0]]["answer"] = {
+                    "text": answer_row[1],
+                    "owner": self._user_dict(answer_row[2:8])
+                }
 
-        except Exception as e:
-            print(f"获取话题详情失败: {e}")
-            return None
+        return details
     
-    def _import_tags(self, topic_id: int, topic_data: Dict[str, Any]):
-        """从话题数据中提取并导入标签信息"""
-        import re
-        
-        group_id = topic_data.get('group', {}).get('group_id')
-        if not group_id:
-            return
-        
+    def _extract_topic_tags(self, topic_data: Dict[str, Any]) -> set:
+        """从话题数据中提取标签，返回 {(tag_name, hid)}"""
         # 收集所有可能包含标签的文本内容
         text_contents = []
         
@@ -1402,82 +1852,118 @@ class ZSXQDatabase:
         # 提取所有标签
         all_tags = set()
         for text in text_contents:
-            if text:
-                # 使用正则表达式提取标签 <e type="hashtag" hid="..." title="..." />
-                tag_pattern = r'<e\s+type="hashtag"\s+hid="([^"]+)"\s+title="([^"]+)"\s*/>'
-                matches = re.findall(tag_pattern, text)
-                for hid, encoded_title in matches:
-                    try:
-                        # 解码标签名称
-                        import urllib.parse
-                        tag_name = urllib.parse.unquote(encoded_title)
-                        # 移除可能的#符号
-                        tag_name = tag_name.strip('#')
-                        if tag_name:
-                            all_tags.add((tag_name, hid))
-                    except Exception as e:
-                        print(f"解码标签失败: {e}")
-        
-        # 为每个标签创建或更新数据库记录
-        for tag_name, hid in all_tags:
-            tag_id = self._upsert_tag(group_id, tag_name, hid)
-            if tag_id:
-                self._link_topic_tag(topic_id, tag_id)
-    
-    def _upsert_tag(self, group_id: int, tag_name: str, hid: str = None) -> Optional[int]:
-        """插入或更新标签信息"""
+            # 不含标签标记的文本无需运行正则
+            if not text or 'hashtag' not in text:
+                continue
+            for hid, encoded_title in _HASHTAG.findall(text):
+                try:
+                    # 解码标签名称并移除可能的#符号
+                    tag_name = unquote(encoded_title).strip('#')
+                    if tag_name:
+                        all_tags.add((tag_name, hid))
+                except Exception as e:
+                    print(f"解码标签失败: {e}")
+
+        return all_tags
+
+    def _create_tag_count_triggers(self):
+        """由触发器维护 tags.topic_count：只有关联真正插入或删除时才增减计数"""
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_topic_tags_count_insert AFTER INSERT ON topic_tags
+            BEGIN
+                UPDATE tags SET topic_count = topic_count + 1 WHERE tag_id = NEW.tag_id;
+            END
+        ''')
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_topic_tags_count_delete AFTER DELETE ON topic_tags
+            BEGIN
+                UPDATE tags SET topic_count = topic_count - 1 WHERE tag_id = OLD.tag_id;
+            END
+        ''')
+
+        # 已有数据库按现有关联校正一次计数（删除话题时旧代码不会扣减）
+        self.cursor.execute('''
+            UPDATE tags SET topic_count = (
+                SELECT COUNT(*) FROM topic_tags WHERE topic_tags.tag_id = tags.tag_id
+            )
+        ''')
+
+    def _flush_topic_tags(self, tag_rows: List[tuple]):
+        """写入标签及话题标签关联，tag_rows 为 (topic_id, group_id, tag_name, hid)"""
+        tag_hids = {}
+        for _, group_id, tag_name, hid in tag_rows:
+            key = (group_id, tag_name)
+            if hid or key not in tag_hids:
+                tag_hids[key] = hid
+
         try:
-            # 检查标签是否已存在
-            self.cursor.execute('''
-                SELECT tag_id FROM tags WHERE group_id = ? AND tag_name = ?
-            ''', (group_id, tag_name))
-            
-            result = self.cursor.fetchone()
-            if result:
-                tag_id = result[0]
-                # 更新hid（如果提供了新的hid）
-                if hid:
-                    self.cursor.execute('''
-                        UPDATE tags SET hid = ? WHERE tag_id = ?
-                    ''', (hid, tag_id))
-                return tag_id
-            else:
-                # 插入新标签
-                from datetime import datetime, timezone, timedelta
-                beijing_tz = timezone(timedelta(hours=8))
-                current_time = datetime.now(beijing_tz).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0800'
-                
-                self.cursor.execute('''
-                    INSERT INTO tags (group_id, tag_name, hid, created_at)
-                    VALUES (?, ?, ?, ?)
-                ''', (group_id, tag_name, hid, current_time))
-                
-                return self.cursor.lastrowid
+            tag_ids = self._resolve_tag_ids(tag_hids)
         except Exception as e:
             print(f"插入标签失败: {e}")
-            return None
-    
-    def _link_topic_tag(self, topic_id: int, tag_id: int):
-        """关联话题和标签"""
+            return
+
+        current_time = _beijing_now()
+        links = [
+            (topic_id, tag_ids[(group_id, tag_name)], current_time)
+            for topic_id, group_id, tag_name, _ in tag_rows
+            if (group_id, tag_name) in tag_ids
+        ]
+        if not links:
+            return
+
         try:
-            from datetime import datetime, timezone, timedelta
-            beijing_tz = timezone(timedelta(hours=8))
-            current_time = datetime.now(beijing_tz).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0800'
-            
-            self.cursor.execute('''
+            # 已存在的关联被忽略，标签计数由 topic_tags 的插入触发器累加
+            self.cursor.executemany('''
                 INSERT OR IGNORE INTO topic_tags (topic_id, tag_id, created_at)
                 VALUES (?, ?, ?)
-            ''', (topic_id, tag_id, current_time))
-            
-            # 更新标签的话题计数
-            self.cursor.execute('''
-                UPDATE tags SET topic_count = (
-                    SELECT COUNT(*) FROM topic_tags WHERE tag_id = ?
-                ) WHERE tag_id = ?
-            ''', (tag_id, tag_id))
-            
+            ''', links)
         except Exception as e:
             print(f"关联话题标签失败: {e}")
+
+    def _resolve_tag_ids(self, tag_hids: Dict[tuple, Optional[str]]) -> Dict[tuple, int]:
+        """
+        批量查找或创建标签（本批次内每个标签只查询一次）
+
+        Args:
+            tag_hids: {(group_id, tag_name): hid}
+
+        Returns:
+            {(group_id, tag_name): tag_id}
+        """
+        names_by_group = {}
+        for group_id, tag_name in tag_hids:
+            names_by_group.setdefault(group_id, []).append(tag_name)
+
+        tag_ids = {}
+        hid_updates = []
+        for group_id, names in names_by_group.items():
+            for i in range(0, len(names), 500):
+                chunk = names[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                self.cursor.execute(f'''
+                    SELECT tag_id, tag_name, hid FROM tags
+                    WHERE group_id = ? AND tag_name IN ({placeholders})
+                ''', [group_id] + chunk)
+                for tag_id, tag_name, current_hid in self.cursor.fetchall():
+                    key = (group_id, tag_name)
+                    tag_ids[key] = tag_id
+                    # 更新hid（如果提供了新的hid）
+                    if tag_hids[key] and tag_hids[key] != current_hid:
+                        hid_updates.append((tag_hids[key], tag_id))
+
+        if hid_updates:
+            self.cursor.executemany('UPDATE tags SET hid = ? WHERE tag_id = ?', hid_updates)
+
+        current_time = _beijing_now()
+        for key, hid in tag_hids.items():
+            if key not in tag_ids:
+                self.cursor.execute('''
+                    INSERT INTO tags (group_id, tag_name, hid, created_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (key[0], key[1], hid, current_time))
+                tag_ids[key] = self.cursor.lastrowid
+
+        return tag_ids
     
     def get_tags_by_group(self, group_id: int) -> List[Dict[str, Any]]:
         """获取指定群组的所有标签"""
@@ -1504,70 +1990,615 @@ class ZSXQDatabase:
             print(f"获取标签列表失败: {e}")
             return []
     
-    def get_topics_by_tag(self, tag_id: int, page: int = 1, per_page: int = 20) -> Dict[str, Any]:
-        """根据标签获取话题列表"""
+    def get_topics_by_tag(self, tag_id: int, page: int = 1, per_page: int = 20,
+                          cursor: Optional[str] = None) -> Dict[str, Any]:
+        """根据标签获取话题列表（总数取自 tags.topic_count）"""
+        try:
+            self.cursor.execute('SELECT topic_count FROM tags WHERE tag_id = ?', (tag_id,))
+            row = self.cursor.fetchone()
+            total = row[0] if row and row[0] else 0
+
+            return self._list_topics(
+                'topics t INNER JOIN topic_tags tt ON t.topic_id = tt.topic_id',
+                'tt.tag_id = ?', [tag_id], total, page, per_page, cursor
+            )
+        except ValueError:
+            raise
+        except Exception as e:
+            print(f"根据标签获取话题失败: {e}")
+            return {'topics': [], 'pagination': self._empty_pagination(page, per_page)}
+
+    # ==================== 话题列表（游标分页） ====================
+
+    # 列表查询的列及内容关联（与 _topic_list_item 的下标对应）
+    _TOPIC_LIST_COLUMNS = '''
+        t.topic_id, t.title, t.create_time, t.likes_count, t.comments_count,
+        t.reading_count, t.type, t.digested, t.sticky,
+        q.text, a.text, tk.text, u.user_id, u.name, u.avatar_url, t.imported_at
+    '''
+    _TOPIC_CONTENT_JOINS = '''
+        LEFT JOIN questions q ON t.topic_id = q.topic_id
+        LEFT JOIN answers a ON t.topic_id = a.topic_id
+        LEFT JOIN talks tk ON t.topic_id = tk.topic_id
+        LEFT JOIN users u ON tk.owner_user_id = u.user_id
+    '''
+
+    @staticmethod
+    def _topic_list_item(topic) -> Dict[str, Any]:
+        """将列表查询的一行转换为话题字典"""
+        topic_data = {
+            "topic_id": topic[0],
+            "title": topic[1],
+            "create_time": topic[2],
+            "likes_count": topic[3],
+            "comments_count": topic[4],
+            "reading_count": topic[5],
+            "type": topic[6],
+            "digested": bool(topic[7]) if topic[7] is not None else False,
+            "sticky": bool(topic[8]) if topic[8] is not None else False,
+            "imported_at": topic[15]
+        }
+
+        # 添加内容文本
+        if topic[6] == 'q&a':
+            # 问答类型话题
+            topic_data['question_text'] = topic[9] if topic[9] else ''
+            topic_data['answer_text'] = topic[10] if topic[10] else ''
+        else:
+            # 其他类型话题（talk、article等）
+            topic_data['talk_text'] = topic[11] if topic[11] else ''
+            if topic[12]:  # 有作者信息
+                topic_data['author'] = {
+                    'user_id': topic[12],
+                    'name': topic[13],
+                    'avatar_url': topic[14]
+                }
+        return topic_data
+
+    @staticmethod
+    def _empty_pagination(page: int, per_page: int) -> Dict[str, Any]:
+        return {'page': page, 'per_page': per_page, 'total': 0, 'pages': 0,
+                'has_more': False, 'next_cursor': None}
+
+    def _list_topics(self, source_sql: str, where_sql: str, params: List[Any], total: int,
+                     page: int, per_page: int, cursor: Optional[str]) -> Dict[str, Any]:
+        """
+        按 (create_time, topic_id) 倒序分页查询话题
+
+        传入游标时从游标位置继续向后读取（键集分页，与翻页深度无关，期间新写入的话题
+        不会造成重复或遗漏）；未传游标时按页码定位，仅为兼容直接跳页的旧调用方式。
+        游标格式错误时抛出 ValueError。
+        """
+        conditions = [where_sql] if where_sql else []
+        query_params = list(params)
+        offset = 0
+        if cursor:
+            key = decode_cursor(cursor)
+            conditions.append('(t.create_time, t.topic_id) < (?, ?)')
+            query_params.extend([key['t'], key['id']])
+        else:
+            offset = (max(page, 1) - 1) * per_page
+        where_clause = ('WHERE ' + ' AND '.join(conditions)) if conditions else ''
+
+        # 多取一行用于判断是否还有下一页
+        self.cursor.execute(f'''
+            SELECT {self._TOPIC_LIST_COLUMNS}
+            FROM {source_sql}
+            {self._TOPIC_CONTENT_JOINS}
+            {where_clause}
+            ORDER BY t.create_time DESC, t.topic_id DESC
+            LIMIT ? OFFSET ?
+        ''', query_params + [per_page + 1, offset])
+        rows = self.cursor.fetchall()
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        next_cursor = encode_cursor({'t': rows[-1][2], 'id': rows[-1][0]}) if has_more else None
+
+        return {
+            'topics': [self._topic_list_item(row) for row in rows],
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': total,
+                'pages': (total + per_page - 1) // per_page,
+                'has_more': has_more,
+                'next_cursor': next_cursor
+            }
+        }
+
+    def get_group_topics(self, group_id: int, page: int = 1, per_page: int = 20,
+                         cursor: Optional[str] = None) -> Dict[str, Any]:
+        """获取群组话题列表（按创建时间倒序，支持游标分页）"""
+        return self._list_topics('topics t', 't.group_id = ?', [group_id],
+                                 self.get_group_topic_count(group_id), page, per_page, cursor)
+
+    def get_all_topics(self, page: int = 1, per_page: int = 20,
+                       cursor: Optional[str] = None) -> Dict[str, Any]:
+        """获取全部话题列表（按创建时间倒序，支持游标分页）"""
+        self.cursor.execute('SELECT COALESCE(SUM(topics_count), 0) FROM group_stats')
+        total = self.cursor.fetchone()[0]
+        return self._list_topics('topics t', '', [], total, page, per_page, cursor)
+
+    # ==================== 群组统计 ====================
+
+    def _create_group_stats(self):
+        """创建群组统计表，由触发器在话题写入和删除时维护，列表总数无需扫描话题表"""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS group_stats (
+                group_id INTEGER PRIMARY KEY,
+                topics_count INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_topics_stats_insert AFTER INSERT ON topics
+            BEGIN
+                INSERT INTO group_stats (group_id, topics_count) VALUES (NEW.group_id, 1)
+                ON CONFLICT(group_id) DO UPDATE SET topics_count = topics_count + 1;
+            END
+        ''')
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_topics_stats_delete AFTER DELETE ON topics
+            BEGIN
+                UPDATE group_stats SET topics_count = topics_count - 1 WHERE group_id = OLD.group_id;
+            END
+        ''')
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_topics_stats_move AFTER UPDATE OF group_id ON topics
+            WHEN NEW.group_id IS NOT OLD.group_id
+            BEGIN
+                UPDATE group_stats SET topics_count = topics_count - 1 WHERE group_id = OLD.group_id;
+                INSERT INTO group_stats (group_id, topics_count) VALUES (NEW.group_id, 1)
+                ON CONFLICT(group_id) DO UPDATE SET topics_count = topics_count + 1;
+            END
+        ''')
+
+        # 已有数据库按现有话题回填
+        self.cursor.execute('DELETE FROM group_stats')
+        self.cursor.execute('''
+            INSERT INTO group_stats (group_id, topics_count)
+            SELECT group_id, COUNT(*) FROM topics GROUP BY group_id
+        ''')
+
+    def get_group_topic_count(self, group_id: int) -> int:
+        """获取群组话题数（读取触发器维护的计数）"""
+        self.cursor.execute('SELECT topics_count FROM group_stats WHERE group_id = ?', (group_id,))
+        row = self.cursor.fetchone()
+        return row[0] if row else 0
+
+    # group_stats 中由触发器维护的统计列
+    GROUP_STATS_COLUMNS = [
+        'topics_count', 'users_count', 'earliest_topic_time', 'latest_topic_time',
+        'total_likes', 'total_comments', 'total_readings',
+    ]
+
+    def _extend_group_stats(self):
+        """扩展群组统计：作者数、时间范围和点赞/评论/阅读总数，全部由触发器增量维护"""
+        self.cursor.execute("PRAGMA table_info(group_stats)")
+        existing = {row[1] for row in self.cursor.fetchall()}
+        for column, definition in [
+            ('users_count', 'INTEGER NOT NULL DEFAULT 0'),
+            ('earliest_topic_time', 'TEXT'),
+            ('latest_topic_time', 'TEXT'),
+            ('total_likes', 'INTEGER NOT NULL DEFAULT 0'),
+            ('total_comments', 'INTEGER NOT NULL DEFAULT 0'),
+            ('total_readings', 'INTEGER NOT NULL DEFAULT 0'),
+        ]:
+            if column not in existing:
+                self.cursor.execute(f'ALTER TABLE group_stats ADD COLUMN {column} {definition}')
+
+        # 作者引用计数：每个群组中每位作者的话题数，归零时删除，行数即作者数
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS group_user_stats (
+                group_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                topics_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (group_id, user_id)
+            ) WITHOUT ROWID
+        ''')
+
+        for trigger in ['trg_topics_stats_insert', 'trg_topics_stats_delete', 'trg_topics_stats_move']:
+            self.cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+
+        # 新增话题：计数和总数累加，时间范围向外扩展
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_topics_stats_insert AFTER INSERT ON topics
+            BEGIN
+                INSERT INTO group_stats (group_id, topics_count, earliest_topic_time, latest_topic_time,
+                                         total_likes, total_comments, total_readings)
+                VALUES (NEW.group_id, 1, NULLIF(NEW.create_time, ''), NULLIF(NEW.create_time, ''),
+                        COALESCE(NEW.likes_count, 0), COALESCE(NEW.comments_count, 0),
+                        COALESCE(NEW.reading_count, 0))
+                ON CONFLICT(group_id) DO UPDATE SET
+                    topics_count = topics_count + 1,
+                    earliest_topic_time = MIN(COALESCE(excluded.earliest_topic_time, earliest_topic_time),
+                                              COALESCE(earliest_topic_time, excluded.earliest_topic_time)),
+                    latest_topic_time = MAX(COALESCE(excluded.latest_topic_time, latest_topic_time),
+                                            COALESCE(latest_topic_time, excluded.latest_topic_time)),
+                    total_likes = total_likes + excluded.total_likes,
+                    total_comments = total_comments + excluded.total_comments,
+                    total_readings = total_readings + excluded.total_readings;
+            END
+        ''')
+
+        # 删除话题：扣减计数；删除的是边界话题时借助 (group_id, create_time) 索引重新取时间范围
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_topics_stats_delete AFTER DELETE ON topics
+            BEGIN
+                UPDATE group_stats SET
+                    topics_count = topics_count - 1,
+                    total_likes = total_likes - COALESCE(OLD.likes_count, 0),
+                    total_comments = total_comments - COALESCE(OLD.comments_count, 0),
+                    total_readings = total_readings - COALESCE(OLD.reading_count, 0)
+                WHERE group_id = OLD.group_id;
+                UPDATE group_stats SET
+                    earliest_topic_time = (SELECT MIN(create_time) FROM topics
+                                           WHERE group_id = OLD.group_id AND create_time > ''),
+                    latest_topic_time = (SELECT MAX(create_time) FROM topics
+                                         WHERE group_id = OLD.group_id AND create_time > '')
+                WHERE group_id = OLD.group_id
+                  AND OLD.create_time IN (earliest_topic_time, latest_topic_time);
+            END
+        ''')
+
+        # 更新话题（重新爬取或刷新统计）：按旧值扣减、新值累加
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_topics_stats_update
+            AFTER UPDATE OF group_id, create_time, likes_count, comments_count, reading_count ON topics
+            BEGIN
+                UPDATE group_stats SET
+                    topics_count = topics_count - 1,
+                    total_likes = total_likes - COALESCE(OLD.likes_count, 0),
+                    total_comments = total_comments - COALESCE(OLD.comments_count, 0),
+                    total_readings = total_readings - COALESCE(OLD.reading_count, 0)
+                WHERE group_id = OLD.group_id;
+                INSERT INTO group_stats (group_id, topics_count, earliest_topic_time, latest_topic_time,
+                                         total_likes, total_comments, total_readings)
+                VALUES (NEW.group_id, 1, NULLIF(NEW.create_time, ''), NULLIF(NEW.create_time, ''),
+                        COALESCE(NEW.likes_count, 0), COALESCE(NEW.comments_count, 0),
+                        COALESCE(NEW.reading_count, 0))
+                ON CONFLICT(group_id) DO UPDATE SET
+                    topics_count = topics_count + 1,
+                    earliest_topic_time = MIN(COALESCE(excluded.earliest_topic_time, earliest_topic_time),
+                                              COALESCE(earliest_topic_time, excluded.earliest_topic_time)),
+                    latest_topic_time = MAX(COALESCE(excluded.latest_topic_time, latest_topic_time),
+                                            COALESCE(latest_topic_time, excluded.latest_topic_time)),
+                    total_likes = total_likes + excluded.total_likes,
+                    total_comments = total_comments + excluded.total_comments,
+                    total_readings = total_readings + excluded.total_readings;
+                UPDATE group_stats SET
+                    earliest_topic_time = (SELECT MIN(create_time) FROM topics
+                                           WHERE group_id = OLD.group_id AND create_time > ''),
+                    latest_topic_time = (SELECT MAX(create_time) FROM topics
+                                         WHERE group_id = OLD.group_id AND create_time > '')
+                WHERE group_id = OLD.group_id
+                  AND (OLD.group_id IS NOT NEW.group_id OR OLD.create_time IS NOT NEW.create_time)
+                  AND OLD.create_time IN (earliest_topic_time, latest_topic_time);
+            END
+        ''')
+
+        # 作者数：talks 写入/删除/换作者时维护引用计数
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_talks_stats_insert AFTER INSERT ON talks
+            WHEN NEW.owner_user_id IS NOT NULL
+            BEGIN
+                INSERT INTO group_user_stats (group_id, user_id, topics_count)
+                SELECT group_id, NEW.owner_user_id, 1 FROM topics WHERE topic_id = NEW.topic_id
+                ON CONFLICT(group_id, user_id) DO UPDATE SET topics_count = topics_count + 1;
+            END
+        ''')
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_talks_stats_delete AFTER DELETE ON talks
+            WHEN OLD.owner_user_id IS NOT NULL
+            BEGIN
+                UPDATE group_user_stats SET topics_count = topics_count - 1
+                WHERE group_id = (SELECT group_id FROM topics WHERE topic_id = OLD.topic_id)
+                  AND user_id = OLD.owner_user_id;
+                DELETE FROM group_user_stats
+                WHERE group_id = (SELECT group_id FROM topics WHERE topic_id = OLD.topic_id)
+                  AND user_id = OLD.owner_user_id AND topics_count <= 0;
+            END
+        ''')
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_talks_stats_update AFTER UPDATE OF owner_user_id ON talks
+            WHEN NEW.owner_user_id IS NOT OLD.owner_user_id
+            BEGIN
+                UPDATE group_user_stats SET topics_count = topics_count - 1
+                WHERE group_id = (SELECT group_id FROM topics WHERE topic_id = OLD.topic_id)
+                  AND user_id = OLD.owner_user_id;
+                DELETE FROM group_user_stats
+                WHERE group_id = (SELECT group_id FROM topics WHERE topic_id = OLD.topic_id)
+                  AND user_id = OLD.owner_user_id AND topics_count <= 0;
+                INSERT INTO group_user_stats (group_id, user_id, topics_count)
+                SELECT group_id, NEW.owner_user_id, 1 FROM topics
+                WHERE topic_id = NEW.topic_id AND NEW.owner_user_id IS NOT NULL
+                ON CONFLICT(group_id, user_id) DO UPDATE SET topics_count = topics_count + 1;
+            END
+        ''')
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_group_user_stats_insert AFTER INSERT ON group_user_stats
+            BEGIN
+                INSERT INTO group_stats (group_id, users_count) VALUES (NEW.group_id, 1)
+                ON CONFLICT(group_id) DO UPDATE SET users_count = users_count + 1;
+            END
+        ''')
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_group_user_stats_delete AFTER DELETE ON group_user_stats
+            BEGIN
+                UPDATE group_stats SET users_count = users_count - 1 WHERE group_id = OLD.group_id;
+            END
+        ''')
+
+        self._rebuild_group_stats_rows()
+
+    def _compute_group_stats(self) -> Dict[int, tuple]:
+        """直接从话题表聚合统计值（用于回填和校验），值顺序与 GROUP_STATS_COLUMNS 一致"""
+        self.cursor.execute('''
+            SELECT group_id, COUNT(*), MIN(NULLIF(create_time, '')), MAX(NULLIF(create_time, '')),
+                   COALESCE(SUM(likes_count), 0), COALESCE(SUM(comments_count), 0),
+                   COALESCE(SUM(reading_count), 0)
+            FROM topics
+            GROUP BY group_id
+        ''')
+        topic_rows = self.cursor.fetchall()
+        self.cursor.execute('''
+            SELECT t.group_id, COUNT(DISTINCT tk.owner_user_id)
+            FROM talks tk
+            JOIN topics t ON tk.topic_id = t.topic_id
+            GROUP BY t.group_id
+        ''')
+        users = dict(self.cursor.fetchall())
+        return {
+            row[0]: (row[1], users.get(row[0], 0)) + tuple(row[2:])
+            for row in topic_rows
+        }
+
+    def _rebuild_group_stats_rows(self):
+        """按现有数据重新生成群组统计（在调用方事务内执行）"""
+        self.cursor.execute('DELETE FROM group_user_stats')
+        self.cursor.execute('DELETE FROM group_stats')
+        self.cursor.execute('''
+            INSERT INTO group_stats (group_id, topics_count, users_count, earliest_topic_time, latest_topic_time,
+                                     total_likes, total_comments, total_readings)
+            SELECT group_id, COUNT(*), 0, MIN(NULLIF(create_time, '')), MAX(NULLIF(create_time, '')),
+                   COALESCE(SUM(likes_count), 0), COALESCE(SUM(comments_count), 0),
+                   COALESCE(SUM(reading_count), 0)
+            FROM topics
+            GROUP BY group_id
+        ''')
+        # users_count 由 group_user_stats 的插入触发器累加
+        self.cursor.execute('''
+            INSERT INTO group_user_stats (group_id, user_id, topics_count)
+            SELECT t.group_id, tk.owner_user_id, COUNT(*)
+            FROM talks tk
+            JOIN topics t ON tk.topic_id = t.topic_id
+            WHERE tk.owner_user_id IS NOT NULL
+            GROUP BY t.group_id, tk.owner_user_id
+        ''')
+
+    def get_group_stats(self, group_id: int) -> Dict[str, Any]:
+        """获取群组统计信息（单行读取，不扫描话题表）"""
+        self.cursor.execute(f'''
+            SELECT {', '.join(self.GROUP_STATS_COLUMNS)} FROM group_stats WHERE group_id = ?
+        ''', (group_id,))
+        row = self.cursor.fetchone()
+        if not row:
+            return {'group_id': group_id, 'topics_count': 0, 'users_count': 0,
+                    'latest_topic_time': None, 'earliest_topic_time': None,
+                    'total_likes': 0, 'total_comments': 0, 'total_readings': 0}
+
+        stats = dict(zip(self.GROUP_STATS_COLUMNS, row))
+        return {
+            'group_id': group_id,
+            'topics_count': stats['topics_count'],
+            'users_count': stats['users_count'],
+            'latest_topic_time': stats['latest_topic_time'],
+            'earliest_topic_time': stats['earliest_topic_time'],
+            'total_likes': stats['total_likes'],
+            'total_comments': stats['total_comments'],
+            'total_readings': stats['total_readings']
+        }
+
+    def verify_group_stats(self) -> Dict[str, Any]:
+        """
+        将维护的群组统计与实际聚合结果比对
+
+        Returns:
+            {'groups_checked': 群组数, 'mismatches': [{'group_id', 'field', 'expected', 'actual'}]}
+        """
+        expected = self._compute_group_stats()
+        self.cursor.execute(f'SELECT group_id, {", ".join(self.GROUP_STATS_COLUMNS)} FROM group_stats')
+        actual = {row[0]: tuple(row[1:]) for row in self.cursor.fetchall()}
+
+        mismatches = []
+        empty = (0, 0, None, None, 0, 0, 0)
+        for group_id in sorted(set(expected) | set(actual)):
+            expected_values = expected.get(group_id, empty)
+            actual_values = actual.get(group_id, empty)
+            for field, expected_value, actual_value in zip(self.GROUP_STATS_COLUMNS, expected_values, actual_values):
+                if expected_value != actual_value:
+                    mismatches.append({'group_id': group_id, 'field': field,
+                                       'expected': expected_value, 'actual': actual_value})
+
+        return {'groups_checked': len(set(expected) | set(actual)), 'mismatches': mismatches}
+
+    def rebuild_group_stats(self) -> Dict[str, Any]:
+        """重建群组统计（用于统计出现偏差时）"""
+        try:
+            self._rebuild_group_stats_rows()
+            self.conn.commit()
+        except Exception as e:
+            self.conn.rollback()
+            return {'success': False, 'message': str(e)}
+
+        self.cursor.execute('SELECT COUNT(*) FROM group_stats')
+        return {'success': True, 'groups': self.cursor.fetchone()[0]}
+
+    # ==================== 全文搜索 ====================
+
+    def _create_search_index(self):
+        """创建全文搜索索引（FTS5 trigram 分词，支持中文子串匹配）"""
         try:
-            offset = (page - 1) * per_page
-            
-            # 获取话题列表 - 包含所有详细信息，与get_group_topics保持一致
             self.cursor.execute('''
-                SELECT
-                    t.topic_id, t.title, t.create_time, t.likes_count, t.comments_count,
-                    t.reading_count, t.type, t.digested, t.sticky,
-                    q.text as question_text,
-                    a.text as answer_text,
-                    tk.text as talk_text,
-                    u.user_id, u.name, u.avatar_url
+                CREATE VIRTUAL TABLE IF NOT EXISTS topics_fts USING fts5(
+                    title, content, comments,
+                    tokenize = 'trigram'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            # SQLite 低于 3.34 不支持 trigram 分词，搜索回退为 LIKE 查询
+            print(f"⚠️ 当前SQLite不支持FTS5 trigram，全文搜索不可用: {e}")
+            return
+
+        # 删除话题时同步删除索引（rowid 即 topic_id）
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_topics_fts_delete AFTER DELETE ON topics
+            BEGIN
+                DELETE FROM topics_fts WHERE rowid = OLD.topic_id;
+            END
+        ''')
+        self._search_index_available = True
+        self._rebuild_search_index_rows()
+
+    def has_search_index(self) -> bool:
+        """全文搜索索引是否可用"""
+        if self._search_index_available is None:
+            self.cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'topics_fts'")
+            self._search_index_available = self.cursor.fetchone() is not None
+        return self._search_index_available
+
+    def _refresh_search_index(self, topic_ids: List[int]):
+        """重建指定话题的全文索引条目（在导入事务内调用）"""
+        if not topic_ids or not self.has_search_index():
+            return
+
+        unique_ids = list(set(topic_ids))
+        for i in range(0, len(unique_ids), 500):
+            chunk = unique_ids[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            self.cursor.execute(f'DELETE FROM topics_fts WHERE rowid IN ({placeholders})', chunk)
+            self.cursor.execute(f'''
+                SELECT t.topic_id, t.title, tk.text, q.text, a.text, ar.title,
+                       (SELECT group_concat(c.text, ' ') FROM comments c WHERE c.topic_id = t.topic_id)
                 FROM topics t
-                INNER JOIN topic_tags tt ON t.topic_id = tt.topic_id
+                LEFT JOIN talks tk ON t.topic_id = tk.topic_id
                 LEFT JOIN questions q ON t.topic_id = q.topic_id
                 LEFT JOIN answers a ON t.topic_id = a.topic_id
-                LEFT JOIN talks tk ON t.topic_id = tk.topic_id
-                LEFT JOIN users u ON tk.owner_user_id = u.user_id
-                WHERE tt.tag_id = ?
-                ORDER BY t.create_time DESC
-                LIMIT ? OFFSET ?
-            ''', (tag_id, per_page, offset))
-            
-            topics = []
-            for topic in self.cursor.fetchall():
-                topic_data = {
-                    "topic_id": topic[0],
-                    "title": topic[1],
-                    "create_time": topic[2],
-                    "likes_count": topic[3],
-                    "comments_count": topic[4],
-                    "reading_count": topic[5],
-                    "type": topic[6],
-                    "digested": bool(topic[7]) if topic[7] is not None else False,
-                    "sticky": bool(topic[8]) if topic[8] is not None else False
-                }
+                LEFT JOIN articles ar ON t.topic_id = ar.topic_id
+                WHERE t.topic_id IN ({placeholders})
+            ''', chunk)
+            documents = [
+                (
+                    row[0],
+                    _plain_text(row[1]),
+                    ' '.join(_plain_text(text) for text in row[2:6] if text),
+                    _plain_text(row[6])
+                )
+                for row in self.cursor.fetchall()
+            ]
+            self.cursor.executemany('''
+                INSERT INTO topics_fts (rowid, title, content, comments) VALUES (?, ?, ?, ?)
+            ''', documents)
+
+    def _rebuild_search_index_rows(self) -> int:
+        """清空并重新生成全部全文索引条目，返回索引的话题数"""
+        self.cursor.execute('DELETE FROM topics_fts')
+        self.cursor.execute('SELECT topic_id FROM topics')
+        topic_ids = [row[0] for row in self.cursor.fetchall()]
+        for i in range(0, len(topic_ids), 1000):
+            self._refresh_search_index(topic_ids[i:i + 1000])
+            if len(topic_ids) > 10000 and (i // 1000) % 20 == 0:
+                print(f"   📇 全文索引进度: {min(i + 1000, len(topic_ids))}/{len(topic_ids)}")
+        return len(topic_ids)
+
+    def rebuild_search_index(self) -> Dict[str, Any]:
+        """重建全文搜索索引（用于已有数据库或索引损坏时）"""
+        if not self.has_search_index():
+            return {'success': False, 'message': '当前SQLite不支持FTS5 trigram'}
+
+        indexed = self._rebuild_search_index_rows()
+        self.cursor.execute("INSERT INTO topics_fts (topics_fts) VALUES ('optimize')")
+        self.conn.commit()
+        return {'success': True, 'indexed_topics': indexed}
+
+    def search_topics(self, group_id: Optional[int], query: str, page: int = 1, per_page: int = 20) -> Dict[str, Any]:
+        """
+        全文搜索话题（标题、正文、问答、文章标题、评论），按相关度排序并返回高亮片段
+
+        Args:
+            group_id: 群组ID，为None时不限制群组
+            query: 搜索关键词，多个关键词以空格分隔（AND）
+        """
+        empty = {'topics': [], 'pagination': {'page': page, 'per_page': per_page, 'total': 0, 'pages': 0}}
+        terms = [term for term in (query or '').split() if term]
+        if not terms:
+            return empty
 
-                # 添加内容文本
-                if topic[6] == 'q&a':
-                    # 问答类型话题
-                    topic_data['question_text'] = topic[9] if topic[9] else ''
-                    topic_data['answer_text'] = topic[10] if topic[10] else ''
+        offset = (page - 1) * per_page
+        group_filter = 'AND t.group_id = ?' if group_id is not None else ''
+        group_params = [group_id] if group_id is not None else []
+
+        select_columns = self._TOPIC_LIST_COLUMNS
+        content_joins = self._TOPIC_CONTENT_JOINS
+
+        try:
+            # trigram 分词要求每个关键词至少3个字符，较短的关键词使用索引表上的 LIKE
+            use_match = self.has_search_index() and all(len(term) >= 3 for term in terms)
+            if use_match:
+                match_expr = ' AND '.join('"' + term.replace('"', '""') + '"' for term in terms)
+                self.cursor.execute(f'''
+                    SELECT {select_columns},
+                           snippet(topics_fts, -1, '<mark>', '</mark>', '…', 32) AS highlight
+                    FROM topics_fts
+                    JOIN topics t ON t.topic_id = topics_fts.rowid
+                    {content_joins}
+                    WHERE topics_fts MATCH ? {group_filter}
+                    ORDER BY bm25(topics_fts, 10.0, 5.0, 1.0), t.create_time DESC
+                    LIMIT ? OFFSET ?
+                ''', [match_expr] + group_params + [per_page, offset])
+                rows = self.cursor.fetchall()
+
+                self.cursor.execute(f'''
+                    SELECT COUNT(*) FROM topics_fts
+                    JOIN topics t ON t.topic_id = topics_fts.rowid
+                    WHERE topics_fts MATCH ? {group_filter}
+                ''', [match_expr] + group_params)
+                total = self.cursor.fetchone()[0]
+            else:
+                if self.has_search_index():
+                    source = 'topics_fts JOIN topics t ON t.topic_id = topics_fts.rowid'
+                    term_sql = '(topics_fts.title LIKE ? OR topics_fts.content LIKE ? OR topics_fts.comments LIKE ?)'
                 else:
-                    # 其他类型话题（talk、article等）
-                    topic_data['talk_text'] = topic[11] if topic[11] else ''
-                    if topic[12]:  # 有作者信息
-                        topic_data['author'] = {
-                            'user_id': topic[12],
-                            'name': topic[13],
-                            'avatar_url': topic[14]
-                        }
+                    source = 'topics t'
+                    term_sql = '''(t.title LIKE ? OR t.topic_id IN (
+                        SELECT topic_id FROM talks WHERE text LIKE ?
+                        UNION SELECT topic_id FROM questions WHERE text LIKE ?))'''
+                where_sql = ' AND '.join([term_sql] * len(terms))
+                like_params = []
+                for term in terms:
+                    like_params.extend([f'%{term}%'] * 3)
+
+                self.cursor.execute(f'''
+                    SELECT {select_columns}, NULL AS highlight
+                    FROM {source}
+                    {content_joins}
+                    WHERE {where_sql} {group_filter}
+                    ORDER BY t.create_time DESC
+                    LIMIT ? OFFSET ?
+                ''', like_params + group_params + [per_page, offset])
+                rows = self.cursor.fetchall()
+
+                self.cursor.execute(f'''
+                    SELECT COUNT(*) FROM {source}
+                    WHERE {where_sql} {group_filter}
+                ''', like_params + group_params)
+                total = self.cursor.fetchone()[0]
 
+            topics = []
+            for topic in rows:
+                topic_data = self._topic_list_item(topic)
+                topic_data['highlight'] = topic[16]
                 topics.append(topic_data)
-            
-            # 获取总数
-            self.cursor.execute('''
-                SELECT COUNT(*)
-                FROM topic_tags
-                WHERE tag_id = ?
-            ''', (tag_id,))
-            total = self.cursor.fetchone()[0]
-            
+
             return {
                 'topics': topics,
                 'pagination': {
@@ -1578,8 +2609,8 @@ class ZSXQDatabase:
                 }
             }
         except Exception as e:
-            print(f"根据标签获取话题失败: {e}")
-            return {'topics': [], 'pagination': {'page': page, 'per_page': per_page, 'total': 0, 'pages': 0}}
+            print(f"搜索话题失败: {e}")
+            return empty
 
     def close(self):
         """关闭数据库连接"""
@@ -1,18 +1,55 @@
 import sqlite3
 from typing import Dict, List, Any, Optional
 
+from cursor_pagination import encode_cursor, decode_cursor
+from db_storage_profile import connect_database
+from schema_migrations import run_migrations
+
 
 class ZSXQFileDatabase:
     """知识星球文件列表数据库管理工具 - 完全匹配API响应结构"""
+
+    # 二级索引: (索引名, 表名, 列定义)
+    INDEXES = [
+        ('idx_files_status_create_time', 'files', 'download_status, create_time'),
+        ('idx_files_create_time', 'files', 'create_time'),
+        ('idx_topics_group_create_time', 'topics', 'group_id, create_time'),
+        ('idx_file_topic_relations_file_id', 'file_topic_relations', 'file_id'),
+        ('idx_file_topic_relations_topic_id', 'file_topic_relations', 'topic_id'),
+        ('idx_talks_topic_id', 'talks', 'topic_id'),
+        ('idx_images_topic_id', 'images', 'topic_id'),
+        ('idx_topic_files_topic_id', 'topic_files', 'topic_id'),
+        ('idx_topic_files_file_id', 'topic_files', 'file_id'),
+        ('idx_latest_likes_topic_id', 'latest_likes', 'topic_id'),
+        ('idx_comments_topic_id', 'comments', 'topic_id'),
+        ('idx_like_emojis_topic_id', 'like_emojis', 'topic_id'),
+        ('idx_user_liked_emojis_topic_id', 'user_liked_emojis', 'topic_id'),
+        ('idx_topic_columns_topic_id', 'topic_columns', 'topic_id'),
+        ('idx_solutions_topic_id', 'solutions', 'topic_id'),
+        ('idx_solution_files_solution_id', 'solution_files', 'solution_id'),
+    ]
     
-    def __init__(self, db_path: str = "zsxq_files_complete.db"):
+    def __init__(self, db_path: str = "zsxq_files_complete.db", storage_profile: Optional[str] = None):
         """初始化数据库连接"""
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn = connect_database(db_path, storage_profile)
         self.cursor = self.conn.cursor()
         self.create_tables()
     
     def create_tables(self):
+        """创建或升级数据表结构（按 user_version 执行尚未应用的迁移）"""
+        run_migrations(self.conn, self._schema_migrations(), f" ({self.db_path})")
+
+    def _schema_migrations(self) -> List[tuple]:
+        """结构迁移列表，只能在末尾追加新版本"""
+        return [
+            (1, '创建基础表结构', self._create_base_tables),
+            (2, '补充文件下载状态列', self._migrate_database),
+            (3, '创建二级索引', self._ensure_indexes),
+            (4, '文件状态计数', self._create_file_stats),
+        ]
+
+    def _create_base_tables(self):
         """创建所有必需的数据表 - 完全匹配API响应结构"""
         
         # 1. API响应记录表
@@ -45,9 +82,6 @@ class ZSXQFileDatabase:
         )
         ''')
 
-        # 执行数据库迁移
-        self._migrate_database()
-        
         # 3. 群组表 (topic.group对象)
         self.cursor.execute('''
         CREATE TABLE IF NOT EXISTS groups (
@@ -284,9 +318,6 @@ class ZSXQFileDatabase:
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
         ''')
-        
-        self.conn.commit()
-        print("✅ 完整数据库表结构创建成功")
     
     def insert_user(self, user_data: Dict[str, Any]) -> Optional[int]:
         """插入或更新用户信息"""
@@ -330,10 +361,18 @@ class ZSXQFileDatabase:
         if not file_data or not file_data.get('file_id'):
             return None
             
+        # 使用 UPSERT 更新元数据，保留已有的下载状态和本地路径
         self.cursor.execute('''
-        INSERT OR REPLACE INTO files 
+        INSERT INTO files
         (file_id, name, hash, size, duration, download_count, create_time)
         VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(file_id) DO UPDATE SET
+            name = excluded.name,
+            hash = excluded.hash,
+            size = excluded.size,
+            duration = excluded.duration,
+            download_count = excluded.download_count,
+            create_time = excluded.create_time
         ''', (
             file_data.get('file_id'),
             file_data.get('name', ''),
@@ -730,7 +769,119 @@ class ZSXQFileDatabase:
             except Exception as e:
                 print(f"❌ 迁移失败: {migration['table']}.{migration['column']} - {e}")
 
-        self.conn.commit()
+    def _ensure_indexes(self):
+        """创建二级索引（幂等，已有数据库首次打开时自动补建）"""
+        for index_name, table, columns in self.INDEXES:
+            self.cursor.execute(f'CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({columns})')
+
+    def _create_file_stats(self):
+        """创建文件状态计数表，由触发器在文件写入、删除和状态变化时维护"""
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS file_stats (
+            download_status TEXT PRIMARY KEY,
+            files_count INTEGER NOT NULL DEFAULT 0
+        )
+        ''')
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_files_stats_insert AFTER INSERT ON files
+        BEGIN
+            INSERT INTO file_stats (download_status, files_count)
+            VALUES (COALESCE(NEW.download_status, ''), 1)
+            ON CONFLICT(download_status) DO UPDATE SET files_count = files_count + 1;
+        END
+        ''')
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_files_stats_delete AFTER DELETE ON files
+        BEGIN
+            UPDATE file_stats SET files_count = files_count - 1
+            WHERE download_status = COALESCE(OLD.download_status, '');
+        END
+        ''')
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_files_stats_update AFTER UPDATE OF download_status ON files
+        WHEN NEW.download_status IS NOT OLD.download_status
+        BEGIN
+            UPDATE file_stats SET files_count = files_count - 1
+            WHERE download_status = COALESCE(OLD.download_status, '');
+            INSERT INTO file_stats (download_status, files_count)
+            VALUES (COALESCE(NEW.download_status, ''), 1)
+            ON CONFLICT(download_status) DO UPDATE SET files_count = files_count + 1;
+        END
+        ''')
+
+        # 已有数据库按现有文件回填
+        self.cursor.execute('DELETE FROM file_stats')
+        self.cursor.execute('''
+        INSERT INTO file_stats (download_status, files_count)
+        SELECT COALESCE(download_status, ''), COUNT(*) FROM files GROUP BY COALESCE(download_status, '')
+        ''')
+
+    def get_file_count(self, status: Optional[str] = None) -> int:
+        """获取文件数（读取触发器维护的计数，status 为空时返回全部文件数）"""
+        if status:
+            self.cursor.execute('SELECT files_count FROM file_stats WHERE download_status = ?', (status,))
+            row = self.cursor.fetchone()
+            return row[0] if row else 0
+        self.cursor.execute('SELECT COALESCE(SUM(files_count), 0) FROM file_stats')
+        return self.cursor.fetchone()[0]
+
+    def list_files(self, status: Optional[str] = None, page: int = 1, per_page: int = 20,
+                   cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        按 (create_time, file_id) 倒序分页查询文件列表
+
+        传入游标时使用键集分页，未传游标时按页码定位；游标格式错误时抛出 ValueError
+        """
+        conditions = []
+        params: List[Any] = []
+        if status:
+            conditions.append('download_status = ?')
+            params.append(status)
+
+        offset = 0
+        if cursor:
+            key = decode_cursor(cursor)
+            conditions.append('(create_time, file_id) < (?, ?)')
+            params.extend([key['t'], key['id']])
+        else:
+            offset = (max(page, 1) - 1) * per_page
+        where_clause = ('WHERE ' + ' AND '.join(conditions)) if conditions else ''
+
+        # 多取一行用于判断是否还有下一页
+        self.cursor.execute(f'''
+        SELECT file_id, name, size, download_count, create_time, download_status
+        FROM files
+        {where_clause}
+        ORDER BY create_time DESC, file_id DESC
+        LIMIT ? OFFSET ?
+        ''', params + [per_page + 1, offset])
+        rows = self.cursor.fetchall()
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        next_cursor = encode_cursor({'t': rows[-1][4], 'id': rows[-1][0]}) if has_more else None
+
+        total = self.get_file_count(status)
+        return {
+            'files': [
+                {
+                    'file_id': row[0],
+                    'name': row[1],
+                    'size': row[2],
+                    'download_count': row[3],
+                    'create_time': row[4],
+                    'download_status': row[5]
+                }
+                for row in rows
+            ],
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': total,
+                'pages': (total + per_page - 1) // per_page,
+                'has_more': has_more,
+                'next_cursor': next_cursor
+            }
+        }
 
     def close(self):
         """关闭数据库连接"""
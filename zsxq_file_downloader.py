@@ -17,6 +17,9 @@ from typing import Dict, Optional, Any
 import requests
 
 from zsxq_file_database import ZSXQFileDatabase
+from rate_controller import get_rate_controller, classify_response, OUTCOME_ERROR, OUTCOME_TIMEOUT
+from response_archive import archive_response, close_response_archive
+from blob_store import get_blob_store
 
 
 class ZSXQFileDownloader:
@@ -26,7 +29,7 @@ class ZSXQFileDownloader:
                  download_interval: float = 1.0, long_sleep_interval: float = 60.0,
                  files_per_batch: int = 10, download_interval_min: float = None,
                  download_interval_max: float = None, long_sleep_interval_min: float = None,
-                 long_sleep_interval_max: float = None):
+                 long_sleep_interval_max: float = None, concurrency: int = 1):
         """
         初始化文件下载器
 
@@ -42,6 +45,7 @@ class ZSXQFileDownloader:
             download_interval_max: 随机下载间隔最大值（秒）
             long_sleep_interval_min: 随机长休眠间隔最小值（秒）
             long_sleep_interval_max: 随机长休眠间隔最大值（秒）
+            concurrency: 并发下载数，大于1时获取下载链接仍按账号限速，CDN传输并发进行且不再插入下载间隔
         """
         self.cookie = self.clean_cookie(cookie)
         self.group_id = group_id
@@ -51,6 +55,7 @@ class ZSXQFileDownloader:
         self.long_sleep_interval = long_sleep_interval
         self.files_per_batch = files_per_batch
         self.current_batch_count = 0  # 当前批次已下载文件数
+        self.concurrency = max(1, concurrency)
 
         # 随机间隔范围参数（如果提供了范围参数，则使用随机间隔）
         self.use_random_interval = download_interval_min is not None
@@ -91,6 +96,7 @@ class ZSXQFileDownloader:
         self.log_callback = None
         self.stop_check_func = None
         self.stop_flag = False  # 本地停止标志
+        self.progress_callback = None  # 并发下载时以汇总进度字典调用
 
         # 反检测设置
         self.min_delay = 2.0  # 最小延迟（秒）
@@ -101,10 +107,14 @@ class ZSXQFileDownloader:
         self.request_count = 0
         self.download_count = 0
         self.debug_mode = False
+        self.dedupe_stats = {'deduplicated': 0, 'bytes_saved': 0}  # 从共享存储链接、未经网络传输的文件
 
         # 创建session
         self.session = requests.Session()
 
+        # API请求速率与话题采集器共用（按账号）
+        self.rate_controller = get_rate_controller(self.cookie)
+
         # 确保下载目录存在
         os.makedirs(self.download_dir, exist_ok=True)
         self.log(f"📁 下载目录: {os.path.abspath(self.download_dir)}")
@@ -272,11 +282,21 @@ class ZSXQFileDownloader:
         return headers
     
     def smart_delay(self):
-        """智能延迟"""
-        delay = random.uniform(self.min_delay, self.max_delay)
-        if self.debug_mode:
-            print(f"   ⏱️ 延迟 {delay:.1f}秒")
+        """智能延迟：由账号共用的自适应速率控制器决定请求间隔"""
+        delay = self.rate_controller.reserve()
+        if delay >= 60:
+            self.log(f"🛌 请求频率受限，暂停 {delay:.1f}秒 ({delay/60:.1f}分钟)")
+        elif self.debug_mode:
+            print(f"   ⏱️ 延迟 {delay:.1f}秒 [当前间隔 {self.rate_controller.interval:.2f}秒]")
         time.sleep(delay)
+
+    def _record_response(self, response, data: Optional[Dict[str, Any]] = None):
+        """向速率控制器报告API请求结果"""
+        self.rate_controller.record(classify_response(response.status_code, data))
+
+    def _record_exception(self, error: Exception):
+        self.rate_controller.record(
+            OUTCOME_TIMEOUT if isinstance(error, requests.exceptions.Timeout) else OUTCOME_ERROR)
     
     def download_delay(self):
         """下载间隔延迟"""
@@ -367,12 +387,14 @@ class ZSXQFileDownloader:
                 if response.status_code == 200:
                     try:
                         data = response.json()
+                        self._record_response(response, data)
                         
                         # 只在第一次尝试或最后一次失败时显示完整响应
                         if attempt == 0 or attempt == max_retries - 1 or data.get('succeeded'):
                             print(f"   📋 响应内容: {json.dumps(data, ensure_ascii=False, indent=2)}")
                         
                         if data.get('succeeded'):
+                            archive_response(self.group_id, 'files', params, data)
                             files = data.get('resp_data', {}).get('files', [])
                             next_index = data.get('resp_data', {}).get('index')
                             if attempt > 0:
@@ -395,6 +417,7 @@ class ZSXQFileDownloader:
                                 return None
                                 
                     except json.JSONDecodeError as e:
+                        self._record_response(response)
                         print(f"   ❌ JSON解析失败: {e}")
                         print(f"   📄 原始响应: {response.text[:500]}...")
                         if attempt < max_retries - 1:
@@ -402,18 +425,21 @@ class ZSXQFileDownloader:
                             continue
                         
                 elif response.status_code in [429, 500, 502, 503, 504]:  # 频率限制或服务器错误
+                    self._record_response(response)
                     print(f"   ❌ HTTP错误: {response.status_code}")
                     print(f"   📄 响应内容: {response.text[:200]}...")
                     if attempt < max_retries - 1:
                         print(f"   🔄 服务器错误，准备重试...")
                         continue
                 else:
+                    self._record_response(response)
                     print(f"   ❌ HTTP错误: {response.status_code}")
                     print(f"   📄 响应内容: {response.text[:200]}...")
                     print(f"   🚫 非可重试HTTP错误，停止重试")
                     return None
                     
             except Exception as e:
+                self._record_exception(e)
                 print(f"   ❌ 请求异常: {e}")
                 if attempt < max_retries - 1:
                     print(f"   🔄 请求异常，准备重试...")
@@ -458,6 +484,7 @@ class ZSXQFileDownloader:
                 if response.status_code == 200:
                     try:
                         data = response.json()
+                        self._record_response(response, data)
                         
                         # 只在第一次尝试或最后一次失败时显示完整响应
                         if attempt == 0 or attempt == max_retries - 1 or data.get('succeeded'):
@@ -495,6 +522,7 @@ class ZSXQFileDownloader:
                                 return None
                                 
                     except json.JSONDecodeError as e:
+                        self._record_response(response)
                         print(f"   ❌ JSON解析失败: {e}")
                         print(f"   📄 原始响应: {response.text[:500]}...")
                         if attempt < max_retries - 1:
@@ -502,18 +530,21 @@ class ZSXQFileDownloader:
                             continue
                         
                 elif response.status_code in [429, 500, 502, 503, 504]:  # 频率限制或服务器错误
+                    self._record_response(response)
                     print(f"   ❌ HTTP错误: {response.status_code}")
                     print(f"   📄 响应内容: {response.text[:200]}...")
                     if attempt < max_retries - 1:
                         print(f"   🔄 服务器错误，准备重试...")
                         continue
                 else:
+                    self._record_response(response)
                     print(f"   ❌ HTTP错误: {response.status_code}")
                     print(f"   📄 响应内容: {response.text[:200]}...")
                     print(f"   🚫 非可重试HTTP错误，停止重试")
                     return None
                     
             except Exception as e:
+                self._record_exception(e)
                 print(f"   ❌ 请求异常: {e}")
                 if attempt < max_retries - 1:
                     print(f"   🔄 请求异常，准备重试...")
@@ -524,11 +555,40 @@ class ZSXQFileDownloader:
     
     def download_file(self, file_info: Dict[str, Any]) -> bool:
         """下载单个文件"""
+        job = self._prepare_download(file_info)
+        if not job or job == "skipped":
+            return job
+
+        # 只有在需要下载时才获取下载链接
+        download_url = self.get_download_url(job['file_id'])
+        if not download_url:
+            self.log(f"   ❌ 无法获取下载链接")
+            return False
+
+        if not self._transfer_file(job, download_url, self.session):
+            return False
+
+        self._finish_download(job)
+
+        # 下载间隔控制
+        self._apply_download_intervals()
+
+        return True
+
+    def _prepare_download(self, file_info: Dict[str, Any]):
+        """
+        下载前检查
+
+        Returns:
+            需要下载时返回下载任务字典；本地已有同大小文件时返回 "skipped"；
+            已下载过或任务被停止时返回 False
+        """
         file_data = file_info.get('file', {})
         file_id = file_data.get('id')
         file_name = file_data.get('name', 'Unknown')
         file_size = file_data.get('size', 0)
         download_count = file_data.get('download_count', 0)
+        file_hash = file_data.get('hash')
 
         create_time_is_now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         create_time = file_data.get('create_time', 0)
@@ -536,7 +596,7 @@ class ZSXQFileDownloader:
             ts_create_time = datetime.datetime.strptime(create_time, "%Y-%m-%dT%H:%M:%S.%f%z").timestamp()
         else:
             create_time = create_time_is_now
-            ts_create_time = datatime.datetime.strptime(create_time_is_now, "%Y-%m-%d %H:%M:%S").timestamp()
+            ts_create_time = datetime.datetime.strptime(create_time_is_now, "%Y-%m-%d %H:%M:%S").timestamp()
 
         
         self.log(f"📥 准备下载文件:")
@@ -572,22 +632,120 @@ class ZSXQFileDownloader:
             existing_size = os.path.getsize(file_path)
             if existing_size == file_size:
                 self.log(f"   ✅ 文件已存在且大小匹配，跳过下载")
+                self._ingest_blob(file_hash, file_size, file_path)
                 self._update_download_time_in_db(file_id)
                 return "skipped"  # 返回特殊值表示跳过
             else:
                 self.log(f"   ⚠️ 文件已存在但大小不匹配，重新下载")
 
-        
-        # 只有在需要下载时才获取下载链接
-        download_url = self.get_download_url(file_id)
-        if not download_url:
-            self.log(f"   ❌ 无法获取下载链接")
-            return False
+        # 共享存储中已有相同内容（其他话题或群组下载过）时直接链接，不获取下载链接
+        blob_store = get_blob_store()
+        if blob_store and file_hash:
+            try:
+                method = blob_store.link_view(file_hash, file_size, file_path)
+            except OSError as e:
+                self.log(f"   ⚠️ 从共享存储链接失败，正常下载: {e}")
+                method = None
+            if method:
+                os.utime(file_path, (ts_create_time, ts_create_time))
+                self.log(f"   ♻️ 共享存储中已有相同文件，{method} 到下载目录，跳过下载")
+                self._update_download_time_in_db(file_id)
+                self.dedupe_stats['deduplicated'] += 1
+                self.dedupe_stats['bytes_saved'] += file_size or 0
+                return "skipped"
+
+        return {
+            'file_id': file_id,
+            'file_name': file_name,
+            'file_size': file_size,
+            'hash': file_hash,
+            'safe_filename': safe_filename,
+            'file_path': file_path,
+            'create_time': create_time,
+            'ts_create_time': ts_create_time,
+        }
+
+    PART_SUFFIX = '.part'
+    JOURNAL_SUFFIX = '.part.json'
+
+    def _read_transfer_journal(self, part_path: str) -> Optional[Dict[str, Any]]:
+        """读取未完成下载的记录（偏移量与 ETag/Last-Modified），不存在或损坏时返回 None"""
+        try:
+            with open(part_path[:-len(self.PART_SUFFIX)] + self.JOURNAL_SUFFIX, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_transfer_journal(self, part_path: str, journal: Dict[str, Any]):
+        """先写临时文件再替换，进程中断时不会留下半截记录"""
+        journal_path = part_path[:-len(self.PART_SUFFIX)] + self.JOURNAL_SUFFIX
+        journal['updated_at'] = datetime.datetime.now().isoformat(timespec='seconds')
+        with open(journal_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(journal, f, ensure_ascii=False)
+        os.replace(journal_path + '.tmp', journal_path)
+
+    def _checkpoint_partial(self, f, part_path: str, journal: Dict[str, Any], offset: int):
+        """把已写入的内容刷到磁盘后再记录偏移量，续传时只信任记录过的部分"""
+        f.flush()
+        os.fsync(f.fileno())
+        journal['offset'] = offset
+        self._write_transfer_journal(part_path, journal)
+
+    def _discard_partial(self, part_path: str):
+        """删除 .part 文件及其记录"""
+        for path in (part_path, part_path[:-len(self.PART_SUFFIX)] + self.JOURNAL_SUFFIX):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _transfer_file(self, job: Dict[str, Any], download_url: str, session: requests.Session,
+                       on_bytes=None) -> bool:
+        """
+        从签名链接下载文件内容（不访问数据库，可在工作线程中执行）
+
+        内容先写入 {文件名}.part，{文件名}.part.json 记录文件ID、已落盘的字节数和服务器返回的 ETag/Last-Modified。
+        再次下载同一文件时用 Range 从记录的位置续传（带 If-Range，文件在服务器端变化时重新下载）；
+        服务器不支持续传时从头下载。大小校验通过后才重命名为最终文件名，
+        中断、停止或网络异常时保留 .part 以便下次续传。
+
+        Args:
+            job: _prepare_download 返回的下载任务，从响应头获取到真实文件名时会更新其中的路径
+            download_url: 下载链接
+            session: 使用的 requests.Session
+            on_bytes: 每写入一块数据时以字节数调用，用于汇总进度
+        """
+        file_id = job['file_id']
+        file_name = job['file_name']
+        file_size = job['file_size']
+        safe_filename = job['safe_filename']
+        file_path = job['file_path']
+        part_path = file_path + self.PART_SUFFIX
+
+        # 检查能否续传：.part 必须属于同一个文件，且未超过预期大小
+        journal = self._read_transfer_journal(part_path) if os.path.exists(part_path) else None
+        offset = 0
+        if journal and journal.get('file_id') == file_id and journal.get('size') == file_size \
+                and journal.get('accept_ranges'):
+            offset = min(int(journal.get('offset', 0)), os.path.getsize(part_path))
+            if file_size > 0 and offset > file_size:
+                offset = 0
+        if offset == 0 and os.path.exists(part_path):
+            self._discard_partial(part_path)
+            journal = None
+
+        headers = {}
+        if offset > 0:
+            # 丢弃记录之后写入的部分（可能未落盘）
+            os.truncate(part_path, offset)
+            headers['Range'] = f"bytes={offset}-"
+            validator = journal.get('etag') or journal.get('last_modified')
+            if validator:
+                headers['If-Range'] = validator
+            self.log(f"   ⏯️ 发现未完成的下载，从 {offset:,}/{file_size:,} bytes 处续传")
 
         try:
             # 下载文件
-            self.log(f"   🚀 开始下载...")
-            response = self.session.get(download_url, timeout=300, stream=True)
+            self.log(f"   🚀 开始下载: {file_name}")
+            response = session.get(download_url, timeout=300, stream=True, headers=headers)
 
             # 如果文件名是默认的，尝试从响应头获取真实文件名
             if file_name.startswith('file_') and 'content-disposition' in response.headers:
@@ -604,66 +762,114 @@ class ZSXQFileDownloader:
                             if not safe_filename:
                                 safe_filename = f"file_{file_id}"
                             file_path = os.path.join(self.download_dir, safe_filename)
+                            job.update(file_name=file_name, safe_filename=safe_filename, file_path=file_path)
                             self.log(f"   📝 从响应头获取到真实文件名: {file_name}")
-            
-            if response.status_code == 200:
-                total_size = int(response.headers.get('content-length', 0))
-                downloaded_size = 0
-                
-                with open(file_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                            downloaded_size += len(chunk)
-                            
-                            # 显示进度（每10MB显示一次）
-                            if downloaded_size % (10 * 1024 * 1024) == 0 or downloaded_size == total_size:
-                                if total_size > 0:
-                                    progress = (downloaded_size / total_size) * 100
-                                    self.log(f"   📊 进度: {progress:.1f}% ({downloaded_size:,}/{total_size:,} bytes)")
-
-                            # 检查是否需要停止
-                            if self.check_stop():
-                                self.log("🛑 下载过程中被停止")
-                                return False
-
-                            if downloaded_size % (10 * 1024 * 1024) != 0 and downloaded_size != total_size:
-                                if total_size == 0:
-                                    self.log(f"   📊 已下载: {downloaded_size:,} bytes")
-                
-                # 验证文件大小
-                final_size = os.path.getsize(file_path)
-                if file_size > 0 and final_size != file_size:
-                    self.log(f"   ⚠️ 文件大小不匹配: 预期{file_size:,}, 实际{final_size:,}")
 
-                # 修改下载文件的创建时间
-                os.utime(file_path, (ts_create_time, ts_create_time))
-                self.log(f"   ✅ 修改文件创建时间: {create_time}")
+            if response.status_code == 416 and offset > 0 and offset == file_size:
+                # .part 已完整写入（上次在重命名前中断），直接校验
+                self.log(f"   ✅ 未完成的下载已写满，直接校验")
+            elif response.status_code == 206 and offset > 0 \
+                    and response.headers.get('content-range', '').startswith(f"bytes {offset}-"):
+                self.log(f"   ⏯️ 服务器支持续传，跳过已下载的 {offset:,} bytes")
+            elif response.status_code == 200:
+                if offset > 0:
+                    self.log(f"   ⚠️ 服务器未按 Range 续传（不支持或文件已变化），从头下载")
+                offset = 0
+            else:
+                self.log(f"   ❌ 下载失败: HTTP {response.status_code}")
+                if offset > 0 and response.status_code in (206, 416):
+                    self._discard_partial(part_path)
+                return False
 
-                # 更新数据库中的下载时间
-                self._update_download_time_in_db(file_id)
+            total_size = offset
+            if response.status_code != 416:
+                journal = {
+                    'file_id': file_id,
+                    'size': file_size,
+                    'etag': response.headers.get('etag'),
+                    'last_modified': response.headers.get('last-modified'),
+                    'accept_ranges': response.status_code == 206
+                                     or response.headers.get('accept-ranges', '').lower() == 'bytes',
+                    'offset': offset,
+                }
+                self._write_transfer_journal(part_path, journal)
 
-                self.log(f"   ✅ 下载完成: {safe_filename}")
-                self.log(f"   💾 保存路径: {file_path}")
+                total_size = offset + int(response.headers.get('content-length', 0))
+                downloaded_size = offset
+                next_report = downloaded_size + 10 * 1024 * 1024
 
-                self.download_count += 1
-                self.current_batch_count += 1
+                with open(part_path, 'ab' if offset > 0 else 'wb') as f:
+                    try:
+                        for chunk in response.iter_content(chunk_size=8192):
+                            if chunk:
+                                f.write(chunk)
+                                downloaded_size += len(chunk)
+                                if on_bytes:
+                                    on_bytes(len(chunk))
+
+                                # 显示进度并记录续传位置（每10MB一次）
+                                if downloaded_size >= next_report or downloaded_size == total_size:
+                                    next_report = downloaded_size + 10 * 1024 * 1024
+                                    self._checkpoint_partial(f, part_path, journal, downloaded_size)
+                                    if total_size > offset:
+                                        progress = (downloaded_size / total_size) * 100
+                                        self.log(f"   📊 进度: {progress:.1f}% ({downloaded_size:,}/{total_size:,} bytes) {safe_filename}")
+                                    else:
+                                        self.log(f"   📊 已下载: {downloaded_size:,} bytes")
+
+                                # 检查是否需要停止
+                                if self.check_stop():
+                                    self.log(f"🛑 下载过程中被停止，已保留 {downloaded_size:,} bytes 供下次续传")
+                                    return False
+                    finally:
+                        self._checkpoint_partial(f, part_path, journal, downloaded_size)
+
+            # 验证文件大小（列表中没有大小时以响应长度为准）：不足时保留 .part 续传，超出说明内容不对，丢弃
+            final_size = os.path.getsize(part_path)
+            expected_size = file_size if file_size > 0 else total_size
+            if expected_size > 0 and final_size != expected_size:
+                self.log(f"   ⚠️ 文件大小不匹配: 预期{expected_size:,}, 实际{final_size:,}")
+                if final_size > expected_size:
+                    self._discard_partial(part_path)
+                    self.log(f"   🗑️ 删除不完整文件")
+                return False
 
-                # 下载间隔控制
-                self._apply_download_intervals()
+            # 校验通过后原子替换为最终文件
+            os.replace(part_path, file_path)
+            self._discard_partial(part_path)
 
-                return True
-            else:
-                self.log(f"   ❌ 下载失败: HTTP {response.status_code}")
-                return False
+            # 修改下载文件的创建时间
+            os.utime(file_path, (job['ts_create_time'], job['ts_create_time']))
+            self.log(f"   ✅ 修改文件创建时间: {job['create_time']}")
+            self._ingest_blob(job.get('hash'), file_size, file_path)
+            return True
 
         except Exception as e:
             self.log(f"   ❌ 下载异常: {e}")
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                self.log(f"   🗑️ 删除不完整文件")
+            if os.path.exists(part_path):
+                self.log(f"   💾 已保留 {os.path.getsize(part_path):,} bytes 供下次续传")
             return False
 
+    def _ingest_blob(self, file_hash: Optional[str], file_size: int, file_path: str):
+        """共享存储开启时把下载好的文件加入存储，失败不影响下载结果"""
+        blob_store = get_blob_store()
+        if not blob_store or not file_hash:
+            return
+        try:
+            blob_store.ingest(file_hash, file_size, file_path)
+        except OSError as e:
+            self.log(f"   ⚠️ 加入共享存储失败: {e}")
+
+    def _finish_download(self, job: Dict[str, Any]):
+        """下载完成后更新数据库中的下载时间和计数（在持有数据库连接的线程中调用）"""
+        self._update_download_time_in_db(job['file_id'])
+
+        self.log(f"   ✅ 下载完成: {job['safe_filename']}")
+        self.log(f"   💾 保存路径: {job['file_path']}")
+
+        self.download_count += 1
+        self.current_batch_count += 1
+
     def _apply_download_intervals(self):
         """应用下载间隔控制"""
         import time
@@ -692,6 +898,12 @@ class ZSXQFileDownloader:
             self.log("🛑 任务被停止")
             return {'total_files': 0, 'downloaded': 0, 'skipped': 0, 'failed': 0}
 
+        if self.concurrency > 1:
+            from download_pool import DownloadPool
+            stats = DownloadPool(self, self.concurrency).run(self._iter_listed_files(start_index), limit=max_files)
+            self._report_download_stats("批量下载完成", stats)
+            return stats
+
         stats = {'total_files': 0, 'downloaded': 0, 'skipped': 0, 'failed': 0}
         current_index = start_index
         downloaded_in_batch = 0
@@ -766,13 +978,46 @@ class ZSXQFileDownloader:
             else:
                 break
 
-        self.log(f"🎉 批量下载完成:")
+        self._report_download_stats("批量下载完成", stats)
+        return stats
+
+    def _iter_listed_files(self, start_index: Optional[str] = None):
+        """边翻页获取文件列表边逐个产出文件信息（供并发下载使用）"""
+        current_index = start_index
+        while not self.check_stop():
+            data = self.fetch_file_list(count=20, index=current_index)
+            if not data:
+                self.log("❌ 获取文件列表失败")
+                return
+
+            files = data.get('resp_data', {}).get('files', [])
+            next_index = data.get('resp_data', {}).get('index')
+            if not files:
+                self.log("📭 没有更多文件")
+                return
+
+            self.log(f"📋 当前批次: {len(files)} 个文件")
+            yield from files
+
+            if not next_index:
+                return
+            current_index = next_index
+            self.log(f"📄 准备获取下一页: {next_index}")
+            time.sleep(2)  # 页面间短暂延迟
+
+    def _report_download_stats(self, title: str, stats: Dict[str, int]):
+        """输出下载统计；共享存储开启时在统计中加入去重的文件数和节省的流量"""
+        if get_blob_store():
+            stats.update(self.dedupe_stats)
+        self.log(f"🎉 {title}:")
         self.log(f"   📊 总文件数: {stats['total_files']}")
         self.log(f"   ✅ 下载成功: {stats['downloaded']}")
         self.log(f"   ⚠️ 跳过: {stats['skipped']}")
         self.log(f"   ❌ 失败: {stats['failed']}")
-        
-        return stats
+        if 'bytes_downloaded' in stats:
+            self.log(f"   💾 下载量: {stats['bytes_downloaded']/1024/1024:.1f}MB")
+        if 'bytes_saved' in stats:
+            self.log(f"   ♻️ 共享存储去重: {stats['deduplicated']} 个文件，节省 {stats['bytes_saved']/1024/1024:.1f}MB")
     
     def show_file_list(self, count: int = 20, index: Optional[str] = None) -> Optional[str]:
         """显示文件列表"""
@@ -1093,14 +1338,14 @@ class ZSXQFileDownloader:
         # 从完整数据库获取文件列表
         if max_files:
             self.file_db.cursor.execute('''
-                SELECT file_id, name, size, download_count, create_time 
+                SELECT file_id, name, size, download_count, create_time, hash 
                 FROM files 
                 ORDER BY download_count DESC, size ASC 
                 LIMIT ?
             ''', (max_files,))
         else:
             self.file_db.cursor.execute('''
-                SELECT file_id, name, size, download_count, create_time 
+                SELECT file_id, name, size, download_count, create_time, hash 
                 FROM files 
                 ORDER BY download_count DESC, size ASC
             ''')
@@ -1113,9 +1358,21 @@ class ZSXQFileDownloader:
 
         self.log(f"📋 找到 {len(files_to_download)} 个待下载文件")
 
+        if self.concurrency > 1:
+            from download_pool import DownloadPool
+            file_infos = ({'file': {'id': file_id, 'name': file_name, 'size': file_size,
+                                    'download_count': download_count, 'create_time': create_time,
+                                    'hash': file_hash}}
+                          for file_id, file_name, file_size, download_count, create_time, file_hash
+                          in files_to_download)
+            stats = DownloadPool(self, self.concurrency).run(file_infos, total_files=len(files_to_download))
+            stats['total_files'] = len(files_to_download)
+            self._report_download_stats("数据库下载完成", stats)
+            return stats
+
         stats = {'total_files': len(files_to_download), 'downloaded': 0, 'skipped': 0, 'failed': 0}
 
-        for i, (file_id, file_name, file_size, download_count, create_time) in enumerate(files_to_download, 1):
+        for i, (file_id, file_name, file_size, download_count, create_time, file_hash) in enumerate(files_to_download, 1):
             # 检查是否需要停止
             if self.check_stop():
                 self.log("🛑 下载任务被停止")
@@ -1132,7 +1389,8 @@ class ZSXQFileDownloader:
                         'name': file_name,
                         'size': file_size,
                         'download_count': download_count,
-                        'create_time': create_time # 传入创建时间用来作为下载文件的创建时间
+                        'create_time': create_time, # 传入创建时间用来作为下载文件的创建时间
+                        'hash': file_hash  # 共享存储按hash去重
                     }
                 }
                 
@@ -1163,12 +1421,7 @@ class ZSXQFileDownloader:
                 stats['failed'] += 1
                 continue
 
-        self.log(f"🎉 数据库下载完成:")
-        self.log(f"   📊 总文件数: {stats['total_files']}")
-        self.log(f"   ✅ 下载成功: {stats['downloaded']}")
-        self.log(f"   ⚠️ 跳过: {stats['skipped']}")
-        self.log(f"   ❌ 失败: {stats['failed']}")
-        
+        self._report_download_stats("数据库下载完成", stats)
         return stats
     
     def show_database_stats(self):
@@ -1274,6 +1527,7 @@ class ZSXQFileDownloader:
     
     def close(self):
         """关闭资源"""
+        close_response_archive(self.group_id)
         if hasattr(self, 'file_db') and self.file_db:
             self.file_db.close()
             print("🔒 文件数据库连接已关闭") 
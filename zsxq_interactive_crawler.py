@@ -12,6 +12,13 @@ from typing import Dict, Any, Optional, List
 from zsxq_database import ZSXQDatabase
 from zsxq_file_downloader import ZSXQFileDownloader
 from db_path_manager import get_db_path_manager
+from crawl_pipeline import CrawlPipeline
+from crawl_checkpoint import CrawlCheckpoint
+from response_archive import archive_response, close_response_archive
+from crawl_coverage import CrawlCoverage, BEIJING_TZ, format_api_time, parse_api_time, shift_api_time, to_ms
+from rate_controller import (
+    get_rate_controller, classify_response, OUTCOME_ERROR, OUTCOME_TIMEOUT
+)
 import os
 try:
     import tomllib
@@ -68,6 +75,10 @@ class ZSXQInteractiveCrawler:
         self.custom_long_delay_max = None
         self.custom_pages_per_batch = None
 
+        # 自适应请求速率（同一账号的话题、评论和文件请求共用），关闭后使用固定随机间隔和按页数长休眠
+        self.rate_controller = get_rate_controller(self.cookie)
+        self.adaptive_rate = True
+
         self.log(f"🚀 知识星球交互式采集器初始化完成")
         self.log(f"📊 目标群组: {group_id}")
         self.log(f"💾 数据库: {db_path}")
@@ -77,8 +88,17 @@ class ZSXQInteractiveCrawler:
 
     def set_custom_intervals(self, crawl_interval_min=None, crawl_interval_max=None,
                            long_sleep_interval_min=None, long_sleep_interval_max=None,
-                           pages_per_batch=None):
-        """设置自定义间隔参数"""
+                           pages_per_batch=None, adaptive=True):
+        """
+        设置自定义间隔参数
+
+        adaptive 为True（默认）时请求间隔由账号共用的速率控制器决定，页面间隔下限只作为本任务请求之间的最短间隔，
+        被限流后的暂停时长使用全局设置，不再按 pages_per_batch 定期长休眠；
+        为False时使用固定随机间隔和按页数的长休眠。
+        这里的设置只作用于本任务，不修改共用的速率控制器（其范围只由全局爬虫设置调整）
+        """
+        self.adaptive_rate = adaptive
+
         if any([crawl_interval_min, crawl_interval_max, long_sleep_interval_min,
                 long_sleep_interval_max, pages_per_batch]):
             self.use_custom_intervals = True
@@ -93,8 +113,10 @@ class ZSXQInteractiveCrawler:
                 self.log(f"   页面间隔: {crawl_interval_min}-{crawl_interval_max}秒")
             if long_sleep_interval_min and long_sleep_interval_max:
                 self.log(f"   长休眠: {long_sleep_interval_min}-{long_sleep_interval_max}秒")
-            if pages_per_batch:
+            if pages_per_batch and not adaptive:
                 self.log(f"   批次大小: {pages_per_batch}页")
+            if adaptive:
+                self.log(f"   自适应速率: 当前间隔 {self.rate_controller.interval:.2f}秒，被限流时自动降速")
         else:
             self.use_custom_intervals = False
             self.log(f"🔧 使用默认间隔设置")
@@ -255,8 +277,19 @@ class ZSXQInteractiveCrawler:
     
     def smart_delay(self, is_historical: bool = False):
         """智能延迟机制 - 模拟人类行为（仅基础延迟）"""
+        delay = self._next_page_delay(is_historical)
+
+        # 可中断的延迟
+        self._interruptible_sleep(delay)
+        self.last_request_time = time.time()
+
+    def _next_page_delay(self, is_historical: bool = False) -> float:
+        """计算本次请求前的延迟时间（同步和异步采集器共用）"""
         self.request_count += 1
 
+        if self.adaptive_rate:
+            return self._next_rate_limited_delay(1.0 if is_historical else 0.0)  # 历史爬取稍长
+
         # 基础延迟时间
         if self.use_custom_intervals and self.custom_min_delay and self.custom_max_delay:
             # 使用自定义间隔
@@ -276,14 +309,59 @@ class ZSXQInteractiveCrawler:
             if self.debug_mode:
                 self.log(f"   ⏱️ 延迟: {delay:.2f}秒 (请求#{self.request_count})")
 
-        # 可中断的延迟
-        self._interruptible_sleep(delay)
-        self.last_request_time = time.time()
-    
+        # 固定间隔只决定节奏，请求数仍计入账号的每小时预算
+        return self._next_budget_delay(delay)
+
+    def _next_budget_delay(self, planned: float = 0.0) -> float:
+        """
+        不使用自适应速率时，向速率控制器登记一次将在 planned 秒后发出的请求，
+        返回实际需要等待的秒数（每小时预算用尽时会更长）
+        """
+        delay = self.rate_controller.reserve_budget(planned)
+        if delay - planned >= 60:
+            import datetime
+            resume_time = datetime.datetime.now() + datetime.timedelta(seconds=delay)
+            self.log(f"🛌 已用完每小时请求预算，暂停 {delay:.1f}秒 ({delay/60:.1f}分钟)，预计恢复: {resume_time.strftime('%H:%M:%S')}")
+        return delay
+
+    def _next_rate_limited_delay(self, extra: float = 0.0) -> float:
+        """从速率控制器预约一次请求，返回需要等待的秒数（处于限流长休眠时输出日志）"""
+        # 本任务设置的最短间隔只约束自己的请求，不影响同账号的其他任务
+        min_wait = self.custom_min_delay if self.use_custom_intervals and self.custom_min_delay else 0.0
+        delay = self.rate_controller.reserve(extra, min_wait)
+        if delay >= 60:
+            import datetime
+            resume_time = datetime.datetime.now() + datetime.timedelta(seconds=delay)
+            self.log(f"🛌 请求频率受限，暂停 {delay:.1f}秒 ({delay/60:.1f}分钟)，预计恢复: {resume_time.strftime('%H:%M:%S')}")
+        elif self.use_custom_intervals or self.debug_mode:
+            self.log(f"⏱️ 页面间隔: {delay:.2f}秒 [自适应: 当前间隔 {self.rate_controller.interval:.2f}秒]")
+        return delay
+
+    def _record_request(self, outcome: str):
+        """向速率控制器报告请求结果"""
+        self.rate_controller.record(outcome)
+
     def check_page_long_delay(self):
         """检查页面级长休眠：根据配置进行长休眠"""
+        long_delay = self._next_long_delay()
+        if long_delay is None:
+            return
+
+        import datetime
+        start_time = datetime.datetime.now()
+
+        # 可中断的长延迟
+        self._interruptible_sleep(long_delay)
+        self._log_long_delay_end(start_time, long_delay)
+
+    def _next_long_delay(self) -> Optional[float]:
+        """记录一个成功页面，到达批次间隔时返回长休眠时间（同步和异步采集器共用）"""
         self.page_count += 1
 
+        # 自适应速率下由速率控制器在被限流时暂停，不再定期长休眠
+        if self.adaptive_rate:
+            return None
+
         # 确定长休眠间隔
         if self.use_custom_intervals and self.custom_pages_per_batch:
             interval = self.custom_pages_per_batch
@@ -307,22 +385,32 @@ class ZSXQInteractiveCrawler:
             self.log(f"   已完成 {self.page_count} 个页面，进入长休眠模式...")
             self.log(f"   ⏰ 开始时间: {start_time.strftime('%H:%M:%S')}")
             self.log(f"   🕐 预计恢复: {end_time.strftime('%H:%M:%S')}")
+            return long_delay
+
+        return None
 
-            # 可中断的长延迟
-            self._interruptible_sleep(long_delay)
+    def _log_long_delay_end(self, start_time, long_delay: float):
+        """输出长休眠结束日志"""
+        import datetime
 
-            actual_end_time = datetime.datetime.now()
-            self.log(f"😴 长休眠结束，继续爬取...")
-            self.log(f"   🕐 实际结束: {actual_end_time.strftime('%H:%M:%S')}")
+        actual_end_time = datetime.datetime.now()
+        self.log(f"😴 长休眠结束，继续爬取...")
+        self.log(f"   🕐 实际结束: {actual_end_time.strftime('%H:%M:%S')}")
 
-            # 调试信息
-            if self.debug_mode:
-                actual_duration = (actual_end_time - start_time).total_seconds()
-                print(f"   💤 长休眠完成: 预计{long_delay:.1f}秒，实际{actual_duration:.1f}秒 (页面#{self.page_count})")
+        # 调试信息
+        if self.debug_mode:
+            actual_duration = (actual_end_time - start_time).total_seconds()
+            print(f"   💤 长休眠完成: 预计{long_delay:.1f}秒，实际{actual_duration:.1f}秒 (页面#{self.page_count})")
 
     def fetch_comments_safe(self, topic_id: int, begin_time: str = None, count: int = 30, max_retries: int = 10) -> Optional[Dict[str, Any]]:
         """安全获取话题评论，包含重试机制处理反爬"""
         for retry in range(max_retries):
+            if self.adaptive_rate:
+                self._interruptible_sleep(self._next_rate_limited_delay())
+            else:
+                self._interruptible_sleep(self._next_budget_delay())
+            if self.is_stopped():
+                return None
             try:
                 # 构建评论API URL
                 url = f"https://api.zsxq.com/v2/topics/{topic_id}/comments"
@@ -356,7 +444,9 @@ class ZSXQInteractiveCrawler:
 
                 if response.status_code == 200:
                     data = response.json()
+                    self._record_request(classify_response(200, data))
                     if data.get('succeeded'):
+                        archive_response(self.group_id, 'comments', dict(params, topic_id=topic_id), data)
                         if retry > 0:
                             self.log(f"✅ 评论API重试成功 (第{retry+1}次尝试)")
                         return data
@@ -367,6 +457,11 @@ class ZSXQInteractiveCrawler:
                         # 检查是否是反爬错误码1059
                         if error_code == 1059:
                             if retry < max_retries - 1:
+                                if self.adaptive_rate:
+                                    # 已报告给速率控制器，下一次预约会按降速后的间隔等待
+                                    self.log(f"⚠️ 遇到反爬机制 (错误码1059)，降速后重试 (第{retry+1}/{max_retries}次)")
+                                    continue
+
                                 # 智能等待时间策略：前几次短等待，后面逐渐增加
                                 if retry < 3:
                                     wait_time = 2  # 前3次等待2秒
@@ -376,7 +471,7 @@ class ZSXQInteractiveCrawler:
                                     wait_time = 10  # 第7-10次等待10秒
 
                                 self.log(f"⚠️ 遇到反爬机制 (错误码1059)，等待{wait_time}秒后重试 (第{retry+1}/{max_retries}次)")
-                                time.sleep(wait_time)
+                                self._interruptible_sleep(wait_time)
                                 continue
                             else:
                                 self.log(f"❌ 评论API重试{max_retries}次后仍失败: 错误码{error_code} - {error_msg}")
@@ -385,6 +480,7 @@ class ZSXQInteractiveCrawler:
                             self.log(f"❌ 评论API返回失败: 错误码{error_code} - {error_msg}")
                             return None
                 else:
+                    self._record_request(classify_response(response.status_code))
                     # 详细的错误日志
                     self.log(f"❌ 评论API请求失败: {response.status_code}")
                     self.log(f"🔗 请求URL: {response.url}")
@@ -392,7 +488,12 @@ class ZSXQInteractiveCrawler:
                     return None
 
             except Exception as e:
+                self._record_request(OUTCOME_TIMEOUT if isinstance(e, requests.exceptions.Timeout) else OUTCOME_ERROR)
                 if retry < max_retries - 1:
+                    if self.adaptive_rate:
+                        self.log(f"❌ 获取评论异常: {str(e)}，由速率控制器安排重试 (第{retry+1}/{max_retries}次)")
+                        continue
+
                     # 使用与1059错误相同的等待策略
                     if retry < 3:
                         wait_time = 2
@@ -402,7 +503,7 @@ class ZSXQInteractiveCrawler:
                         wait_time = 10
 
                     self.log(f"❌ 获取评论异常: {str(e)}，等待{wait_time}秒后重试 (第{retry+1}/{max_retries}次)")
-                    time.sleep(wait_time)
+                    self._interruptible_sleep(wait_time)
                     continue
                 else:
                     self.log(f"❌ 获取评论异常，重试{max_retries}次后仍失败: {str(e)}")
@@ -410,8 +511,8 @@ class ZSXQInteractiveCrawler:
 
         return None
 
-    def fetch_all_comments(self, topic_id: int, comments_count: int) -> List[Dict[str, Any]]:
-        """获取话题的所有评论（如果评论数量大于8）"""
+    def fetch_all_comments(self, topic_id: int, comments_count: int, page_delay: float = 1.0) -> List[Dict[str, Any]]:
+        """获取话题的所有评论（如果评论数量大于8），page_delay 为评论翻页间隔（秒）"""
         if comments_count <= 8:
             return []  # 不需要额外获取
 
@@ -469,7 +570,7 @@ class ZSXQInteractiveCrawler:
             page += 1
 
             # 添加延迟避免请求过快
-            time.sleep(1)
+            self._interruptible_sleep(page_delay)
 
         return all_comments
 
@@ -574,65 +675,80 @@ class ZSXQInteractiveCrawler:
             if self.is_stopped():
                 return None
 
-            if response.status_code == 200:
-                try:
-                    # 在处理响应前检查停止标志
-                    if self.is_stopped():
-                        self.log("🛑 响应处理前检测到停止信号")
-                        return None
+            data = self._parse_topics_response(response.status_code, response.content, dict(response.headers))
+            archive_response(self.group_id, 'topics', params, data)
+            return data
 
-                    data = response.json()
-                    if data.get('succeeded'):
-                        topics = data.get('resp_data', {}).get('topics', [])
-                        self.log(f"   ✅ 获取成功: {len(topics)}个话题")
-                        return data
-                    else:
-                        error_code = data.get('code')
-                        error_message = data.get('error', data.get('message', '未知错误'))
-
-                        # 检查是否是会员过期错误
-                        if error_code == 14210:
-                            print(f"   ❌ 会员已过期: {error_message}")
-                            print(f"   📋 完整响应: {json.dumps(data, ensure_ascii=False, indent=2)}")
-                            # 设置过期标志，让调用方知道这是过期错误
-                            return {"expired": True, "code": error_code, "message": error_message}
-                        else:
-                            print(f"   ❌ API失败: {error_message}")
-                            print(f"   📋 完整响应: {json.dumps(data, ensure_ascii=False, indent=2)}")
-                            return None
-                except json.JSONDecodeError as e:
-                    print(f"   ❌ JSON解析失败: {e}")
-                    print(f"   📄 响应内容: {response.text[:500]}...")
-                    print(f"   📋 响应头: {dict(response.headers)}")
-                    return None
-            else:
-                print(f"   ❌ HTTP错误: {response.status_code}")
-                print(f"   📄 响应内容: {response.text}")
-                print(f"   📋 响应头: {dict(response.headers)}")
-                if response.status_code == 429:
-                    print("   🚨 触发频率限制，建议增加延迟时间")
-                elif response.status_code == 403:
-                    print("   🚨 访问被拒绝，可能需要更新Cookie或反检测策略")
-                elif response.status_code == 401:
-                    print("   🚨 认证失败，请检查Cookie是否过期")
-                return None
-                
         except requests.exceptions.Timeout as e:
+            self._record_request(OUTCOME_TIMEOUT)
             print(f"   ❌ 请求超时: {e}")
             print(f"   🔧 建议: 增加超时时间或检查网络连接")
             return None
         except requests.exceptions.ConnectionError as e:
+            self._record_request(OUTCOME_ERROR)
             print(f"   ❌ 连接错误: {e}")
             print(f"   🔧 建议: 检查网络连接或DNS设置")
             return None
         except requests.exceptions.HTTPError as e:
+            self._record_request(OUTCOME_ERROR)
             print(f"   ❌ HTTP协议错误: {e}")
             return None
         except requests.exceptions.RequestException as e:
+            self._record_request(OUTCOME_ERROR)
             print(f"   ❌ 请求异常: {e}")
             print(f"   🔧 异常类型: {type(e).__name__}")
             return None
     
+    def _parse_topics_response(self, status_code: int, body: bytes, headers: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """解析话题列表响应并向速率控制器报告结果（同步和异步采集器共用）"""
+        text = body.decode('utf-8', errors='replace')
+        if status_code == 200:
+            try:
+                data = json.loads(body)
+                self._record_request(classify_response(status_code, data))
+
+                # 在处理响应前检查停止标志
+                if self.is_stopped():
+                    self.log("🛑 响应处理前检测到停止信号")
+                    return None
+
+                if data.get('succeeded'):
+                    topics = data.get('resp_data', {}).get('topics', [])
+                    self.log(f"   ✅ 获取成功: {len(topics)}个话题")
+                    return data
+                else:
+                    error_code = data.get('code')
+                    error_message = data.get('error', data.get('message', '未知错误'))
+
+                    # 检查是否是会员过期错误
+                    if error_code == 14210:
+                        print(f"   ❌ 会员已过期: {error_message}")
+                        print(f"   📋 完整响应: {json.dumps(data, ensure_ascii=False, indent=2)}")
+                        # 设置过期标志，让调用方知道这是过期错误
+                        return {"expired": True, "code": error_code, "message": error_message}
+                    else:
+                        print(f"   ❌ API失败: {error_message}")
+                        print(f"   📋 完整响应: {json.dumps(data, ensure_ascii=False, indent=2)}")
+                        return None
+            except ValueError as e:
+                self._record_request(OUTCOME_ERROR)
+                print(f"   ❌ JSON解析失败: {e}")
+                print(f"   📄 响应内容: {text[:500]}...")
+                print(f"   📋 响应头: {headers}")
+                return None
+        else:
+            self._record_request(classify_response(status_code))
+            print(f"   ❌ HTTP错误: {status_code}")
+            print(f"   📄 响应内容: {text}")
+            print(f"   📋 响应头: {headers}")
+            if status_code == 429:
+                print("   🚨 触发频率限制，建议增加延迟时间")
+            elif status_code == 403:
+                print("   🚨 访问被拒绝，可能需要更新Cookie或反检测策略")
+            elif status_code == 401:
+                print("   🚨 认证失败，请检查Cookie是否过期")
+            return None
+    
     def store_batch_data(self, data: Dict[str, Any]) -> Dict[str, int]:
         """批量存储数据到数据库"""
         # 在数据存储前检查停止标志
@@ -647,52 +763,38 @@ class ZSXQInteractiveCrawler:
         if not topics:
             return {'new_topics': 0, 'updated_topics': 0, 'errors': 0}
 
-        stats = {'new_topics': 0, 'updated_topics': 0, 'errors': 0}
-
-        for topic_data in topics:
-            # 在处理每个话题前检查停止标志
-            if self.is_stopped():
-                self.log("🛑 话题处理过程中检测到停止信号")
-                break
-
-            try:
-                topic_id = topic_data.get('topic_id')
+        # 整页话题在一个事务内批量写入
+        stats = self.db.import_topics_batch(topics)
+        self._log_write_breakdown(stats)
 
-                # 检查是否已存在
-                self.db.cursor.execute('SELECT topic_id FROM topics WHERE topic_id = ?', (topic_id,))
-                exists = self.db.cursor.fetchone()
+        # 评论较多的话题只登记到补全队列，由评论补全任务单独获取，不阻塞话题爬取
+        queued = len(self.db.enqueue_comment_backfill(topics))
+        self.db.conn.commit()
+        if queued:
+            self.log(f"📝 {queued} 个话题的评论不完整，已加入评论补全队列")
+        return stats
 
-                # 导入数据
-                self.db.import_topic_data(topic_data)
+    def _next_page_cursor(self, topics: List[Dict[str, Any]]) -> Optional[str]:
+        """下一页的 end_time：本页最老话题时间减去偏移毫秒，无法解析时返回 None"""
+        try:
+            return shift_api_time(topics[-1]['create_time'], self.timestamp_offset_ms)
+        except (KeyError, TypeError, ValueError):
+            return None
 
-                # 检查是否需要获取更多评论
-                comments_count = topic_data.get('comments_count', 0)
-                if comments_count > 8:
-                    self.log(f"📝 话题 {topic_id} 有 {comments_count} 条评论，尝试获取完整评论列表...")
-                    try:
-                        additional_comments = self.fetch_all_comments(topic_id, comments_count)
-                        if additional_comments:
-                            self.db.import_additional_comments(topic_id, additional_comments)
-                            self.log(f"✅ 成功获取并导入 {len(additional_comments)} 条额外评论")
-                        else:
-                            self.log(f"ℹ️ 话题 {topic_id} 无法获取更多评论，可能是权限限制")
-                    except Exception as e:
-                        self.log(f"⚠️ 话题 {topic_id} 获取评论时出错: {e}")
-                        # 不影响话题本身的导入
+    def _log_write_breakdown(self, page_stats: Dict[str, int]):
+        """已有话题按指纹跳过或只更新统计时，输出本页的写入分类"""
+        skipped = page_stats.get('skipped_topics', 0)
+        stats_only = page_stats.get('stats_updated_topics', 0)
+        if skipped or stats_only:
+            self.log(f"   ♻️ 未变化跳过{skipped}, 仅更新统计{stats_only}, 完整写入{page_stats.get('rewritten_topics', 0)}")
 
-                if exists:
-                    stats['updated_topics'] += 1
-                else:
-                    stats['new_topics'] += 1
+    def _run_with_checkpoint(self, mode: str, crawl_func, *args) -> Dict[str, Any]:
+        """带断点执行爬取：crawl_func(checkpoint, *args) 负责调用 checkpoint.start() 和 page_done()"""
+        checkpoint = CrawlCheckpoint(self.db, self.group_id, mode, self.log, stop_check=self.is_stopped)
+        result = crawl_func(checkpoint, *args)
+        checkpoint.finish(stopped=self.is_stopped() or bool(result and result.get('expired')))
+        return result
 
-            except Exception as e:
-                stats['errors'] += 1
-                print(f"   ⚠️ 话题导入失败: {e}")
-        
-        # 提交事务
-        self.db.conn.commit()
-        return stats
-    
     def crawl_latest(self, count: int = 20) -> Dict[str, int]:
         """爬取最新话题"""
         print(f"\n🆕 爬取最新 {count} 个话题...")
@@ -707,11 +809,14 @@ class ZSXQInteractiveCrawler:
             return {'new_topics': 0, 'updated_topics': 0, 'errors': 1}
     
     def crawl_historical(self, pages: int = 10, per_page: int = 20) -> Dict[str, int]:
-        """爬取历史数据"""
+        """爬取历史数据（上次未完成时从断点继续）"""
+        return self._run_with_checkpoint('historical', self._crawl_historical_pages, pages, per_page)
+
+    def _crawl_historical_pages(self, checkpoint: CrawlCheckpoint, pages: int, per_page: int) -> Dict[str, int]:
         print(f"\n📚 爬取历史数据: {pages}页 x {per_page}条/页")
         
         total_stats = {'new_topics': 0, 'updated_topics': 0, 'errors': 0, 'pages': 0}
-        end_time = None
+        end_time = checkpoint.start()  # 无断点时从最新开始
         completed_pages = 0
         max_retries_per_page = 10  # 每页最大重试次数
         
@@ -735,7 +840,8 @@ class ZSXQInteractiveCrawler:
                     self.log(f"   🔄 第{retry_count}次重试")
                 
                 # 获取数据
-                if current_page == 1:
+                request_end_time = end_time
+                if end_time is None:
                     data = self.fetch_topics_safe(scope="all", count=per_page, is_historical=True)
                 else:
                     data = self.fetch_topics_safe(scope="all", count=per_page, 
@@ -782,6 +888,7 @@ class ZSXQInteractiveCrawler:
                             end_time = original_time
                             print(f"   ⚠️ 时间戳调整失败: {e}")
                             print(f"   ⏭️ 下一页时间戳: {end_time} (未调整)")
+                    checkpoint.page_done(end_time, page_stats, request_end_time)
                     
                     # 检查是否已爬完
                     if len(topics) < per_page:
@@ -872,15 +979,57 @@ class ZSXQInteractiveCrawler:
                 self.log("❌ 用户取消操作")
                 return {'new_topics': 0, 'updated_topics': 0, 'errors': 0, 'pages': 0}
 
+        # 上次未完成时从断点继续（中间留有空洞时最老时间戳会跳过空洞）
+        checkpoint = CrawlCheckpoint(self.db, self.group_id, 'all_historical', self.log)
+        start_end_time = checkpoint.start() or start_end_time
+
         self.log(f"🚀 开始无限历史爬取...")
-        
+
+        # 抓取在当前线程进行，解析和写入交给流水线，请求节奏不再受写库拖累；断点由写入线程在每页写入后保存
+        pipeline = CrawlPipeline(self, checkpoint=checkpoint)
+        pipeline.start()
         total_stats = {'new_topics': 0, 'updated_topics': 0, 'errors': 0, 'pages': 0}
+        try:
+            result = self._crawl_all_historical_pages(pipeline, start_end_time, per_page, total_stats)
+        finally:
+            pipeline_stats = pipeline.close()
+            for key in ('new_topics', 'updated_topics', 'errors'):
+                total_stats[key] += pipeline_stats[key]
+        checkpoint.finish(stopped=self.is_stopped() or result is not total_stats)
+
+        if result is not total_stats:
+            return result  # 会员过期
+
+        if total_stats['pages'] or total_stats['errors']:
+            print(f"\n🎉 无限爬取完成总结:")
+            print(f"   📄 总页数: {total_stats['pages']}")
+            print(f"   ✅ 新增话题: {total_stats['new_topics']}")
+            print(f"   🔄 更新话题: {total_stats['updated_topics']}")
+            if pipeline_stats['comment_backfill_queued']:
+                print(f"   💬 评论待补全: {pipeline_stats['comment_backfill_queued']}个话题（运行评论补全任务获取）")
+            if total_stats['errors'] > 0:
+                print(f"   ❌ 总错误数: {total_stats['errors']}")
+
+            # 显示最终数据库状态
+            final_db_stats = self.db.get_timestamp_range_info()
+            if final_db_stats['has_data']:
+                print(f"\n📊 最终数据库状态:")
+                print(f"   话题总数: {final_db_stats['total_topics']}")
+                if timestamp_info['has_data']:
+                    print(f"   新增话题: {final_db_stats['total_topics'] - timestamp_info['total_topics']}")
+                print(f"   时间范围: {final_db_stats['oldest_timestamp']} ~ {final_db_stats['newest_timestamp']}")
+
+        return total_stats
+
+    def _crawl_all_historical_pages(self, pipeline: CrawlPipeline, start_end_time: Optional[str],
+                                    per_page: int, total_stats: Dict[str, int]) -> Dict[str, Any]:
+        """全量爬取的抓取循环：只负责请求页面并提交给流水线，写入统计在流水线结束后汇总"""
         end_time = start_end_time  # 使用增量爬取的起始时间戳
         current_page = 0
         max_retries_per_page = 10
         consecutive_empty_pages = 0  # 连续空页面计数
         max_consecutive_empty = 3   # 最大连续空页面数
-        
+
         while True:
             # 检查停止标志
             if self.is_stopped():
@@ -899,8 +1048,9 @@ class ZSXQInteractiveCrawler:
                     return total_stats
                 if retry_count > 0:
                     self.log(f"   🔄 第{retry_count}次重试")
-                
+
                 # 获取数据 - 根据是否有起始时间戳决定请求方式
+                request_end_time = end_time
                 if current_page == 1 and start_end_time is None:
                     # 数据库为空，从最新开始
                     data = self.fetch_topics_safe(scope="all", count=per_page, is_historical=True)
@@ -917,86 +1067,59 @@ class ZSXQInteractiveCrawler:
                 if data:
                     # 成功获取数据
                     topics = data.get('resp_data', {}).get('topics', [])
-                    
+
                     if not topics:
                         consecutive_empty_pages += 1
                         print(f"   📭 第{consecutive_empty_pages}个空页面")
-                        
+
                         if consecutive_empty_pages >= max_consecutive_empty:
                             print(f"   🏁 连续{max_consecutive_empty}个空页面，所有历史数据爬取完成")
-                            print(f"\n🎉 无限爬取完成总结:")
-                            print(f"   📄 总页数: {total_stats['pages']}")
-                            print(f"   ✅ 新增话题: {total_stats['new_topics']}")
-                            print(f"   🔄 更新话题: {total_stats['updated_topics']}")
-                            if total_stats['errors'] > 0:
-                                print(f"   ❌ 总错误数: {total_stats['errors']}")
-                            
-                            # 显示最终数据库状态
-                            final_db_stats = self.db.get_timestamp_range_info()
-                            if final_db_stats['has_data']:
-                                print(f"\n📊 最终数据库状态:")
-                                print(f"   话题总数: {final_db_stats['total_topics']}")
-                                if timestamp_info['has_data']:
-                                    print(f"   新增话题: {final_db_stats['total_topics'] - timestamp_info['total_topics']}")
-                                print(f"   时间范围: {final_db_stats['oldest_timestamp']} ~ {final_db_stats['newest_timestamp']}")
-                            
                             return total_stats
-                        
+
                         # 空页面也算成功，避免无限重试
                         page_success = True
                         break
                     else:
                         consecutive_empty_pages = 0  # 重置连续空页面计数
-                    
-                    # 检查是否有新数据（避免重复爬取已有数据）
-                    new_topics_count = 0
-                    for topic in topics:
-                        topic_id = topic.get('topic_id')
-                        self.db.cursor.execute('SELECT topic_id FROM topics WHERE topic_id = ?', (topic_id,))
-                        if not self.db.cursor.fetchone():
-                            new_topics_count += 1
-                    
-                    # 存储数据
-                    page_stats = self.store_batch_data(data)
-                    print(f"   💾 页面存储: 新增{page_stats['new_topics']}, 更新{page_stats['updated_topics']}")
-                    
-                    # 累计统计
-                    total_stats['new_topics'] += page_stats['new_topics']
-                    total_stats['updated_topics'] += page_stats['updated_topics']
-                    total_stats['errors'] += page_stats['errors']
+
+                    # 只有数据量不足（可能到达底部）时才需要知道新话题数，此时等待之前的页面写完再查询
+                    new_topics_count = None
+                    if len(topics) < per_page:
+                        topic_ids = [topic.get('topic_id') for topic in topics]
+                        new_topics_count = len(topics) - len(pipeline.call(self.db.get_existing_topic_ids, topic_ids))
+
+                    # 准备下一页的时间戳
+                    original_time = topics[-1].get('create_time')
+                    try:
+                        from datetime import datetime, timedelta
+                        dt = datetime.fromisoformat(original_time.replace('+0800', '+08:00'))
+                        dt = dt - timedelta(milliseconds=self.timestamp_offset_ms)
+                        end_time = dt.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0800'
+                    except Exception as e:
+                        end_time = original_time
+                        print(f"   ⚠️ 时间戳调整失败: {e}")
+
+                    # 提交给流水线（解析队列已满时在此阻塞），写入后以下一页时间戳作为断点
+                    if not pipeline.submit_page(topics, cursor=end_time, request_end_time=request_end_time):
+                        return total_stats
                     total_stats['pages'] += 1
-                    
+
                     # 显示进度信息
-                    print(f"   📊 获取到 {len(topics)} 个话题，其中 {new_topics_count} 个为新话题")
-                    print(f"   📈 累计: 新增{total_stats['new_topics']}, 更新{total_stats['updated_topics']}, 页数{total_stats['pages']}")
-                    
+                    self.log(f"   📊 获取到 {len(topics)} 个话题，队列: {pipeline.queue_depths()}")
+
                     # 调试：显示时间戳信息（简化版）
-                    if topics:
-                        first_time = topics[0].get('create_time', 'N/A')
-                        last_time = topics[-1].get('create_time', 'N/A')
-                        print(f"   ⏰ 时间范围: {first_time} ~ {last_time}")
-                    
-                    # 准备下一页的时间戳
-                    if topics:
-                        original_time = topics[-1].get('create_time')
-                        try:
-                            from datetime import datetime, timedelta
-                            dt = datetime.fromisoformat(original_time.replace('+0800', '+08:00'))
-                            dt = dt - timedelta(milliseconds=self.timestamp_offset_ms)
-                            end_time = dt.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0800'
-                        except Exception as e:
-                            end_time = original_time
-                            print(f"   ⚠️ 时间戳调整失败: {e}")
-                    
+                    first_time = topics[0].get('create_time', 'N/A')
+                    print(f"   ⏰ 时间范围: {first_time} ~ {original_time}")
+
                     # 检查是否返回数据量小于预期（可能接近底部）
                     if len(topics) < per_page:
-                        print(f"   ⚠️ 返回数据量({len(topics)})小于预期({per_page})，可能接近历史底部")
-                    
+                        print(f"   ⚠️ 返回数据量({len(topics)})小于预期({per_page})，其中 {new_topics_count} 个为新话题，可能接近历史底部")
+
                     # 如果没有新话题且数据量不足，可能已达历史底部
-                    if new_topics_count == 0 and len(topics) < per_page:
+                    if new_topics_count == 0:
                         print(f"   📭 无新话题且数据量不足，可能已达历史底部")
                         return total_stats
-                    
+
                     # 成功，跳出重试循环
                     page_success = True
                     break
@@ -1005,7 +1128,7 @@ class ZSXQInteractiveCrawler:
                     retry_count += 1
                     total_stats['errors'] += 1
                     print(f"   ❌ 页面 {current_page} 获取失败 (重试{retry_count}/{max_retries_per_page})")
-                    
+
                     # 调整时间戳用于重试
                     if end_time:
                         try:
@@ -1015,7 +1138,7 @@ class ZSXQInteractiveCrawler:
                             end_time = dt.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0800'
                         except Exception as e:
                             print(f"   ⚠️ 时间戳调整失败: {e}")
-            
+
             # 如果重试次数用完仍然失败
             if not page_success:
                 print(f"   🚫 页面 {current_page} 达到最大重试次数")
@@ -1029,30 +1152,25 @@ class ZSXQInteractiveCrawler:
                         print(f"   ⏰ 大幅度跳过时间段: {end_time} (减去1小时)")
                     except Exception as e:
                         print(f"   ⚠️ 大幅度时间戳调整失败: {e}")
-                completed_pages += 1  # 跳过这一页
             else:
                 # 页面成功处理后进行长休眠检查（基于页面数而非请求数）
                 self.check_page_long_delay()
-            
+
             # 每50页显示一次总体进度
             if current_page % 50 == 0:
                 print(f"\n🎯 进度报告 (第{current_page}页):")
-                print(f"   📊 累计新增: {total_stats['new_topics']}")
-                print(f"   📊 累计更新: {total_stats['updated_topics']}")
-                print(f"   📊 成功页数: {total_stats['pages']}")
-                print(f"   📊 错误次数: {total_stats['errors']}")
-                
-                # 显示当前数据库状态
-                current_db_stats = self.db.get_timestamp_range_info()
-                if current_db_stats['has_data']:
-                    print(f"   📊 数据库状态: {current_db_stats['total_topics']}个话题")
-                    print(f"   📊 时间范围: {current_db_stats['oldest_timestamp']} ~ {current_db_stats['newest_timestamp']}")
-        
-        # 这里理论上不会到达，因为在循环内会return
+                print(f"   📊 已提交页数: {total_stats['pages']}")
+                print(f"   📊 已写入: 新增{pipeline.stats['new_topics']}, 更新{pipeline.stats['updated_topics']}")
+                print(f"   📊 错误次数: {total_stats['errors'] + pipeline.stats['errors']}")
+                print(f"   📊 队列深度: {pipeline.queue_depths()}")
+
         return total_stats
-    
+
     def crawl_incremental(self, pages: int = 10, per_page: int = 20) -> Dict[str, int]:
-        """增量爬取：基于数据库最老时间戳继续向历史爬取"""
+        """增量爬取：基于数据库最老时间戳（上次未完成时从断点）继续向历史爬取"""
+        return self._run_with_checkpoint('incremental', self._crawl_incremental_pages, pages, per_page)
+
+    def _crawl_incremental_pages(self, checkpoint: CrawlCheckpoint, pages: int, per_page: int) -> Dict[str, int]:
         print(f"\n📈 增量爬取模式: {pages}页 x {per_page}条/页")
         
         # 获取数据库时间戳范围信息
@@ -1081,6 +1199,9 @@ class ZSXQInteractiveCrawler:
         except Exception as e:
             print(f"⚠️ 时间戳处理失败，使用原时间戳: {e}")
             start_end_time = oldest_timestamp
+
+        # 上次未完成时从断点继续（最老时间戳之后可能还有未爬完的空洞）
+        start_end_time = checkpoint.start() or start_end_time
         
         # 执行增量爬取
         total_stats = {'new_topics': 0, 'updated_topics': 0, 'errors': 0, 'pages': 0}
@@ -1099,6 +1220,7 @@ class ZSXQInteractiveCrawler:
                     print(f"   🔄 第{retry_count}次重试")
                 
                 # 获取数据 - 总是使用 end_time 参数
+                request_end_time = end_time
                 data = self.fetch_topics_safe(scope="all", count=per_page,
                                             end_time=end_time, is_historical=True)
 
@@ -1115,12 +1237,8 @@ class ZSXQInteractiveCrawler:
                         return total_stats
                     
                     # 检查是否有新数据（避免重复爬取已有数据）
-                    new_topics_count = 0
-                    for topic in topics:
-                        topic_id = topic.get('topic_id')
-                        self.db.cursor.execute('SELECT topic_id FROM topics WHERE topic_id = ?', (topic_id,))
-                        if not self.db.cursor.fetchone():
-                            new_topics_count += 1
+                    topic_ids = [topic.get('topic_id') for topic in topics if topic.get('topic_id')]
+                    new_topics_count = len(topics) - len(self.db.get_existing_topic_ids(topic_ids))
                     
                     print(f"   📊 获取到 {len(topics)} 个话题，其中 {new_topics_count} 个为新话题")
                     
@@ -1160,6 +1278,7 @@ class ZSXQInteractiveCrawler:
                         except Exception as e:
                             end_time = original_time
                             print(f"   ⚠️ 时间戳调整失败: {e}")
+                    checkpoint.page_done(end_time, page_stats, request_end_time)
                     
                     # 成功，跳出重试循环
                     self.check_page_long_delay()  # 页面成功处理后进行长休眠检查
@@ -1219,7 +1338,10 @@ class ZSXQInteractiveCrawler:
         return total_stats
     
     def crawl_latest_until_complete(self, per_page: int = 20) -> Dict[str, int]:
-        """获取最新记录：智能增量更新，爬取到与数据库完全衔接为止"""
+        """获取最新记录：智能增量更新，爬取到与数据库完全衔接为止（上次中断时从断点继续，避免留下空洞）"""
+        return self._run_with_checkpoint('latest_until_complete', self._crawl_latest_until_complete_pages, per_page)
+
+    def _crawl_latest_until_complete_pages(self, checkpoint: CrawlCheckpoint, per_page: int) -> Dict[str, int]:
         print(f"\n🔄 获取最新记录模式 (每页{per_page}条)")
         print(f"💡 智能逻辑：检查最新话题，如有新内容则向后爬取直到与数据库完全衔接")
         
@@ -1233,8 +1355,22 @@ class ZSXQInteractiveCrawler:
         print(f"   现有话题数: {timestamp_info['total_topics']}")
         print(f"   最新时间戳: {timestamp_info['newest_timestamp']}")
         
+        end_time = checkpoint.start()  # 无断点时从最新开始
+        total_stats = self._walk_latest_until_complete(checkpoint, per_page, end_time, timestamp_info)
+
+        # 从断点续传时只补上了中断留下的空洞，中断之后发布的话题还需要从最新开始检查一遍
+        if end_time is not None and not self.is_stopped() and not checkpoint.interrupted:
+            self.log("🔁 断点之后的部分已与数据库衔接，再从最新开始检查中断后发布的话题")
+            head_stats = self._walk_latest_until_complete(checkpoint, per_page, None, timestamp_info)
+            for key in total_stats:
+                total_stats[key] += head_stats.get(key, 0)
+
+        return total_stats
+
+    def _walk_latest_until_complete(self, checkpoint: CrawlCheckpoint, per_page: int, end_time: Optional[str],
+                                    timestamp_info: Dict[str, Any]) -> Dict[str, int]:
+        """从 end_time（None 表示最新）向更早翻页，直到整页话题都已在库"""
         total_stats = {'new_topics': 0, 'updated_topics': 0, 'errors': 0, 'pages': 0}
-        end_time = None  # 从最新开始
         current_page = 0
         max_retries_per_page = 10
         
@@ -1257,7 +1393,8 @@ class ZSXQInteractiveCrawler:
                     print(f"   🔄 第{retry_count}次重试")
                 
                 # 获取数据
-                if current_page == 1:
+                request_end_time = end_time
+                if end_time is None:
                     # 第一页：获取最新话题
                     data = self.fetch_topics_safe(scope="all", count=per_page, is_historical=False)
                 else:
@@ -1273,23 +1410,21 @@ class ZSXQInteractiveCrawler:
                         print(f"   📭 无更多数据，获取完成")
                         break
                     
-                    # 检查这一页的话题是否在数据库中全部存在
-                    existing_count = 0
-                    new_topics_list = []
-                    
-                    for topic in topics:
-                        topic_id = topic.get('topic_id')
-                        self.db.cursor.execute('SELECT topic_id FROM topics WHERE topic_id = ?', (topic_id,))
-                        if self.db.cursor.fetchone():
-                            existing_count += 1
-                        else:
-                            new_topics_list.append(topic)
+                    # 检查这一页的话题是否在数据库中全部存在（查内存中的话题ID索引）
+                    existing_ids = self.db.get_existing_topic_ids(
+                        [topic.get('topic_id') for topic in topics if topic.get('topic_id')])
+                    if len(existing_ids) == len(topics):
+                        # 索引不含其他连接的删除，停止前到数据库确认整页确实都已存在
+                        existing_ids = self.db.confirm_existing_topic_ids(existing_ids)
+                    new_topics_list = [topic for topic in topics if topic.get('topic_id') not in existing_ids]
+                    existing_count = len(topics) - len(new_topics_list)
                     
                     print(f"   📊 页面分析: {len(topics)}个话题，{existing_count}个已存在，{len(new_topics_list)}个新话题")
                     
                     # 判断是否需要停止
                     if existing_count == len(topics):
-                        # 整页话题全部存在于数据库中
+                        # 整页话题全部存在于数据库中，本页时间段同样已完整
+                        checkpoint.page_covered(self._next_page_cursor(topics), request_end_time)
                         print(f"   ✅ 整页话题全部存在于数据库，增量更新完成")
                         print(f"\n🎉 获取最新记录完成总结:")
                         print(f"   📄 检查页数: {total_stats['pages']}")
@@ -1313,43 +1448,15 @@ class ZSXQInteractiveCrawler:
                         print(f"   💾 整页存储: 新增{page_stats['new_topics']}, 更新{page_stats['updated_topics']}")
                     
                     else:
-                        # 部分话题是新的，只存储新话题
+                        # 部分话题是新的，只存储新话题（同样登记评论补全）
                         print(f"   💾 部分存储: 只处理{len(new_topics_list)}个新话题")
-                        new_topics_count = 0
-                        updated_topics_count = 0
-                        
-                        for new_topic in new_topics_list:
-                            try:
-                                topic_id = new_topic.get('topic_id')
-                                # 检查是否已存在（双重检查）
-                                self.db.cursor.execute('SELECT topic_id FROM topics WHERE topic_id = ?', (topic_id,))
-                                exists = self.db.cursor.fetchone()
-                                
-                                # 导入数据
-                                self.db.import_topic_data(new_topic)
-                                
-                                if exists:
-                                    updated_topics_count += 1
-                                else:
-                                    new_topics_count += 1
-                                    
-                            except Exception as e:
-                                print(f"   ⚠️ 话题导入失败: {e}")
-                        
-                        # 提交事务
-                        self.db.conn.commit()
-                        print(f"   💾 新话题存储: 新增{new_topics_count}, 更新{updated_topics_count}")
-                        
-                        # 更新统计
-                        total_stats['new_topics'] += new_topics_count
-                        total_stats['updated_topics'] += updated_topics_count
-                    
-                    # 累计统计（如果是整页存储）
-                    if existing_count == 0:
-                        total_stats['new_topics'] += page_stats['new_topics']
-                        total_stats['updated_topics'] += page_stats['updated_topics']
-                        total_stats['errors'] += page_stats['errors']
+                        page_stats = self.store_batch_data({'succeeded': True, 'resp_data': {'topics': new_topics_list}})
+                        print(f"   💾 新话题存储: 新增{page_stats['new_topics']}, 更新{page_stats['updated_topics']}")
                     
+                    # 累计统计
+                    total_stats['new_topics'] += page_stats['new_topics']
+                    total_stats['updated_topics'] += page_stats['updated_topics']
+                    total_stats['errors'] += page_stats['errors']
                     total_stats['pages'] += 1
                     
                     # 显示当前进度
@@ -1372,6 +1479,7 @@ class ZSXQInteractiveCrawler:
                         except Exception as e:
                             end_time = original_time
                             print(f"   ⚠️ 时间戳调整失败: {e}")
+                    checkpoint.page_done(end_time, page_stats, request_end_time)
                     
                     # 成功，跳出重试循环
                     page_success = True
@@ -1403,13 +1511,197 @@ class ZSXQInteractiveCrawler:
                 if self.is_stopped():
                     break
                 print(f"   🚫 页面 {current_page} 达到最大重试次数，停止获取")
+                checkpoint.interrupted = True  # 与数据库尚未衔接，保留断点
                 break
             else:
                 # 页面成功处理后进行长休眠检查（基于页面数而非请求数）
                 self.check_page_long_delay()
-        
+
         return total_stats
-    
+
+    def crawl_hot_window(self, days: int = 7, per_page: int = 20, max_retries_per_page: int = 3) -> Dict[str, int]:
+        """
+        热点窗口刷新：只重新翻阅最近 days 天的话题列表页
+        已入库话题批量更新统计列（点赞、评论、阅读数），新话题完整写入，
+        评论数增长的话题登记到评论补全队列；每页一个请求即可刷新整页话题
+        """
+        from datetime import datetime, timedelta
+
+        window_start = datetime.now(BEIJING_TZ) - timedelta(days=days)
+        self.log(f"🔥 热点窗口刷新: 最近 {days} 天 (自 {window_start.strftime('%Y-%m-%d %H:%M')})，每页{per_page}条")
+
+        total_stats = {'new_topics': 0, 'stats_updated_topics': 0, 'comment_backfill_queued': 0,
+                       'errors': 0, 'pages': 0}
+        end_time = None
+        retries = 0
+
+        while not self.is_stopped():
+            data = self.fetch_topics_safe(scope="all", count=per_page, end_time=end_time,
+                                          is_historical=end_time is not None)
+            if data and data.get('expired'):
+                return data
+            if not data:
+                retries += 1
+                total_stats['errors'] += 1
+                if retries >= max_retries_per_page:
+                    self.log(f"   🚫 连续 {retries} 次获取失败，停止刷新")
+                    break
+                continue
+            retries = 0
+
+            topics = data.get('resp_data', {}).get('topics', [])
+            if not topics:
+                break
+
+            # 置顶话题可能早于窗口，逐条过滤；以本页最后一条判断是否已翻出窗口
+            in_window = [topic for topic in topics
+                         if topic.get('create_time') and parse_api_time(topic['create_time']) >= window_start]
+            existing_ids = self.db.get_existing_topic_ids([topic['topic_id'] for topic in in_window])
+            new_topics = [topic for topic in in_window if topic['topic_id'] not in existing_ids]
+            known_topics = [topic for topic in in_window if topic['topic_id'] in existing_ids]
+
+            if new_topics:
+                page_new = self.db.import_topics_batch(new_topics)
+                total_stats['new_topics'] += page_new['new_topics']
+                total_stats['errors'] += page_new['errors']
+            updated = self.db.update_topics_stats_batch(known_topics)
+            queued = len(self.db.enqueue_comment_backfill(in_window))
+            self.db.conn.commit()
+
+            total_stats['stats_updated_topics'] += updated
+            total_stats['comment_backfill_queued'] += queued
+            total_stats['pages'] += 1
+            next_cursor = self._next_page_cursor(topics)
+            if next_cursor:
+                # 窗口内的话题都已写入或刷新，本页时间段（截取到窗口内）计入覆盖区间
+                coverage = CrawlCoverage(self.db, self.group_id)
+                coverage.record_page(end_time, topics[-1]['create_time'], self.timestamp_offset_ms, start_dt=window_start)
+                self.db.conn.commit()
+            self.log(f"   🔄 第{total_stats['pages']}页: 更新统计{updated}, 新话题{len(new_topics)}"
+                     + (f", 评论待补全{queued}" if queued else ''))
+
+            if not next_cursor or len(topics) < per_page or parse_api_time(topics[-1]['create_time']) < window_start:
+                break
+            end_time = next_cursor
+
+            self.check_page_long_delay()
+
+        self.log(f"🏁 热点窗口刷新完成: {total_stats['pages']} 页，更新统计 {total_stats['stats_updated_topics']} 个话题，"
+                 f"新增 {total_stats['new_topics']}，评论待补全 {total_stats['comment_backfill_queued']}")
+        return total_stats
+
+    def crawl_time_range(self, start_dt, end_dt, per_page: int = 20) -> Dict[str, Any]:
+        """
+        按时间区间爬取：只导入 create_time 位于 [start_dt, end_dt] 的话题
+        扣除已爬取过的时间段，每个空缺区间从其结束时间直接开始翻页，越过开始时间即结束
+        """
+        coverage = CrawlCoverage(self.db, self.group_id)
+        gaps = coverage.missing(start_dt, end_dt)
+        if not gaps:
+            self.log("✅ 该时间区间已完整爬取过，无需请求")
+            return {'new_topics': 0, 'updated_topics': 0, 'errors': 0, 'pages': 0, 'gaps': 0}
+        return self._crawl_gaps(coverage, gaps, per_page, start_dt, end_dt)
+
+    def crawl_gaps(self, per_page: int = 20) -> Dict[str, Any]:
+        """补洞模式：只爬取已覆盖区间之间的空洞（翻页失败跳过的时间段、中断后未续传的部分）"""
+        coverage = CrawlCoverage(self.db, self.group_id)
+        gaps = coverage.gaps()
+        if not gaps:
+            self.log("✅ 已爬取的时间段之间没有空洞")
+            return {'new_topics': 0, 'updated_topics': 0, 'errors': 0, 'pages': 0, 'gaps': 0}
+        return self._crawl_gaps(coverage, gaps, per_page)
+
+    def _crawl_gaps(self, coverage: CrawlCoverage, gaps: List[tuple], per_page: int,
+                    start_dt=None, end_dt=None) -> Dict[str, Any]:
+        """依次爬取各个空缺区间（从新到旧），页面失败或任务停止时结束"""
+        labels = [f"{gap_start:%Y-%m-%d %H:%M:%S} ~ {gap_end:%Y-%m-%d %H:%M:%S}" for gap_start, gap_end in gaps]
+        self.log(f"🧩 待爬取 {len(gaps)} 个区间: {', '.join(labels[:5])}{' ...' if len(gaps) > 5 else ''}")
+
+        total_stats = {'new_topics': 0, 'updated_topics': 0, 'errors': 0, 'pages': 0, 'gaps': len(gaps),
+                       'gaps_filled': 0}
+        for index, (gap_start, gap_end) in enumerate(gaps, 1):
+            if self.is_stopped():
+                break
+            self.log(f"⏩ 区间 {index}/{len(gaps)}: {labels[index - 1]}")
+            outcome = self._crawl_gap(coverage, gap_start, gap_end, per_page, total_stats, start_dt, end_dt)
+            if isinstance(outcome, dict):
+                return outcome  # 会员过期
+            if outcome != 'done':
+                break
+            total_stats['gaps_filled'] += 1
+
+        self.log(f"🏁 已完成 {total_stats['gaps_filled']}/{len(gaps)} 个区间: {total_stats['pages']} 页，"
+                 f"新增 {total_stats['new_topics']}，更新 {total_stats['updated_topics']}")
+        return total_stats
+
+    def _crawl_gap(self, coverage: CrawlCoverage, gap_start, gap_end, per_page: int, total_stats: Dict[str, Any],
+                   start_dt=None, end_dt=None, max_retries_per_page: int = 10):
+        """
+        从 gap_end 向前翻页直到越过 gap_start，每页写入后记录覆盖区间
+        start_dt/end_dt 给定时只导入该区间内的话题
+
+        Returns:
+            'done' / 'stopped' / 'failed'，会员过期时返回过期响应
+        """
+        end_time = format_api_time(gap_end)
+        while True:
+            data = None
+            for retry in range(max_retries_per_page):
+                if self.is_stopped():
+                    return 'stopped'
+                data = self.fetch_topics_safe(scope="all", count=per_page, end_time=end_time, is_historical=True)
+                if data:
+                    break
+                total_stats['errors'] += 1
+                self.log(f"   ❌ 页面获取失败 (重试{retry + 1}/{max_retries_per_page})")
+
+            if not data:
+                self.log("   🚫 当前页面达到最大重试次数，停止爬取")
+                return 'failed'
+            if data.get('expired'):
+                return data
+
+            topics = data.get('resp_data', {}).get('topics', []) or []
+            if not topics:
+                # end_time 之前已没有话题，整个空缺区间都已确认
+                gap_end_ms = to_ms(parse_api_time(end_time))
+                coverage.add(to_ms(gap_start), min(gap_end_ms, to_ms(end_dt)) if end_dt else gap_end_ms)
+                self.db.conn.commit()
+                self.log("   📭 无更多数据")
+                return 'done'
+
+            if start_dt or end_dt:
+                stored = []
+                for topic in topics:
+                    try:
+                        topic_dt = parse_api_time(topic.get('create_time') or '')
+                    except ValueError:
+                        continue
+                    if (not start_dt or topic_dt >= start_dt) and (not end_dt or topic_dt <= end_dt):
+                        stored.append(topic)
+            else:
+                stored = topics
+            if stored:
+                page_stats = self.store_batch_data({'succeeded': True, 'resp_data': {'topics': stored}})
+                for key in ('new_topics', 'updated_topics', 'errors'):
+                    total_stats[key] += page_stats.get(key, 0)
+            if self.is_stopped():
+                return 'stopped'  # 停止时本页可能未写入，不记录覆盖区间
+            total_stats['pages'] += 1
+
+            # 本页覆盖 [下一页游标, end_time]，与下一页的覆盖区间首尾相接
+            next_cursor = self._next_page_cursor(topics)
+            if not next_cursor:
+                self.log(f"   ⚠️ 无法解析话题时间 {topics[-1].get('create_time')}，停止爬取")
+                return 'failed'
+            coverage.record_page(end_time, topics[-1]['create_time'], self.timestamp_offset_ms, start_dt, end_dt)
+            self.db.conn.commit()
+            end_time = next_cursor
+
+            if parse_api_time(topics[-1]['create_time']) < gap_start:
+                return 'done'
+            self.check_page_long_delay()
+
     def show_menu(self):
         """显示交互菜单"""
         print(f"\n{'='*60}")
@@ -1452,6 +1744,7 @@ class ZSXQInteractiveCrawler:
             self.min_delay = max(new_min, 1.0)  # 最小1秒
             self.max_delay = max(new_max, self.min_delay + 1.0)
             self.long_delay_interval = max(new_interval, 5)
+            self.rate_controller.configure(self.min_delay, self.max_delay)
             
             print(f"✅ 设置已更新")
             print(f"💡 长休眠时间固定为3-5分钟，有助于更好地模拟人类行为")
@@ -1614,6 +1907,7 @@ class ZSXQInteractiveCrawler:
     
     def close(self):
         """关闭资源"""
+        close_response_archive(self.group_id)
         self.db.close()
         print("🔒 数据库连接已关闭")
 